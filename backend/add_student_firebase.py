@@ -6,11 +6,15 @@ Simple script to add students to Firebase Realtime Database.
 
 Usage:
     python add_student_firebase.py
+    python add_student_firebase.py --file students.csv [--overwrite] [--workers 4] [--dry-run]
+    DOCSTORE_BACKEND=sqlite python add_student_firebase.py   (offline)
+
+CSV columns / JSON fields:
+    student_id, full_name, email, course_code, fingerprint_id (optional)
 ============================================================
 """
 
-import firebase_admin
-from firebase_admin import credentials, firestore
+import argparse
 import os
 import sys
 
@@ -18,7 +22,16 @@ import sys
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'fingerprint_attendance.settings')
 
+import django
+django.setup()
+
+from devices.directory import invalidate_directory
 from fingerprint_attendance import settings
+from docstore import (
+    SERVER_TIMESTAMP, CourseRepository, FingerprintMappingRepository, StudentRepository, SummaryRepository,
+    get_store, student_course_changes,
+)
+from docstore.importer import DEFAULT_WORKERS, import_students, read_rows
 
 def add_student():
     """Add a student to Firebase database."""
@@ -28,20 +41,14 @@ def add_student():
     print("=" * 60 + "\n")
     
     # Check credentials
-    if not os.path.exists(settings.FIREBASE_CREDENTIALS_PATH):
+    if settings.DOCSTORE_BACKEND == 'firestore' and not os.path.exists(settings.FIREBASE_CREDENTIALS_PATH):
         print("❌ Firebase credentials not found!")
         print(f"   Place firebase-credentials.json in: {settings.FIREBASE_CREDENTIALS_PATH}")
         return
     
-    # Initialize Firebase (if not already)
-    try:
-        firebase_admin.get_app()
-    except ValueError:
-        cred = credentials.Certificate(settings.FIREBASE_CREDENTIALS_PATH)
-        firebase_admin.initialize_app(cred)
-    
-    # Get Firestore client
-    db_client = firestore.client()
+    # Open the document store (Firestore by default)
+    store = get_store()
+    students_repo = StudentRepository(store)
     
     # Get student details
     print("Enter student details:")
@@ -53,8 +60,8 @@ def add_student():
         return
     
     # Check if student already exists
-    student_ref = db_client.collection('students').document(student_id)
-    if student_ref.get().exists:
+    existing = students_repo.get(student_id)
+    if existing is not None:
         print(f"\n⚠️  Student {student_id} already exists!")
         overwrite = input("Overwrite? (yes/no): ").strip().lower()
         if overwrite != 'yes':
@@ -65,13 +72,11 @@ def add_student():
     email = input("Email: ").strip()
     
     # Get available courses
-    courses_ref = db_client.collection('courses')
-    courses = courses_ref.stream()
+    courses = CourseRepository(store).all()
     
     print("\nAvailable Courses:")
     for course_doc in courses:
-        course = course_doc.to_dict()
-        print(f"  - {course_doc.id}: {course.get('course_name', 'N/A')}")
+        print(f"  - {course_doc.id}: {course_doc.get('course_name', 'N/A')}")
     
     course_code = input("\nCourse Code (e.g., CS101): ").strip().upper()
     
@@ -85,7 +90,8 @@ def add_student():
         'email': email,
         'course_code': course_code,
         'fingerprint_enrolled': fingerprint_id is not None,
-        'created_at': firestore.SERVER_TIMESTAMP
+        'created_at': SERVER_TIMESTAMP,
+        'updated_at': SERVER_TIMESTAMP
     }
     
     if fingerprint_id:
@@ -94,14 +100,19 @@ def add_student():
     # Save to Firestore
     print("\nSaving to Firestore...")
     try:
-        student_ref.set(student_data)
+        batch = store.batch()
+        students_repo.save(student_id, student_data, writer=batch)
+        previous = {student_id: existing} if existing is not None else {}
+        SummaryRepository(store).count_students(student_course_changes([student_data], previous), writer=batch)
+        batch.commit()
         print(f"✅ Student {student_id} added successfully!")
         
         # If fingerprint ID provided, create mapping
         if fingerprint_id:
-            mapping_ref = db_client.collection('fingerprint_mapping').document(str(fingerprint_id))
-            mapping_ref.set({'student_id': student_id})
+            FingerprintMappingRepository(store).map(fingerprint_id, student_id)
             print(f"✅ Fingerprint mapping created: {fingerprint_id} → {student_id}")
+        # Devices resolve scans against a cached directory - rebuild it
+        invalidate_directory()
         
         # Display summary
         print("\n" + "-" * 60)
@@ -124,18 +135,12 @@ def add_multiple_students():
     print("=" * 60 + "\n")
     
     # Check credentials
-    if not os.path.exists(settings.FIREBASE_CREDENTIALS_PATH):
+    if settings.DOCSTORE_BACKEND == 'firestore' and not os.path.exists(settings.FIREBASE_CREDENTIALS_PATH):
         print("❌ Firebase credentials not found!")
         return
     
-    # Initialize Firebase
-    try:
-        firebase_admin.get_app()
-    except ValueError:
-        cred = credentials.Certificate(settings.FIREBASE_CREDENTIALS_PATH)
-        firebase_admin.initialize_app(cred)
-    
-    db_client = firestore.client()
+    # Open the document store (Firestore by default)
+    store = get_store()
     
     students = []
     
@@ -160,7 +165,8 @@ def add_multiple_students():
             'course_code': course_code,
             'fingerprint_id': int(fingerprint_id) if fingerprint_id else None,
             'fingerprint_enrolled': bool(fingerprint_id),
-            'created_at': firestore.SERVER_TIMESTAMP
+            'created_at': SERVER_TIMESTAMP,
+            'updated_at': SERVER_TIMESTAMP
         })
     
     if not students:
@@ -177,31 +183,86 @@ def add_multiple_students():
         print("Cancelled.")
         return
     
-    # Add to Firestore
+    # Add to Firestore (batched writes, up to 500 per commit)
     print("\nAdding students...")
-    success_count = 0
+    students_repo = StudentRepository(store)
+    mappings_repo = FingerprintMappingRepository(store)
+    
+    writer = None
+    try:
+        existing = students_repo.get_many([student['student_id'] for student in students])
+        with store.bulk_writer() as writer:
+            SummaryRepository(store).count_students(student_course_changes(students, existing), writer=writer)
+            for student in students:
+                student_id = student['student_id']
+                fingerprint_id = student.pop('fingerprint_id', None)
+                
+                # Add student
+                students_repo.save(student_id, student, writer=writer)
+                
+                # Add fingerprint mapping if provided
+                if fingerprint_id:
+                    mappings_repo.map(fingerprint_id, student_id, writer=writer)
+        invalidate_directory()
+    except Exception as e:
+        print(f"  ❌ Error: {str(e)}")
+        if writer is not None and writer.commits:
+            # Earlier batches of 500 writes were already committed
+            invalidate_directory()
+            print(f"  ⚠️ {writer.commits} batch(es) were written before the error - run again to add the rest")
+        else:
+            print("  No students were added.")
+        return
     
+    # Only report students once their writes are committed
     for student in students:
-        try:
-            student_id = student['student_id']
-            fingerprint_id = student.pop('fingerprint_id', None)
-            
-            # Add student
-            student_ref = db_client.collection('students').document(student_id)
-            student_ref.set(student)
-            
-            # Add fingerprint mapping if provided
-            if fingerprint_id:
-                mapping_ref = db_client.collection('fingerprint_mapping').document(str(fingerprint_id))
-                mapping_ref.set({'student_id': student_id})
-            
-            print(f"  ✅ {student_id}: {student['full_name']}")
-            success_count += 1
-            
-        except Exception as e:
-            print(f"  ❌ {student_id}: {str(e)}")
-    
-    print(f"\n✅ {success_count}/{len(students)} students added successfully!")
+        print(f"  ✅ {student['student_id']}: {student['full_name']}")
+    print(f"\n✅ {len(students)}/{len(students)} students added successfully!")
+
+def import_from_file(path, overwrite=False, workers=DEFAULT_WORKERS, dry_run=False):
+    """Import students from a CSV/JSON file (non-interactive)."""
+    
+    print("\n" + "=" * 60)
+    print("BULK IMPORT STUDENTS TO FIREBASE" + (" (DRY RUN)" if dry_run else ""))
+    print("=" * 60 + "\n")
+    
+    # Check credentials
+    if settings.DOCSTORE_BACKEND == 'firestore' and not os.path.exists(settings.FIREBASE_CREDENTIALS_PATH):
+        print("❌ Firebase credentials not found!")
+        return False
+    
+    try:
+        rows = read_rows(path)
+    except (OSError, ValueError) as e:
+        print(f"❌ Could not read {path}: {str(e)}")
+        return False
+    
+    print(f"📄 {len(rows)} row(s) read from {path}")
+    
+    store = get_store()
+    result = import_students(store, rows, overwrite=overwrite, workers=workers, dry_run=dry_run)
+    store.close()
+    if result.imported and not dry_run:
+        invalidate_directory()
+    
+    # Summary
+    print("\n" + "-" * 60)
+    print(f"  {'Would import' if dry_run else 'Imported'}: {result.imported}")
+    print(f"  Skipped (already exist): {result.skipped_existing}")
+    print(f"  Errors: {len(result.errors)}")
+    if not dry_run:
+        print(f"  Batches: {result.batches}")
+        print(f"  Time: {result.seconds:.2f}s ({result.rows_per_second:.0f} students/s)")
+    print("-" * 60)
+    
+    for error in result.errors:
+        print(f"  ❌ {error}")
+    
+    if result.errors:
+        print(f"\n⚠️  {result.imported}/{result.total} students imported, {len(result.errors)} row(s) failed")
+    else:
+        print(f"\n✅ {result.imported}/{result.total} students imported successfully!")
+    return not result.errors
 
 def main():
     """Main menu."""
@@ -230,4 +291,14 @@ def main():
             print("\n❌ Invalid option!")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Add students to Firebase')
+    parser.add_argument('--file', help='CSV or JSON file to import (skips the interactive menu)')
+    parser.add_argument('--overwrite', action='store_true', help='Replace students that already exist')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help='Parallel batch commits')
+    parser.add_argument('--dry-run', action='store_true', help='Validate only, write nothing')
+    args = parser.parse_args()
+    
+    if args.file:
+        success = import_from_file(args.file, args.overwrite, args.workers, args.dry_run)
+        sys.exit(0 if success else 1)
     main()
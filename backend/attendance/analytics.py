@@ -0,0 +1,292 @@
+"""
+============================================================
+ATTENDANCE ANALYTICS ENGINE
+============================================================
+Computes per-course attendance metrics for instructors:
+- Attendance rate per student (whole term and last 4 weeks)
+- Weekly attendance trend with a rolling 4-week rate
+- At-risk students below an attendance threshold
+- Attendance pattern per weekday
+
+A course's logs are loaded ONCE into NumPy arrays and every
+metric is computed vectorized from a single
+(students x sessions) presence matrix.
+
+Results are cached keyed by the course, its latest AttendanceLog
+id and the lookup cache's roster and course-attendance generations
+(fingerprint_attendance/cache.py), so a new scan, an edited or
+deleted log and an enrolment change all produce a fresh result
+while repeated dashboard loads are served straight from the cache.
+============================================================
+"""
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Max
+from django.utils import timezone
+
+from fingerprint_attendance import cache as lookup_cache
+from users.models import UserProfile
+from .models import AttendanceLog
+
+
+# ========== CONFIGURATION ==========
+# Default at-risk threshold (attendance percentage)
+DEFAULT_AT_RISK_THRESHOLD = getattr(settings, 'ANALYTICS_AT_RISK_THRESHOLD', 75.0)
+
+# How long computed analytics stay cached (seconds)
+CACHE_TIMEOUT = getattr(settings, 'ANALYTICS_CACHE_TIMEOUT', 60 * 60)
+
+# Rolling window used for trends and "recent" rates
+ROLLING_WINDOW_DAYS = 28
+
+WEEKDAY_NAMES = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+
+def _percent(numerator, denominator):
+    """
+    Vectorized percentage rounded to 1 decimal (NaN where denominator is 0).
+
+    Args:
+        numerator: Array of counts
+        denominator: Array (or scalar) of totals
+
+    Returns:
+        numpy.ndarray: Percentages
+    """
+    numerator = np.asarray(numerator, dtype=np.float64)
+    denominator = np.broadcast_to(np.asarray(denominator, dtype=np.float64), numerator.shape)
+    result = np.full(numerator.shape, np.nan)
+    np.divide(numerator * 100.0, denominator, out=result, where=denominator > 0)
+    return np.round(result, 1)
+
+
+def _to_json_number(value):
+    """Convert a NumPy scalar to a JSON-friendly float (None for NaN)."""
+    value = float(value)
+    return None if np.isnan(value) else value
+
+
+def compute_metrics(student_user_ids, log_user_ids, log_dates):
+    """
+    Compute all attendance metrics for one course.
+
+    A "session" is any date on which at least one student of the
+    course was marked present.
+
+    Args:
+        student_user_ids: Sequence of user ids on the course roster
+        log_user_ids: Sequence of user ids, one per 'present' log
+        log_dates: Sequence of dates, one per 'present' log
+
+    Returns:
+        dict: Arrays and series describing the course:
+            sessions, attended, rate, recent_rate, weekly, weekday
+    """
+    roster = np.asarray(student_user_ids, dtype=np.int64)
+    log_users = np.asarray(log_user_ids, dtype=np.int64)
+    # Days since 1970-01-01 (a Thursday)
+    log_days = np.asarray(log_dates, dtype='datetime64[D]').astype(np.int64)
+
+    # Session calendar - one column per distinct attendance date
+    sessions, session_index = np.unique(log_days, return_inverse=True)
+    n_students = roster.size
+    n_sessions = sessions.size
+
+    # Map each log to a roster row (logs of students no longer on the roster are dropped)
+    order = np.argsort(roster, kind='stable')
+    sorted_roster = roster[order]
+    if n_students:
+        position = np.minimum(np.searchsorted(sorted_roster, log_users), n_students - 1)
+        on_roster = sorted_roster[position] == log_users
+    else:
+        position = np.zeros(log_users.shape, dtype=np.int64)
+        on_roster = np.zeros(log_users.shape, dtype=bool)
+
+    # Presence matrix: students x sessions
+    present = np.zeros((n_students, n_sessions), dtype=bool)
+    present[order[position[on_roster]], session_index[on_roster]] = True
+
+    attended = present.sum(axis=1)
+    present_per_session = present.sum(axis=0)
+    rate = _percent(attended, n_sessions)
+
+    # Last 4 weeks of sessions (relative to the latest session)
+    if n_sessions:
+        recent_mask = sessions > sessions[-1] - ROLLING_WINDOW_DAYS
+        recent_rate = _percent(present[:, recent_mask].sum(axis=1), recent_mask.sum())
+    else:
+        recent_rate = np.full(n_students, np.nan)
+
+    # Weekday of each session (Monday = 0)
+    weekday = (sessions + 3) % 7
+
+    # Weekly trend - group sessions by the Monday starting their week
+    week_start, week_index = np.unique(sessions - weekday, return_inverse=True)
+    week_sessions = np.bincount(week_index, minlength=week_start.size)
+    week_present = np.bincount(week_index, weights=present_per_session, minlength=week_start.size)
+    week_possible = week_sessions * n_students
+
+    # Rolling 4-week rate via cumulative sums over the weeks in each window
+    window_start = np.searchsorted(week_start, week_start - (ROLLING_WINDOW_DAYS - 7), side='left')
+    cum_present = np.concatenate(([0.0], np.cumsum(week_present)))
+    cum_possible = np.concatenate(([0.0], np.cumsum(week_possible)))
+    rolling_present = cum_present[1:] - cum_present[window_start]
+    rolling_possible = cum_possible[1:] - cum_possible[window_start]
+
+    # Per-weekday pattern
+    weekday_sessions = np.bincount(weekday, minlength=7)
+    weekday_present = np.bincount(weekday, weights=present_per_session, minlength=7)
+
+    return {
+        'sessions': sessions.astype('datetime64[D]'),
+        'attended': attended,
+        'rate': rate,
+        'recent_rate': recent_rate,
+        'overall_rate': _percent(present_per_session.sum(), n_students * n_sessions)[()],
+        'weekly': {
+            'week_start': week_start.astype('datetime64[D]'),
+            'sessions': week_sessions,
+            'rate': _percent(week_present, week_possible),
+            'rolling_rate': _percent(rolling_present, rolling_possible),
+        },
+        'weekday': {
+            'sessions': weekday_sessions,
+            'rate': _percent(weekday_present, weekday_sessions * n_students),
+        },
+    }
+
+
+def _latest_log_id(course):
+    """Return the newest AttendanceLog id for a course (0 if none)."""
+    return AttendanceLog.objects.filter(course=course).aggregate(latest=Max('id'))['latest'] or 0
+
+
+def build_course_analytics(course, latest_log_id=None):
+    """
+    Load a course's roster and logs and compute its analytics.
+
+    Args:
+        course: Course instance
+        latest_log_id: Latest AttendanceLog id (looked up if omitted)
+
+    Returns:
+        dict: JSON-serializable analytics for the course
+    """
+    if latest_log_id is None:
+        latest_log_id = _latest_log_id(course)
+
+    # Single query each for roster and logs
+    roster = list(
+        UserProfile.objects.filter(course=course, role='student')
+        .order_by('full_name')
+        .values_list('user_id', 'student_id', 'full_name')
+    )
+    logs = list(
+        AttendanceLog.objects.filter(course=course, status='present', id__lte=latest_log_id)
+        .values_list('user_id', 'date')
+    )
+
+    log_user_ids = [user_id for user_id, _ in logs]
+    log_dates = [log_date for _, log_date in logs]
+    metrics = compute_metrics([row[0] for row in roster], log_user_ids, log_dates)
+
+    students = [
+        {
+            'student_id': student_id,
+            'full_name': full_name,
+            'sessions_attended': int(attended),
+            'attendance_rate': _to_json_number(rate),
+            'recent_rate': _to_json_number(recent),
+        }
+        for (_, student_id, full_name), attended, rate, recent in zip(
+            roster, metrics['attended'], metrics['rate'], metrics['recent_rate']
+        )
+    ]
+
+    weekly = metrics['weekly']
+    weekday = metrics['weekday']
+
+    return {
+        'course_code': course.course_code,
+        'course_name': course.course_name,
+        'latest_log_id': latest_log_id,
+        'generated_at': timezone.now().isoformat(),
+        'total_students': len(roster),
+        'total_sessions': int(metrics['sessions'].size),
+        'first_session': str(metrics['sessions'][0]) if metrics['sessions'].size else None,
+        'last_session': str(metrics['sessions'][-1]) if metrics['sessions'].size else None,
+        'overall_rate': _to_json_number(metrics['overall_rate']),
+        'students': students,
+        'weekly_trend': [
+            {
+                'week_start': str(start),
+                'sessions': int(count),
+                'rate': _to_json_number(rate),
+                'rolling_4_week_rate': _to_json_number(rolling),
+            }
+            for start, count, rate, rolling in zip(
+                weekly['week_start'], weekly['sessions'], weekly['rate'], weekly['rolling_rate']
+            )
+        ],
+        'weekday_pattern': [
+            {
+                'weekday': WEEKDAY_NAMES[index],
+                'sessions': int(weekday['sessions'][index]),
+                'rate': _to_json_number(weekday['rate'][index]),
+            }
+            for index in range(7)
+        ],
+    }
+
+
+def get_course_analytics(course):
+    """
+    Return analytics for a course, computing them only on a cache miss.
+
+    The cache key includes the latest AttendanceLog id for the course
+    and the generations bumped when a log is edited or deleted and
+    when the roster changes, so those invalidate the cached result.
+
+    Args:
+        course: Course instance
+
+    Returns:
+        dict: JSON-serializable analytics for the course
+    """
+    latest_log_id = _latest_log_id(course)
+    cache_key = ':'.join([
+        'attendance:analytics',
+        str(course.pk),
+        str(latest_log_id),
+        str(lookup_cache.get_generation('rosters')),
+        str(lookup_cache.get_generation(f'attendance:{course.pk}')),
+    ])
+
+    analytics = cache.get(cache_key)
+    if analytics is None:
+        analytics = build_course_analytics(course, latest_log_id)
+        cache.set(cache_key, analytics, CACHE_TIMEOUT)
+
+    return analytics
+
+
+def at_risk_students(analytics, threshold=DEFAULT_AT_RISK_THRESHOLD):
+    """
+    Students whose attendance rate is below the threshold, lowest first.
+
+    Args:
+        analytics: Result of get_course_analytics()
+        threshold: Attendance percentage below which a student is at risk
+
+    Returns:
+        list: Student entries from analytics['students']
+    """
+    if not analytics['total_sessions']:
+        return []
+
+    at_risk = [
+        student for student in analytics['students']
+        if student['attendance_rate'] is not None and student['attendance_rate'] < threshold
+    ]
+    return sorted(at_risk, key=lambda student: student['attendance_rate'])
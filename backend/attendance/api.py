@@ -0,0 +1,327 @@
+"""
+============================================================
+ATTENDANCE JSON API (READ-ONLY)
+============================================================
+JSON endpoints for integrations, replacing HTML scraping and
+repeated XLSX downloads.
+
+Endpoints:
+- GET /attendance/api/logs/                   -> Attendance logs
+- GET /attendance/api/courses/                -> Courses
+- GET /attendance/api/courses/<code>/roster/  -> Students in a course
+
+Features:
+- Keyset (cursor) pagination on (date, id), newest first.
+  Pages stay fast no matter how deep a client pages, and new
+  scans never shift rows between pages.
+- Field selection: ?fields=student_id,date,time
+- Filters: ?course=CS101&student_id=ST001&date=2025-11-20
+           ?date_from=2025-11-01&date_to=2025-11-30&status=present
+- Conditional GET: ETag derived from the latest AttendanceLog and
+  the lookup-cache generations, so polling clients get a cheap 304
+  Not Modified until attendance is written, edited or deleted.
+  (No Last-Modified: an edit in place keeps the latest timestamp.)
+
+Access: Instructors (their own courses) and admins (all courses).
+============================================================
+"""
+import base64
+import hashlib
+from datetime import date
+from functools import wraps
+
+from django.http import JsonResponse
+from django.views.decorators.http import condition, require_GET
+
+from fingerprint_attendance import cache as lookup_cache
+from users.models import Course, UserProfile
+from .models import AttendanceLog
+
+
+# ========== CONFIGURATION ==========
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+# Selectable fields -> ORM lookups
+LOG_FIELDS = {
+    'id': 'id',
+    'student_id': 'student_id',
+    'student_name': 'student_name',
+    'course_code': 'course__course_code',
+    'date': 'date',
+    'time': 'time',
+    'timestamp': 'timestamp',
+    'status': 'status',
+    'scan_method': 'scan_method',
+}
+
+COURSE_FIELDS = ['course_code', 'course_name', 'description', 'instructor_id', 'created_at']
+
+ROSTER_FIELDS = {
+    'student_id': 'student_id',
+    'full_name': 'full_name',
+    'email': 'email',
+    'fingerprint_enrolled': 'fingerprint_enrolled',
+}
+
+
+class ApiError(Exception):
+    """Error returned to the client as JSON with an HTTP status."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+# ========== ACCESS CONTROL ==========
+
+def api_instructor_required(view_func):
+    """
+    Allow only logged-in instructors and admins; answer with JSON errors.
+
+    Also turns ApiError raised by the view into a JSON response.
+    """
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return JsonResponse({'error': 'Authentication required'}, status=401)
+
+        try:
+            profile = lookup_cache.get_profile(request.user)
+            if profile.role != 'instructor' and not request.user.is_staff:
+                return JsonResponse({'error': 'Access denied'}, status=403)
+        except UserProfile.DoesNotExist:
+            if not request.user.is_staff:
+                return JsonResponse({'error': 'Access denied'}, status=403)
+
+        try:
+            return view_func(request, *args, **kwargs)
+        except ApiError as e:
+            return JsonResponse({'error': e.message}, status=e.status)
+
+    return wrapper
+
+
+def _visible_courses(request):
+    """Courses the current user may read (all for admins)."""
+    courses = lookup_cache.get_all_courses()
+    if request.user.is_staff:
+        return courses
+    return [course for course in courses if course.instructor_id == request.user.id]
+
+
+def _get_visible_course(request, course_code):
+    """Get a course by code, checking the user may read it."""
+    try:
+        course = lookup_cache.get_course(course_code)
+    except Course.DoesNotExist:
+        raise ApiError(f'Course "{course_code}" not found', status=404)
+
+    if not request.user.is_staff and course.instructor_id != request.user.id:
+        raise ApiError('You do not have access to this course', status=403)
+
+    return course
+
+
+# ========== CONDITIONAL GET ==========
+
+def _latest_log_id(request):
+    """Id of the newest AttendanceLog (one query per request)."""
+    if not hasattr(request, '_latest_attendance_log_id'):
+        request._latest_attendance_log_id = (
+            AttendanceLog.objects.order_by('-id').values_list('id', flat=True).first() or 0
+        )
+    return request._latest_attendance_log_id
+
+
+def _etag(request, *args, **kwargs):
+    """
+    ETag: latest log id + lookup-cache generations + user + full URL.
+
+    The latest id alone misses logs edited in place (Firestore sync)
+    or deleted; the 'attendance' generation is bumped for those.
+    """
+    key = ':'.join([
+        str(_latest_log_id(request)),
+        str(lookup_cache.get_generation('attendance')),
+        str(lookup_cache.get_generation('courses')),
+        str(lookup_cache.get_generation('rosters')),
+        str(request.user.pk),
+        request.get_full_path(),
+    ])
+    return hashlib.md5(key.encode()).hexdigest()
+
+
+# ========== PARAMETER PARSING ==========
+
+def _parse_fields(request, allowed):
+    """Parse ?fields=a,b,c (defaults to all allowed fields)."""
+    raw = request.GET.get('fields')
+    if not raw:
+        return list(allowed)
+
+    fields = [field.strip() for field in raw.split(',') if field.strip()]
+    unknown = [field for field in fields if field not in allowed]
+    if unknown:
+        raise ApiError(f'Unknown field(s): {", ".join(unknown)}. Allowed: {", ".join(allowed)}')
+    return fields
+
+
+def _parse_date(request, name):
+    """Parse an ISO date query parameter (None if absent)."""
+    value = request.GET.get(name)
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise ApiError(f'{name} must be a date in YYYY-MM-DD format')
+
+
+def _parse_limit(request):
+    """Parse ?limit= (page size)."""
+    try:
+        limit = int(request.GET.get('limit', DEFAULT_PAGE_SIZE))
+    except ValueError:
+        raise ApiError('limit must be an integer')
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise ApiError(f'limit must be between 1 and {MAX_PAGE_SIZE}')
+    return limit
+
+
+def encode_cursor(log_date, log_id):
+    """Opaque cursor for the row after which the next page starts."""
+    return base64.urlsafe_b64encode(f'{log_date.isoformat()}:{log_id}'.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    Decode a cursor into (date, id).
+
+    Raises:
+        ApiError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        log_date, log_id = base64.urlsafe_b64decode(padded.encode()).decode().split(':')
+        return date.fromisoformat(log_date), int(log_id)
+    except (ValueError, UnicodeDecodeError):
+        raise ApiError('Invalid cursor')
+
+
+# ========== ENDPOINTS ==========
+
+@require_GET
+@api_instructor_required
+@condition(etag_func=_etag)
+def attendance_logs(request):
+    """
+    Attendance logs, newest first, with cursor pagination.
+
+    URL: /attendance/api/logs/
+
+    Query params:
+        course: Course code
+        student_id: Student ID
+        date / date_from / date_to: Date filters (YYYY-MM-DD)
+        status: present or absent
+        fields: Comma-separated fields (default: all)
+        limit: Page size (default 100, max 1000)
+        cursor: next_cursor from the previous page
+
+    Returns:
+        JSON: {'results': [...], 'next_cursor': str or None}
+    """
+    fields = _parse_fields(request, LOG_FIELDS)
+    limit = _parse_limit(request)
+
+    logs = AttendanceLog.objects.all()
+
+    # Course filter / access restriction
+    course_code = request.GET.get('course')
+    if course_code:
+        logs = logs.filter(course_id=_get_visible_course(request, course_code).pk)
+    elif not request.user.is_staff:
+        logs = logs.filter(course_id__in=[course.pk for course in _visible_courses(request)])
+
+    # Other filters
+    if request.GET.get('student_id'):
+        logs = logs.filter(student_id=request.GET['student_id'])
+    if request.GET.get('status'):
+        logs = logs.filter(status=request.GET['status'])
+
+    exact_date = _parse_date(request, 'date')
+    date_from = _parse_date(request, 'date_from')
+    date_to = _parse_date(request, 'date_to')
+    if exact_date:
+        logs = logs.filter(date=exact_date)
+    if date_from:
+        logs = logs.filter(date__gte=date_from)
+    if date_to:
+        logs = logs.filter(date__lte=date_to)
+
+    # Keyset pagination: rows strictly after the cursor in (date, id) DESC order
+    cursor = request.GET.get('cursor')
+    if cursor:
+        cursor_date, cursor_id = decode_cursor(cursor)
+        logs = logs.filter(date__lte=cursor_date).exclude(date=cursor_date, id__gte=cursor_id)
+
+    # Fetch one extra row to know whether there is a next page
+    lookups = {LOG_FIELDS[field] for field in fields} | {'date', 'id'}
+    rows = list(logs.order_by('-date', '-id').values(*lookups)[:limit + 1])
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    results = [{field: row[LOG_FIELDS[field]] for field in fields} for row in rows]
+    next_cursor = encode_cursor(rows[-1]['date'], rows[-1]['id']) if has_more else None
+
+    return JsonResponse({'results': results, 'next_cursor': next_cursor})
+
+
+@require_GET
+@api_instructor_required
+@condition(etag_func=_etag)
+def courses(request):
+    """
+    Courses visible to the current user.
+
+    URL: /attendance/api/courses/
+
+    Query params:
+        fields: Comma-separated fields (default: all)
+    """
+    fields = _parse_fields(request, COURSE_FIELDS)
+
+    results = [
+        {field: getattr(course, field) for field in fields}
+        for course in _visible_courses(request)
+    ]
+
+    return JsonResponse({'results': results})
+
+
+@require_GET
+@api_instructor_required
+@condition(etag_func=_etag)
+def course_roster(request, course_code):
+    """
+    Students enrolled in a course.
+
+    URL: /attendance/api/courses/<course_code>/roster/
+
+    Query params:
+        fields: Comma-separated fields (default: all)
+    """
+    fields = _parse_fields(request, ROSTER_FIELDS)
+    course = _get_visible_course(request, course_code)
+
+    rows = (
+        UserProfile.objects.filter(course=course, role='student')
+        .order_by('full_name')
+        .values(*[ROSTER_FIELDS[field] for field in fields])
+    )
+    results = [{field: row[ROSTER_FIELDS[field]] for field in fields} for row in rows]
+
+    return JsonResponse({'course_code': course.course_code, 'results': results})
@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class AttendanceConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'attendance'
+
+    def ready(self):
+        # Register cache invalidation signal handlers
+        from . import signals  # noqa: F401
+        # Apply the SQLite profile PRAGMAs to new connections
+        from fingerprint_attendance import sqlite  # noqa: F401
@@ -0,0 +1,335 @@
+"""
+============================================================
+LIVE ATTENDANCE EVENTS (SERVER-SENT EVENTS)
+============================================================
+Pushes new attendance to live dashboards over one long-lived
+HTTP connection per screen, instead of full-page reloads.
+
+How it works:
+1. AttendanceLog post_save (attendance/signals.py) calls publish()
+   once the transaction commits
+2. publish() appends the event to the course's ring buffer and
+   hands it to every connected subscriber of that course
+3. course_events (async view) streams events as SSE:
+       id: <AttendanceLog id>
+       event: attendance
+       data: {"student_id": "ST001", ...}
+
+Resume: browsers reconnect automatically and send Last-Event-ID
+(the highest AttendanceLog id sent so far). Missed events are
+replayed from the in-memory ring buffer, or from the database if
+the buffer no longer covers them.
+
+Out-of-order commits: ids are assigned at INSERT, so a log can
+commit after one with a higher id. Each heartbeat therefore
+rescans the last REORDER_WINDOW ids and sends logs it has not
+sent yet, instead of only those above the highest id sent.
+
+Deployment: serve with an ASGI server so each open stream costs
+a coroutine, not a worker thread:
+    uvicorn fingerprint_attendance.asgi:application
+Under WSGI (runserver, gunicorn sync workers) the view does not
+hold a worker thread open: it sends the missed events and ends
+the response, and the browser reconnects after RETRY_MS.
+With several worker processes, events written by another process
+are picked up from the database on the next heartbeat.
+============================================================
+"""
+import asyncio
+import json
+import threading
+from collections import defaultdict, deque
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.decorators import login_required
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse, StreamingHttpResponse
+
+from fingerprint_attendance import cache as lookup_cache
+from users.models import Course, UserProfile
+from .models import AttendanceLog
+
+
+# ========== CONFIGURATION ==========
+# Events kept per course for Last-Event-ID resume
+BUFFER_SIZE = getattr(settings, 'ATTENDANCE_EVENTS_BUFFER_SIZE', 500)
+
+# Seconds between keep-alive comments (also the database catch-up interval)
+HEARTBEAT_INTERVAL = getattr(settings, 'ATTENDANCE_EVENTS_HEARTBEAT', 15)
+
+# Max undelivered events per connection before it falls back to catch-up
+SUBSCRIBER_QUEUE_SIZE = 1000
+
+# Browser reconnect delay (milliseconds)
+RETRY_MS = 3000
+
+# Ids below the highest one sent that are rescanned for late commits
+REORDER_WINDOW = getattr(settings, 'ATTENDANCE_EVENTS_REORDER_WINDOW', 100)
+
+
+# ========== RING BUFFER + SUBSCRIBERS ==========
+_buffers = defaultdict(lambda: deque(maxlen=BUFFER_SIZE))
+_subscribers = defaultdict(set)
+_lock = threading.Lock()
+
+
+def _event_from_log(log):
+    """Build the event payload for an AttendanceLog (course_code is added per stream)."""
+    return {
+        'id': log.id,
+        'student_id': log.student_id,
+        'student_name': log.student_name,
+        'date': log.date,
+        'time': log.time,
+        'status': log.status,
+        'scan_method': log.scan_method,
+    }
+
+
+def _deliver(queue, event):
+    """Put an event on a subscriber queue (runs on the subscriber's loop)."""
+    try:
+        queue.put_nowait(event)
+    except asyncio.QueueFull:
+        # Slow client - it will catch up from the database on its next heartbeat
+        pass
+
+
+def publish(log):
+    """
+    Publish a newly written AttendanceLog to live subscribers.
+
+    Safe to call from any thread (sync views, management commands).
+
+    Args:
+        log: AttendanceLog instance
+    """
+    event = _event_from_log(log)
+
+    with _lock:
+        _buffers[log.course_id].append(event)
+        subscribers = list(_subscribers[log.course_id])
+
+    for loop, queue in subscribers:
+        try:
+            loop.call_soon_threadsafe(_deliver, queue, event)
+        except RuntimeError:
+            # Subscriber's event loop already closed
+            unsubscribe(log.course_id, (loop, queue))
+
+
+def subscribe(course_id):
+    """
+    Register a subscriber for a course on the running event loop.
+
+    Returns:
+        tuple: (loop, asyncio.Queue) - pass to unsubscribe() when done
+    """
+    subscriber = (asyncio.get_running_loop(), asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE))
+    with _lock:
+        _subscribers[course_id].add(subscriber)
+    return subscriber
+
+
+def unsubscribe(course_id, subscriber):
+    """Remove a subscriber registered with subscribe()."""
+    with _lock:
+        _subscribers[course_id].discard(subscriber)
+
+
+def events_since(course, last_event_id, use_buffer=True):
+    """
+    Events for a course with id greater than last_event_id, oldest first.
+
+    Served from the ring buffer when it covers the gap, otherwise
+    from the database.
+
+    Args:
+        course: Course instance
+        last_event_id: Last AttendanceLog id the client has seen
+        use_buffer: False to always read the database (sees writes
+            made by other processes)
+
+    Returns:
+        list: Event dicts
+    """
+    with _lock:
+        buffered = list(_buffers[course.pk])
+
+    if use_buffer and buffered and buffered[0]['id'] <= last_event_id:
+        return [event for event in buffered if event['id'] > last_event_id]
+
+    logs = AttendanceLog.objects.filter(course=course, id__gt=last_event_id).order_by('id')[:BUFFER_SIZE]
+    return [_event_from_log(log) for log in logs]
+
+
+def _format_event(event, course, last_id):
+    """
+    Encode an event in SSE wire format.
+
+    The SSE id is the highest log id sent so far (not the event's
+    own, which is lower for a late commit), so Last-Event-ID never
+    moves backwards.
+    """
+    data = json.dumps({**event, 'course_code': course.course_code}, cls=DjangoJSONEncoder)
+    return f'id: {last_id}\nevent: attendance\ndata: {data}\n\n'
+
+
+def _committed_ids(course, above, up_to):
+    """Ids of the course's logs in (above, up_to] that are already committed."""
+    return set(
+        AttendanceLog.objects.filter(course=course, id__gt=above, id__lte=up_to).values_list('id', flat=True)
+    )
+
+
+class _SentIds:
+    """Log ids a stream has sent, kept for the last REORDER_WINDOW ids."""
+
+    def __init__(self, last_id, ids=()):
+        self.last_id = last_id
+        self._ids = set(ids)
+
+    def __contains__(self, log_id):
+        return log_id in self._ids
+
+    def add(self, log_id):
+        self._ids.add(log_id)
+        if log_id > self.last_id:
+            self.last_id = log_id
+            floor = self.floor
+            self._ids = {sent for sent in self._ids if sent > floor}
+
+    @property
+    def floor(self):
+        """Ids at or below this are no longer rescanned."""
+        return self.last_id - REORDER_WINDOW
+
+
+async def _stream(course, last_event_id):
+    """Async generator producing the SSE stream for one connection."""
+    subscriber = subscribe(course.pk)
+    queue = subscriber[1]
+
+    try:
+        yield f'retry: {RETRY_MS}\n\n'
+
+        if last_event_id is None:
+            # New connection - only events from now on
+            latest = await AttendanceLog.objects.filter(course=course).order_by('-id').values_list('id', flat=True).afirst()
+            last_event_id = latest or 0
+
+        # Logs committed at or below the resume point count as sent
+        sent = _SentIds(last_event_id, await sync_to_async(_committed_ids)(
+            course, last_event_id - REORDER_WINDOW, last_event_id
+        ))
+
+        # Replay anything missed since Last-Event-ID
+        for event in await sync_to_async(events_since)(course, last_event_id):
+            sent.add(event['id'])
+            yield _format_event(event, course, sent.last_id)
+
+        while True:
+            try:
+                event = await asyncio.wait_for(queue.get(), HEARTBEAT_INTERVAL)
+            except asyncio.TimeoutError:
+                # Catch up on late commits, events written by other processes
+                # and events dropped when the queue was full
+                for event in await sync_to_async(events_since)(course, sent.floor, use_buffer=False):
+                    if event['id'] not in sent:
+                        sent.add(event['id'])
+                        yield _format_event(event, course, sent.last_id)
+                yield ': keep-alive\n\n'
+                continue
+
+            if event['id'] not in sent:
+                sent.add(event['id'])
+                yield _format_event(event, course, sent.last_id)
+    finally:
+        unsubscribe(course.pk, subscriber)
+
+
+def _catch_up(course, last_event_id):
+    """
+    Whole response under WSGI: missed events, then end of stream.
+
+    The browser reconnects after RETRY_MS with Last-Event-ID, so a
+    WSGI worker thread is never held by an open stream.
+    """
+    yield f'retry: {RETRY_MS}\n\n'
+    if last_event_id is None:
+        latest = AttendanceLog.objects.filter(course=course).order_by('-id').values_list('id', flat=True).first()
+        # An id without data sets the browser's Last-Event-ID only
+        yield f'id: {latest or 0}\n\n'
+        return
+    last_id = last_event_id
+    for event in events_since(course, last_event_id):
+        last_id = max(last_id, event['id'])
+        yield _format_event(event, course, last_id)
+
+
+def _check_course_access(user, course_code):
+    """
+    Check an instructor/admin may follow a course.
+
+    Returns:
+        tuple: (Course or None, error message or None, HTTP status)
+    """
+    try:
+        profile = lookup_cache.get_profile(user)
+        if profile.role != 'instructor' and not user.is_staff:
+            return None, 'Access denied', 403
+    except UserProfile.DoesNotExist:
+        if not user.is_staff:
+            return None, 'Access denied', 403
+
+    try:
+        course = lookup_cache.get_course(course_code)
+    except Course.DoesNotExist:
+        return None, f'Course "{course_code}" not found', 404
+
+    if not user.is_staff and course.instructor_id != user.id:
+        return None, 'You do not have access to this course', 403
+
+    return course, None, 200
+
+
+@login_required
+async def course_events(request, course_code):
+    """
+    Live attendance feed for a course (Server-Sent Events).
+
+    Access: Instructors and admins only
+    URL: /attendance/events/<course_code>/
+
+    Usage (browser):
+        const source = new EventSource('/attendance/events/CS101/');
+        source.addEventListener('attendance', (e) => addRow(JSON.parse(e.data)));
+
+    Headers:
+        Last-Event-ID: Resume after this event (sent automatically on reconnect)
+
+    Streams until the client disconnects under ASGI; under WSGI it
+    answers with the missed events only (see _catch_up).
+    """
+    user = await request.auser()
+    course, error, status = await sync_to_async(_check_course_access)(user, course_code)
+    if error:
+        return JsonResponse({'error': error}, status=status)
+
+    # Resume point (header from EventSource, or ?last_event_id= for manual clients)
+    last_event_id = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+    try:
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        last_event_id = None
+
+    if isinstance(request, ASGIRequest):
+        stream = _stream(course, last_event_id)
+    else:
+        stream = await sync_to_async(lambda: list(_catch_up(course, last_event_id)))()
+    response = StreamingHttpResponse(stream, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # Disable proxy buffering (nginx)
+    return response
@@ -0,0 +1,259 @@
+"""
+============================================================
+SQLITE CONCURRENCY BENCHMARK
+============================================================
+Kiosks marking attendance (attendance INSERT + session save per
+scan) while dashboards read today's attendance, against a
+throwaway SQLite file - once per database profile:
+
+    default      Django's SQLite defaults (rollback journal)
+    production   WAL + tuned PRAGMAs, BEGIN IMMEDIATE and the
+                 group-commit writer queue
+                 (fingerprint_attendance/sqlite.py, writer.py)
+
+Reports scans and reads per second, latency percentiles and
+"database is locked" errors for each profile. Nothing touches
+the configured database.
+
+Usage:
+    python manage.py benchmark_sqlite --kiosks 8 --readers 4 --duration 10
+============================================================
+"""
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+
+from django.contrib.auth.models import User
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, OperationalError, connections, transaction
+from django.db.models import Count
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from attendance.models import AttendanceLog
+from docstore.benchmark import percentile
+from fingerprint_attendance.sqlite import PRODUCTION_PRAGMAS, current_pragmas
+from fingerprint_attendance.writer import WriteQueue
+from users.models import Course
+
+
+PROFILES = ['default', 'production']
+
+COURSES = 10
+
+
+class Command(BaseCommand):
+    help = 'Compare SQLite profiles under concurrent kiosk writes and dashboard reads'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--profile', choices=PROFILES, action='append', dest='profiles',
+                            help='Only run this profile (repeatable; default: both)')
+        parser.add_argument('--kiosks', type=int, default=8, help='Concurrent writing kiosks')
+        parser.add_argument('--readers', type=int, default=4, help='Concurrent dashboard readers')
+        parser.add_argument('--read-interval', type=float, default=0.05,
+                            help='Seconds each dashboard waits between refreshes (0 = read flat out)')
+        parser.add_argument('--duration', type=float, default=10, help='Seconds per profile')
+        parser.add_argument('--students', type=int, default=20000,
+                            help='Students available to scan (each scans once)')
+        parser.add_argument('--json', action='store_true', help='Print the raw report as JSON')
+
+    def handle(self, *args, **options):
+        if options['kiosks'] < 1 or options['readers'] < 0 or options['duration'] <= 0:
+            raise CommandError('--kiosks and --duration must be positive')
+
+        report = {}
+        for profile in options['profiles'] or PROFILES:
+            with tempfile.TemporaryDirectory() as directory:
+                report[profile] = run_profile(
+                    profile, os.path.join(directory, 'benchmark.sqlite3'),
+                    kiosks=options['kiosks'], readers=options['readers'],
+                    duration=options['duration'], students=options['students'],
+                    read_interval=options['read_interval'],
+                )
+
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+        else:
+            self._print(report, options)
+
+    def _print(self, report, options):
+        self.stdout.write('=' * 78)
+        self.stdout.write('SQLITE CONCURRENCY BENCHMARK')
+        self.stdout.write('=' * 78)
+        self.stdout.write(
+            f'{options["kiosks"]} kiosks, {options["readers"]} dashboard readers, '
+            f'{options["duration"]:g}s per profile\n'
+        )
+        self.stdout.write(
+            f'{"profile":<12}{"scans/s":>9}{"p50 ms":>9}{"p95 ms":>9}{"max ms":>9}'
+            f'{"reads/s":>9}{"p95 ms":>9}{"max ms":>9}{"locked":>8}'
+        )
+        self.stdout.write('-' * 78)
+        for profile, result in report.items():
+            writes, reads = result['writes'], result['reads']
+            self.stdout.write(
+                f'{profile:<12}{writes["per_second"]:>9.1f}{writes["p50_ms"] or 0:>9.1f}'
+                f'{writes["p95_ms"] or 0:>9.1f}{writes["max_ms"] or 0:>9.1f}'
+                f'{reads["per_second"]:>9.1f}{reads["p95_ms"] or 0:>9.1f}{reads["max_ms"] or 0:>9.1f}'
+                f'{writes["locked"] + reads["locked"]:>8}'
+            )
+        self.stdout.write('-' * 78)
+        for profile, result in report.items():
+            pragmas = ', '.join(f'{name}={value}' for name, value in result['pragmas'].items())
+            batch = f', {result["scans_per_commit"]:.1f} scans per commit' if result['scans_per_commit'] else ''
+            self.stdout.write(f'{profile}: {pragmas}{batch}')
+
+        if len(report) == 2:
+            default, production = report['default'], report['production']
+            speedup = production['writes']['per_second'] / max(default['writes']['per_second'], 0.001)
+            self.stdout.write(self.style.SUCCESS(
+                f'\n✅ production: {speedup:.1f}x scans/s, read p95 '
+                f'{default["reads"]["p95_ms"] or 0:.1f} -> {production["reads"]["p95_ms"] or 0:.1f} ms'
+            ))
+
+
+def _database(path, profile):
+    settings_dict = {'ENGINE': 'django.db.backends.sqlite3', 'NAME': path}
+    if profile == 'production':
+        settings_dict['OPTIONS'] = {'transaction_mode': 'IMMEDIATE'}
+    return connections.configure_settings({DEFAULT_DB_ALIAS: settings_dict})[DEFAULT_DB_ALIAS]
+
+
+def _seed(alias, students):
+    """Tables and rows the workload needs, in the benchmark database."""
+    with connections[alias].schema_editor() as editor:
+        for model in (User, Course, AttendanceLog, Session):
+            editor.create_model(model)
+    User.objects.using(alias).bulk_create(
+        [User(username=f'bench-{index:06d}', password='!') for index in range(students)], batch_size=1000
+    )
+    Course.objects.using(alias).bulk_create(
+        [Course(course_code=f'BENCH{index:02d}', course_name=f'Benchmark {index}') for index in range(COURSES)]
+    )
+    return (
+        list(User.objects.using(alias).order_by('id').values_list('id', flat=True)),
+        list(Course.objects.using(alias).values_list('id', flat=True)),
+    )
+
+
+def _summary(latencies, locked, duration):
+    latencies.sort()
+    return {
+        'count': len(latencies),
+        'per_second': round(len(latencies) / duration, 1),
+        'p50_ms': _round(percentile(latencies, 50)),
+        'p95_ms': _round(percentile(latencies, 95)),
+        'max_ms': _round(latencies[-1] if latencies else None),
+        'locked': locked,
+    }
+
+
+def _round(value):
+    return round(value, 2) if value is not None else None
+
+
+def run_profile(profile, path, kiosks=8, readers=4, duration=10.0, students=20000, read_interval=0.05):
+    """
+    Run the kiosk/dashboard workload against a new SQLite file.
+
+    Returns:
+        dict: writes / reads summaries, pragmas in effect, scans per commit
+    """
+    alias = f'sqlite_benchmark_{profile}'
+    connections.settings[alias] = _database(path, profile)
+    pragmas = PRODUCTION_PRAGMAS if profile == 'production' else {}
+    writer = WriteQueue(alias) if profile == 'production' else None
+    try:
+        with override_settings(SQLITE_PRAGMAS=pragmas):
+            user_ids, course_ids = _seed(alias, students)
+            in_effect = current_pragmas(connections[alias])
+            connections[alias].close()
+
+            lock = threading.Lock()
+            next_user = iter(range(len(user_ids)))
+            writes, reads = [], []
+            locked = {'writes': 0, 'reads': 0}
+            today = date.today()
+            deadline = time.perf_counter() + duration
+
+            def scan(index, kiosk):
+                """One kiosk scan: attendance row + the kiosk's session."""
+                try:
+                    with transaction.atomic(using=alias):
+                        AttendanceLog.objects.using(alias).create(
+                            user_id=user_ids[index], student_name=f'Student {index}',
+                            student_id=f'B{index:06d}', course_id=course_ids[index % len(course_ids)],
+                        )
+                except IntegrityError:
+                    pass
+                Session(
+                    session_key=f'kiosk-{kiosk:032d}', session_data=f'scan {index}',
+                    expire_date=timezone.now() + timedelta(hours=1),
+                ).save(using=alias)
+
+            def kiosk_loop(kiosk):
+                try:
+                    while time.perf_counter() < deadline:
+                        with lock:
+                            index = next(next_user, None)
+                        if index is None:
+                            return
+                        start = time.perf_counter()
+                        try:
+                            if writer:
+                                writer.submit(scan, index, kiosk).result()
+                            else:
+                                scan(index, kiosk)
+                        except OperationalError:
+                            with lock:
+                                locked['writes'] += 1
+                            continue
+                        with lock:
+                            writes.append((time.perf_counter() - start) * 1000)
+                finally:
+                    connections[alias].close()
+
+            def dashboard_loop():
+                try:
+                    while time.perf_counter() < deadline:
+                        start = time.perf_counter()
+                        try:
+                            logs = AttendanceLog.objects.using(alias).filter(date=today)
+                            list(logs.values('course_id').annotate(present=Count('id')))
+                            list(logs.order_by('-id').values('student_id', 'time')[:20])
+                        except OperationalError:
+                            with lock:
+                                locked['reads'] += 1
+                            continue
+                        with lock:
+                            reads.append((time.perf_counter() - start) * 1000)
+                        if read_interval:
+                            time.sleep(read_interval)
+                finally:
+                    connections[alias].close()
+
+            threads = [threading.Thread(target=kiosk_loop, args=(kiosk,)) for kiosk in range(kiosks)]
+            threads += [threading.Thread(target=dashboard_loop) for _ in range(readers)]
+            started = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - started
+            if writer:
+                writer.stop()
+    finally:
+        connections[alias].close()
+        del connections[alias]
+        del connections.settings[alias]
+
+    return {
+        'writes': _summary(writes, locked['writes'], elapsed),
+        'reads': _summary(reads, locked['reads'], elapsed),
+        'pragmas': in_effect,
+        'scans_per_commit': round(writer.jobs / writer.commits, 1) if writer and writer.commits else None,
+    }
@@ -0,0 +1,104 @@
+"""
+============================================================
+VIEW BENCHMARK
+============================================================
+Runs the end-to-end view benchmark suite
+(fingerprint_attendance/benchmarks.py) against the current
+database and compares it with the stored baseline.
+
+Fails (non-zero exit) when any view needs more queries than the
+baseline, or its latency / peak memory grew beyond --tolerance.
+
+Usage:
+    python manage.py seed_population
+    python manage.py benchmark_views --save-baseline
+    ... change code ...
+    python manage.py benchmark_views
+============================================================
+"""
+import json
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from fingerprint_attendance import benchmarks
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the hot views (latency, queries, peak memory) against a stored baseline'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--baseline', default=settings.BENCHMARK_BASELINE,
+                            help='Baseline JSON file (default: settings.BENCHMARK_BASELINE)')
+        parser.add_argument('--save-baseline', action='store_true',
+                            help='Write this run as the new baseline instead of comparing')
+        parser.add_argument('--tolerance', type=float, default=benchmarks.DEFAULT_TOLERANCE,
+                            help='Allowed relative growth of latency/memory (0.5 = +50%%)')
+        parser.add_argument('--repeat', type=int, default=20, help='Timed requests per view')
+        parser.add_argument('--view', action='append', dest='views',
+                            choices=[name for name, *_ in benchmarks.SCENARIOS],
+                            help='Only benchmark this view (repeatable)')
+        parser.add_argument('--json', action='store_true', help='Print the raw report as JSON')
+
+    def handle(self, *args, **options):
+        if options['repeat'] < 1:
+            raise CommandError('--repeat must be at least 1')
+
+        try:
+            report = benchmarks.run_suite(repeats=options['repeat'], only=options['views'])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+        else:
+            self._print(report)
+
+        path = options['baseline']
+        if options['save_baseline']:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            with open(path, 'w') as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(self.style.SUCCESS(f'✅ Baseline saved to {path}'))
+            return
+
+        if not os.path.exists(path):
+            self.stdout.write(self.style.WARNING(
+                f'⚠️  No baseline at {path} - run with --save-baseline to create one'
+            ))
+            return
+
+        with open(path) as f:
+            baseline = json.load(f)
+        try:
+            regressions = benchmarks.compare(report, baseline, options['tolerance'])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        if regressions:
+            for regression in regressions:
+                self.stdout.write(self.style.ERROR(f'❌ {regression}'))
+            raise CommandError(f'{len(regressions)} regression(s) against {path}')
+        self.stdout.write(self.style.SUCCESS('✅ No regressions against the baseline'))
+
+    def _print(self, report):
+        scale = report['scale']
+        self.stdout.write('=' * 72)
+        self.stdout.write('VIEW BENCHMARK')
+        self.stdout.write('=' * 72)
+        self.stdout.write(
+            f"{scale['courses']} courses, {scale['students']} students, "
+            f"{scale['attendance_logs']} attendance logs (course {report['course']})\n"
+        )
+        self.stdout.write(f"{'view':<24}{'p50 ms':>10}{'p95 ms':>10}{'queries':>9}{'peak KB':>10}")
+        for name, result in report['results'].items():
+            if 'error' in result:
+                self.stdout.write(f'{name:<24}  ❌ {result["error"]}')
+                continue
+            note = '  (stand-in template)' if result.get('template') == 'stand-in' else ''
+            self.stdout.write(
+                f"{name:<24}{result['p50_ms']:>10.2f}{result['p95_ms']:>10.2f}"
+                f"{result['queries']:>9}{result['peak_kb']:>10.1f}{note}"
+            )
+        self.stdout.write('')
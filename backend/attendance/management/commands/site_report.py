@@ -0,0 +1,111 @@
+"""
+============================================================
+CROSS-SITE ATTENDANCE REPORT
+============================================================
+Queries every campus site database in parallel
+(sharding.fan_out) and merges the results: per-site and total
+courses, students and attendance for one day, plus the courses
+with the lowest attendance across all sites.
+
+Usage:
+    python manage.py site_report
+    python manage.py site_report --date 2025-03-14 --lowest 10 --json
+============================================================
+"""
+import json
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count, Q
+
+from attendance.models import AttendanceLog
+from fingerprint_attendance import sharding
+from users.models import Course, UserProfile
+
+
+def site_summary(day):
+    """One site's numbers for a day (run inside site_scope)."""
+    present = dict(
+        AttendanceLog.objects.filter(date=day).values_list('course_id').annotate(present=Count('id'))
+    )
+    courses = [
+        {
+            'course_code': course['course_code'],
+            'students': course['roster'],
+            'present': present.get(course['id'], 0),
+        }
+        for course in Course.objects.annotate(
+            roster=Count('students', filter=Q(students__role='student'))
+        ).values('id', 'course_code', 'roster')
+    ]
+    return {
+        'counts': {
+            'courses': len(courses),
+            'students': UserProfile.objects.filter(role='student').count(),
+            'enrolled': UserProfile.objects.filter(role='student', fingerprint_enrolled=True).count(),
+            'present': sum(present.values()),
+        },
+        'courses': courses,
+    }
+
+
+def _rate(course):
+    return course['present'] / course['students'] if course['students'] else 1.0
+
+
+def build_report(day, lowest=5):
+    """
+    Per-site and merged numbers for a day.
+
+    Returns:
+        dict: {'date', 'sites': {site: counts}, 'total': counts, 'lowest': [course rows]}
+    """
+    results = sharding.fan_out(lambda site: site_summary(day))
+    lowest_courses = sharding.merge_lists(
+        {site: [{**course, 'site': site} for course in result['courses']] for site, result in results.items()},
+        key=lambda course: (_rate(course), course['course_code']), limit=lowest,
+    )
+    return {
+        'date': day.isoformat(),
+        'sites': {site: result['counts'] for site, result in results.items()},
+        'total': sharding.merge_counts({site: result['counts'] for site, result in results.items()}),
+        'lowest': lowest_courses,
+    }
+
+
+class Command(BaseCommand):
+    help = 'Attendance summary across all campus sites'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help='Day to report (YYYY-MM-DD, default: today)')
+        parser.add_argument('--lowest', type=int, default=5, help='Courses with the lowest attendance to list')
+        parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+
+    def handle(self, *args, **options):
+        try:
+            day = date.fromisoformat(options['date']) if options['date'] else date.today()
+        except ValueError:
+            raise CommandError('--date must be YYYY-MM-DD')
+
+        report = build_report(day, options['lowest'])
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+
+        self.stdout.write('=' * 60)
+        self.stdout.write(f'CROSS-SITE ATTENDANCE - {report["date"]}')
+        self.stdout.write('=' * 60)
+        self.stdout.write(f'{"site":<12}{"courses":>9}{"students":>10}{"enrolled":>10}{"present":>10}')
+        self.stdout.write('-' * 60)
+        for site, counts in [*report['sites'].items(), ('total', report['total'])]:
+            self.stdout.write(
+                f'{site or "default":<12}{counts["courses"]:>9}{counts["students"]:>10}'
+                f'{counts["enrolled"]:>10}{counts["present"]:>10}'
+            )
+        if report['lowest']:
+            self.stdout.write('\nLowest attendance:')
+            for course in report['lowest']:
+                self.stdout.write(
+                    f'  {course["course_code"]:<12}{course["site"] or "default":<12}'
+                    f'{course["present"]}/{course["students"]}'
+                )
@@ -0,0 +1,49 @@
+"""
+============================================================
+SQLITE READ REPLICA SNAPSHOT
+============================================================
+Copies the SQLite primary to the replica file
+(DATABASES['replica'], set by DATABASE_REPLICA) so reports and
+dashboards can read from it (see fingerprint_attendance/replica.py).
+
+Once (e.g. from cron):
+    python manage.py snapshot_replica
+Or keep it fresh:
+    python manage.py snapshot_replica --every 60
+
+Keep --every well under REPLICA_MAX_LAG, or reports fall back to
+the primary between snapshots.
+============================================================
+"""
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from fingerprint_attendance.replica import REPLICA, snapshot_sqlite
+
+
+class Command(BaseCommand):
+    help = 'Copy the SQLite primary to the read replica file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--every', type=float, default=0,
+                            help='Repeat every N seconds (0 = once)')
+
+    def handle(self, *args, **options):
+        replica = settings.DATABASES.get(REPLICA)
+        if not replica:
+            raise CommandError('No replica configured - set DATABASE_REPLICA to the snapshot file')
+        if replica['ENGINE'] != 'django.db.backends.sqlite3':
+            raise CommandError('The replica is not SQLite - it is kept up to date by its own replication')
+        path = str(replica['NAME'])
+
+        while True:
+            try:
+                seconds = snapshot_sqlite(path)
+            except ValueError as e:
+                raise CommandError(str(e))
+            self.stdout.write(self.style.SUCCESS(f'✅ Snapshot written to {path} in {seconds:.2f}s'))
+            if options['every'] <= 0:
+                return
+            time.sleep(max(0.0, options['every'] - seconds))
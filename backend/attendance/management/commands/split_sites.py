@@ -0,0 +1,192 @@
+"""
+============================================================
+SPLIT THE DATABASE INTO CAMPUS SITES
+============================================================
+Copies the sharded rows (courses, profiles, attendance, scan
+audit rows) of the default database into the site databases
+configured by SITES_CONFIG (fingerprint_attendance/sharding.py):
+
+- a course goes to the site its course code belongs to
+- a profile goes with its course; instructors without a course
+  with the first course they teach; anyone else to SITE_DEFAULT
+- attendance goes with its course, scans with the user's profile
+- the users all of these reference are copied too
+
+Rows keep their ids. Rows already in a site are skipped, so the
+command can be re-run to catch up before switching over. Then
+each site's id counters are moved to its own block
+(number * SITE_ID_BLOCK) so new ids never collide across sites,
+and the copied row counts are checked.
+
+Usage:
+    python manage.py split_sites --dry-run     # show the plan
+    python manage.py split_sites               # copy
+    python manage.py split_sites --purge       # copy, then delete the
+                                               # copied rows from default
+============================================================
+"""
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models.constants import OnConflict
+
+from attendance.models import AttendanceLog
+from fingerprint.models import FingerprintScan
+from fingerprint_attendance import cache as lookup_cache, sharding
+from users.models import Course, UserProfile
+
+
+# Copy order: referenced rows first
+MODELS = [Course, UserProfile, AttendanceLog, FingerprintScan]
+
+
+def _chunks(ids, size):
+    ids = sorted(ids)
+    for start in range(0, len(ids), size):
+        yield ids[start:start + size]
+
+
+def copy_rows(model, ids, alias, batch_size=1000):
+    """
+    Copy rows of a model from the default database to alias as they are.
+
+    Plain INSERTs of the stored values - unlike save()/bulk_create(),
+    auto_now / auto_now_add fields keep their original timestamps.
+    Rows whose id already exists in alias are skipped.
+
+    Returns:
+        int: Rows sent
+    """
+    connection = connections[alias]
+    fields = model._meta.concrete_fields
+    insert = connection.ops.insert_statement(on_conflict=OnConflict.IGNORE)
+    suffix = connection.ops.on_conflict_suffix_sql(fields, OnConflict.IGNORE, None, None)
+    sql = (
+        f'{insert} {connection.ops.quote_name(model._meta.db_table)} '
+        f'({", ".join(connection.ops.quote_name(field.column) for field in fields)}) '
+        f'VALUES ({", ".join(["%s"] * len(fields))}) {suffix}'
+    )
+    sent = 0
+    with connection.cursor() as cursor:
+        for chunk in _chunks(ids, batch_size):
+            rows = model.objects.using(DEFAULT_DB_ALIAS).filter(pk__in=chunk)
+            values = [
+                [field.get_db_prep_save(value, connection) for field, value in zip(fields, row)]
+                for row in rows.values_list(*[field.attname for field in fields])
+            ]
+            cursor.executemany(sql, values)
+            sent += len(values)
+    return sent
+
+
+def plan_split():
+    """
+    Which site each sharded row of the default database belongs to.
+
+    Returns:
+        dict: {site: {'users': set of user ids, Model: set of row ids}}
+    """
+    plan = defaultdict(lambda: defaultdict(set))
+    default = DEFAULT_DB_ALIAS
+    fallback = sharding.default_site()
+
+    course_site = {}
+    for course_id, course_code, instructor_id in Course.objects.using(default).values_list(
+            'id', 'course_code', 'instructor_id'):
+        site = course_site[course_id] = sharding.site_for_course(course_code)
+        plan[site][Course].add(course_id)
+        plan[site]['users'].add(instructor_id)
+
+    teaching_site = {}
+    for course_id, instructor_id in Course.objects.using(default).filter(
+            instructor__isnull=False).order_by('course_code').values_list('id', 'instructor_id'):
+        teaching_site.setdefault(instructor_id, course_site[course_id])
+
+    user_site = {}
+    for profile_id, user_id, course_id in UserProfile.objects.using(default).values_list('id', 'user_id', 'course_id'):
+        site = course_site.get(course_id) or teaching_site.get(user_id) or fallback
+        user_site[user_id] = site
+        plan[site][UserProfile].add(profile_id)
+        plan[site]['users'].add(user_id)
+
+    for log_id, user_id, course_id in AttendanceLog.objects.using(default).values_list('id', 'user_id', 'course_id'):
+        site = course_site[course_id]
+        plan[site][AttendanceLog].add(log_id)
+        plan[site]['users'].add(user_id)
+
+    for scan_id, user_id in FingerprintScan.objects.using(default).values_list('id', 'user_id'):
+        site = user_site.get(user_id) or teaching_site.get(user_id) or fallback
+        plan[site][FingerprintScan].add(scan_id)
+        plan[site]['users'].add(user_id)
+
+    for rows in plan.values():
+        rows['users'].discard(None)
+    return plan
+
+
+class Command(BaseCommand):
+    help = 'Copy courses, profiles and attendance from the default database into the campus site databases'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only show how the rows would be split')
+        parser.add_argument('--purge', action='store_true',
+                            help='Delete the copied rows from the default database afterwards')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows per INSERT batch')
+
+    def handle(self, *args, **options):
+        if not sharding.sharding_enabled():
+            raise CommandError('No campus sites configured - set SITES_CONFIG (see fingerprint_attendance/sharding.py)')
+
+        plan = plan_split()
+        self.stdout.write('=' * 60)
+        self.stdout.write('SPLIT INTO CAMPUS SITES')
+        self.stdout.write('=' * 60)
+        self.stdout.write(f'{"site":<12}{"users":>9}{"courses":>9}{"profiles":>10}{"logs":>10}{"scans":>9}')
+        for site in sharding.sites():
+            rows = plan.get(site, {})
+            self.stdout.write(
+                f'{site:<12}{len(rows.get("users", ())):>9}{len(rows.get(Course, ())):>9}'
+                f'{len(rows.get(UserProfile, ())):>10}{len(rows.get(AttendanceLog, ())):>10}'
+                f'{len(rows.get(FingerprintScan, ())):>9}'
+            )
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING('\n⚠️  Dry run - nothing copied'))
+            return
+
+        for site in sharding.sites():
+            alias = sharding.site_alias(site)
+            rows = plan.get(site, {})
+            # Full schema: users are copied too (foreign keys need them)
+            sharding.create_schema(site)
+            with transaction.atomic(using=alias):
+                for chunk in _chunks(rows.get('users', ()), options['batch_size']):
+                    sharding.mirror_users(chunk, alias)
+                for model in MODELS:
+                    copy_rows(model, rows.get(model, ()), alias, options['batch_size'])
+                start = sharding.reserve_ids(site)
+            self._verify(site, alias, rows, options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(f'✅ {site}: copied to {alias}, new ids from {start}'))
+
+        if options['purge']:
+            with transaction.atomic(using=DEFAULT_DB_ALIAS):
+                for model in reversed(MODELS):
+                    ids = [row_id for rows in plan.values() for row_id in rows.get(model, ())]
+                    for chunk in _chunks(ids, options['batch_size']):
+                        model.objects.using(DEFAULT_DB_ALIAS).filter(pk__in=chunk).delete()
+            self.stdout.write(self.style.SUCCESS('✅ Copied rows deleted from the default database'))
+
+        # Cached lookups were loaded from the default database
+        lookup_cache.invalidate_courses()
+        lookup_cache.invalidate_rosters()
+
+    def _verify(self, site, alias, rows, batch_size):
+        """Every planned row must now be in the site database."""
+        for model in MODELS:
+            ids = rows.get(model, set())
+            found = sum(model.objects.using(alias).filter(pk__in=chunk).count() for chunk in _chunks(ids, batch_size))
+            if found != len(ids):
+                raise CommandError(
+                    f'{site}: {found} of {len(ids)} {model._meta.verbose_name_plural} arrived - '
+                    f'nothing was purged; re-run split_sites'
+                )
@@ -69,6 +69,9 @@ class AttendanceLog(models.Model):
     # How was attendance marked
     scan_method = models.CharField(max_length=20, choices=SCAN_METHOD_CHOICES, default='fingerprint')
 
+    # Last modification (used by the Firestore sync, so edits are pushed again)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
     def __str__(self):
         """String representation of attendance record"""
         return f"{self.student_name} ({self.student_id}) - {self.course.course_code} - {self.date} {self.time}"
@@ -80,5 +83,9 @@ class AttendanceLog(models.Model):
         verbose_name_plural = "Attendance Logs"
         # Prevent duplicate attendance for same student, course, and date
         unique_together = ['user', 'course', 'date']
+        indexes = [
+            # Keyset pagination on (date, id) in the JSON API
+            models.Index(fields=['date', 'id'], name='attendance_date_id_idx'),
+        ]
 
 
@@ -0,0 +1,179 @@
+"""
+============================================================
+ATTENDANCE REPORT CACHE
+============================================================
+Built report files (attendance/reports.py) are kept on disk and
+reused until the course's attendance changes, so downloading the
+same report again near a deadline costs one aggregate query
+instead of a rebuild.
+
+- Key: course, format, the course's latest log id and log count
+  and its attendance generation (fingerprint_attendance/cache.py)
+  - a new scan, a deleted log or an edit in place (admin, Firestore
+  sync) gives a new key. The Firestore sync also calls invalidate()
+  to free the old files early.
+- Storage: settings.REPORT_CACHE_DIR, one file per key.
+  Formats that compress (CSV) are stored gzipped and sent as
+  Content-Encoding: gzip; XLSX is a zip file already.
+- Eviction: least recently used first once the directory holds
+  more than settings.REPORT_CACHE_MAX_BYTES (a hit touches the
+  file's modification time).
+============================================================
+"""
+import gzip
+import hashlib
+import os
+from pathlib import Path
+
+from django.conf import settings
+from django.db.models import Count, Max
+
+from fingerprint_attendance import cache as lookup_cache
+from fingerprint_attendance.sharding import current_site
+
+from .models import AttendanceLog
+
+
+# Bump when the report layout changes (orphans every cached file)
+CACHE_VERSION = 1
+
+# Formats stored gzip-compressed
+COMPRESSED_FORMATS = {'csv'}
+
+
+class CachedReport:
+    """
+    A report file in the cache.
+
+    Attributes:
+        path: File on disk
+        key: Cache key (also the download's ETag)
+        fmt: Report format
+        encoding: 'gzip' if the file is stored compressed, else None
+    """
+
+    def __init__(self, path, key, fmt):
+        self.path = path
+        self.key = key
+        self.fmt = fmt
+        self.encoding = 'gzip' if fmt in COMPRESSED_FORMATS else None
+
+
+def _directory():
+    return Path(settings.REPORT_CACHE_DIR)
+
+
+def _path(course_id, key, fmt):
+    suffix = '.gz' if fmt in COMPRESSED_FORMATS else ''
+    return _directory() / f'c{course_id}-{key}.{fmt}{suffix}'
+
+
+def report_key(course, fmt):
+    """
+    Cache key of a course's report as of now (one aggregate query
+    plus a cache read).
+
+    Args:
+        course: Course instance
+        fmt: Report format
+
+    Returns:
+        str: Hex key
+    """
+    latest = AttendanceLog.objects.filter(course=course).aggregate(last_id=Max('id'), logs=Count('id'))
+    key = ':'.join([
+        str(CACHE_VERSION),
+        current_site() or '',
+        str(course.pk),
+        course.course_code,
+        fmt,
+        str(latest['last_id'] or 0),
+        str(latest['logs']),
+        # Bumped by edits that keep the id and count (status changes)
+        str(lookup_cache.get_generation(f'attendance:{course.pk}')),
+    ])
+    return hashlib.md5(key.encode()).hexdigest()
+
+
+def get(course, key, fmt):
+    """
+    The cached report for a key, marked as just used.
+
+    Returns:
+        CachedReport or None
+    """
+    path = _path(course.pk, key, fmt)
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        return None
+    return CachedReport(path, key, fmt)
+
+
+def put(course, key, fmt, content):
+    """
+    Store a built report (then evict down to the size budget).
+
+    Args:
+        course: Course instance
+        key: report_key() the content was built for
+        fmt: Report format
+        content: File bytes (uncompressed)
+
+    Returns:
+        CachedReport
+    """
+    path = _path(course.pk, key, fmt)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if fmt in COMPRESSED_FORMATS:
+        # mtime=0: the same report always compresses to the same bytes
+        content = gzip.compress(content, mtime=0)
+    temp_path = path.with_name(f'.{path.name}.{os.getpid()}.tmp')
+    temp_path.write_bytes(content)
+    temp_path.replace(path)
+    evict(keep=path)
+    return CachedReport(path, key, fmt)
+
+
+def invalidate(course_id):
+    """Delete every cached report of a course."""
+    for path in _directory().glob(f'c{course_id}-*'):
+        path.unlink(missing_ok=True)
+
+
+def evict(max_bytes=None, keep=None):
+    """
+    Delete least recently used reports until the cache fits its budget.
+
+    Args:
+        max_bytes: Size budget (default: settings.REPORT_CACHE_MAX_BYTES)
+        keep: A path never to delete (the report just stored)
+
+    Returns:
+        int: Files deleted
+    """
+    if max_bytes is None:
+        max_bytes = settings.REPORT_CACHE_MAX_BYTES
+
+    files = []
+    try:
+        with os.scandir(_directory()) as entries:
+            for entry in entries:
+                # Dot files are reports still being written
+                if entry.is_file() and not entry.name.startswith('.'):
+                    stat = entry.stat()
+                    files.append((stat.st_mtime, stat.st_size, Path(entry.path)))
+    except FileNotFoundError:
+        return 0
+
+    total = sum(size for _, size, _ in files)
+    deleted = 0
+    for _, size, path in sorted(files, key=lambda file: file[0]):
+        if total <= max_bytes:
+            break
+        if keep is not None and path == keep:
+            continue
+        path.unlink(missing_ok=True)
+        total -= size
+        deleted += 1
+    return deleted
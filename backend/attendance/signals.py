@@ -0,0 +1,33 @@
+"""
+============================================================
+ATTENDANCE SIGNALS - CACHE INVALIDATION
+============================================================
+- Keeps cached per-course daily stats and analytics
+  (fingerprint_attendance/cache.py) in sync with AttendanceLog
+  writes - again after commit, see invalidate_on_commit()
+- Publishes new attendance to live SSE subscribers (attendance/events.py)
+============================================================
+"""
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from fingerprint_attendance import cache as lookup_cache
+from . import events
+from .models import AttendanceLog
+
+
+@receiver([post_save, post_delete], sender=AttendanceLog)
+def attendance_changed(sender, instance, using, **kwargs):
+    """Attendance marked, edited or removed - drop that course/day's stats and analytics."""
+    lookup_cache.invalidate_on_commit(
+        lookup_cache.invalidate_course_day_stats, instance.course_id, instance.date, using=using
+    )
+    lookup_cache.invalidate_on_commit(lookup_cache.invalidate_attendance, instance.course_id, using=using)
+
+
+@receiver(post_save, sender=AttendanceLog)
+def attendance_created(sender, instance, created, using, **kwargs):
+    """New attendance - push it to live dashboards once committed."""
+    if created:
+        transaction.on_commit(lambda: events.publish(instance), using=using)
@@ -0,0 +1,34 @@
+"""
+============================================================
+ATTENDANCE BACKGROUND TASKS
+============================================================
+Run by the job worker (jobs/queue.py, manage.py run_jobs).
+============================================================
+"""
+from django.urls import reverse
+
+from fingerprint_attendance.replica import replica_reads
+from jobs.queue import PRIORITY_HIGH, task
+from users.models import Course
+
+from . import report_cache
+from .reports import build_report
+
+
+@task('attendance.report', priority=PRIORITY_HIGH)
+def attendance_report(job, course_code, fmt='xlsx'):
+    """Attendance report for a course (someone is waiting for it)."""
+    course = Course.objects.get(course_code=course_code)
+    result = {'course_code': course.course_code, 'format': fmt}
+    with replica_reads():
+        # Key and content come from the same database, so a lagging
+        # replica never files old content under a new key
+        key = report_cache.report_key(course, fmt)
+        if report_cache.get(course, key, fmt) is None:
+            job.progress(0.0, 'Reading attendance')
+            content, result['rows'] = build_report(course, fmt, progress=job.progress)
+            report_cache.put(course, key, fmt, content)
+
+    url = reverse('attendance_report_download', args=[course.course_code, key])
+    result['download_url'] = f'{url}?format={fmt}'
+    return result
@@ -1,3 +1,712 @@
-from django.test import TestCase
+import asyncio
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from contextlib import closing
+from datetime import date
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.http import HttpResponse
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from fingerprint.matching import mark_attendance
+from fingerprint_attendance import cache as lookup_cache, metrics, replica, sharding, writer
+from fingerprint_attendance.benchmarks import SCENARIOS, compare, current_scale, run_suite
+from jobs.models import Job
+from jobs.queue import claim, execute
+from users.models import Course, UserProfile
+
+from . import analytics, events, report_cache
+from .models import AttendanceLog
+
+
+def _report(queries=3, p50_ms=10.0, peak_kb=100.0, scale=None):
+    return {
+        'scale': scale or {'courses': 2, 'students': 20, 'attendance_logs': 100},
+        'results': {'course_attendance': {'p50_ms': p50_ms, 'p95_ms': p50_ms, 'queries': queries, 'peak_kb': peak_kb}},
+    }
+
+
+class BenchmarkCompareTests(SimpleTestCase):
+
+    def test_same_figures_pass(self):
+        self.assertEqual(compare(_report(), _report()), [])
+
+    def test_any_extra_query_is_a_regression(self):
+        regressions = compare(_report(queries=4), _report(queries=3))
+        self.assertEqual(len(regressions), 1)
+        self.assertIn('4 queries', regressions[0])
+
+    def test_latency_and_memory_use_the_tolerance(self):
+        self.assertEqual(compare(_report(p50_ms=14.0), _report(), tolerance=0.5), [])
+        self.assertEqual(len(compare(_report(p50_ms=16.0, peak_kb=200.0), _report(), tolerance=0.5)), 2)
+
+    def test_errors_are_regressions(self):
+        report = _report()
+        report['results']['course_attendance'] = {'error': 'HTTP 500'}
+        self.assertEqual(compare(report, _report()), ['course_attendance: HTTP 500'])
+
+    def test_different_scale_is_refused(self):
+        with self.assertRaises(ValueError):
+            compare(_report(scale={'courses': 2, 'students': 40, 'attendance_logs': 100}), _report())
+
+
+class BenchmarkSuiteTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command('seed_population', courses=2, instructors=1, students=20, days=3, stdout=StringIO())
+
+    def test_every_view_is_measured(self):
+        report = run_suite(repeats=2)
+
+        self.assertEqual(set(report['results']), {name for name, *_ in SCENARIOS})
+        for name, result in report['results'].items():
+            self.assertNotIn('error', result, name)
+            self.assertGreater(result['queries'], 0, name)
+            self.assertLessEqual(result['p50_ms'], result['p95_ms'], name)
+        self.assertEqual(compare(report, report), [])
+
+    def test_scan_writes_are_rolled_back(self):
+        logs = AttendanceLog.objects.count()
+        report = run_suite(repeats=2, only=['scan_api'])
+
+        self.assertEqual(list(report['results']), ['scan_api'])
+        self.assertEqual(AttendanceLog.objects.count(), logs)
+        self.assertEqual(report['scale'], current_scale())
+
+
+@override_settings(SQLITE_WRITE_QUEUE=True)
+class WriteQueueTests(TransactionTestCase):
+
+    def setUp(self):
+        self.addCleanup(writer._writer.stop)
+        course = Course.objects.create(course_code='WRQ101', course_name='Writer Queue')
+        self.profile = UserProfile.objects.create(
+            user=User.objects.create(username='queued-student'),
+            full_name='Queued Student',
+            student_id='WRQ001',
+            email='queued@example.com',
+            course=course,
+            role='student',
+        )
+
+    def test_attendance_is_written_by_the_writer_thread(self):
+        threads = []
+        with self.assertNumQueries(0):
+            _, created = mark_attendance(self.profile)
+            _, again = mark_attendance(self.profile)
+
+        self.assertTrue(created)
+        self.assertFalse(again)
+        self.assertEqual(AttendanceLog.objects.count(), 1)
+        writer.run(lambda: threads.append(threading.current_thread()))
+        self.assertIs(threads[0], writer._writer.thread)
+
+    def test_job_errors_reach_the_caller_and_spare_the_batch(self):
+        def fail():
+            AttendanceLog.objects.create(user=self.profile.user, course=self.profile.course, student_id='X')
+            raise ValueError('job failed')
+
+        with self.assertRaisesMessage(ValueError, 'job failed'):
+            writer.run(fail)
+        self.assertFalse(AttendanceLog.objects.exists())
+        self.assertTrue(mark_attendance(self.profile)[1])
+
+    def test_runs_inline_inside_a_transaction(self):
+        with transaction.atomic():
+            writer.run(lambda: self.assertIs(threading.current_thread(), threading.main_thread()))
+            mark_attendance(self.profile)
+            transaction.set_rollback(True)
+        self.assertFalse(AttendanceLog.objects.exists())
+
+
+class SqliteBenchmarkCommandTests(SimpleTestCase):
+
+    def test_profiles_are_compared_on_a_scratch_database(self):
+        # The command adds its scratch database aliases at run time
+        scratch = {f'sqlite_benchmark_{profile}' for profile in ('default', 'production')}
+        self.enterContext(mock.patch.object(type(self), 'databases', scratch))
+        out = StringIO()
+        call_command('benchmark_sqlite', duration=0.3, kiosks=2, readers=1, students=200, json=True, stdout=out)
+        report = json.loads(out.getvalue())
+
+        self.assertEqual(set(report), {'default', 'production'})
+        self.assertEqual(report['default']['pragmas']['journal_mode'], 'delete')
+        self.assertEqual(report['production']['pragmas']['journal_mode'], 'wal')
+        self.assertEqual(report['production']['pragmas']['synchronous'], 1)
+        for result in report.values():
+            self.assertGreater(result['writes']['count'], 0)
+            self.assertEqual(result['writes']['locked'], 0)
+        self.assertGreaterEqual(report['production']['scans_per_commit'], 1)
+
+
+class ReplicaRoutingTests(SimpleTestCase):
+
+    def setUp(self):
+        metrics.reset()
+        self.addCleanup(metrics.reset)
+        self.enterContext(mock.patch.object(replica, 'replica_configured', return_value=True))
+
+    def read_alias(self, lag, **options):
+        router = replica.ReplicaRouter()
+        with mock.patch.object(replica, 'replica_lag', return_value=lag):
+            with replica.replica_reads(**options) as alias:
+                self.assertEqual(router.db_for_read(AttendanceLog), alias)
+                # Sessions and users always come from the primary
+                self.assertEqual(router.db_for_read(Session), 'default')
+                self.assertEqual(router.db_for_read(User), 'default')
+                with replica.primary():
+                    self.assertEqual(router.db_for_read(AttendanceLog), 'default')
+        self.assertIsNone(router.db_for_read(AttendanceLog))
+        self.assertEqual(router.db_for_write(AttendanceLog), 'default')
+        return alias
+
+    @override_settings(REPLICA_MAX_LAG=60)
+    def test_fresh_replica_serves_the_block(self):
+        self.assertEqual(self.read_alias(lag=30), 'replica')
+        self.assertEqual(replica.REPLICA_READS.snapshot(), {('replica',): 1})
+
+    @override_settings(REPLICA_MAX_LAG=60)
+    def test_stale_or_missing_replica_falls_back_to_the_primary(self):
+        self.assertEqual(self.read_alias(lag=90), 'default')
+        self.assertEqual(self.read_alias(lag=90, max_lag=120), 'replica')
+        self.assertEqual(self.read_alias(lag=None), 'default')
+        self.assertEqual(
+            replica.REPLICA_READS.snapshot(), {('stale',): 1, ('replica',): 1, ('unavailable',): 1}
+        )
+
+    def test_no_replica_configured(self):
+        with mock.patch.object(replica, 'replica_configured', return_value=False):
+            self.assertEqual(self.read_alias(lag=0), 'default')
+        self.assertEqual(replica.REPLICA_READS.snapshot(), {})
+
+
+class ReplicaSnapshotTests(TransactionTestCase):
+
+    def test_snapshot_is_a_consistent_copy_stamped_with_its_start(self):
+        course = Course.objects.create(course_code='SNAP101', course_name='Snapshot')
+        user = User.objects.create(username='snapshot-student')
+        AttendanceLog.objects.create(user=user, course=course, student_id='SNAP001', student_name='Snap')
+        directory = self.enterContext(tempfile.TemporaryDirectory())
+        path = os.path.join(directory, 'replica.sqlite3')
+
+        before = time.time()
+        replica.snapshot_sqlite(path)
+
+        self.assertLessEqual(before - 1, os.path.getmtime(path))
+        self.assertFalse(os.path.exists(f'{path}.tmp'))
+        with closing(sqlite3.connect(path)) as copy:
+            self.assertEqual(copy.execute('SELECT COUNT(*) FROM attendance_attendancelog').fetchone(), (1,))
+            self.assertEqual(copy.execute('PRAGMA journal_mode').fetchone(), ('delete',))
+
+    def test_command_needs_a_sqlite_replica(self):
+        with self.assertRaisesMessage(CommandError, 'DATABASE_REPLICA'):
+            call_command('snapshot_replica', stdout=StringIO())
+
+
+class SiteShardingTests(TransactionTestCase):
+    """Two campus sites on scratch SQLite files next to the default test database."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.TemporaryDirectory()
+        sites = {}
+        for number, (name, prefix) in enumerate([('north', 'N'), ('south', 'S')], start=1):
+            path = os.path.join(cls.directory.name, f'{name}.sqlite3')
+            sites[name] = {'number': number, 'database': path, 'courses': [prefix], 'devices': [f'{name}-']}
+            connections.settings[f'site_{name}'] = connections.configure_settings(
+                {DEFAULT_DB_ALIAS: {'ENGINE': 'django.db.backends.sqlite3', 'NAME': path}}
+            )[DEFAULT_DB_ALIAS]
+        cls.enterClassContext(override_settings(SITES=sites, SITE_DEFAULT='north'))
+        for name in sites:
+            sharding.create_schema(name)
+        # Added here: the test runner checks declared databases before they exist
+        cls.databases = {'default', 'site_north', 'site_south'}
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        for alias in ('site_north', 'site_south'):
+            connections[alias].close()
+            del connections[alias]
+            del connections.settings[alias]
+        cls.directory.cleanup()
+
+    def setUp(self):
+        self.instructor = User.objects.create(username='site-instructor', password='secret-hash', is_staff=True)
+        self.student = User.objects.create(username='site-student')
+
+    def course_in(self, site, code):
+        with sharding.site_scope(site):
+            course = Course.objects.create(course_code=code, course_name=code, instructor=self.instructor)
+            profile = UserProfile.objects.create(
+                user=User.objects.create(username=f'{code}-student'), full_name=f'{code} Student',
+                student_id=f'{code}-1', email=f'{code.lower()}@example.com', course=course, role='student',
+                fingerprint_template=code.encode() * 64, fingerprint_enrolled=True,
+            )
+        return course, profile
+
+    def test_course_codes_and_devices_pick_the_site(self):
+        self.assertEqual(sharding.site_for_course('n101'), 'north')
+        self.assertEqual(sharding.site_for_course('SCI200'), 'south')
+        self.assertEqual(sharding.site_for_course('X1'), 'north')
+        self.assertEqual(sharding.site_for_device('south-kiosk-2'), 'south')
+        with self.assertRaises(sharding.SiteError):
+            sharding.site_alias('east')
+
+    def test_writes_in_a_site_scope_stay_on_that_site(self):
+        course, profile = self.course_in('south', 'S101')
+        with sharding.site_scope('south'):
+            log, created = mark_attendance(profile)
+
+        self.assertTrue(created)
+        self.assertEqual(log._state.db, 'site_south')
+        self.assertTrue(AttendanceLog.objects.using('site_south').filter(pk=log.pk).exists())
+        self.assertFalse(Course.objects.exists())
+        self.assertFalse(Course.objects.using('site_north').exists())
+        # Referenced users are copied, without their password
+        copy = User.objects.using('site_south').get(pk=self.instructor.pk)
+        self.assertEqual(copy.username, 'site-instructor')
+        self.assertFalse(copy.has_usable_password())
+
+    def test_fan_out_queries_every_site_and_merges(self):
+        self.course_in('north', 'N101')
+        self.course_in('south', 'S101')
+        self.course_in('south', 'S102')
+
+        counts = sharding.fan_out(lambda site: {'courses': Course.objects.count()})
+        self.assertEqual(counts, {'north': {'courses': 1}, 'south': {'courses': 2}})
+        self.assertEqual(sharding.merge_counts(counts), {'courses': 3})
+        codes = sharding.fan_out(lambda site: list(Course.objects.values_list('course_code', flat=True)))
+        self.assertEqual(sharding.merge_lists(codes, key=str, reverse=True, limit=2), ['S102', 'S101'])
+
+        out = StringIO()
+        call_command('site_report', json=True, stdout=out)
+        report = json.loads(out.getvalue())
+        self.assertEqual(report['total']['courses'], 3)
+        self.assertEqual(report['sites']['south']['students'], 2)
+
+    def test_split_sites_copies_rows_as_they_are(self):
+        north = Course.objects.create(course_code='N101', course_name='North', instructor=self.instructor)
+        south = Course.objects.create(course_code='S101', course_name='South')
+        profile = UserProfile.objects.create(
+            user=self.student, full_name='Split Student', student_id='SPLIT1',
+            email='split@example.com', course=south, role='student',
+        )
+        log = AttendanceLog.objects.create(user=self.student, course=south, student_id='SPLIT1', student_name='Split')
+        AttendanceLog.objects.filter(pk=log.pk).update(date=date(2024, 9, 2))
+
+        call_command('split_sites', purge=True, stdout=StringIO())
+
+        self.assertEqual(list(Course.objects.using('site_north').values_list('pk', flat=True)), [north.pk])
+        self.assertEqual(UserProfile.objects.using('site_south').get().pk, profile.pk)
+        self.assertEqual(AttendanceLog.objects.using('site_south').get(pk=log.pk).date, date(2024, 9, 2))
+        self.assertFalse(Course.objects.exists())
+        self.assertFalse(AttendanceLog.objects.exists())
+        self.assertTrue(User.objects.filter(pk=self.student.pk).exists())
+        # New rows are numbered in the site's own id block
+        with sharding.site_scope('north'):
+            self.assertGreaterEqual(
+                Course.objects.create(course_code='N102', course_name='New').pk, sharding.SITE_ID_BLOCK
+            )
+
+    def test_split_sites_needs_sites(self):
+        with override_settings(SITES={}):
+            with self.assertRaisesMessage(CommandError, 'SITES_CONFIG'):
+                call_command('split_sites', stdout=StringIO())
+
+    @override_settings(R307_EMULATION=True)
+    def test_requests_run_on_their_site(self):
+        self.enterContext(mock.patch('builtins.print'))
+        course, profile = self.course_in('south', 'S101')
+        self.course_in('north', 'N101')
+
+        # Kiosk: the device id picks the site whose templates are matched
+        response = self.client.post(
+            '/fingerprint/api/scan/?device=south-kiosk-1', HTTP_X_EMULATED_FINGER=profile.fingerprint_template.hex()
+        )
+        self.assertEqual(response.json()['result'], 'marked')
+        self.assertEqual(AttendanceLog.objects.using('site_south').count(), 1)
+
+        # Course pages: the course code picks the site
+        self.client.force_login(self.instructor)
+        response = self.client.get(reverse('api_course_roster', args=['S101']))
+        self.assertEqual([row['full_name'] for row in response.json()['results']], ['S101 Student'])
+
+        # Admin dashboard: courses of every site
+        with mock.patch('attendance.views.render', return_value=HttpResponse()) as render:
+            self.client.get(reverse('instructor_dashboard'))
+        course_stats = render.call_args.args[2]['course_stats']
+        self.assertEqual([(row['site'], row['course'].course_code) for row in course_stats],
+                         [('north', 'N101'), ('south', 'S101')])
+        self.assertEqual(course_stats[1]['present_today'], 1)
+
+    def test_login_reads_the_profile_from_the_users_site(self):
+        user = User.objects.create_user(username='S-INS', password='south-pass-1')
+        with sharding.site_scope('south'):
+            UserProfile.objects.create(
+                user=user, full_name='South Instructor', student_id='S-INS', email='s-ins@example.com',
+                role='instructor',
+            )
+
+        response = self.client.post(reverse('user_login'), {'student_id': 'S-INS', 'password': 'south-pass-1'})
+        self.assertRedirects(response, reverse('instructor_dashboard'), fetch_redirect_response=False)
+
+    async def test_asgi_requests_run_on_their_site(self):
+        await sync_to_async(self.course_in)('south', 'S101')
+        await self.async_client.aforce_login(self.instructor)
+
+        response = await self.async_client.get(reverse('api_course_roster', args=['S101']))
+        self.assertEqual([row['full_name'] for row in response.json()['results']], ['S101 Student'])
+        self.assertIsNone(sharding.current_site())
+
+
+class ReportCacheTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        directory = self.enterContext(tempfile.TemporaryDirectory())
+        self.enterContext(override_settings(REPORT_CACHE_DIR=directory, JOBS_ARTIFACT_DIR=directory, JOBS_RUN_INLINE=False))
+        self.instructor = User.objects.create(username='report-instructor', is_staff=True)
+        self.course = Course.objects.create(course_code='REP101', course_name='Reports', instructor=self.instructor)
+        AttendanceLog.objects.create(
+            user=User.objects.create(username='report-student'), course=self.course,
+            student_id='R-1', student_name='Report Student',
+        )
+        self.client.force_login(self.instructor)
+
+    def download(self, fmt='xlsx', **headers):
+        return self.client.get(reverse('attendance_report', args=['REP101']), {'format': fmt}, headers=headers)
+
+    def build(self, fmt='xlsx'):
+        """Request the report and run the job it queues."""
+        response = self.download(fmt)
+        job = Job.objects.latest('pk')
+        self.assertRedirects(response, reverse('job_page', args=[job.pk]), fetch_redirect_response=False)
+        claim(job.pk, 'test')
+        execute(job.pk, close_connections=False)
+        job.refresh_from_db()
+        return job
+
+    def scan(self):
+        AttendanceLog.objects.create(
+            user=User.objects.create(username=f'report-student-{AttendanceLog.objects.count()}'),
+            course=self.course, student_id='R-2', student_name='Another Student',
+        )
+
+    def test_key_changes_with_new_attendance(self):
+        key = report_cache.report_key(self.course, 'xlsx')
+        self.assertEqual(report_cache.report_key(self.course, 'xlsx'), key)
+        self.assertNotEqual(report_cache.report_key(self.course, 'csv'), key)
+
+        self.scan()
+        self.assertNotEqual(report_cache.report_key(self.course, 'xlsx'), key)
+
+    def test_editing_a_log_gives_a_new_report(self):
+        self.build('csv')
+        response = self.download('csv')
+        self.assertEqual(response.status_code, 200)
+
+        # Same ids and count - only the status changes
+        with self.captureOnCommitCallbacks(execute=True):
+            log = AttendanceLog.objects.get()
+            log.status = 'absent'
+            log.save()
+
+        self.assertEqual(self.download('csv', If_None_Match=response['ETag']).status_code, 302)
+        self.build('csv')
+        response = self.download('csv')
+        self.assertIn(b',Absent,', response.getvalue())
+
+    def test_report_is_built_once_then_served_from_the_cache(self):
+        job = self.build()
+        self.assertEqual(job.result['rows'], 1)
+
+        with mock.patch('attendance.tasks.build_report') as build_report:
+            response = self.download()
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(b''.join(response.streaming_content).startswith(b'PK'))
+            self.assertEqual(response['Accept-Ranges'], 'bytes')
+            build_report.assert_not_called()
+
+        self.assertEqual(self.download(If_None_Match=response['ETag']).status_code, 304)
+
+        # A new scan makes the cached file out of date
+        self.scan()
+        self.assertEqual(self.download(If_None_Match=response['ETag']).status_code, 302)
+
+    @override_settings(JOBS_RUN_INLINE=True)
+    def test_without_a_worker_the_report_is_built_in_the_request(self):
+        response = self.download()
+        job = Job.objects.get()
+        self.assertEqual(job.status, Job.SUCCEEDED)
+        self.assertRedirects(response, reverse('job_page', args=[job.pk]), fetch_redirect_response=False)
+        self.assertEqual(self.download().status_code, 200)
+
+    def test_the_built_version_stays_downloadable(self):
+        job = self.build()
+        self.scan()
+
+        response = self.client.get(job.result['download_url'])
+        self.assertEqual(response.status_code, 200)
+
+        report_cache.invalidate(self.course.pk)
+        response = self.client.get(job.result['download_url'])
+        self.assertRedirects(response, reverse('attendance_report', args=['REP101']) + '?format=xlsx',
+                             fetch_redirect_response=False)
+
+    def test_csv_is_stored_gzipped(self):
+        self.build('csv')
+        cached = report_cache.get(self.course, report_cache.report_key(self.course, 'csv'), 'csv')
+        self.assertEqual(cached.path.read_bytes()[:2], b'\x1f\x8b')
+
+        compressed = self.download('csv', Accept_Encoding='gzip, deflate')
+        self.assertEqual(compressed['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', compressed['Vary'])
+
+        plain = self.download('csv')
+        self.assertFalse(plain.has_header('Content-Encoding'))
+        self.assertTrue(plain.content.startswith(b'Student ID,Student Name'))
+        self.assertNotEqual(plain['ETag'], compressed['ETag'])
+
+    def test_range_requests(self):
+        self.build('csv')
+        body = self.download('csv').content
+
+        response = self.download('csv', Range='bytes=0-9')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response.content, body[:10])
+        self.assertEqual(response['Content-Range'], f'bytes 0-9/{len(body)}')
+
+        self.assertEqual(self.download('csv', Range='bytes=-5').content, body[-5:])
+        self.assertEqual(self.download('csv', Range=f'bytes={len(body)}-').status_code, 416)
+        # A changed file (If-Range mismatch) is sent whole
+        self.assertEqual(self.download('csv', Range='bytes=0-9', If_Range='"old"').status_code, 200)
+
+    def test_least_recently_used_reports_are_evicted(self):
+        paths = []
+        for number in range(3):
+            cached = report_cache.put(self.course, f'key{number}', 'xlsx', b'x' * 100)
+            os.utime(cached.path, (1000 + number, 1000 + number))
+            paths.append(cached.path)
+        # Using the oldest makes the second one least recently used
+        report_cache.get(self.course, 'key0', 'xlsx')
+
+        self.assertEqual(report_cache.evict(max_bytes=250), 1)
+        self.assertEqual([path.exists() for path in paths], [True, False, True])
+
+        with self.settings(REPORT_CACHE_MAX_BYTES=150):
+            newest = report_cache.put(self.course, 'key3', 'xlsx', b'x' * 200)
+        self.assertTrue(newest.path.exists())
+        self.assertEqual(list(newest.path.parent.iterdir()), [newest.path])
+
+
+class AnalyticsTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.instructor = User.objects.create(username='analytics-instructor', is_staff=True)
+        self.course = Course.objects.create(course_code='ANA101', course_name='Analytics', instructor=self.instructor)
+        self.alice = self.enrol('A-1', 'Alice')
+        self.bob = self.enrol('B-1', 'Bob')
+        self.attend(self.alice, date(2025, 3, 3))
+        self.attend(self.alice, date(2025, 3, 4))
+        self.attend(self.bob, date(2025, 3, 4))
+
+    def enrol(self, student_id, name):
+        return UserProfile.objects.create(
+            user=User.objects.create(username=student_id), full_name=name, student_id=student_id,
+            email=f'{student_id.lower()}@example.com', course=self.course, role='student',
+        )
+
+    def attend(self, profile, day):
+        log = AttendanceLog.objects.create(
+            user=profile.user, course=self.course, student_id=profile.student_id, student_name=profile.full_name,
+        )
+        AttendanceLog.objects.filter(pk=log.pk).update(date=day)
+        return log
+
+    def rates(self, data):
+        return {student['student_id']: student['attendance_rate'] for student in data['students']}
+
+    def test_build_course_analytics(self):
+        data = analytics.build_course_analytics(self.course)
+
+        self.assertEqual((data['total_students'], data['total_sessions']), (2, 2))
+        self.assertEqual(self.rates(data), {'A-1': 100.0, 'B-1': 50.0})
+        self.assertEqual(data['overall_rate'], 75.0)
+        self.assertEqual((data['first_session'], data['last_session']), ('2025-03-03', '2025-03-04'))
+        self.assertEqual([day['sessions'] for day in data['weekday_pattern'][:2]], [1, 1])
+
+    def test_at_risk_students(self):
+        data = analytics.build_course_analytics(self.course)
+
+        self.assertEqual([s['student_id'] for s in analytics.at_risk_students(data, 75)], ['B-1'])
+        self.assertEqual(analytics.at_risk_students(data, 50), [])
+        self.assertEqual(analytics.at_risk_students({**data, 'total_sessions': 0}), [])
+
+    def test_cached_result_follows_roster_and_log_changes(self):
+        first = analytics.get_course_analytics(self.course)
+        self.assertEqual(analytics.get_course_analytics(self.course)['generated_at'], first['generated_at'])
+
+        # Enrolment: the latest log id stays the same
+        self.enrol('C-1', 'Carol')
+        self.assertEqual(analytics.get_course_analytics(self.course)['total_students'], 3)
+
+        # An older log deleted
+        AttendanceLog.objects.filter(user=self.alice.user, date=date(2025, 3, 3)).delete()
+        self.assertEqual(analytics.get_course_analytics(self.course)['total_sessions'], 1)
+
+        # A log edited in place (Firestore sync) - update() sends no signals
+        AttendanceLog.objects.filter(user=self.bob.user).update(status='absent')
+        lookup_cache.invalidate_attendance(self.course.pk)
+        self.assertEqual(self.rates(analytics.get_course_analytics(self.course))['B-1'], 0.0)
+
+    def test_data_view(self):
+        self.client.force_login(self.instructor)
+        url = reverse('course_analytics_data', args=['ANA101'])
+
+        data = self.client.get(url, {'threshold': '60'}).json()
+        self.assertEqual(data['at_risk_threshold'], 60.0)
+        self.assertEqual([student['student_id'] for student in data['at_risk']], ['B-1'])
+
+        for threshold in ('abc', 'nan', 'inf', '-1', '100.5'):
+            self.assertEqual(self.client.get(url, {'threshold': threshold}).status_code, 400, threshold)
+
+        self.client.force_login(User.objects.create(username='analytics-student'))
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+
+class AttendanceApiTests(TestCase):
+
+    def setUp(self):
+        self.instructor = User.objects.create(username='api-instructor', is_staff=True)
+        self.course = Course.objects.create(course_code='API101', course_name='API', instructor=self.instructor)
+        self.logs = []
+        for number in range(5):
+            log = AttendanceLog.objects.create(
+                user=User.objects.create(username=f'api-student-{number}'), course=self.course,
+                student_id=f'API{number}', student_name=f'Student {number}',
+            )
+            # Two logs per day: newest day first, then newest id first
+            AttendanceLog.objects.filter(pk=log.pk).update(date=date(2025, 3, 1 + number // 2))
+            self.logs.append(log)
+        self.client.force_login(self.instructor)
+        self.url = reverse('api_attendance_logs')
+
+    def test_cursor_pagination_walks_every_log_once(self):
+        expected = [log.pk for log in sorted(
+            AttendanceLog.objects.all(), key=lambda log: (log.date, log.pk), reverse=True
+        )]
+        seen, params = [], {'limit': 2, 'fields': 'id'}
+        while True:
+            page = self.client.get(self.url, params).json()
+            seen += [row['id'] for row in page['results']]
+            if not page['next_cursor']:
+                break
+            params['cursor'] = page['next_cursor']
+
+        self.assertEqual(seen, expected)
+        self.assertEqual(self.client.get(self.url, {'cursor': '!!'}).status_code, 400)
+
+    def test_fields_selection(self):
+        rows = self.client.get(self.url, {'fields': 'student_id,course_code', 'limit': 1}).json()['results']
+        self.assertEqual(rows, [{'student_id': 'API4', 'course_code': 'API101'}])
+        self.assertEqual(self.client.get(self.url, {'fields': 'student_id,password'}).status_code, 400)
+
+    def test_if_none_match_until_attendance_changes(self):
+        etag = self.client.get(self.url)['ETag']
+        self.assertEqual(self.client.get(self.url, headers={'If-None-Match': etag}).status_code, 304)
+
+        # Edited in place (Firestore sync): the latest id does not change
+        AttendanceLog.objects.filter(pk=self.logs[0].pk).update(status='absent')
+        lookup_cache.invalidate_attendance(self.course.pk)
+        response = self.client.get(self.url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+
+        # An older log deleted
+        self.logs[1].delete()
+        self.assertEqual(self.client.get(self.url, headers={'If-None-Match': etag}).status_code, 200)
+
+
+class EventStreamTests(TestCase):
+
+    def setUp(self):
+        self.instructor = User.objects.create(username='events-instructor', is_staff=True)
+        self.course = Course.objects.create(course_code='EVT101', course_name='Events', instructor=self.instructor)
+        self.log(0)
+
+    def log(self, number):
+        return AttendanceLog.objects.create(
+            user=User.objects.create(username=f'events-student-{number}'), course=self.course,
+            student_id=f'EVT{number}', student_name=f'Student {number}',
+        )
+
+    @staticmethod
+    def parse(chunk):
+        fields = dict(line.split(': ', 1) for line in chunk.strip().splitlines())
+        return int(fields['id']), json.loads(fields['data'])
+
+    async def test_stream_sends_new_attendance(self):
+        stream = events._stream(self.course, None)
+        self.assertEqual(await anext(stream), f'retry: {events.RETRY_MS}\n\n')
+        waiting = asyncio.ensure_future(anext(stream))
+        await asyncio.sleep(0.05)
+
+        log = await sync_to_async(self.log)(1)
+        events.publish(log)
+
+        sse_id, data = self.parse(await asyncio.wait_for(waiting, 5))
+        await stream.aclose()
+        self.assertEqual(sse_id, log.pk)
+        self.assertEqual((data['student_id'], data['course_code']), ('EVT1', 'EVT101'))
+
+    async def test_last_event_id_resumes_and_late_commits_are_sent(self):
+        first = await sync_to_async(AttendanceLog.objects.get)(student_id='EVT0')
+        await sync_to_async(self.log)(1)
+
+        stream = events._stream(self.course, first.pk)
+        await anext(stream)
+        self.assertEqual(self.parse(await anext(stream))[1]['student_id'], 'EVT1')
+
+        # EVT2 gets the lower id but commits after EVT3
+        late = await sync_to_async(self.log)(2)
+        events.publish(await sync_to_async(self.log)(3))
+        sse_id, data = self.parse(await anext(stream))
+        self.assertEqual(data['student_id'], 'EVT3')
+
+        with mock.patch.object(events, 'HEARTBEAT_INTERVAL', 0.05):
+            late_id, data = self.parse(await asyncio.wait_for(anext(stream), 5))
+        await stream.aclose()
+        self.assertEqual(data['id'], late.pk)
+        # Last-Event-ID never moves back below an event already sent
+        self.assertEqual(late_id, sse_id)
+
+    def test_wsgi_request_gets_the_missed_events_and_ends(self):
+        first = AttendanceLog.objects.get(student_id='EVT0')
+        self.log(1)
+        self.client.force_login(self.instructor)
+        url = reverse('course_events', args=['EVT101'])
+
+        body = b''.join(self.client.get(url, headers={'Last-Event-ID': str(first.pk)}).streaming_content).decode()
+        chunks = body.split('\n\n')
+        self.assertEqual(chunks[0], f'retry: {events.RETRY_MS}')
+        self.assertEqual(self.parse(chunks[1])[1]['student_id'], 'EVT1')
+
+        body = b''.join(self.client.get(url).streaming_content).decode()
+        self.assertIn(f'id: {AttendanceLog.objects.latest("id").pk}\n\n', body)
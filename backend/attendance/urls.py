@@ -6,7 +6,7 @@ URL routes for instructor dashboard and attendance viewing.
 ============================================================
 """
 from django.urls import path
-from . import views
+from . import views, api, events
 
 urlpatterns = [
     # Instructor dashboard - view all courses
@@ -15,8 +15,23 @@ urlpatterns = [
     # View attendance for specific course
     path('course/<str:course_code>/', views.course_attendance, name='course_attendance'),
     
-    # Download attendance report for course (Excel)
+    # Download attendance report for course (Excel, or ?format=csv)
     path('report/<str:course_code>/', views.attendance_report, name='attendance_report'),
-]
 
- 
\ No newline at end of file
+    # Download one built version of the report (linked from its job)
+    path('report/<str:course_code>/<slug:key>/', views.attendance_report_download, name='attendance_report_download'),
+
+    # Attendance analytics dashboard for course
+    path('analytics/<str:course_code>/', views.course_analytics, name='course_analytics'),
+
+    # Attendance analytics data for course (JSON)
+    path('analytics/<str:course_code>/data/', views.course_analytics_data, name='course_analytics_data'),
+
+    # Read-only JSON API (cursor pagination + conditional GET)
+    path('api/logs/', api.attendance_logs, name='api_attendance_logs'),
+    path('api/courses/', api.courses, name='api_courses'),
+    path('api/courses/<str:course_code>/roster/', api.course_roster, name='api_course_roster'),
+
+    # Live attendance feed for course (Server-Sent Events)
+    path('events/<str:course_code>/', events.course_events, name='course_events'),
+]
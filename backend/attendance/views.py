@@ -3,17 +3,29 @@
 ATTENDANCE VIEWS
 ============================================================
 Handles instructor dashboard and attendance viewing.
+Dashboard, course attendance and report read from the replica
+when one is configured (fingerprint_attendance/replica.py).
 ============================================================
 """
 from django.shortcuts import render, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
+from django.http import JsonResponse
+from django.urls import reverse
 from .models import AttendanceLog
+from .reports import FORMATS, report_filename
+from . import analytics, report_cache
 from users.models import UserProfile, Course
+from fingerprint_attendance import cache as lookup_cache, sharding
+from fingerprint_attendance.downloads import serve_file
+from fingerprint_attendance.replica import replica_reads
+from jobs import queue as jobs
 from datetime import date, timedelta
+import math
 
 
 @login_required
+@replica_reads()
 def instructor_dashboard(request):
     """
     Instructor Dashboard - View courses and attendance.
@@ -28,7 +40,7 @@ def instructor_dashboard(request):
     """
     # Check if user is instructor or admin
     try:
-        profile = UserProfile.objects.get(user=request.user)
+        profile = lookup_cache.get_profile(request.user)
         if profile.role != 'instructor' and not request.user.is_staff:
             messages.error(request, '❌ Access denied! Only instructors can access this page.')
             return redirect('home')
@@ -37,28 +49,35 @@ def instructor_dashboard(request):
             messages.error(request, '❌ Access denied!')
             return redirect('home')
     
-    # Get courses for this instructor
-    if request.user.is_staff:
-        # Admins can see all courses
-        courses = Course.objects.all()
-    else:
-        # Instructors see only their courses
-        courses = Course.objects.filter(instructor=request.user)
-    
-    # Get attendance stats for each course (today)
+    # Get attendance stats for each course (today), on every campus site
     today = date.today()
-    course_stats = []
-    
-    for course in courses:
-        total_students = UserProfile.objects.filter(course=course, role='student').count()
-        present_today = AttendanceLog.objects.filter(course=course, date=today).count()
-        
-        course_stats.append({
-            'course': course,
-            'total_students': total_students,
-            'present_today': present_today,
-            'absent_today': total_students - present_today
-        })
+
+    def site_course_stats(site):
+        if request.user.is_staff:
+            # Admins can see all courses
+            courses = lookup_cache.get_all_courses()
+        else:
+            # Instructors see only their courses (from the cached course list)
+            courses = [course for course in lookup_cache.get_all_courses() if course.instructor_id == request.user.id]
+
+        course_stats = []
+        for course in courses:
+            stats = lookup_cache.get_course_day_stats(course, today)
+            total_students = stats['total_students']
+            present_today = stats['present']
+
+            course_stats.append({
+                'course': course,
+                'site': site,
+                'total_students': total_students,
+                'present_today': present_today,
+                'absent_today': total_students - present_today
+            })
+        return course_stats
+
+    course_stats = sharding.merge_lists(
+        sharding.fan_out(site_course_stats), key=lambda row: row['course'].course_code
+    )
     
     context = {
         'course_stats': course_stats,
@@ -69,6 +88,7 @@ def instructor_dashboard(request):
 
 
 @login_required
+@replica_reads()
 def course_attendance(request, course_code):
     """
     View attendance for a specific course.
@@ -84,7 +104,7 @@ def course_attendance(request, course_code):
     """
     # Check if user is instructor or admin
     try:
-        profile = UserProfile.objects.get(user=request.user)
+        profile = lookup_cache.get_profile(request.user)
         if profile.role != 'instructor' and not request.user.is_staff:
             messages.error(request, '❌ Access denied!')
             return redirect('home')
@@ -95,13 +115,13 @@ def course_attendance(request, course_code):
     
     # Get the course
     try:
-        course = Course.objects.get(course_code=course_code.upper())
+        course = lookup_cache.get_course(course_code)
     except Course.DoesNotExist:
         messages.error(request, f'❌ Course "{course_code}" not found!')
         return redirect('instructor_dashboard')
     
     # Check if instructor has access to this course
-    if not request.user.is_staff and course.instructor != request.user:
+    if not request.user.is_staff and course.instructor_id != request.user.id:
         messages.error(request, '❌ You do not have access to this course!')
         return redirect('instructor_dashboard')
     
@@ -159,21 +179,125 @@ def course_attendance(request, course_code):
     return render(request, 'attendance/course_attendance.html', context)
 
 
+def _report_access_denied(request):
+    """Redirect for users who may not download reports (instructors and admins may)."""
+    try:
+        profile = lookup_cache.get_profile(request.user)
+        if profile.role != 'instructor' and not request.user.is_staff:
+            messages.error(request, '❌ Access denied!')
+            return redirect('home')
+    except UserProfile.DoesNotExist:
+        if not request.user.is_staff:
+            messages.error(request, '❌ Access denied!')
+            return redirect('home')
+    return None
+
+
+def _serve_report(request, course, cached):
+    return serve_file(
+        request, cached.path, report_filename(course.course_code, fmt=cached.fmt),
+        FORMATS[cached.fmt], etag=cached.key, encoding=cached.encoding,
+    )
+
+
 @login_required
 def attendance_report(request, course_code):
     """
-    Download attendance report for a course (Excel).
+    Download attendance report for a course (Excel, or ?format=csv).
+    
+    A report built since the course's last scan comes straight from
+    the report cache (attendance/report_cache.py). Otherwise a
+    background job ("attendance.report", attendance/tasks.py) builds
+    it; this view queues the job and redirects to its progress page,
+    which starts the download when it is ready.
     
     Access: Instructors and admins only
     URL: /attendance/report/<course_code>/
     """
-    from django.http import HttpResponse
-    import pandas as pd
-    from datetime import datetime
-    
     # Check access
+    denied = _report_access_denied(request)
+    if denied:
+        return denied
+    
+    # Get the course
     try:
-        profile = UserProfile.objects.get(user=request.user)
+        course = lookup_cache.get_course(course_code)
+    except Course.DoesNotExist:
+        messages.error(request, f'❌ Course "{course_code}" not found!')
+        return redirect('instructor_dashboard')
+    
+    fmt = request.GET.get('format', 'xlsx')
+    if fmt not in FORMATS:
+        messages.error(request, f'❌ Unknown report format "{fmt}"!')
+        return redirect('course_attendance', course_code=course.course_code)
+    
+    # Same database the job would build from (see attendance/tasks.py)
+    with replica_reads():
+        key = report_cache.report_key(course, fmt)
+    cached = report_cache.get(course, key, fmt)
+    if cached:
+        return _serve_report(request, course, cached)
+    
+    # Queue the report (reusing one already on its way for this user)
+    job = jobs.enqueue('attendance.report', user=request.user, unique=True, course_code=course.course_code, fmt=fmt)
+    
+    return redirect('job_page', job_id=job.pk)
+
+
+@login_required
+def attendance_report_download(request, course_code, key):
+    """
+    Download one built version of a course's report.
+    
+    The report job links here, so the file it built downloads even
+    if attendance was marked in the meantime. A version that was
+    evicted from the cache is rebuilt via attendance_report.
+    
+    Access: Instructors and admins only
+    URL: /attendance/report/<course_code>/<key>/?format=xlsx
+    """
+    denied = _report_access_denied(request)
+    if denied:
+        return denied
+    
+    try:
+        course = lookup_cache.get_course(course_code)
+    except Course.DoesNotExist:
+        messages.error(request, f'❌ Course "{course_code}" not found!')
+        return redirect('instructor_dashboard')
+    
+    fmt = request.GET.get('format', 'xlsx')
+    if fmt not in FORMATS:
+        fmt = 'xlsx'
+    cached = report_cache.get(course, key, fmt)
+    if cached is None:
+        # Evicted - get the current version instead
+        return redirect(f"{reverse('attendance_report', args=[course.course_code])}?format={fmt}")
+    
+    return _serve_report(request, course, cached)
+
+
+
+
+@login_required
+def course_analytics(request, course_code):
+    """
+    Attendance analytics dashboard for a course.
+    
+    Access: Instructors and admins only
+    URL: /attendance/analytics/<course_code>/
+    
+    Features:
+        - Attendance rate per student
+        - Rolling 4-week trend
+        - At-risk students below a threshold
+        - Per-weekday attendance pattern
+    
+    The page loads its data from course_analytics_data (JSON).
+    """
+    # Check if user is instructor or admin
+    try:
+        profile = lookup_cache.get_profile(request.user)
         if profile.role != 'instructor' and not request.user.is_staff:
             messages.error(request, '❌ Access denied!')
             return redirect('home')
@@ -184,46 +308,72 @@ def attendance_report(request, course_code):
     
     # Get the course
     try:
-        course = Course.objects.get(course_code=course_code.upper())
+        course = lookup_cache.get_course(course_code)
     except Course.DoesNotExist:
         messages.error(request, f'❌ Course "{course_code}" not found!')
         return redirect('instructor_dashboard')
     
-    # Get all attendance logs for this course
-    logs = AttendanceLog.objects.filter(course=course).order_by('-date', 'time')
-    
-    # Convert to DataFrame
-    data = [
-        {
-            'Student ID': log.student_id,
-            'Student Name': log.student_name,
-            'Date': log.date.strftime('%Y-%m-%d'),
-            'Time': log.time.strftime('%I:%M %p'),
-            'Status': log.status.capitalize(),
-            'Scan Method': log.scan_method.capitalize(),
-        }
-        for log in logs
-    ]
-    
-    df = pd.DataFrame(data)
-    
-    if df.empty:
-        df = pd.DataFrame(columns=[
-            'Student ID', 'Student Name', 'Date', 'Time', 'Status', 'Scan Method'
-        ])
-    
-    # Generate filename
-    filename = f'attendance_{course_code}_{datetime.now().strftime("%Y-%m-%d")}.xlsx'
-    
-    # Create HTTP response
-    response = HttpResponse(
-        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-    )
-    response['Content-Disposition'] = f'attachment; filename={filename}'
+    # Check if instructor has access to this course
+    if not request.user.is_staff and course.instructor_id != request.user.id:
+        messages.error(request, '❌ You do not have access to this course!')
+        return redirect('instructor_dashboard')
     
-    # Write to Excel
-    df.to_excel(response, index=False, engine='openpyxl')
+    context = {
+        'course': course,
+        'default_threshold': analytics.DEFAULT_AT_RISK_THRESHOLD,
+    }
     
-    return response
+    return render(request, 'attendance/course_analytics.html', context)
 
 
+@login_required
+def course_analytics_data(request, course_code):
+    """
+    Attendance analytics for a course as JSON.
+    
+    Access: Instructors and admins only
+    URL: /attendance/analytics/<course_code>/data/
+    
+    Query params:
+        threshold: At-risk attendance percentage, 0-100 (default: 75)
+    
+    Returns:
+        JSON with per-student rates, weekly trend, weekday pattern
+        and the at-risk list. Served from cache until a new
+        attendance log is written for the course.
+    """
+    # Check if user is instructor or admin
+    try:
+        profile = lookup_cache.get_profile(request.user)
+        if profile.role != 'instructor' and not request.user.is_staff:
+            return JsonResponse({'error': 'Access denied'}, status=403)
+    except UserProfile.DoesNotExist:
+        if not request.user.is_staff:
+            return JsonResponse({'error': 'Access denied'}, status=403)
+    
+    # Get the course
+    try:
+        course = lookup_cache.get_course(course_code)
+    except Course.DoesNotExist:
+        return JsonResponse({'error': f'Course "{course_code}" not found'}, status=404)
+    
+    # Check if instructor has access to this course
+    if not request.user.is_staff and course.instructor_id != request.user.id:
+        return JsonResponse({'error': 'You do not have access to this course'}, status=403)
+    
+    # At-risk threshold from query params
+    try:
+        threshold = float(request.GET.get('threshold', analytics.DEFAULT_AT_RISK_THRESHOLD))
+    except ValueError:
+        return JsonResponse({'error': 'threshold must be a number'}, status=400)
+    # float() also accepts "nan" and "inf", which are not valid JSON
+    if not math.isfinite(threshold) or not 0 <= threshold <= 100:
+        return JsonResponse({'error': 'threshold must be between 0 and 100'}, status=400)
+    
+    data = analytics.get_course_analytics(course)
+    
+    return JsonResponse({
+        **data,
+        'at_risk_threshold': threshold,
+        'at_risk': analytics.at_risk_students(data, threshold),
+    })
@@ -0,0 +1,261 @@
+"""
+============================================================
+DEVICE DIRECTORY (FINGERPRINT ID -> STUDENT)
+============================================================
+Index of the Firestore fingerprint_mapping and students
+collections, built once and kept in the Django cache, so a
+device scan is resolved without per-scan document reads:
+
+    {fingerprint_id: {'student_id', 'full_name', 'course_code'}}
+
+Ids missing from the cached index (e.g. enrolled a minute
+ago) fall back to a direct lookup. Writers of students and
+mappings (Firestore sync, add_student_firebase.py) drop the
+index with invalidate_directory(), so a remapped id is not
+served from the cache until it expires.
+
+Every rebuild is also diffed into the versioned DirectoryEntry
+table; devices download a snapshot once and then ask for the
+changes since their version (see encode_directory).
+============================================================
+"""
+import struct
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from docstore import FingerprintMappingRepository, StudentRepository
+
+from .models import DirectoryEntry
+
+
+DIRECTORY_CACHE_KEY = 'devices:directory'
+
+
+def _entry(student_id, student):
+    return {
+        'student_id': student_id,
+        'full_name': student.get('full_name', ''),
+        'course_code': student.get('course_code', ''),
+    }
+
+
+def build_directory(store):
+    """
+    Read every fingerprint mapping and its student (one query + one batched get).
+
+    Returns:
+        dict: {fingerprint_id (int): entry}
+    """
+    mappings = {}
+    for document in FingerprintMappingRepository(store).all():
+        if document.id.isdigit() and document.get('student_id'):
+            mappings[int(document.id)] = document.get('student_id')
+
+    students = StudentRepository(store).get_many(set(mappings.values()))
+    return {
+        fingerprint_id: _entry(student_id, students[student_id])
+        for fingerprint_id, student_id in mappings.items()
+        if student_id in students
+    }
+
+
+def get_directory(store):
+    """Cached directory (rebuilt after DEVICE_DIRECTORY_TIMEOUT seconds)."""
+    directory = cache.get(DIRECTORY_CACHE_KEY)
+    if directory is None:
+        directory = build_directory(store)
+        record_versions(directory)
+        cache.set(DIRECTORY_CACHE_KEY, directory, settings.DEVICE_DIRECTORY_TIMEOUT)
+    return directory
+
+
+def invalidate_directory():
+    """Drop the cached index - call after writing students or fingerprint mappings."""
+    cache.delete(DIRECTORY_CACHE_KEY)
+
+
+def resolve(store, fingerprint_id):
+    """
+    Look up the student for a sensor fingerprint id.
+
+    Returns:
+        dict: Directory entry, or None if the id is not mapped
+    """
+    entry = get_directory(store).get(fingerprint_id)
+    if entry is not None:
+        return entry
+
+    # Not in the cached index - check the source directly
+    student_id = FingerprintMappingRepository(store).student_for(fingerprint_id)
+    if not student_id:
+        return None
+    student = StudentRepository(store).get(student_id)
+    if student is None:
+        return None
+
+    # The index is stale - rebuild it on the next scan
+    invalidate_directory()
+    return _entry(student_id, student)
+
+
+# ========== VERSIONED SNAPSHOTS / DELTAS ==========
+
+def current_version():
+    return DirectoryEntry.objects.aggregate(version=Max('version'))['version'] or 0
+
+
+@transaction.atomic
+def record_versions(directory):
+    """
+    Diff a freshly built directory into DirectoryEntry.
+
+    Changed, new and removed ids get the next version number;
+    an unchanged directory keeps its version.
+
+    Returns:
+        int: Current directory version
+    """
+    stored = {entry.fingerprint_id: entry for entry in DirectoryEntry.objects.select_for_update()}
+    version = max((entry.version for entry in stored.values()), default=0) + 1
+    # bulk_update() does not apply auto_now
+    now = timezone.now()
+
+    changed, created = [], []
+    for fingerprint_id, values in directory.items():
+        entry = stored.get(fingerprint_id)
+        if entry is None:
+            created.append(DirectoryEntry(fingerprint_id=fingerprint_id, version=version, **values))
+        elif entry.deleted or any(getattr(entry, field) != value for field, value in values.items()):
+            for field, value in values.items():
+                setattr(entry, field, value)
+            entry.deleted = False
+            entry.version = version
+            entry.updated_at = now
+            changed.append(entry)
+
+    for fingerprint_id, entry in stored.items():
+        if fingerprint_id not in directory and not entry.deleted:
+            entry.deleted = True
+            entry.version = version
+            entry.updated_at = now
+            changed.append(entry)
+
+    if created:
+        DirectoryEntry.objects.bulk_create(created)
+    if changed:
+        DirectoryEntry.objects.bulk_update(
+            changed, ['student_id', 'full_name', 'course_code', 'deleted', 'version', 'updated_at']
+        )
+    if created or changed:
+        return version
+    return version - 1
+
+
+def entries_for(device_id, since=None):
+    """
+    Directory entries for a device.
+
+    Args:
+        device_id: Device asking (settings.DEVICE_COURSES limits its courses)
+        since: Only entries changed after this version (None = full snapshot)
+
+    Returns:
+        list: (fingerprint_id, entry dict or None) - None means "remove"
+    """
+    entries = DirectoryEntry.objects.all()
+    if since is None:
+        entries = entries.filter(deleted=False)
+    else:
+        entries = entries.filter(version__gt=since)
+
+    courses = settings.DEVICE_COURSES.get(device_id)
+    result = []
+    for entry in entries:
+        visible = not entry.deleted and (not courses or entry.course_code in courses)
+        if visible:
+            result.append((entry.fingerprint_id, {
+                'student_id': entry.student_id,
+                'full_name': entry.full_name,
+                'course_code': entry.course_code,
+            }))
+        elif since is not None:
+            # Removed, or moved to a course this device does not serve
+            result.append((entry.fingerprint_id, None))
+    return result
+
+
+# Binary layout (all integers little-endian):
+#   header:  b'FPD1' | u32 version | u32 since (0 = full snapshot) | u16 count
+#   entry:   u16 fingerprint_id | u8 flags (1 = removed)
+#            then, unless removed, three u8-length-prefixed UTF-8 strings:
+#            student_id, full_name, course_code
+DIRECTORY_MAGIC = b'FPD1'
+FLAG_REMOVED = 1
+MAX_U16 = 0xFFFF
+
+
+class DirectoryTooLarge(ValueError):
+    """Directory does not fit the binary format (u16 count / fingerprint ids)."""
+
+
+def _short_string(value):
+    # Cut at 255 bytes without splitting a multi-byte character
+    encoded = value.encode('utf-8')[:255].decode('utf-8', errors='ignore').encode('utf-8')
+    return struct.pack('<B', len(encoded)) + encoded
+
+
+def encode_directory(version, entries, since=None):
+    """
+    Pack directory entries into the compact binary format above.
+
+    Raises:
+        DirectoryTooLarge: More than 65535 entries, or a fingerprint id
+                           outside 0-65535
+    """
+    if len(entries) > MAX_U16:
+        raise DirectoryTooLarge(f'{len(entries)} entries do not fit the binary format (max {MAX_U16})')
+    bad_ids = [fingerprint_id for fingerprint_id, _ in entries if not 0 <= fingerprint_id <= MAX_U16]
+    if bad_ids:
+        raise DirectoryTooLarge(f'fingerprint id {bad_ids[0]} does not fit the binary format (max {MAX_U16})')
+
+    parts = [DIRECTORY_MAGIC, struct.pack('<IIH', version, since or 0, len(entries))]
+    for fingerprint_id, entry in entries:
+        if entry is None:
+            parts.append(struct.pack('<HB', fingerprint_id, FLAG_REMOVED))
+        else:
+            parts.append(struct.pack('<HB', fingerprint_id, 0))
+            parts.append(_short_string(entry['student_id']))
+            parts.append(_short_string(entry['full_name']))
+            parts.append(_short_string(entry['course_code']))
+    return b''.join(parts)
+
+
+def decode_directory(data):
+    """
+    Unpack the binary format (reference decoder, mirrors the firmware).
+
+    Returns:
+        tuple: (version, since, [(fingerprint_id, entry or None), ...])
+    """
+    if data[:4] != DIRECTORY_MAGIC:
+        raise ValueError('not a directory snapshot')
+    version, since, count = struct.unpack_from('<IIH', data, 4)
+    offset = 4 + struct.calcsize('<IIH')
+    entries = []
+    for _ in range(count):
+        fingerprint_id, flags = struct.unpack_from('<HB', data, offset)
+        offset += 3
+        if flags & FLAG_REMOVED:
+            entries.append((fingerprint_id, None))
+            continue
+        values = []
+        for _ in range(3):
+            length = data[offset]
+            values.append(data[offset + 1:offset + 1 + length].decode('utf-8'))
+            offset += 1 + length
+        entries.append((fingerprint_id, dict(zip(['student_id', 'full_name', 'course_code'], values))))
+    return version, since, entries
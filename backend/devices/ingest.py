@@ -0,0 +1,207 @@
+"""
+============================================================
+DEVICE SCAN INGESTION
+============================================================
+Turns ESP32 scans (fingerprint_id, confidence, client_ts)
+into attendance records:
+
+1. Resolve fingerprint id -> student/course (cached directory)
+2. Derive date/time from the device timestamp
+3. Create attendance/{studentID_YYYY-MM-DD_courseCode} only if
+   it does not exist yet (idempotent - repeats are reported as
+   "already_marked"), counting it in summary/{date} in the same
+   atomic batch
+
+ingest_scan handles one live scan; ingest_batch handles a
+device's offline queue in one request and one atomic write.
+============================================================
+"""
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.utils import timezone
+
+from docstore import MAX_BATCH_SIZE, AlreadyExists, AttendanceRepository, SummaryRepository
+from fingerprint_attendance.metrics import span
+
+from .directory import resolve
+
+
+# Scans per batch upload: every new record may need its own summary
+# write (one per date), so twice this fits in one atomic store batch
+MAX_SCANS_PER_BATCH = MAX_BATCH_SIZE // 2
+
+
+class ScanError(ValueError):
+    """Scan payload is malformed."""
+
+
+def parse_client_ts(value):
+    """
+    Device timestamp -> aware datetime (server time if missing or implausible).
+
+    Timestamps more than DEVICE_MAX_CLOCK_SKEW seconds in the future
+    come from an unsynchronized clock and are replaced by server time.
+    """
+    now = timezone.now()
+    if not value:
+        return now
+    try:
+        when = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    except ValueError:
+        raise ScanError(f'invalid client_ts: {value}')
+    if timezone.is_naive(when):
+        when = when.replace(tzinfo=dt_timezone.utc)
+    if when - now > timedelta(seconds=settings.DEVICE_MAX_CLOCK_SKEW):
+        return now
+    return when
+
+
+def _prepare(store, device_id, fingerprint_id, confidence, client_ts):
+    """
+    Validate and resolve a scan.
+
+    Returns:
+        tuple: (result, doc_id, data, entry) - result is set (and the
+               rest None) when the scan ends before any write
+    """
+    try:
+        fingerprint_id = int(fingerprint_id)
+        confidence = int(confidence) if confidence is not None else None
+    except (TypeError, ValueError):
+        raise ScanError('fingerprint_id and confidence must be integers')
+
+    if confidence is not None and confidence < settings.DEVICE_MIN_CONFIDENCE:
+        return {'result': 'low_confidence', 'fingerprint_id': fingerprint_id}, None, None, None
+
+    entry = resolve(store, fingerprint_id)
+    if entry is None:
+        return {'result': 'not_mapped', 'fingerprint_id': fingerprint_id}, None, None, None
+
+    scanned_at = timezone.localtime(parse_client_ts(client_ts))
+    doc_id, data = AttendanceRepository(store).new_record(
+        entry['student_id'],
+        entry['full_name'],
+        entry['course_code'],
+        scanned_at.date(),
+        scanned_at.strftime('%H:%M:%S'),
+        scanned_at,
+        fingerprint_id=fingerprint_id,
+        confidence=confidence,
+        device_id=device_id,
+    )
+    return None, doc_id, data, entry
+
+
+def _result(created, doc_id, entry, record):
+    return {
+        'result': 'marked' if created else 'already_marked',
+        'doc_id': doc_id,
+        'student_id': entry['student_id'],
+        'student_name': entry['full_name'],
+        'course_code': entry['course_code'],
+        'date': record.get('date'),
+        'time': record.get('time'),
+    }
+
+
+def ingest_scan(store, device_id, fingerprint_id, confidence=None, client_ts=None):
+    """
+    Record one device scan.
+
+    Returns:
+        dict: {"result": "marked" | "already_marked" | "not_mapped"
+                         | "low_confidence", ...student/attendance fields}
+
+    Raises:
+        ScanError: Missing or malformed fields
+    """
+    # The sensor matched on the device - "match" is the directory lookup
+    with span('match'):
+        result, doc_id, data, entry = _prepare(store, device_id, fingerprint_id, confidence, client_ts)
+    if result is not None:
+        return result
+
+    with span('write'):
+        created, record = AttendanceRepository(store).create_once(doc_id, data)
+    return _result(created, doc_id, entry, record)
+
+
+def ingest_batch(store, device_id, scans):
+    """
+    Record a device's queued scans.
+
+    All new records and their summary counts are written in one
+    atomic batch (MAX_SCANS_PER_BATCH keeps it within the store's
+    batch limit); the existing ones are found with one batched read.
+    Re-sending the same batch (e.g. the device never saw the
+    response) marks nothing twice.
+
+    If a live scan creates one of the records between the read and
+    the write, the batch fails as a whole and the records are then
+    created one by one - each on its own atomic and idempotent, so
+    a retry still marks nothing twice.
+
+    Args:
+        scans: [{"fingerprint_id", "confidence", "client_ts", "scan_id"?}, ...]
+
+    Returns:
+        list: One result per scan, in request order ("scan_id" echoed
+              back; malformed scans get {"result": "invalid", "error"})
+    """
+    if len(scans) > MAX_SCANS_PER_BATCH:
+        raise ScanError(f'at most {MAX_SCANS_PER_BATCH} scans per batch')
+
+    results = [None] * len(scans)
+    pending = []  # (index, doc_id, data, entry)
+
+    for index, scan in enumerate(scans):
+        if not isinstance(scan, dict):
+            results[index] = {'result': 'invalid', 'error': 'scan must be an object'}
+            continue
+        try:
+            result, doc_id, data, entry = _prepare(
+                store, device_id, scan.get('fingerprint_id'), scan.get('confidence'), scan.get('client_ts')
+            )
+        except ScanError as e:
+            results[index] = {'result': 'invalid', 'error': str(e)}
+            continue
+        if result is not None:
+            results[index] = result
+        else:
+            pending.append((index, doc_id, data, entry))
+
+    attendance = AttendanceRepository(store)
+    existing = attendance.get_many({doc_id for _, doc_id, _, _ in pending})
+
+    # Earliest scan of the day wins, also within the batch
+    pending.sort(key=lambda item: item[2]['timestamp'])
+    to_create = {}
+    for index, doc_id, data, entry in pending:
+        if doc_id in existing:
+            results[index] = _result(False, doc_id, entry, existing[doc_id])
+        elif doc_id in to_create:
+            results[index] = _result(False, doc_id, entry, to_create[doc_id][1])
+        else:
+            to_create[doc_id] = (index, data, entry)
+            results[index] = _result(True, doc_id, entry, data)
+
+    if to_create:
+        batch = store.batch()
+        for doc_id, (_, data, _) in to_create.items():
+            batch.create(attendance.collection, doc_id, data)
+        SummaryRepository(store).count_check_ins([data for _, data, _ in to_create.values()], writer=batch)
+        try:
+            batch.commit()
+        except AlreadyExists:
+            # A live scan landed between the read and the write - nothing
+            # was written; create the records one by one for their answers
+            for doc_id, (index, data, entry) in to_create.items():
+                created, record = attendance.create_once(doc_id, data)
+                if not created:
+                    results[index] = _result(False, doc_id, entry, record)
+
+    for index, scan in enumerate(scans):
+        if isinstance(scan, dict) and 'scan_id' in scan:
+            results[index]['scan_id'] = scan['scan_id']
+    return results
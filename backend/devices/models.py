@@ -0,0 +1,37 @@
+"""
+============================================================
+DEVICE DIRECTORY MODEL
+============================================================
+Versioned copy of the fingerprint id -> student directory,
+so devices can download it once and then fetch only what
+changed since the version they hold.
+============================================================
+"""
+from django.db import models
+
+
+class DirectoryEntry(models.Model):
+    """
+    One sensor fingerprint id and the student it belongs to.
+    
+    Fields:
+        fingerprint_id: Template slot on the R307 sensor
+        student_id / full_name / course_code: Student details
+        version: Directory version in which this entry last changed
+        deleted: Mapping removed (kept as a tombstone for deltas)
+    """
+    fingerprint_id = models.PositiveIntegerField(unique=True)
+    student_id = models.CharField(max_length=50)
+    full_name = models.CharField(max_length=200)
+    course_code = models.CharField(max_length=20, blank=True)
+    version = models.PositiveIntegerField(db_index=True)
+    deleted = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['fingerprint_id']
+        verbose_name_plural = 'Directory entries'
+    
+    def __str__(self):
+        state = 'deleted' if self.deleted else self.student_id
+        return f"#{self.fingerprint_id} -> {state} (v{self.version})"
@@ -0,0 +1,237 @@
+import json
+from datetime import datetime, timedelta, timezone as dt_timezone
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from devices import directory
+from devices.ingest import MAX_SCANS_PER_BATCH
+from devices.models import DirectoryEntry
+from docstore import (
+    AttendanceRepository, FingerprintMappingRepository, MemoryStore, StudentRepository,
+    reset_shared_store,
+)
+
+
+KEYS = {'lab1': 'secret-1'}
+
+
+@override_settings(DEVICE_API_KEYS=KEYS, DEVICE_COURSES={})
+class DeviceApiTestCase(TestCase):
+    """Device endpoints against an in-memory document store."""
+
+    def setUp(self):
+        cache.clear()
+        self.store = MemoryStore()
+        reset_shared_store(self.store)
+        self.addCleanup(reset_shared_store)
+
+        StudentRepository(self.store).save_student(
+            {'student_id': 'D-1', 'full_name': 'Dana Device', 'course_code': 'DEV101'}
+        )
+        FingerprintMappingRepository(self.store).map(7, 'D-1')
+
+    def post(self, name, body, key='secret-1'):
+        headers = {'X-Device-Key': key} if key is not None else {}
+        return self.client.post(reverse(name), json.dumps(body), content_type='application/json', headers=headers)
+
+
+class MarkTests(DeviceApiTestCase):
+
+    def mark(self, key='secret-1', **scan):
+        body = {'device_id': 'lab1', 'fingerprint_id': 7, 'confidence': 90,
+                'client_ts': '2026-03-02T09:05:00+00:00', **scan}
+        return self.post('device_mark', body, key)
+
+    def test_valid_key_marks_attendance(self):
+        response = self.mark()
+
+        self.assertEqual(response.status_code, 200)
+        result = response.json()
+        self.assertEqual(result['result'], 'marked')
+        self.assertEqual((result['student_id'], result['course_code']), ('D-1', 'DEV101'))
+        record = AttendanceRepository(self.store).get(result['doc_id'])
+        self.assertEqual((record['device_id'], record['fingerprint_id']), ('lab1', 7))
+
+    def test_wrong_or_missing_key_is_refused(self):
+        self.assertEqual(self.mark(key='wrong').status_code, 403)
+        self.assertEqual(self.mark(key=None).status_code, 403)
+        self.assertEqual(self.post('device_mark', {'device_id': 'lab2', 'fingerprint_id': 7}).status_code, 403)
+        self.assertEqual(list(AttendanceRepository(self.store).all()), [])
+
+    @override_settings(DEVICE_API_KEYS={})
+    def test_no_configured_keys_refuses_unless_debug(self):
+        self.assertEqual(self.mark(key=None).status_code, 403)
+        with self.settings(DEBUG=True):
+            self.assertEqual(self.mark(key=None).json()['result'], 'marked')
+
+    def test_unknown_fingerprint_is_not_mapped(self):
+        response = self.mark(fingerprint_id=99)
+
+        self.assertEqual(response.json(), {'result': 'not_mapped', 'fingerprint_id': 99})
+        self.assertEqual(list(AttendanceRepository(self.store).all()), [])
+
+    def test_duplicate_scan_keeps_the_first_check_in(self):
+        first = self.mark().json()
+        second = self.mark(client_ts='2026-03-02T09:40:00+00:00').json()
+
+        self.assertEqual(second['result'], 'already_marked')
+        self.assertEqual((second['doc_id'], second['time']), (first['doc_id'], first['time']))
+        self.assertEqual(len(list(AttendanceRepository(self.store).all())), 1)
+
+    def test_malformed_scan_is_rejected(self):
+        self.assertEqual(self.mark(fingerprint_id='seven').status_code, 400)
+        self.assertEqual(self.mark(confidence=10).json()['result'], 'low_confidence')
+
+
+class MarkBatchTests(DeviceApiTestCase):
+
+    def setUp(self):
+        super().setUp()
+        StudentRepository(self.store).save_student(
+            {'student_id': 'D-2', 'full_name': 'Devi Batch', 'course_code': 'DEV101'}
+        )
+        FingerprintMappingRepository(self.store).map(8, 'D-2')
+
+    def upload(self, *scans):
+        response = self.post('device_mark_batch', {'device_id': 'lab1', 'scans': list(scans)})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def scan(self, scan_id, fingerprint_id=7, at='09:05'):
+        return {'scan_id': scan_id, 'fingerprint_id': fingerprint_id, 'confidence': 90,
+                'client_ts': f'2026-03-02T{at}:00+00:00'}
+
+    def test_earliest_scan_in_the_batch_wins(self):
+        # Queued out of order: the later scan comes first
+        body = self.upload(self.scan('late', at='09:40'), self.scan('early', at='09:05'), self.scan('other', 8))
+
+        late, early, other = body['results']
+        self.assertEqual([r['scan_id'] for r in body['results']], ['late', 'early', 'other'])
+        self.assertEqual((early['result'], late['result'], other['result']), ('marked', 'already_marked', 'marked'))
+        self.assertEqual(late['time'], early['time'])
+        self.assertEqual((body['marked'], body['already_marked']), (2, 1))
+        stored = AttendanceRepository(self.store).get(early['doc_id'])
+        self.assertEqual(stored['time'], early['time'])
+
+    def test_records_already_stored_are_not_marked_again(self):
+        live = self.post('device_mark', {'device_id': 'lab1', **self.scan('live', at='08:55')}).json()
+
+        body = self.upload(self.scan('queued', at='09:05'), self.scan('new', 8))
+        self.assertEqual([r['result'] for r in body['results']], ['already_marked', 'marked'])
+        self.assertEqual(body['results'][0]['time'], live['time'])
+
+        # Re-sending a batch whose response was lost marks nothing twice
+        body = self.upload(self.scan('queued', at='09:05'), self.scan('new', 8))
+        self.assertEqual((body['marked'], body['already_marked']), (0, 2))
+        self.assertEqual(len(list(AttendanceRepository(self.store).all())), 2)
+
+    def test_invalid_scans_do_not_stop_the_batch(self):
+        body = self.upload({'scan_id': 'bad', 'fingerprint_id': 'x'}, 'not-a-scan', self.scan('ok'))
+
+        self.assertEqual([r['result'] for r in body['results']], ['invalid', 'invalid', 'marked'])
+        self.assertEqual(body['results'][0]['scan_id'], 'bad')
+
+    def test_a_full_batch_is_one_commit(self):
+        # Every scan on its own day: one record and one summary write each
+        for fingerprint_id in range(100, 100 + MAX_SCANS_PER_BATCH):
+            student_id = f'D-{fingerprint_id}'
+            StudentRepository(self.store).save_student(
+                {'student_id': student_id, 'full_name': student_id, 'course_code': 'DEV101'}
+            )
+            FingerprintMappingRepository(self.store).map(fingerprint_id, student_id)
+        start = datetime(2025, 1, 1, 9, tzinfo=dt_timezone.utc)
+        scans = [
+            {'fingerprint_id': 100 + n, 'confidence': 90, 'client_ts': (start + timedelta(days=n)).isoformat()}
+            for n in range(MAX_SCANS_PER_BATCH)
+        ]
+        commits = self.store.stats['commits']
+
+        body = self.upload(*scans)
+        self.assertEqual(body['marked'], MAX_SCANS_PER_BATCH)
+        self.assertEqual(self.store.stats['commits'], commits + 1)
+
+    def test_record_created_during_the_upload_is_already_marked(self):
+        live = self.post('device_mark', {'device_id': 'lab1', **self.scan('live', at='08:55')}).json()
+
+        # The live scan lands after the batch read its existing records
+        with mock.patch.object(AttendanceRepository, 'get_many', return_value={}):
+            body = self.upload(self.scan('queued', at='09:05'), self.scan('new', 8))
+
+        self.assertEqual([r['result'] for r in body['results']], ['already_marked', 'marked'])
+        self.assertEqual(body['results'][0]['time'], live['time'])
+        self.assertEqual(len(list(AttendanceRepository(self.store).all())), 2)
+
+    def test_malformed_batch_is_rejected(self):
+        response = self.post('device_mark_batch', {'device_id': 'lab1', 'scans': 'nope'})
+        self.assertEqual(response.status_code, 400)
+        scans = [self.scan('s')] * (MAX_SCANS_PER_BATCH + 1)
+        response = self.post('device_mark_batch', {'device_id': 'lab1', 'scans': scans})
+        self.assertEqual(response.status_code, 400)
+
+
+class DirectoryEncodingTests(SimpleTestCase):
+
+    def test_snapshot_round_trip(self):
+        entries = [
+            (1, {'student_id': 'D-1', 'full_name': 'Dana Device', 'course_code': 'DEV101'}),
+            (65535, {'student_id': 'D-2', 'full_name': 'Zoë Ünicode', 'course_code': 'DEV101'}),
+        ]
+        data = directory.encode_directory(12, entries)
+        self.assertEqual(directory.decode_directory(data), (12, 0, entries))
+
+    def test_delta_round_trip_keeps_removals(self):
+        entries = [(3, None), (4, {'student_id': 'D-4', 'full_name': '', 'course_code': 'DEV201'})]
+        data = directory.encode_directory(9, entries, since=7)
+        self.assertEqual(directory.decode_directory(data), (9, 7, entries))
+
+    def test_long_names_are_cut_on_a_character_boundary(self):
+        name = 'é' * 200  # 400 bytes of UTF-8
+        data = directory.encode_directory(1, [(1, {'student_id': 'D-1', 'full_name': name, 'course_code': 'X'})])
+        _, _, [(_, entry)] = directory.decode_directory(data)
+        self.assertEqual(entry['full_name'], 'é' * 127)
+
+    def test_values_outside_the_format_are_refused(self):
+        with self.assertRaises(directory.DirectoryTooLarge):
+            directory.encode_directory(1, [(65536, None)])
+        with self.assertRaises(directory.DirectoryTooLarge):
+            directory.encode_directory(1, [(i, None) for i in range(65536)])
+
+
+class DirectoryViewTests(DeviceApiTestCase):
+
+    def get(self, name, headers=None, **params):
+        headers = {'X-Device-Key': 'secret-1', **(headers or {})}
+        return self.client.get(reverse(name), {'device_id': 'lab1', **params}, headers=headers)
+
+    def test_snapshot_then_delta(self):
+        response = self.get('device_directory')
+        version, since, entries = directory.decode_directory(response.content)
+        entry = {'student_id': 'D-1', 'full_name': 'Dana Device', 'course_code': 'DEV101'}
+        self.assertEqual((since, entries), (0, [(7, entry)]))
+        self.assertEqual(self.get('device_directory', headers={'If-None-Match': response['ETag']}).status_code, 304)
+
+        FingerprintMappingRepository(self.store).map(7, 'missing')
+        directory.invalidate_directory()
+        _, since, entries = directory.decode_directory(self.get('device_directory_delta', since=version).content)
+        self.assertEqual((since, entries), (version, [(7, None)]))
+
+    def test_changed_entries_get_a_new_updated_at(self):
+        directory.record_versions({7: {'student_id': 'D-1', 'full_name': 'Dana Device', 'course_code': 'DEV101'}})
+        DirectoryEntry.objects.update(updated_at=timezone.now() - timedelta(days=1))
+
+        directory.record_versions({7: {'student_id': 'D-1', 'full_name': 'Dana Renamed', 'course_code': 'DEV101'}})
+        entry = DirectoryEntry.objects.get(fingerprint_id=7)
+        self.assertEqual(entry.full_name, 'Dana Renamed')
+        self.assertGreater(entry.updated_at, timezone.now() - timedelta(minutes=1))
+
+    def test_unencodable_fingerprint_id_is_a_bad_request(self):
+        FingerprintMappingRepository(self.store).map(70000, 'D-1')
+
+        response = self.get('device_directory')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('70000', response.json()['error'])
+        self.assertEqual(len(self.get('device_directory', format='json').json()['entries']), 2)
@@ -0,0 +1,21 @@
+"""
+============================================================
+DEVICES URL CONFIGURATION
+============================================================
+JSON endpoints for the ESP32 attendance devices.
+============================================================
+"""
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    # One scan -> one request (NO LOGIN, device key)
+    path('api/mark/', views.mark, name='device_mark'),
+
+    # Offline queue upload: many scans -> one request
+    path('api/mark/batch/', views.mark_batch, name='device_mark_batch'),
+
+    # Fingerprint id -> student directory: full snapshot + deltas
+    path('api/directory/', views.directory_snapshot, name='device_directory'),
+    path('api/directory/delta/', views.directory_delta, name='device_directory_delta'),
+]
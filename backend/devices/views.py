@@ -0,0 +1,214 @@
+"""
+============================================================
+DEVICE API VIEWS
+============================================================
+Endpoints called by the ESP32 attendance devices.
+
+Devices authenticate with an X-Device-Key header matching
+settings.DEVICE_API_KEYS[device_id]. With no keys configured
+every request is refused, unless DEBUG is on (development).
+============================================================
+"""
+import hmac
+import json
+from functools import wraps
+
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+
+from docstore import shared_store
+
+from . import directory
+from .ingest import ScanError, ingest_batch, ingest_scan
+
+
+def _key_is_valid(request, device_id):
+    """Check X-Device-Key (no keys configured = open in DEBUG only)."""
+    keys = settings.DEVICE_API_KEYS
+    if not keys:
+        return settings.DEBUG
+    expected = keys.get(device_id)
+    provided = request.headers.get('X-Device-Key', '')
+    return bool(expected) and hmac.compare_digest(expected, provided)
+
+
+def device_api(view_func):
+    """
+    Parse the JSON body and check the device key.
+
+    The wrapped view receives (request, payload, device_id).
+    """
+    @csrf_exempt
+    @require_POST
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        try:
+            payload = json.loads(request.body or b'{}')
+        except ValueError:
+            return JsonResponse({'error': 'Body must be JSON'}, status=400)
+        if not isinstance(payload, dict) or not payload.get('device_id'):
+            return JsonResponse({'error': 'device_id is required'}, status=400)
+
+        device_id = str(payload['device_id'])
+        if not _key_is_valid(request, device_id):
+            return JsonResponse({'error': 'Unknown device or wrong key'}, status=403)
+
+        return view_func(request, payload, device_id, *args, **kwargs)
+    return wrapper
+
+
+def device_download(view_func):
+    """
+    GET endpoint for devices: device_id comes from the query string.
+
+    The wrapped view receives (request, device_id).
+    """
+    @require_GET
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        device_id = request.GET.get('device_id', '')
+        if not device_id:
+            return JsonResponse({'error': 'device_id is required'}, status=400)
+        if not _key_is_valid(request, device_id):
+            return JsonResponse({'error': 'Unknown device or wrong key'}, status=403)
+        return view_func(request, device_id, *args, **kwargs)
+    return wrapper
+
+
+def _directory_response(request, version, entries, since=None):
+    """Binary directory body (or JSON with ?format=json); 400 if it does not fit the binary format."""
+    if request.GET.get('format') == 'json':
+        response = JsonResponse({
+            'version': version,
+            'since': since,
+            'entries': [
+                {'fingerprint_id': fingerprint_id, **(entry or {'removed': True})}
+                for fingerprint_id, entry in entries
+            ],
+        })
+    else:
+        try:
+            body = directory.encode_directory(version, entries, since)
+        except directory.DirectoryTooLarge as e:
+            return JsonResponse({'error': f'{e} - use ?format=json'}, status=400)
+        response = HttpResponse(body, content_type='application/octet-stream')
+    response['X-Directory-Version'] = str(version)
+    return response
+
+
+@device_api
+def mark(request, payload, device_id):
+    """
+    Mark attendance for one scan in a single round trip.
+    
+    Replaces the four sequential Firestore REST calls the ESP32
+    used to make (mapping, student, duplicate check, create).
+    
+    URL: /devices/api/mark/
+    Method: POST
+    Body: {"device_id", "fingerprint_id", "confidence", "client_ts"}
+    
+    Returns:
+        JSON: {"result": "marked" | "already_marked" | "not_mapped"
+                         | "low_confidence", ...}
+    """
+    try:
+        result = ingest_scan(
+            shared_store(),
+            device_id,
+            payload.get('fingerprint_id'),
+            payload.get('confidence'),
+            payload.get('client_ts'),
+        )
+    except ScanError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    return JsonResponse(result)
+
+
+@device_api
+def mark_batch(request, payload, device_id):
+    """
+    Upload a device's offline scan queue in one request.
+    
+    Scans are applied idempotently in one atomic write, so a device
+    can safely re-send a batch whose response it never received.
+    
+    URL: /devices/api/mark/batch/
+    Method: POST
+    Body: {"device_id", "scans": [{"scan_id", "fingerprint_id",
+                                    "confidence", "client_ts"}, ...]}
+    
+    Returns:
+        JSON: {"results": [...one result per scan, in order...],
+               "marked": n, "already_marked": n}
+    """
+    scans = payload.get('scans')
+    if not isinstance(scans, list):
+        return JsonResponse({'error': 'scans must be a list'}, status=400)
+    
+    try:
+        results = ingest_batch(shared_store(), device_id, scans)
+    except ScanError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    
+    return JsonResponse({
+        'results': results,
+        'marked': sum(result['result'] == 'marked' for result in results),
+        'already_marked': sum(result['result'] == 'already_marked' for result in results),
+    })
+
+
+@device_download
+def directory_snapshot(request, device_id):
+    """
+    Full fingerprint id -> student directory for a device.
+    
+    Lets the device resolve matches locally instead of reading
+    fingerprint_mapping and students over the network per scan.
+    Only the courses in settings.DEVICE_COURSES[device_id] are
+    included (all courses when the device is not listed).
+    
+    URL: /devices/api/directory/?device_id=lab1[&format=json]
+    Method: GET
+    
+    Returns:
+        Binary snapshot (see devices/directory.py), ETag = version,
+        304 when If-None-Match matches
+    """
+    directory.get_directory(shared_store())
+    version = directory.current_version()
+    etag = f'"{device_id}-{version}"'
+    
+    if request.headers.get('If-None-Match') == etag:
+        response = HttpResponse(status=304)
+    else:
+        response = _directory_response(request, version, directory.entries_for(device_id))
+    response['ETag'] = etag
+    return response
+
+
+@device_download
+def directory_delta(request, device_id):
+    """
+    Directory changes since the version a device already has.
+    
+    URL: /devices/api/directory/delta/?device_id=lab1&since=<version>
+    Method: GET
+    
+    Returns:
+        Binary delta: changed entries plus "removed" markers. When the
+        device is already current the delta is empty.
+    """
+    try:
+        since = int(request.GET.get('since', ''))
+    except ValueError:
+        return JsonResponse({'error': 'since must be a version number'}, status=400)
+    
+    directory.get_directory(shared_store())
+    version = directory.current_version()
+    if since > version:
+        # Device holds a version from a reset directory - start over
+        return _directory_response(request, version, directory.entries_for(device_id))
+    return _directory_response(request, version, directory.entries_for(device_id, since), since)
@@ -0,0 +1,93 @@
+"""
+============================================================
+DOCUMENT STORE
+============================================================
+Repository layer for the Firestore collections (students,
+courses, fingerprint_mapping, attendance), with interchangeable
+backends:
+
+    firestore - Cloud Firestore (firebase-credentials.json)
+    sqlite    - local SQLite file (DOCSTORE_SQLITE_PATH)
+    memory    - in-process dict (tests, benchmarks)
+
+Pick the backend with settings.DOCSTORE_BACKEND or the
+DOCSTORE_BACKEND environment variable, e.g.:
+
+    DOCSTORE_BACKEND=sqlite python add_student_firebase.py
+
+Usage:
+    from docstore import get_store, StudentRepository
+    students = StudentRepository(get_store())
+============================================================
+"""
+import threading
+
+from .base import (
+    MAX_BATCH_SIZE, SERVER_TIMESTAMP,
+    AlreadyExists, BatchTooLarge, BulkWriter, Document, DocumentStore, DocumentStoreError,
+    Increment, NotFound, StoreUnavailable, WriteBatch,
+)
+from .counters import ShardedCounter
+from .memory import MemoryStore
+from .repositories import (
+    AttendanceRepository, CourseRepository, FingerprintMappingRepository, StudentRepository,
+    SummaryRepository, attendance_doc_id, student_course_changes,
+)
+from .sqlite import SQLiteStore
+
+
+BACKENDS = ['firestore', 'sqlite', 'memory']
+
+_shared_store = None
+_shared_lock = threading.Lock()
+
+
+def get_store(backend=None):
+    """
+    Open the configured document store.
+
+    Args:
+        backend: 'firestore', 'sqlite' or 'memory'
+                 (default: settings.DOCSTORE_BACKEND)
+
+    Returns:
+        DocumentStore
+
+    Raises:
+        StoreUnavailable: Backend cannot be opened
+    """
+    from django.conf import settings
+
+    backend = backend or getattr(settings, 'DOCSTORE_BACKEND', 'firestore')
+    if backend == 'memory':
+        return MemoryStore()
+    if backend == 'sqlite':
+        return SQLiteStore(settings.DOCSTORE_SQLITE_PATH)
+    if backend == 'firestore':
+        from .firestore import FirestoreStore, connect
+        return FirestoreStore(connect(settings.FIREBASE_CREDENTIALS_PATH))
+    raise ValueError(f'Unknown document store backend: {backend} (choose from {", ".join(BACKENDS)})')
+
+
+def shared_store():
+    """
+    Process-wide store for request handlers (opened once, reused).
+
+    Returns:
+        DocumentStore
+    """
+    global _shared_store
+    if _shared_store is None:
+        with _shared_lock:
+            if _shared_store is None:
+                _shared_store = get_store()
+    return _shared_store
+
+
+def reset_shared_store(store=None):
+    """Replace (or drop) the shared store - used by tests and after settings changes."""
+    global _shared_store
+    with _shared_lock:
+        if _shared_store is not None and _shared_store is not store:
+            _shared_store.close()
+        _shared_store = store
@@ -0,0 +1,400 @@
+"""
+============================================================
+DOCUMENT STORE - COMMON INTERFACE
+============================================================
+Backend-neutral API for the Firestore-shaped data
+(students, courses, fingerprint_mapping, attendance):
+
+    store.get(collection, doc_id)           -> Document | None
+    store.get_many(collection, doc_ids)     -> {doc_id: Document}
+    store.set / create / update / delete    single writes
+    store.add(collection, data)             -> new doc_id
+    store.query(collection, filters, order_by, limit)
+                                            -> iterator of Document
+    store.batch()                           atomic batch (max 500 ops)
+    store.bulk_writer()                     auto-committing batches
+
+Every backend has the same semantics (deep merge writes,
+SERVER_TIMESTAMP, Increment, operators, ordering, batch limit) and
+counts reads/writes/commits in store.stats, so a Firestore
+code path can be run and measured against a local backend.
+============================================================
+"""
+import copy
+import threading
+from collections import defaultdict
+from datetime import datetime, timezone
+
+
+# Firestore's limit on operations in one batch/transaction
+MAX_BATCH_SIZE = 500
+
+
+class _ServerTimestamp:
+    """Sentinel: replaced by the write time when the document is stored."""
+
+    def __repr__(self):
+        return 'SERVER_TIMESTAMP'
+
+
+SERVER_TIMESTAMP = _ServerTimestamp()
+
+
+class Increment:
+    """
+    Field transform: add amount to the stored number (missing = 0).
+
+    Resolved by the backend at write time, so concurrent writers
+    never read-modify-write the same counter.
+    """
+
+    __slots__ = ('amount',)
+
+    def __init__(self, amount=1):
+        self.amount = amount
+
+    def __eq__(self, other):
+        return isinstance(other, Increment) and other.amount == self.amount
+
+    def __repr__(self):
+        return f'Increment({self.amount})'
+
+
+def resolve_fields(data, before, now, deep):
+    """
+    Resolve SERVER_TIMESTAMP / Increment in written data.
+
+    Args:
+        data: Written fields (may contain nested maps)
+        before: Current value at the same place (or None)
+        now: Write time
+        deep: Merge nested maps into before (set(merge=True)),
+              otherwise written maps replace what was there
+
+    Returns:
+        dict: Stored fields
+    """
+    before = before if isinstance(before, dict) else {}
+    resolved = copy.deepcopy(before) if deep else {}
+    for key, value in data.items():
+        if value is SERVER_TIMESTAMP:
+            resolved[key] = now
+        elif isinstance(value, Increment):
+            current = before.get(key)
+            if isinstance(current, bool) or not isinstance(current, (int, float)):
+                current = 0
+            resolved[key] = current + value.amount
+        elif isinstance(value, dict):
+            resolved[key] = resolve_fields(value, before.get(key) if deep else None, now, deep)
+        else:
+            resolved[key] = copy.deepcopy(value)
+    return resolved
+
+
+# ========== ERRORS ==========
+
+class DocumentStoreError(Exception):
+    """Base error for document store operations."""
+
+
+class AlreadyExists(DocumentStoreError):
+    """create() on a document that already exists."""
+
+
+class NotFound(DocumentStoreError):
+    """update() on a document that does not exist."""
+
+
+class BatchTooLarge(DocumentStoreError):
+    """More than MAX_BATCH_SIZE operations in one batch."""
+
+
+class StoreUnavailable(DocumentStoreError):
+    """Backend cannot be opened (missing credentials, SDK, ...)."""
+
+
+# ========== QUERY OPERATORS ==========
+
+OPERATORS = {
+    '==': lambda a, b: a == b,
+    '!=': lambda a, b: a != b,
+    '<': lambda a, b: a < b,
+    '<=': lambda a, b: a <= b,
+    '>': lambda a, b: a > b,
+    '>=': lambda a, b: a >= b,
+    'in': lambda a, b: a in b,
+    'not-in': lambda a, b: a not in b,
+    'array-contains': lambda a, b: isinstance(a, list) and b in a,
+}
+
+
+class Document:
+    """A stored document: id, data and last write time."""
+
+    __slots__ = ('id', 'data', 'update_time')
+
+    def __init__(self, doc_id, data, update_time=None):
+        self.id = doc_id
+        self.data = data
+        self.update_time = update_time
+
+    def to_dict(self):
+        return self.data
+
+    def get(self, field, default=None):
+        return self.data.get(field, default)
+
+    def __repr__(self):
+        return f'<Document {self.id}>'
+
+
+class WriteBatch:
+    """Atomic group of writes, committed together (max 500 operations)."""
+
+    def __init__(self, store):
+        self._store = store
+        self._operations = []
+
+    def __len__(self):
+        return len(self._operations)
+
+    def set(self, collection, doc_id, data, merge=False):
+        self._operations.append(('set', collection, str(doc_id), data, merge))
+        return self
+
+    def create(self, collection, doc_id, data):
+        self._operations.append(('create', collection, str(doc_id), data, False))
+        return self
+
+    def update(self, collection, doc_id, data):
+        self._operations.append(('update', collection, str(doc_id), data, True))
+        return self
+
+    def delete(self, collection, doc_id):
+        self._operations.append(('delete', collection, str(doc_id), None, False))
+        return self
+
+    def commit(self):
+        if len(self._operations) > MAX_BATCH_SIZE:
+            raise BatchTooLarge(
+                f'maximum {MAX_BATCH_SIZE} writes allowed per batch, got {len(self._operations)}'
+            )
+        if self._operations:
+            self._store._commit(self._operations)
+            self._store._count('commits')
+            self._store._count('writes', len(self._operations))
+        self._operations = []
+
+
+class BulkWriter:
+    """
+    Writes of any size, split into batches of up to 500 operations.
+
+    Usage:
+        with store.bulk_writer() as writer:
+            for student in students:
+                writer.set('students', student['student_id'], student)
+    """
+
+    def __init__(self, store, batch_size=MAX_BATCH_SIZE):
+        if not 1 <= batch_size <= MAX_BATCH_SIZE:
+            raise ValueError(f'batch_size must be between 1 and {MAX_BATCH_SIZE}')
+        self._store = store
+        self._batch_size = batch_size
+        self._batch = store.batch()
+        self.operations = 0
+        self.commits = 0
+
+    def _added(self):
+        self.operations += 1
+        if len(self._batch) >= self._batch_size:
+            self.flush()
+
+    def set(self, collection, doc_id, data, merge=False):
+        self._batch.set(collection, doc_id, data, merge=merge)
+        self._added()
+
+    def update(self, collection, doc_id, data):
+        self._batch.update(collection, doc_id, data)
+        self._added()
+
+    def delete(self, collection, doc_id):
+        self._batch.delete(collection, doc_id)
+        self._added()
+
+    def flush(self):
+        if len(self._batch):
+            self._batch.commit()
+            self.commits += 1
+            self._batch = self._store.batch()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.flush()
+
+
+# ========== BASE STORE ==========
+
+class DocumentStore:
+    """
+    Base class for document stores.
+
+    Local backends implement _load, _load_many, _scan and
+    _commit; filtering and ordering are shared so every local
+    backend behaves the same.
+    """
+
+    name = 'base'
+
+    def __init__(self, clock=None):
+        self._clock = clock or (lambda: datetime.now(timezone.utc))
+        self.stats = defaultdict(int)
+        self._stats_lock = threading.Lock()
+
+    # ---------- reads ----------
+
+    def get(self, collection, doc_id):
+        self._count('reads')
+        return self._load(collection, str(doc_id))
+
+    def get_many(self, collection, doc_ids):
+        doc_ids = [str(doc_id) for doc_id in doc_ids]
+        self._count('reads', len(doc_ids))
+        return self._load_many(collection, doc_ids)
+
+    def query(self, collection, filters=(), order_by=None, descending=False, limit=None):
+        """
+        Stream documents matching all filters.
+
+        Args:
+            collection: Collection name
+            filters: [(field, operator, value), ...] (see OPERATORS)
+            order_by: Field to sort by (documents without it are skipped,
+                like Firestore); default is document id order
+            descending: Reverse the order
+            limit: Maximum number of documents
+
+        Yields:
+            Document
+        """
+        for field, op, _ in filters:
+            if op not in OPERATORS:
+                raise DocumentStoreError(f'Unsupported operator: {op}')
+
+        matched = [
+            document for document in self._scan(collection)
+            if all(
+                document.data.get(field) is not None and OPERATORS[op](document.data[field], value)
+                for field, op, value in filters
+            )
+        ]
+        if order_by:
+            matched = [document for document in matched if order_by in document.data]
+            matched.sort(key=lambda document: (document.data[order_by], document.id), reverse=descending)
+        else:
+            matched.sort(key=lambda document: document.id, reverse=descending)
+        if limit is not None:
+            matched = matched[:limit]
+
+        for document in matched:
+            self._count('reads')
+            yield document
+
+    def collections(self):
+        """Names of collections that hold at least one document."""
+        raise NotImplementedError
+
+    # ---------- writes ----------
+
+    def set(self, collection, doc_id, data, merge=False):
+        self.batch().set(collection, doc_id, data, merge=merge).commit()
+
+    def create(self, collection, doc_id, data):
+        self.batch().create(collection, doc_id, data).commit()
+
+    def update(self, collection, doc_id, data):
+        self.batch().update(collection, doc_id, data).commit()
+
+    def delete(self, collection, doc_id):
+        self.batch().delete(collection, doc_id).commit()
+
+    def add(self, collection, data):
+        """Store a document under a new random id and return the id."""
+        import uuid
+        doc_id = uuid.uuid4().hex[:20]
+        self.create(collection, doc_id, data)
+        return doc_id
+
+    def batch(self):
+        return WriteBatch(self)
+
+    def bulk_writer(self, batch_size=MAX_BATCH_SIZE):
+        return BulkWriter(self, batch_size)
+
+    def close(self):
+        pass
+
+    # ---------- backend hooks ----------
+
+    def _load(self, collection, doc_id):
+        raise NotImplementedError
+
+    def _load_many(self, collection, doc_ids):
+        documents = (self._load(collection, doc_id) for doc_id in doc_ids)
+        return {document.id: document for document in documents if document is not None}
+
+    def _scan(self, collection):
+        raise NotImplementedError
+
+    def _commit(self, operations):
+        raise NotImplementedError
+
+    # ---------- helpers ----------
+
+    def _count(self, name, amount=1):
+        with self._stats_lock:
+            self.stats[name] += amount
+
+    def _apply(self, operations, current):
+        """
+        Work out the new state of every touched document.
+
+        Args:
+            operations: [(kind, collection, doc_id, data, merge), ...]
+            current: Callable (collection, doc_id) -> data or None
+
+        Returns:
+            list: [(collection, doc_id, new_data or None, write_time)]
+                  (None means delete)
+        """
+        now = self._clock()
+        pending = {}
+
+        def existing(collection, doc_id):
+            if (collection, doc_id) in pending:
+                return pending[(collection, doc_id)]
+            return current(collection, doc_id)
+
+        for kind, collection, doc_id, data, merge in operations:
+            before = existing(collection, doc_id)
+            if kind == 'create' and before is not None:
+                raise AlreadyExists(f'Document already exists: {collection}/{doc_id}')
+            if kind == 'update' and before is None:
+                raise NotFound(f'No document to update: {collection}/{doc_id}')
+
+            if kind == 'delete':
+                pending[(collection, doc_id)] = None
+                continue
+
+            if kind == 'update':
+                # Top-level fields replaced, transforms see the stored values
+                new_data = copy.deepcopy(before)
+                new_data.update(resolve_fields(data, before, now, deep=False))
+            else:
+                new_data = resolve_fields(data, before if merge else None, now, deep=merge)
+            pending[(collection, doc_id)] = new_data
+
+        return [(collection, doc_id, data, now) for (collection, doc_id), data in pending.items()]
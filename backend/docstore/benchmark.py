@@ -0,0 +1,235 @@
+"""
+============================================================
+DOCUMENT STORE BENCHMARK
+============================================================
+Measures latency (p50/p95/p99) and throughput of the exact
+operations the attendance paths use, against any backend:
+
+    get       students/{id}                       (single read)
+    set       attendance/{id}                     (single write)
+    batch     N attendance writes per commit      (ingest_batch, import)
+    query     attendance where date == today
+              order_by timestamp                  (dashboard)
+    mapping   fingerprint_mapping/{fp} -> students/{id}
+                                                  (directory miss)
+
+Every operation runs `ops` times from `concurrency` threads.
+Students and mappings go to their own collections (prefixed with
+"_bench_"). Attendance uses the real collection - the query needs
+its composite index - under a date no real record has (BENCH_DATE)
+and ids starting with "BENCH_". Everything written is deleted
+afterwards, so it is safe to run against the live project.
+
+Usage:
+    report = run_benchmark(get_store(), ops=200, concurrency=8)
+    print(json.dumps(report, indent=2))
+============================================================
+"""
+import math
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from .base import MAX_BATCH_SIZE, SERVER_TIMESTAMP
+
+
+OPERATIONS = ['get', 'set', 'batch', 'query', 'mapping']
+
+PREFIX = '_bench_'
+
+# Dates of the benchmark's attendance documents (never a real day):
+# the query reads BENCH_DATE, set/batch write BENCH_WRITE_DATE so the
+# query always matches exactly query_docs documents
+BENCH_DATE = '1999-12-31'
+BENCH_WRITE_DATE = '1999-12-30'
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(latencies, errors, seconds, items_per_op=1):
+    """
+    Latency/throughput figures for one operation.
+
+    Args:
+        latencies: Per-operation latencies (ms)
+        errors: Failed operations
+        seconds: Wall time for all operations
+        items_per_op: Documents written per operation (batch)
+
+    Returns:
+        dict
+    """
+    latencies = sorted(latencies)
+    return {
+        'count': len(latencies),
+        'errors': errors,
+        'mean_ms': round(sum(latencies) / len(latencies), 3) if latencies else None,
+        'p50_ms': _round(percentile(latencies, 50)),
+        'p95_ms': _round(percentile(latencies, 95)),
+        'p99_ms': _round(percentile(latencies, 99)),
+        'ops_per_second': round(len(latencies) / seconds, 1) if seconds else None,
+        'docs_per_second': round(len(latencies) * items_per_op / seconds, 1) if seconds else None,
+    }
+
+
+def _round(value):
+    return round(value, 3) if value is not None else None
+
+
+class _Workload:
+    """Seeded benchmark collections and the operations that hit them."""
+
+    def __init__(self, store, seed_docs, payload_bytes, batch_size, query_docs):
+        self.store = store
+        self.students_collection = f'{PREFIX}students'
+        self.mapping_collection = f'{PREFIX}fingerprint_mapping'
+        self.attendance_collection = 'attendance'
+        self.seed_docs = seed_docs
+        self.payload = 'x' * payload_bytes
+        self.batch_size = batch_size
+        self.query_docs = query_docs
+        self.written = set()
+
+    def seed(self):
+        """Students, fingerprint mappings and the attendance the query reads."""
+        with self.store.bulk_writer() as writer:
+            for i in range(self.seed_docs):
+                student_id = f'BENCH{i:05d}'
+                writer.set(self.students_collection, student_id, {
+                    'student_id': student_id,
+                    'full_name': f'Bench Student {i}',
+                    'course_code': 'BENCH101',
+                    'fingerprint_id': i + 1,
+                    'note': self.payload,
+                })
+                writer.set(self.mapping_collection, str(i + 1), {'student_id': student_id})
+            for i in range(self.query_docs):
+                self._attendance(writer, f'seed-{i}', BENCH_DATE)
+
+    def _attendance(self, target, key, log_date=BENCH_WRITE_DATE):
+        doc_id = f'BENCH_{log_date}_{key}'
+        target.set(self.attendance_collection, doc_id, {
+            'student_id': key,
+            'course_code': 'BENCH101',
+            'date': log_date,
+            'time': '09:00:00',
+            'timestamp': datetime.now(timezone.utc),
+            'received_at': SERVER_TIMESTAMP,
+            'status': 'present',
+            'note': self.payload,
+        })
+        self.written.add(doc_id)
+
+    # ---------- operations (n = operation number) ----------
+
+    def get(self, n):
+        self.store.get(self.students_collection, f'BENCH{random.randrange(self.seed_docs):05d}')
+
+    def set(self, n):
+        self._attendance(self.store, f'set-{n}')
+
+    def batch(self, n):
+        batch = self.store.batch()
+        for i in range(self.batch_size):
+            self._attendance(batch, f'batch-{n}-{i}')
+        batch.commit()
+
+    def query(self, n):
+        filters = [('date', '==', BENCH_DATE)]
+        for _ in self.store.query(self.attendance_collection, filters, order_by='timestamp', descending=True):
+            pass
+
+    def mapping(self, n):
+        mapped = self.store.get(self.mapping_collection, str(random.randrange(self.seed_docs) + 1))
+        if mapped is not None:
+            self.store.get(self.students_collection, mapped.get('student_id'))
+
+    def cleanup(self):
+        with self.store.bulk_writer() as writer:
+            for i in range(self.seed_docs):
+                writer.delete(self.students_collection, f'BENCH{i:05d}')
+                writer.delete(self.mapping_collection, str(i + 1))
+            for doc_id in self.written:
+                writer.delete(self.attendance_collection, doc_id)
+
+
+def run_benchmark(store, operations=OPERATIONS, ops=200, concurrency=8, payload_bytes=256,
+                  batch_size=50, seed_docs=200, query_docs=100, progress=None):
+    """
+    Benchmark the attendance operations on a document store.
+
+    Args:
+        store: DocumentStore (Firestore, a local backend or the fake client)
+        operations: Subset of OPERATIONS to run
+        ops: Operations per type
+        concurrency: Threads issuing operations at once
+        payload_bytes: Extra bytes per written document
+        batch_size: Writes per batch commit (max 500)
+        seed_docs: Students / mappings to read from
+        query_docs: Attendance documents matched by the query
+        progress: Optional callable(operation_name) called before each run
+
+    Returns:
+        dict: Machine-readable report
+    """
+    unknown = set(operations) - set(OPERATIONS)
+    if unknown:
+        raise ValueError(f'Unknown operation(s): {", ".join(sorted(unknown))}')
+    if not 1 <= batch_size <= MAX_BATCH_SIZE:
+        raise ValueError(f'batch_size must be between 1 and {MAX_BATCH_SIZE}')
+
+    workload = _Workload(store, seed_docs, payload_bytes, batch_size, query_docs)
+    report = {
+        'backend': store.name,
+        'started_at': datetime.now(timezone.utc).isoformat(),
+        'config': {
+            'ops': ops,
+            'concurrency': concurrency,
+            'payload_bytes': payload_bytes,
+            'batch_size': batch_size,
+            'seed_docs': seed_docs,
+            'query_docs': query_docs,
+        },
+        'operations': {},
+    }
+
+    workload.seed()
+    try:
+        for name in operations:
+            if progress:
+                progress(name)
+            operation = getattr(workload, name)
+
+            def timed(n):
+                start = time.perf_counter()
+                try:
+                    operation(n)
+                except Exception as e:
+                    return None, f'{type(e).__name__}: {e}'
+                return (time.perf_counter() - start) * 1000, None
+
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+                results = list(pool.map(timed, range(ops)))
+            seconds = time.perf_counter() - started
+
+            latencies = [latency for latency, _ in results if latency is not None]
+            errors = [error for _, error in results if error is not None]
+            report['operations'][name] = summarize(
+                latencies, len(errors), seconds,
+                items_per_op=batch_size if name == 'batch' else 1,
+            )
+            if errors:
+                report['operations'][name]['first_error'] = errors[0]
+    finally:
+        workload.cleanup()
+
+    report['store_stats'] = dict(store.stats)
+    return report
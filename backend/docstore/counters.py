@@ -0,0 +1,159 @@
+"""
+============================================================
+DOCUMENT STORE - SHARDED COUNTERS
+============================================================
+Firestore sustains only about one write per second on a single
+document. At lecture start every device, the kiosk and the sync
+job would increment the same summary/{date} document, and the
+writes would queue up and get throttled.
+
+A sharded counter spreads the increments over N documents:
+
+    counter_shards/{collection}_{name}_{0..N-1}
+        increments land on a random shard
+    {collection}/{name}
+        compacted base value (plus any labels, e.g. date)
+
+    value = base + sum(shards)
+
+compact() folds the shards into the base document in one
+atomic batch (base += n, shard -= n). Both sides are Increment
+transforms, so increments arriving meanwhile are never lost.
+
+Counter values are (nested) maps of numbers, e.g.
+    {'present': 3, 'courses': {'CS101': 2, 'MATH101': 1}}
+
+Usage:
+    counter = ShardedCounter(store, 'summary', '2026-03-02')
+    counter.increment({'present': 1, 'courses': {'CS101': 1}})
+    counter.value()      # base + shards (N + 1 reads)
+    counter.compact()    # run periodically
+============================================================
+"""
+import random
+
+from .base import SERVER_TIMESTAMP, Increment
+
+
+SHARD_COLLECTION = 'counter_shards'
+
+# Shards per counter - each one takes ~1 sustained write/second
+DEFAULT_SHARDS = 10
+
+
+def _transform(values, sign=1):
+    """Numbers (in nested maps) -> Increment transforms."""
+    return {
+        key: _transform(value, sign) if isinstance(value, dict) else Increment(sign * value)
+        for key, value in values.items()
+        if isinstance(value, dict) or _is_number(value)
+    }
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _add(total, values):
+    """Add the numbers in values into total (in place, nested maps)."""
+    for key, value in values.items():
+        if isinstance(value, dict):
+            _add(total.setdefault(key, {}), value)
+        elif _is_number(value):
+            current = total.get(key)
+            total[key] = (current if _is_number(current) else 0) + value
+    return total
+
+
+def _is_zero(values):
+    return all(_is_zero(value) if isinstance(value, dict) else value == 0 for value in values.values())
+
+
+class ShardedCounter:
+    """
+    Counter document with sharded writes.
+
+    Args:
+        store: DocumentStore
+        collection: Collection of the base document
+        name: Base document id
+        shards: Number of shards writes are spread over
+    """
+
+    def __init__(self, store, collection, name, shards=DEFAULT_SHARDS):
+        if shards < 1:
+            raise ValueError('shards must be at least 1')
+        self.store = store
+        self.collection = collection
+        self.name = str(name)
+        self.shards = shards
+        self.key = f'{collection}/{self.name}'
+
+    def shard_id(self, shard):
+        return f'{self.collection}_{self.name}_{shard}'
+
+    def increment(self, values, writer=None):
+        """
+        Add values to a random shard (one write).
+
+        Args:
+            values: {field: number or nested map of numbers}
+            writer: Optional BulkWriter/WriteBatch to add the write to
+        """
+        shard = random.randrange(self.shards)
+        target = writer or self.store
+        target.set(SHARD_COLLECTION, self.shard_id(shard), {
+            'counter': self.key,
+            'shard': shard,
+            **_transform(values),
+        }, merge=True)
+
+    def shard_documents(self):
+        """Shards that hold this counter's pending increments."""
+        return list(self.store.query(SHARD_COLLECTION, [('counter', '==', self.key)]))
+
+    def value(self):
+        """
+        Current value: the base document with every shard added in.
+
+        Returns:
+            dict: Base document data (labels included) or {} if the
+                  counter was never written
+        """
+        base = self.store.get(self.collection, self.name)
+        total = dict(base.data) if base else {}
+        for document in self.shard_documents():
+            _add(total, {key: value for key, value in document.data.items() if key not in ('counter', 'shard')})
+        return total
+
+    def compact(self):
+        """
+        Fold every shard into the base document.
+
+        Returns:
+            int: Number of shards folded (0 when there was nothing pending)
+        """
+        pending = {}
+        shards = []
+        for document in self.shard_documents():
+            values = {key: value for key, value in document.data.items() if key not in ('counter', 'shard')}
+            if values and not _is_zero(values):
+                shards.append((document.id, values))
+                _add(pending, values)
+        if not shards:
+            return 0
+
+        batch = self.store.batch()
+        batch.set(self.collection, self.name, {**_transform(pending), 'updated_at': SERVER_TIMESTAMP}, merge=True)
+        for shard_id, values in shards:
+            batch.set(SHARD_COLLECTION, shard_id, _transform(values, sign=-1), merge=True)
+        batch.commit()
+        return len(shards)
+
+    def reset(self, data):
+        """Replace the base document with data and drop every shard."""
+        batch = self.store.batch()
+        batch.set(self.collection, self.name, data)
+        for document in self.shard_documents():
+            batch.delete(SHARD_COLLECTION, document.id)
+        batch.commit()
@@ -0,0 +1,342 @@
+"""
+============================================================
+IN-PROCESS FAKE FIRESTORE CLIENT
+============================================================
+A small, dependency-free stand-in for firebase_admin's
+Firestore client, for testing sync code without network
+access or credentials (used to test docstore.FirestoreStore).
+
+Supports the subset of the API this project uses:
+- client.collection(name).document(id).get/set/update/create/delete
+- collection.where(field, op, value) / where(filter=FieldFilter(...))
+- query.order_by(field, direction).limit(n).stream()
+- client.batch() (max 500 operations per commit, like Firestore)
+- client.get_all(refs)
+- client.collections()
+- SERVER_TIMESTAMP -> replaced by the current time on write
+- Increment(n) -> added to the stored number on write
+- set(merge=True) merges nested maps, like Firestore
+
+Every document gets an update_time on write, and the client
+counts reads, writes and commits (see client.stats) and the
+writes per document (client.document_writes - hot documents).
+============================================================
+"""
+import copy
+import itertools
+import threading
+from collections import defaultdict
+from datetime import datetime, timezone
+
+try:
+    from google.cloud.firestore_v1 import SERVER_TIMESTAMP, Increment
+except ImportError:  # Firebase SDK not installed - fake still works
+    SERVER_TIMESTAMP = object()
+
+    class Increment:
+        def __init__(self, value):
+            self.value = value
+
+
+# Firestore's limit on operations in one batch/transaction
+MAX_BATCH_SIZE = 500
+
+
+class FakeFirestoreError(Exception):
+    """Raised for invalid operations (mirrors Firestore errors)."""
+
+
+class AlreadyExists(FakeFirestoreError):
+    """create() on a document that already exists."""
+
+
+class NotFound(FakeFirestoreError):
+    """update() on a document that does not exist."""
+
+
+_OPERATORS = {
+    '==': lambda a, b: a == b,
+    '!=': lambda a, b: a != b,
+    '<': lambda a, b: a < b,
+    '<=': lambda a, b: a <= b,
+    '>': lambda a, b: a > b,
+    '>=': lambda a, b: a >= b,
+    'in': lambda a, b: a in b,
+    'not-in': lambda a, b: a not in b,
+    'array_contains': lambda a, b: isinstance(a, list) and b in a,
+    'array-contains': lambda a, b: isinstance(a, list) and b in a,
+}
+
+
+class FakeSnapshot:
+    """Mirrors google.cloud.firestore DocumentSnapshot."""
+
+    def __init__(self, reference, data, update_time):
+        self.reference = reference
+        self.id = reference.id
+        self._data = data
+        self.update_time = update_time
+        self.create_time = update_time
+
+    @property
+    def exists(self):
+        return self._data is not None
+
+    def to_dict(self):
+        return copy.deepcopy(self._data) if self._data is not None else None
+
+    def get(self, field):
+        return (self._data or {}).get(field)
+
+
+class FakeDocumentReference:
+    """Mirrors google.cloud.firestore DocumentReference."""
+
+    def __init__(self, client, collection_name, document_id):
+        self._client = client
+        self.collection_name = collection_name
+        self.id = document_id
+        self.path = f'{collection_name}/{document_id}'
+
+    def get(self):
+        self._client._count('reads')
+        return self._client._snapshot(self)
+
+    def set(self, data, merge=False):
+        self._client._count('writes')
+        self._client._apply([('set', self, data, merge)])
+
+    def create(self, data):
+        self._client._count('writes')
+        self._client._apply([('create', self, data, False)])
+
+    def update(self, data):
+        self._client._count('writes')
+        self._client._apply([('update', self, data, True)])
+
+    def delete(self):
+        self._client._count('writes')
+        self._client._apply([('delete', self, None, False)])
+
+
+class FakeQuery:
+    """Mirrors google.cloud.firestore Query (filters, ordering, limit)."""
+
+    def __init__(self, client, collection_name, filters=(), orders=(), limit_count=None):
+        self._client = client
+        self._collection_name = collection_name
+        self._filters = list(filters)
+        self._orders = list(orders)
+        self._limit = limit_count
+
+    def _copy(self, **changes):
+        state = {
+            'filters': self._filters,
+            'orders': self._orders,
+            'limit_count': self._limit,
+        }
+        state.update(changes)
+        return FakeQuery(self._client, self._collection_name, **state)
+
+    def where(self, field_path=None, op_string=None, value=None, filter=None):
+        if filter is not None:
+            field_path, op_string, value = filter.field_path, filter.op_string, filter.value
+        if op_string not in _OPERATORS:
+            raise FakeFirestoreError(f'Unsupported operator: {op_string}')
+        return self._copy(filters=self._filters + [(field_path, op_string, value)])
+
+    def order_by(self, field_path, direction='ASCENDING'):
+        return self._copy(orders=self._orders + [(field_path, direction)])
+
+    def limit(self, count):
+        return self._copy(limit_count=count)
+
+    def stream(self):
+        for snapshot in self._run():
+            yield snapshot
+
+    def get(self):
+        return list(self._run())
+
+    def _run(self):
+        documents = self._client._documents_in(self._collection_name)
+        matched = []
+        for document_id, (data, update_time) in documents:
+            if all(
+                field in data and data[field] is not None and _OPERATORS[op](data[field], value)
+                for field, op, value in self._filters
+            ):
+                matched.append((document_id, data, update_time))
+
+        # Firestore excludes documents missing an order_by field
+        for field, _ in self._orders:
+            matched = [row for row in matched if field in row[1]]
+
+        for field, direction in reversed(self._orders):
+            matched.sort(key=lambda row: row[1][field], reverse=(direction == 'DESCENDING'))
+        if not self._orders:
+            matched.sort(key=lambda row: row[0])
+
+        if self._limit is not None:
+            matched = matched[:self._limit]
+
+        for document_id, data, update_time in matched:
+            self._client._count('reads')
+            reference = FakeDocumentReference(self._client, self._collection_name, document_id)
+            yield FakeSnapshot(reference, copy.deepcopy(data), update_time)
+
+
+class FakeCollectionReference(FakeQuery):
+    """Mirrors google.cloud.firestore CollectionReference."""
+
+    def __init__(self, client, name):
+        super().__init__(client, name)
+        self.id = name
+
+    def document(self, document_id=None):
+        if document_id is None:
+            document_id = f'auto{next(self._client._auto_ids):016d}'
+        return FakeDocumentReference(self._client, self.id, str(document_id))
+
+    def add(self, data):
+        reference = self.document()
+        reference.set(data)
+        return None, reference
+
+
+class FakeWriteBatch:
+    """Mirrors google.cloud.firestore WriteBatch (atomic, max 500 operations)."""
+
+    def __init__(self, client):
+        self._client = client
+        self._operations = []
+
+    def __len__(self):
+        return len(self._operations)
+
+    def set(self, reference, data, merge=False):
+        self._operations.append(('set', reference, data, merge))
+
+    def create(self, reference, data):
+        self._operations.append(('create', reference, data, False))
+
+    def update(self, reference, data):
+        self._operations.append(('update', reference, data, True))
+
+    def delete(self, reference):
+        self._operations.append(('delete', reference, None, False))
+
+    def commit(self):
+        if len(self._operations) > MAX_BATCH_SIZE:
+            raise FakeFirestoreError(
+                f'maximum {MAX_BATCH_SIZE} writes allowed per request, got {len(self._operations)}'
+            )
+        self._client._count('commits')
+        self._client._count('writes', len(self._operations))
+        self._client._apply(self._operations)
+        self._operations = []
+
+
+class FakeFirestoreClient:
+    """
+    In-process Firestore client.
+
+    Attributes:
+        stats: Counters {'reads', 'writes', 'commits'}
+        document_writes: Writes per document path
+    """
+
+    def __init__(self, clock=None):
+        """
+        Args:
+            clock: Callable returning the current (aware) datetime.
+                Used for update times and SERVER_TIMESTAMP.
+        """
+        self._data = defaultdict(dict)  # collection -> {doc_id: (data, update_time)}
+        self._lock = threading.RLock()
+        self._auto_ids = itertools.count(1)
+        self._clock = clock or (lambda: datetime.now(timezone.utc))
+        self.stats = defaultdict(int)
+        self.document_writes = defaultdict(int)  # path -> writes
+
+    # ---------- public API ----------
+
+    def collection(self, name):
+        return FakeCollectionReference(self, name)
+
+    def document(self, path):
+        collection_name, document_id = path.split('/', 1)
+        return FakeDocumentReference(self, collection_name, document_id)
+
+    def batch(self):
+        return FakeWriteBatch(self)
+
+    def get_all(self, references):
+        for reference in references:
+            self._count('reads')
+            yield self._snapshot(reference)
+
+    def collections(self):
+        with self._lock:
+            return [FakeCollectionReference(self, name) for name, docs in self._data.items() if docs]
+
+    # ---------- internals ----------
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self.stats[name] += amount
+
+    def _snapshot(self, reference):
+        with self._lock:
+            data, update_time = self._data[reference.collection_name].get(reference.id, (None, None))
+            return FakeSnapshot(reference, copy.deepcopy(data), update_time)
+
+    def _documents_in(self, collection_name):
+        with self._lock:
+            return list(self._data[collection_name].items())
+
+    def _resolve(self, data, before, now, deep):
+        """Apply SERVER_TIMESTAMP / Increment transforms (deep = merge nested maps)."""
+        before = before if isinstance(before, dict) else {}
+        resolved = copy.deepcopy(before) if deep else {}
+        for key, value in data.items():
+            if value is SERVER_TIMESTAMP:
+                resolved[key] = now
+            elif isinstance(value, Increment):
+                current = before.get(key)
+                if isinstance(current, bool) or not isinstance(current, (int, float)):
+                    current = 0
+                resolved[key] = current + value.value
+            elif isinstance(value, dict):
+                resolved[key] = self._resolve(value, before.get(key) if deep else None, now, deep)
+            else:
+                resolved[key] = copy.deepcopy(value)
+        return resolved
+
+    def _apply(self, operations):
+        """Apply operations atomically (all or nothing)."""
+        with self._lock:
+            now = self._clock()
+
+            # Validate first so a failing batch changes nothing
+            for kind, reference, _, _ in operations:
+                exists = reference.id in self._data[reference.collection_name]
+                if kind == 'create' and exists:
+                    raise AlreadyExists(f'Document already exists: {reference.path}')
+                if kind == 'update' and not exists:
+                    raise NotFound(f'No document to update: {reference.path}')
+
+            for kind, reference, data, merge in operations:
+                self.document_writes[reference.path] += 1
+                documents = self._data[reference.collection_name]
+                if kind == 'delete':
+                    documents.pop(reference.id, None)
+                    continue
+
+                before = documents[reference.id][0] if reference.id in documents else None
+                if kind == 'update':
+                    new_data = copy.deepcopy(before)
+                    new_data.update(self._resolve(data, before, now, deep=False))
+                else:
+                    new_data = self._resolve(data, before if merge else None, now, deep=merge)
+                documents[reference.id] = (new_data, now)
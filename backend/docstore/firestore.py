@@ -0,0 +1,150 @@
+"""
+============================================================
+DOCUMENT STORE - FIRESTORE BACKEND
+============================================================
+Thin adapter over a firebase_admin Firestore client (or the
+in-process FakeFirestoreClient from docstore.fake_firestore).
+============================================================
+"""
+import os
+
+from .base import (
+    MAX_BATCH_SIZE, OPERATORS, SERVER_TIMESTAMP,
+    AlreadyExists, Increment, BatchTooLarge, Document, DocumentStore, DocumentStoreError, NotFound, StoreUnavailable,
+)
+
+try:
+    from google.cloud.firestore_v1.base_query import FieldFilter
+except ImportError:  # Firebase SDK not installed - positional where() still works
+    FieldFilter = None
+
+
+def connect(credentials_path):
+    """
+    Initialize firebase_admin (once) and return a Firestore client.
+
+    Raises:
+        StoreUnavailable: Credentials file or SDK missing
+    """
+    if not os.path.exists(credentials_path):
+        raise StoreUnavailable(f'Firebase credentials not found: {credentials_path}')
+
+    try:
+        import firebase_admin
+        from firebase_admin import credentials, firestore
+    except ImportError as e:
+        raise StoreUnavailable(f'firebase-admin is not installed: {e}')
+
+    try:
+        firebase_admin.get_app()
+    except ValueError:
+        cred = credentials.Certificate(credentials_path)
+        firebase_admin.initialize_app(cred)
+    return firestore.client()
+
+
+def _native_transforms(client):
+    """(SERVER_TIMESTAMP sentinel, Increment class) understood by the given client."""
+    module = type(client).__module__
+    if module.startswith('google.'):
+        from google.cloud.firestore_v1 import SERVER_TIMESTAMP as native, Increment as native_increment
+        return native, native_increment
+    from .fake_firestore import SERVER_TIMESTAMP as fake, Increment as fake_increment
+    return fake, fake_increment
+
+
+class FirestoreStore(DocumentStore):
+    """
+    Document store backed by Cloud Firestore.
+
+    Args:
+        client: google.cloud.firestore Client or FakeFirestoreClient
+    """
+
+    name = 'firestore'
+
+    def __init__(self, client):
+        super().__init__()
+        self.client = client
+        self._server_timestamp, self._increment = _native_transforms(client)
+
+    def _to_native(self, data):
+        native = {}
+        for key, value in data.items():
+            if value is SERVER_TIMESTAMP:
+                value = self._server_timestamp
+            elif isinstance(value, Increment):
+                value = self._increment(value.amount)
+            elif isinstance(value, dict):
+                value = self._to_native(value)
+            native[key] = value
+        return native
+
+    def _reference(self, collection, doc_id):
+        return self.client.collection(collection).document(str(doc_id))
+
+    # ---------- reads ----------
+
+    def get(self, collection, doc_id):
+        self._count('reads')
+        snapshot = self._reference(collection, doc_id).get()
+        return Document(snapshot.id, snapshot.to_dict(), snapshot.update_time) if snapshot.exists else None
+
+    def get_many(self, collection, doc_ids):
+        references = [self._reference(collection, doc_id) for doc_id in doc_ids]
+        self._count('reads', len(references))
+        return {
+            snapshot.id: Document(snapshot.id, snapshot.to_dict(), snapshot.update_time)
+            for snapshot in self.client.get_all(references)
+            if snapshot.exists
+        }
+
+    def query(self, collection, filters=(), order_by=None, descending=False, limit=None):
+        query = self.client.collection(collection)
+        for field, op, value in filters:
+            if op not in OPERATORS:
+                raise DocumentStoreError(f'Unsupported operator: {op}')
+            if FieldFilter is not None:
+                query = query.where(filter=FieldFilter(field, op, value))
+            else:
+                query = query.where(field, op, value)
+        if order_by:
+            query = query.order_by(order_by, direction='DESCENDING' if descending else 'ASCENDING')
+        if limit is not None:
+            query = query.limit(limit)
+
+        for snapshot in query.stream():
+            self._count('reads')
+            yield Document(snapshot.id, snapshot.to_dict(), snapshot.update_time)
+
+    def collections(self):
+        return sorted(collection.id for collection in self.client.collections())
+
+    # ---------- writes ----------
+
+    def _commit(self, operations):
+        if len(operations) > MAX_BATCH_SIZE:
+            raise BatchTooLarge(f'maximum {MAX_BATCH_SIZE} writes allowed per batch, got {len(operations)}')
+
+        batch = self.client.batch()
+        for kind, collection, doc_id, data, merge in operations:
+            reference = self._reference(collection, doc_id)
+            if kind == 'set':
+                batch.set(reference, self._to_native(data), merge=merge)
+            elif kind == 'create':
+                batch.create(reference, self._to_native(data))
+            elif kind == 'update':
+                batch.update(reference, self._to_native(data))
+            else:
+                batch.delete(reference)
+
+        try:
+            batch.commit()
+        except Exception as e:
+            # Map SDK errors onto the store's exceptions
+            name = type(e).__name__
+            if name in ('AlreadyExists', 'Conflict'):
+                raise AlreadyExists(str(e)) from e
+            if name == 'NotFound':
+                raise NotFound(str(e)) from e
+            raise
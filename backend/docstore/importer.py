@@ -0,0 +1,242 @@
+"""
+============================================================
+BULK STUDENT IMPORT (CSV / JSON -> DOCUMENT STORE)
+============================================================
+Non-interactive onboarding of a whole intake:
+
+1. Read rows from a CSV file (header row) or a JSON file
+   (a list of objects, or {"students": [...]})
+2. Validate every row (required fields, email, duplicates,
+   fingerprint ids, known course codes)
+3. Dedupe against existing documents with batched get_many
+   lookups (students, fingerprint_mapping, courses)
+4. Write students + fingerprint mappings in atomic batches of
+   up to 500 operations, committed by a small thread pool
+
+A student and its fingerprint mapping always land in the same
+batch, so a failed batch never leaves a half-imported student.
+Each batch also updates the summary/students counters.
+
+Columns / fields:
+    student_id, full_name, email, course_code, fingerprint_id (optional)
+
+Usage:
+    result = import_students(get_store(), read_rows('intake.csv'))
+============================================================
+"""
+import csv
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+from .base import MAX_BATCH_SIZE, SERVER_TIMESTAMP
+from .repositories import (
+    CourseRepository, FingerprintMappingRepository, StudentRepository, SummaryRepository, student_course_changes,
+)
+
+
+REQUIRED_FIELDS = ['student_id', 'full_name', 'email', 'course_code']
+
+DEFAULT_WORKERS = 4
+
+
+class ImportRowError:
+    """A row that could not be imported."""
+
+    def __init__(self, row_number, student_id, message):
+        self.row_number = row_number
+        self.student_id = student_id
+        self.message = message
+
+    def __str__(self):
+        return f'row {self.row_number} ({self.student_id or "?"}): {self.message}'
+
+
+class ImportResult:
+    """Outcome of one import run."""
+
+    def __init__(self, total):
+        self.total = total
+        self.imported = 0
+        self.skipped_existing = 0
+        self.errors = []
+        self.batches = 0
+        self.seconds = 0.0
+
+    @property
+    def rows_per_second(self):
+        return self.imported / self.seconds if self.seconds else 0.0
+
+
+def read_rows(path):
+    """
+    Load student rows from a .csv or .json file.
+
+    Returns:
+        list: Row dicts (values as read, not yet validated)
+    """
+    path = Path(path)
+    if path.suffix.lower() == '.json':
+        data = json.loads(path.read_text(encoding='utf-8'))
+        if isinstance(data, dict):
+            data = data.get('students', [])
+        if not isinstance(data, list):
+            raise ValueError('JSON file must contain a list of students or {"students": [...]}')
+        return data
+
+    with path.open(newline='', encoding='utf-8-sig') as f:
+        return list(csv.DictReader(f))
+
+
+def validate_rows(rows):
+    """
+    Normalize and validate rows.
+
+    Returns:
+        tuple: (students, errors) - students are
+               (row_number, student_doc, fingerprint_id or None)
+    """
+    students, errors = [], []
+    seen_ids, seen_fingerprints = set(), set()
+
+    # Row 1 is the CSV header, so data rows start at 2
+    for row_number, row in enumerate(rows, start=2):
+        if not isinstance(row, dict):
+            errors.append(ImportRowError(row_number, None, 'not an object'))
+            continue
+
+        values = {key.strip().lower(): str(value).strip() for key, value in row.items() if key and value is not None}
+        student_id = values.get('student_id', '').upper()
+
+        missing = [field for field in REQUIRED_FIELDS if not values.get(field)]
+        if missing:
+            errors.append(ImportRowError(row_number, student_id, f'missing {", ".join(missing)}'))
+            continue
+        if '@' not in values['email']:
+            errors.append(ImportRowError(row_number, student_id, f'invalid email {values["email"]}'))
+            continue
+        if student_id in seen_ids:
+            errors.append(ImportRowError(row_number, student_id, 'duplicate student_id in file'))
+            continue
+
+        fingerprint_id = None
+        if values.get('fingerprint_id'):
+            try:
+                fingerprint_id = int(values['fingerprint_id'])
+            except ValueError:
+                errors.append(ImportRowError(row_number, student_id, 'fingerprint_id must be a number'))
+                continue
+            if fingerprint_id in seen_fingerprints:
+                errors.append(ImportRowError(row_number, student_id, f'duplicate fingerprint_id {fingerprint_id} in file'))
+                continue
+            seen_fingerprints.add(fingerprint_id)
+
+        seen_ids.add(student_id)
+        students.append((row_number, {
+            'student_id': student_id,
+            'full_name': values['full_name'],
+            'email': values['email'],
+            'course_code': values['course_code'].upper(),
+            'fingerprint_enrolled': fingerprint_id is not None,
+        }, fingerprint_id))
+
+    return students, errors
+
+
+def _chunk(students, batch_size):
+    """Group students into batches, keeping each student's writes together."""
+    batch, operations = [], 0
+    for student in students:
+        needed = 2 if student[2] is not None else 1
+        if operations + needed > batch_size:
+            yield batch
+            batch, operations = [], 0
+        batch.append(student)
+        operations += needed
+    if batch:
+        yield batch
+
+
+def import_students(store, rows, overwrite=False, workers=DEFAULT_WORKERS, batch_size=MAX_BATCH_SIZE, dry_run=False):
+    """
+    Import student rows into the document store.
+
+    Args:
+        store: DocumentStore
+        rows: Row dicts (see read_rows)
+        overwrite: Replace students that already exist (default: skip them)
+        workers: Threads committing batches in parallel
+        batch_size: Operations per batch (max 500)
+        dry_run: Validate and dedupe only, write nothing
+
+    Returns:
+        ImportResult
+    """
+    started = time.perf_counter()
+    result = ImportResult(len(rows))
+    students, errors = validate_rows(rows)
+    result.errors.extend(errors)
+
+    students_repo = StudentRepository(store)
+    mappings_repo = FingerprintMappingRepository(store)
+    summary = SummaryRepository(store)
+
+    # ---------- dedupe / cross-check with one batched lookup per collection ----------
+    existing = students_repo.get_many([student['student_id'] for _, student, _ in students])
+    courses = CourseRepository(store).get_many({student['course_code'] for _, student, _ in students})
+    mappings = mappings_repo.get_many([str(fp) for _, _, fp in students if fp is not None])
+
+    to_write = []
+    for row_number, student, fingerprint_id in students:
+        student_id = student['student_id']
+        if student_id in existing and not overwrite:
+            result.skipped_existing += 1
+            continue
+        if student['course_code'] not in courses:
+            result.errors.append(ImportRowError(row_number, student_id, f'unknown course {student["course_code"]}'))
+            continue
+        if fingerprint_id is not None:
+            mapped_to = mappings.get(str(fingerprint_id), {}).get('student_id')
+            if mapped_to and mapped_to != student_id:
+                result.errors.append(ImportRowError(
+                    row_number, student_id, f'fingerprint_id {fingerprint_id} already mapped to {mapped_to}'
+                ))
+                continue
+
+        student['updated_at'] = SERVER_TIMESTAMP
+        if student_id not in existing:
+            student['created_at'] = SERVER_TIMESTAMP
+        to_write.append((row_number, student, fingerprint_id))
+
+    if dry_run:
+        result.imported = len(to_write)
+        result.seconds = time.perf_counter() - started
+        return result
+
+    # ---------- write: atomic batches across a thread pool ----------
+    def commit(batch_students):
+        batch = store.batch()
+        for _, student, fingerprint_id in batch_students:
+            students_repo.save(student['student_id'], student, merge=True, writer=batch)
+            if fingerprint_id is not None:
+                mappings_repo.map(fingerprint_id, student['student_id'], writer=batch)
+        changes = student_course_changes([student for _, student, _ in batch_students], existing)
+        summary.count_students(changes, writer=batch)
+        batch.commit()
+        return len(batch_students)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        # One operation per batch is kept for the summary/students update
+        futures = {pool.submit(commit, batch): batch for batch in _chunk(to_write, max(1, batch_size - 1))}
+        for future in as_completed(futures):
+            try:
+                result.imported += future.result()
+                result.batches += 1
+            except Exception as e:
+                for row_number, student, _ in futures[future]:
+                    result.errors.append(ImportRowError(row_number, student['student_id'], f'batch failed: {e}'))
+
+    result.errors.sort(key=lambda error: error.row_number)
+    result.seconds = time.perf_counter() - started
+    return result
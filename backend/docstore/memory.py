@@ -0,0 +1,53 @@
+"""
+============================================================
+DOCUMENT STORE - IN-MEMORY BACKEND
+============================================================
+Keeps documents in a dict. Nothing is persisted; use it for
+tests and for benchmarking code paths without the network.
+============================================================
+"""
+import copy
+import threading
+from collections import defaultdict
+
+from .base import Document, DocumentStore
+
+
+class MemoryStore(DocumentStore):
+    """Document store held in process memory (thread-safe)."""
+
+    name = 'memory'
+
+    def __init__(self, clock=None):
+        super().__init__(clock)
+        self._data = defaultdict(dict)  # collection -> {doc_id: (data, update_time)}
+        self._lock = threading.RLock()
+
+    def collections(self):
+        with self._lock:
+            return sorted(name for name, documents in self._data.items() if documents)
+
+    def _load(self, collection, doc_id):
+        with self._lock:
+            stored = self._data[collection].get(doc_id)
+        if stored is None:
+            return None
+        return Document(doc_id, copy.deepcopy(stored[0]), stored[1])
+
+    def _scan(self, collection):
+        with self._lock:
+            items = list(self._data[collection].items())
+        for doc_id, (data, update_time) in items:
+            yield Document(doc_id, copy.deepcopy(data), update_time)
+
+    def _commit(self, operations):
+        with self._lock:
+            def current(collection, doc_id):
+                stored = self._data[collection].get(doc_id)
+                return stored[0] if stored else None
+
+            for collection, doc_id, data, write_time in self._apply(operations, current):
+                if data is None:
+                    self._data[collection].pop(doc_id, None)
+                else:
+                    self._data[collection][doc_id] = (data, write_time)
@@ -0,0 +1,369 @@
+"""
+============================================================
+DOCUMENT STORE - REPOSITORIES
+============================================================
+One repository per Firestore collection, so scripts, sync and
+ingestion code never build collection paths or document ids
+by hand:
+
+    students/{student_id}
+    courses/{course_code}
+    fingerprint_mapping/{fingerprint_id}    -> {'student_id'}
+    attendance/{studentID_YYYY-MM-DD_courseCode}
+    summary/students, summary/{YYYY-MM-DD}  -> dashboard counters
+                                            (days sharded, see counters.py)
+============================================================
+"""
+from collections import Counter
+from datetime import date
+
+from .base import SERVER_TIMESTAMP, AlreadyExists, Increment
+from .counters import DEFAULT_SHARDS, ShardedCounter
+
+
+def attendance_doc_id(student_id, log_date, course_code):
+    """Attendance document id: {studentID}_{YYYY-MM-DD}_{courseCode} (same as the ESP32)."""
+    if isinstance(log_date, date):
+        log_date = log_date.isoformat()
+    return f'{student_id}_{log_date}_{course_code}'
+
+
+class Repository:
+    """
+    Base repository for one collection.
+
+    Args:
+        store: DocumentStore to read from / write to
+    """
+
+    collection = None
+
+    def __init__(self, store):
+        self.store = store
+
+    def get(self, doc_id):
+        """Document data, or None if it does not exist."""
+        document = self.store.get(self.collection, doc_id)
+        return document.data if document else None
+
+    def get_many(self, doc_ids):
+        """{doc_id: data} for the ids that exist."""
+        return {doc_id: document.data for doc_id, document in self.store.get_many(self.collection, doc_ids).items()}
+
+    def exists(self, doc_id):
+        return self.store.get(self.collection, doc_id) is not None
+
+    def save(self, doc_id, data, merge=False, writer=None):
+        """Write a document (optionally through a BulkWriter/WriteBatch)."""
+        target = writer or self.store
+        target.set(self.collection, doc_id, data, merge=merge)
+
+    def delete(self, doc_id):
+        self.store.delete(self.collection, doc_id)
+
+    def find(self, limit=None, order_by=None, **equals):
+        """Stream documents whose fields equal the given values."""
+        filters = [(field, '==', value) for field, value in equals.items()]
+        return self.store.query(self.collection, filters, order_by=order_by, limit=limit)
+
+    def all(self, limit=None):
+        return self.store.query(self.collection, limit=limit)
+
+
+class StudentRepository(Repository):
+    """students/{student_id}"""
+
+    collection = 'students'
+
+    def save_student(self, student, writer=None):
+        """
+        Write a student document (created_at kept on overwrite via merge).
+
+        Args:
+            student: Dict with at least student_id
+            writer: Optional BulkWriter/WriteBatch to add the write to
+        """
+        data = dict(student)
+        data.setdefault('updated_at', SERVER_TIMESTAMP)
+        target = writer or self.store
+        target.set(self.collection, data['student_id'], data, merge=True)
+
+    def in_course(self, course_code):
+        return self.find(course_code=course_code)
+
+
+class CourseRepository(Repository):
+    """courses/{course_code}"""
+
+    collection = 'courses'
+
+    def save_course(self, course, writer=None):
+        data = dict(course)
+        data.setdefault('updated_at', SERVER_TIMESTAMP)
+        target = writer or self.store
+        target.set(self.collection, data['course_code'], data, merge=True)
+
+
+class FingerprintMappingRepository(Repository):
+    """fingerprint_mapping/{fingerprint_id} -> student_id"""
+
+    collection = 'fingerprint_mapping'
+
+    def student_for(self, fingerprint_id):
+        """Student id mapped to a sensor fingerprint id, or None."""
+        data = self.get(str(fingerprint_id))
+        return data.get('student_id') if data else None
+
+    def map(self, fingerprint_id, student_id, writer=None):
+        target = writer or self.store
+        target.set(self.collection, str(fingerprint_id), {'student_id': student_id})
+
+
+class AttendanceRepository(Repository):
+    """attendance/{studentID_YYYY-MM-DD_courseCode}"""
+
+    collection = 'attendance'
+
+    def on_date(self, log_date, course_code=None):
+        """Attendance records for one day (optionally one course)."""
+        if isinstance(log_date, date):
+            log_date = log_date.isoformat()
+        equals = {'date': log_date}
+        if course_code:
+            equals['course_code'] = course_code
+        return self.find(**equals)
+
+    def mark(self, student_id, student_name, course_code, log_date, log_time, status='present',
+             scan_method='fingerprint', writer=None):
+        """
+        Record a check-in. The deterministic id makes repeat scans
+        overwrite the same document instead of creating duplicates.
+
+        Returns:
+            str: Document id
+        """
+        doc_id = attendance_doc_id(student_id, log_date, course_code)
+        data = {
+            'student_id': student_id,
+            'student_name': student_name,
+            'course_code': course_code,
+            'date': log_date.isoformat() if isinstance(log_date, date) else log_date,
+            'time': log_time,
+            'timestamp': SERVER_TIMESTAMP,
+            'received_at': SERVER_TIMESTAMP,
+            'status': status,
+            'scan_method': scan_method,
+        }
+        target = writer or self.store
+        target.set(self.collection, doc_id, data)
+        return doc_id
+
+    def new_record(self, student_id, student_name, course_code, log_date, log_time, timestamp,
+                   status='present', scan_method='fingerprint', **extra):
+        """
+        Build a check-in document without writing it.
+
+        Returns:
+            tuple: (doc_id, data)
+        """
+        doc_id = attendance_doc_id(student_id, log_date, course_code)
+        data = {
+            'student_id': student_id,
+            'student_name': student_name,
+            'course_code': course_code,
+            'date': log_date.isoformat() if isinstance(log_date, date) else log_date,
+            'time': log_time,
+            'timestamp': timestamp,
+            # Server time the record arrived (the sync cursor) - the
+            # scan time above can be much older for queued scans
+            'received_at': SERVER_TIMESTAMP,
+            'status': status,
+            'scan_method': scan_method,
+            **extra,
+        }
+        return doc_id, data
+
+    def create_once(self, doc_id, data):
+        """
+        Create a check-in document unless it already exists, and count it
+        in the day's summary in the same atomic batch.
+
+        Returns:
+            tuple: (created, data) - data is the stored record
+                   (the earlier one when created is False)
+        """
+        batch = self.store.batch()
+        batch.create(self.collection, doc_id, data)
+        SummaryRepository(self.store).count_check_ins([data], writer=batch)
+        try:
+            batch.commit()
+            return True, data
+        except AlreadyExists:
+            return False, self.get(doc_id) or data
+
+    def record_once(self, *args, **kwargs):
+        """
+        Create a check-in only if there is none for that student/day/course
+        (same arguments as new_record).
+
+        Uses create() on the deterministic id, so the duplicate check and
+        the write are a single operation.
+
+        Returns:
+            tuple: (doc_id, created, data) - data is the stored record
+                   (the earlier one when created is False)
+        """
+        doc_id, data = self.new_record(*args, **kwargs)
+        created, data = self.create_once(doc_id, data)
+        return doc_id, created, data
+
+
+def student_course_changes(students, existing):
+    """
+    Per-course change in student counts caused by writing students.
+
+    Args:
+        students: Student dicts about to be written
+        existing: {student_id: current data} for those already stored
+
+    Returns:
+        Counter: {course_code: +n / -n}
+    """
+    changes = Counter()
+    for student in students:
+        before = existing.get(student['student_id'])
+        old_course = before.get('course_code') if before else None
+        new_course = student.get('course_code', old_course)
+        if before is not None and old_course == new_course:
+            continue
+        if before is not None:
+            changes[old_course or ''] -= 1
+        changes[new_course or ''] += 1
+    return changes
+
+
+class SummaryRepository(Repository):
+    """
+    summary/students       -> {total, courses: {code: students}}
+    summary/{YYYY-MM-DD}   -> {present, courses: {code: present}}
+
+    Kept up to date with Increment transforms on every check-in and
+    student write, so a dashboard reads a handful of documents instead
+    of the whole students and attendance collections.
+
+    Check-ins are the hot path (every device at lecture start), so the
+    day counters are sharded: writes land on one of `shards` documents
+    and compact_day() folds them back into summary/{date}. Student
+    counts change only on imports and are kept in one document.
+    """
+
+    collection = 'summary'
+    STUDENTS = 'students'
+
+    def __init__(self, store, shards=DEFAULT_SHARDS):
+        super().__init__(store)
+        self.shards = shards
+
+    def day_counter(self, log_date):
+        if isinstance(log_date, date):
+            log_date = log_date.isoformat()
+        return ShardedCounter(self.store, self.collection, log_date, shards=self.shards)
+
+    def count_check_ins(self, records, writer=None):
+        """
+        Count new attendance records (one shard write per date).
+
+        Args:
+            records: Attendance document dicts that were just created
+            writer: Optional BulkWriter/WriteBatch to add the writes to
+
+        Returns:
+            int: Number of summary writes
+        """
+        per_day = {}
+        for record in records:
+            per_day.setdefault(record['date'], Counter())[record.get('course_code') or ''] += 1
+
+        for log_date, courses in per_day.items():
+            self.day_counter(log_date).increment(
+                {'present': sum(courses.values()), 'courses': dict(courses)}, writer=writer
+            )
+        return len(per_day)
+
+    def count_students(self, changes, writer=None):
+        """
+        Apply per-course student count changes (see student_course_changes).
+
+        Returns:
+            int: Number of summary writes (0 when nothing changed)
+        """
+        changes = {code: amount for code, amount in changes.items() if amount}
+        if not changes:
+            return 0
+        target = writer or self.store
+        target.set(self.collection, self.STUDENTS, {
+            'total': Increment(sum(changes.values())),
+            'courses': {code: Increment(amount) for code, amount in changes.items()},
+            'updated_at': SERVER_TIMESTAMP,
+        }, merge=True)
+        return 1
+
+    def rebuild_students(self):
+        """Recount summary/students from the students collection (full read)."""
+        courses = Counter(
+            document.get('course_code') or '' for document in self.store.query(StudentRepository.collection)
+        )
+        data = {'total': sum(courses.values()), 'courses': dict(courses), 'updated_at': SERVER_TIMESTAMP}
+        self.store.set(self.collection, self.STUDENTS, data)
+        return data
+
+    def rebuild_day(self, log_date):
+        """Recount summary/{date} from that day's attendance (full read of the day)."""
+        if isinstance(log_date, date):
+            log_date = log_date.isoformat()
+        courses = Counter(
+            document.get('course_code') or '' for document in AttendanceRepository(self.store).on_date(log_date)
+        )
+        data = {
+            'date': log_date,
+            'present': sum(courses.values()),
+            'courses': dict(courses),
+            'updated_at': SERVER_TIMESTAMP,
+        }
+        self.day_counter(log_date).reset(data)
+        return data
+
+    def compact_day(self, log_date):
+        """Fold a day's counter shards into summary/{date} (returns shards folded)."""
+        return self.day_counter(log_date).compact()
+
+    def for_day(self, log_date):
+        """
+        Dashboard summary for one day (summary/students, summary/{date}
+        and the day's counter shards).
+
+        Returns:
+            dict: {date, total_students, present, attendance_rate,
+                   courses: {code: {students, present}}}
+        """
+        if isinstance(log_date, date):
+            log_date = log_date.isoformat()
+        students = self.get(self.STUDENTS) or {}
+        day = self.day_counter(log_date).value()
+
+        total = students.get('total', 0)
+        present = day.get('present', 0)
+        codes = set(students.get('courses', {})) | set(day.get('courses', {}))
+        return {
+            'date': log_date,
+            'total_students': total,
+            'present': present,
+            'attendance_rate': round(present / total * 100, 1) if total else 0.0,
+            'courses': {
+                code: {
+                    'students': students.get('courses', {}).get(code, 0),
+                    'present': day.get('courses', {}).get(code, 0),
+                }
+                for code in sorted(codes)
+            },
+        }
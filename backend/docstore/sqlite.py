@@ -0,0 +1,129 @@
+"""
+============================================================
+DOCUMENT STORE - SQLITE BACKEND
+============================================================
+Stores each document as a JSON row in a local SQLite file,
+so data survives between runs (offline development, repeatable
+benchmarks). Datetimes round-trip as timezone-aware values.
+
+Table:
+    documents(collection, doc_id, data, update_time)
+============================================================
+"""
+import json
+import sqlite3
+import threading
+from datetime import datetime
+
+from .base import Document, DocumentStore
+
+
+def _encode(value):
+    if isinstance(value, datetime):
+        return {'__datetime__': value.isoformat()}
+    raise TypeError(f'Cannot store {type(value).__name__} in a document')
+
+
+def _decode(obj):
+    if set(obj) == {'__datetime__'}:
+        return datetime.fromisoformat(obj['__datetime__'])
+    return obj
+
+
+class SQLiteStore(DocumentStore):
+    """
+    Document store backed by SQLite.
+
+    Args:
+        path: Database file (':memory:' for a throwaway store)
+        clock: Callable returning the current (aware) datetime
+    """
+
+    name = 'sqlite'
+
+    def __init__(self, path=':memory:', clock=None):
+        super().__init__(clock)
+        self.path = str(path)
+        self._lock = threading.RLock()
+        self._connection = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute(
+            'CREATE TABLE IF NOT EXISTS documents ('
+            ' collection TEXT NOT NULL,'
+            ' doc_id TEXT NOT NULL,'
+            ' data TEXT NOT NULL,'
+            ' update_time TEXT NOT NULL,'
+            ' PRIMARY KEY (collection, doc_id))'
+        )
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    def collections(self):
+        with self._lock:
+            rows = self._connection.execute('SELECT DISTINCT collection FROM documents ORDER BY collection')
+            return [row[0] for row in rows]
+
+    def _row_to_document(self, doc_id, data, update_time):
+        return Document(doc_id, json.loads(data, object_hook=_decode), datetime.fromisoformat(update_time))
+
+    def _load(self, collection, doc_id):
+        with self._lock:
+            row = self._connection.execute(
+                'SELECT doc_id, data, update_time FROM documents WHERE collection = ? AND doc_id = ?',
+                (collection, doc_id),
+            ).fetchone()
+        return self._row_to_document(*row) if row else None
+
+    def _load_many(self, collection, doc_ids):
+        documents = {}
+        # Stay well below SQLite's bound-parameter limit
+        for start in range(0, len(doc_ids), 500):
+            chunk = doc_ids[start:start + 500]
+            placeholders = ','.join('?' * len(chunk))
+            with self._lock:
+                rows = self._connection.execute(
+                    f'SELECT doc_id, data, update_time FROM documents '
+                    f'WHERE collection = ? AND doc_id IN ({placeholders})',
+                    [collection, *chunk],
+                ).fetchall()
+            for row in rows:
+                documents[row[0]] = self._row_to_document(*row)
+        return documents
+
+    def _scan(self, collection):
+        with self._lock:
+            rows = self._connection.execute(
+                'SELECT doc_id, data, update_time FROM documents WHERE collection = ?', (collection,)
+            ).fetchall()
+        for row in rows:
+            yield self._row_to_document(*row)
+
+    def _commit(self, operations):
+        with self._lock:
+            cursor = self._connection.cursor()
+            cursor.execute('BEGIN IMMEDIATE')
+            try:
+                def current(collection, doc_id):
+                    row = cursor.execute(
+                        'SELECT data FROM documents WHERE collection = ? AND doc_id = ?',
+                        (collection, doc_id),
+                    ).fetchone()
+                    return json.loads(row[0], object_hook=_decode) if row else None
+
+                for collection, doc_id, data, write_time in self._apply(operations, current):
+                    if data is None:
+                        cursor.execute(
+                            'DELETE FROM documents WHERE collection = ? AND doc_id = ?', (collection, doc_id)
+                        )
+                    else:
+                        cursor.execute(
+                            'INSERT OR REPLACE INTO documents (collection, doc_id, data, update_time) '
+                            'VALUES (?, ?, ?, ?)',
+                            (collection, doc_id, json.dumps(data, default=_encode), write_time.isoformat()),
+                        )
+                cursor.execute('COMMIT')
+            except Exception:
+                cursor.execute('ROLLBACK')
+                raise
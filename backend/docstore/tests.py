@@ -0,0 +1,284 @@
+import os
+import threading
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from django.test import SimpleTestCase
+
+from . import (
+    SERVER_TIMESTAMP, AlreadyExists, AttendanceRepository, BatchTooLarge, FingerprintMappingRepository,
+    Increment, MemoryStore, NotFound, ShardedCounter, SQLiteStore, StudentRepository, SummaryRepository,
+)
+from .benchmark import percentile, run_benchmark
+from .counters import SHARD_COLLECTION
+from .fake_firestore import FakeFirestoreClient
+from .firestore import FirestoreStore
+from .importer import import_students
+
+
+NOW = datetime(2026, 3, 2, 9, 0, tzinfo=timezone.utc)
+
+
+class StoreContract:
+    """Behaviour every backend must share."""
+
+    def make_store(self):
+        raise NotImplementedError
+
+    def setUp(self):
+        self.store = self.make_store()
+
+    def tearDown(self):
+        self.store.close()
+
+    def test_set_get_merge_and_delete(self):
+        self.store.set('students', 'ST001', {'full_name': 'Alice', 'course_code': 'CS101'})
+        self.store.set('students', 'ST001', {'email': 'a@example.com'}, merge=True)
+
+        document = self.store.get('students', 'ST001')
+        self.assertEqual(document.data, {'full_name': 'Alice', 'course_code': 'CS101', 'email': 'a@example.com'})
+        self.assertIsNotNone(document.update_time)
+
+        self.store.set('students', 'ST001', {'full_name': 'Alice'})
+        self.assertEqual(self.store.get('students', 'ST001').data, {'full_name': 'Alice'})
+
+        self.store.delete('students', 'ST001')
+        self.assertIsNone(self.store.get('students', 'ST001'))
+
+    def test_create_and_update_errors(self):
+        self.store.create('courses', 'CS101', {'course_name': 'Intro'})
+        with self.assertRaises(AlreadyExists):
+            self.store.create('courses', 'CS101', {'course_name': 'Again'})
+        with self.assertRaises(NotFound):
+            self.store.update('courses', 'CS999', {'course_name': 'Missing'})
+
+    def test_server_timestamp_and_datetimes_round_trip(self):
+        self.store.set('attendance', 'a', {'timestamp': SERVER_TIMESTAMP, 'when': NOW})
+        data = self.store.get('attendance', 'a').data
+        self.assertIsInstance(data['timestamp'], datetime)
+        self.assertEqual(data['when'], NOW)
+
+    def test_increment_and_nested_merge(self):
+        self.store.set('summary', 'day', {'present': Increment(2), 'courses': {'CS101': Increment(2)}}, merge=True)
+        self.store.set('summary', 'day', {'present': Increment(1), 'courses': {'MATH101': Increment(1)}}, merge=True)
+        self.store.update('summary', 'day', {'present': Increment(-1)})
+
+        self.assertEqual(self.store.get('summary', 'day').data, {'present': 2, 'courses': {'CS101': 2, 'MATH101': 1}})
+
+    def test_query_filters_order_and_limit(self):
+        for i in range(5):
+            self.store.set('students', f'ST00{i}', {
+                'course_code': 'CS101' if i % 2 == 0 else 'MATH101',
+                'updated_at': NOW + timedelta(minutes=i),
+            })
+
+        cs = [document.id for document in self.store.query('students', [('course_code', '==', 'CS101')])]
+        self.assertEqual(cs, ['ST000', 'ST002', 'ST004'])
+
+        recent = self.store.query(
+            'students', [('updated_at', '>', NOW + timedelta(minutes=1))],
+            order_by='updated_at', descending=True, limit=2,
+        )
+        self.assertEqual([document.id for document in recent], ['ST004', 'ST003'])
+
+    def test_batch_is_atomic_and_limited(self):
+        self.store.set('courses', 'CS101', {'course_name': 'Intro'})
+
+        batch = self.store.batch()
+        batch.set('courses', 'CS201', {'course_name': 'Data Structures'})
+        batch.create('courses', 'CS101', {'course_name': 'Duplicate'})
+        with self.assertRaises(AlreadyExists):
+            batch.commit()
+        self.assertIsNone(self.store.get('courses', 'CS201'))
+
+        batch = self.store.batch()
+        for i in range(501):
+            batch.set('students', f'S{i}', {})
+        with self.assertRaises(BatchTooLarge):
+            batch.commit()
+
+    def test_bulk_writer_splits_batches(self):
+        with self.store.bulk_writer() as writer:
+            for i in range(1001):
+                writer.set('students', f'S{i:04d}', {'n': i})
+
+        self.assertEqual(writer.commits, 3)
+        self.assertEqual(len(self.store.get_many('students', ['S0000', 'S1000', 'S9999'])), 2)
+        self.assertEqual(self.store.collections(), ['students'])
+
+    def test_repositories(self):
+        StudentRepository(self.store).save_student({'student_id': 'ST001', 'full_name': 'Alice'})
+        FingerprintMappingRepository(self.store).map(7, 'ST001')
+        doc_id = AttendanceRepository(self.store).mark('ST001', 'Alice', 'CS101', '2026-03-02', '09:00:00')
+
+        self.assertEqual(doc_id, 'ST001_2026-03-02_CS101')
+        self.assertEqual(FingerprintMappingRepository(self.store).student_for(7), 'ST001')
+        self.assertEqual(len(list(AttendanceRepository(self.store).on_date('2026-03-02', 'CS101'))), 1)
+        self.assertIn('updated_at', StudentRepository(self.store).get('ST001'))
+
+    def test_summary_counts_check_ins_once(self):
+        attendance = AttendanceRepository(self.store)
+        summary = SummaryRepository(self.store)
+        summary.count_students({'CS101': 2, 'MATH101': 1})
+
+        for student_id, course_code in [('ST001', 'CS101'), ('ST001', 'CS101'), ('ST002', 'MATH101')]:
+            attendance.record_once(student_id, 'Name', course_code, '2026-03-02', '09:00:00', NOW)
+
+        day = summary.for_day('2026-03-02')
+        self.assertEqual((day['total_students'], day['present'], day['attendance_rate']), (3, 2, 66.7))
+        self.assertEqual(day['courses']['CS101'], {'students': 2, 'present': 1})
+        self.assertEqual(summary.rebuild_day('2026-03-02')['courses'], {'CS101': 1, 'MATH101': 1})
+
+
+class MemoryStoreTests(StoreContract, SimpleTestCase):
+
+    def make_store(self):
+        return MemoryStore(clock=lambda: NOW)
+
+
+class SQLiteStoreTests(StoreContract, SimpleTestCase):
+
+    def make_store(self):
+        return SQLiteStore(':memory:', clock=lambda: NOW)
+
+
+class FirestoreStoreTests(StoreContract, SimpleTestCase):
+
+    def make_store(self):
+        return FirestoreStore(FakeFirestoreClient(clock=lambda: NOW))
+
+
+def emulator_or_fake_client():
+    """Firestore emulator client when FIRESTORE_EMULATOR_HOST is set, else the in-process fake."""
+    if os.environ.get('FIRESTORE_EMULATOR_HOST'):
+        from google.cloud import firestore
+        return firestore.Client(project=os.environ.get('GCLOUD_PROJECT', 'demo-attendance'))
+    return FakeFirestoreClient()
+
+
+class ShardedCounterTests(SimpleTestCase):
+    """Runs against the Firestore emulator if one is configured."""
+
+    THREADS = 8
+    SCANS_PER_THREAD = 50
+
+    def setUp(self):
+        self.client = emulator_or_fake_client()
+        self.store = FirestoreStore(self.client)
+        self.day = f'test-{uuid.uuid4().hex[:8]}'  # fresh counter (emulator data persists)
+        self.summary = SummaryRepository(self.store, shards=10)
+
+    def scan_burst(self):
+        def device():
+            for i in range(self.SCANS_PER_THREAD):
+                course = 'CS101' if i % 2 == 0 else 'MATH101'
+                self.summary.count_check_ins([{'date': self.day, 'course_code': course}])
+
+        threads = [threading.Thread(target=device) for _ in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def test_concurrent_increments_spread_over_shards(self):
+        self.scan_burst()
+
+        total = self.THREADS * self.SCANS_PER_THREAD
+        day = self.summary.for_day(self.day)
+        self.assertEqual(day['present'], total)
+        self.assertEqual(day['courses']['CS101']['present'], total // 2)
+
+        if hasattr(self.client, 'document_writes'):
+            writes = self.client.document_writes
+            # The base document is never written on the hot path...
+            self.assertEqual(writes[f'summary/{self.day}'], 0)
+            # ...and no shard takes more than a fraction of the burst
+            shard_writes = [count for path, count in writes.items() if path.startswith(SHARD_COLLECTION)]
+            self.assertEqual(len(shard_writes), 10)
+            self.assertLess(max(shard_writes), total / 4)
+
+    def test_compaction_keeps_concurrent_increments(self):
+        counter = self.summary.day_counter(self.day)
+        done = threading.Event()
+
+        def compactor():
+            while not done.is_set():
+                counter.compact()
+
+        thread = threading.Thread(target=compactor)
+        thread.start()
+        try:
+            self.scan_burst()
+        finally:
+            done.set()
+            thread.join()
+        counter.compact()
+
+        total = self.THREADS * self.SCANS_PER_THREAD
+        self.assertEqual(self.store.get('summary', self.day).get('present'), total)
+        self.assertEqual(counter.value()['courses'], {'CS101': total // 2, 'MATH101': total // 2})
+        self.assertEqual(counter.compact(), 0)
+
+    def test_reset_drops_shards(self):
+        counter = ShardedCounter(self.store, 'summary', self.day, shards=3)
+        counter.increment({'present': 5})
+        counter.reset({'present': 2})
+
+        self.assertEqual(counter.value(), {'present': 2})
+        self.assertEqual(counter.shard_documents(), [])
+
+
+class ImportStudentsTests(SimpleTestCase):
+
+    def setUp(self):
+        self.store = MemoryStore(clock=lambda: NOW)
+        self.store.set('courses', 'CS101', {'course_name': 'Intro'})
+
+    def rows(self, count, **extra):
+        return [
+            dict({'student_id': f'st{i:04d}', 'full_name': f'Student {i}', 'email': f's{i}@example.com',
+                  'course_code': 'cs101', 'fingerprint_id': str(i + 1)}, **extra)
+            for i in range(count)
+        ]
+
+    def test_imports_in_atomic_batches_with_mappings(self):
+        result = import_students(self.store, self.rows(600), workers=3)
+
+        self.assertEqual((result.imported, result.errors), (600, []))
+        # 600 students + 600 mappings, 249 students (+ summary write) per 500-op batch
+        self.assertEqual(result.batches, 3)
+        self.assertEqual(self.store.get('students', 'ST0005').get('course_code'), 'CS101')
+        self.assertEqual(FingerprintMappingRepository(self.store).student_for(6), 'ST0005')
+        self.assertEqual(self.store.get('summary', 'students').get('courses'), {'CS101': 600})
+
+    def test_skips_existing_and_reports_row_errors(self):
+        import_students(self.store, self.rows(3))
+        rows = self.rows(3) + [
+            {'student_id': 'NEW1', 'full_name': 'New', 'email': 'bad-email', 'course_code': 'CS101'},
+            {'student_id': 'NEW2', 'full_name': 'New', 'email': 'n@example.com', 'course_code': 'CS999'},
+            {'student_id': 'NEW3', 'full_name': 'New', 'email': 'n@example.com', 'course_code': 'CS101',
+             'fingerprint_id': '1'},
+        ]
+
+        result = import_students(self.store, rows)
+        self.assertEqual(result.imported, 0)
+        self.assertEqual(result.skipped_existing, 3)
+        self.assertEqual([error.student_id for error in result.errors], ['NEW1', 'NEW2', 'NEW3'])
+
+
+class BenchmarkTests(SimpleTestCase):
+
+    def test_percentile_nearest_rank(self):
+        values = list(range(1, 101))
+        self.assertEqual((percentile(values, 50), percentile(values, 95), percentile(values, 99)), (50, 95, 99))
+        self.assertIsNone(percentile([], 50))
+
+    def test_report_covers_operations_and_cleans_up(self):
+        store = MemoryStore()
+        report = run_benchmark(store, ops=10, concurrency=2, batch_size=5, seed_docs=10, query_docs=4)
+
+        self.assertEqual(set(report['operations']), {'get', 'set', 'batch', 'query', 'mapping'})
+        self.assertTrue(all(result['errors'] == 0 for result in report['operations'].values()))
+        batch = report['operations']['batch']
+        self.assertAlmostEqual(batch['docs_per_second'], batch['ops_per_second'] * 5, delta=1)
+        self.assertEqual(store.collections(), [])
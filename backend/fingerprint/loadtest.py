@@ -0,0 +1,292 @@
+"""
+============================================================
+MULTI-KIOSK SCAN LOAD GENERATOR
+============================================================
+Simulates kiosks posting scans to a running server, the way
+students arrive at class changeover:
+
+- arrivals are bursty: groups of students (mean size --burst)
+  arrive as a Poisson process, members a second or two apart
+- some students scan again a few seconds later (--repeat-rate),
+  unsure whether the first scan worked
+- a few fingers are not enrolled (--unknown-rate)
+- each kiosk handles one student at a time; students take the
+  next free kiosk, so a saturated server shows up as queueing
+
+Endpoints:
+    scan     POST /fingerprint/scan/      (HTML page)
+    api      POST /fingerprint/api/scan/  (kiosk JSON API)
+    device   POST /devices/api/mark/      (ESP32 JSON API)
+
+The server must run with R307_EMULATION=1: the finger is sent in
+the X-Emulated-Finger header and read through the emulated R307
+protocol (device scans carry a fingerprint id instead).
+
+Driven by `python manage.py loadtest_scans`.
+============================================================
+"""
+import math
+import queue
+import random
+import secrets
+import threading
+import time
+from collections import Counter
+
+import requests
+
+from docstore.benchmark import percentile
+
+
+ENDPOINTS = {
+    'scan': '/fingerprint/scan/',
+    'api': '/fingerprint/api/scan/',
+    'device': '/devices/api/mark/',
+}
+
+# Scans counted as a failure in the report
+FAILED_RESULTS = {'error', 'sensor_error', 'invalid'}
+
+UNKNOWN_TEMPLATE_BYTES = 512
+
+
+def arrival_times(rate_per_minute, duration, burst=3.0, rng=random):
+    """
+    Arrival offsets (seconds) of students over a test step.
+
+    Groups arrive as a Poisson process; group sizes are geometric
+    with mean `burst` (1 = plain Poisson arrivals).
+
+    Args:
+        rate_per_minute: Mean offered scans per minute
+        duration: Step length in seconds
+        burst: Mean group size
+        rng: random.Random
+
+    Returns:
+        list: Sorted offsets within [0, duration)
+    """
+    burst = max(1.0, burst)
+    group_rate = rate_per_minute / 60.0 / burst
+    times = []
+    t = rng.expovariate(group_rate) if group_rate > 0 else duration
+    while t < duration:
+        # Geometric group size with mean `burst`
+        size = 1
+        while rng.random() > 1 / burst:
+            size += 1
+        member = t
+        for _ in range(size):
+            if member >= duration:
+                break
+            times.append(member)
+            member += rng.uniform(0.5, 2.0)
+        t += rng.expovariate(group_rate)
+    return sorted(times)
+
+
+def build_schedule(arrivals, fingers, repeat_rate=0.1, unknown_rate=0.02, rng=random):
+    """
+    Pair arrivals with fingers and add repeat scans.
+
+    Args:
+        arrivals: Offsets from arrival_times()
+        fingers: Enrolled fingers (hex templates or fingerprint ids)
+        repeat_rate: Chance a student scans a second time
+        unknown_rate: Chance a scan is an unenrolled finger
+
+    Returns:
+        list: [(offset, finger or None for unknown, is_repeat)] sorted by offset
+    """
+    schedule = []
+    for offset in arrivals:
+        finger = None if rng.random() < unknown_rate or not fingers else rng.choice(fingers)
+        schedule.append((offset, finger, False))
+        if finger is not None and rng.random() < repeat_rate:
+            schedule.append((offset + rng.uniform(3.0, 15.0), finger, True))
+    schedule.sort(key=lambda item: item[0])
+    return schedule
+
+
+def summarize(results, offered_per_minute, duration):
+    """
+    Latency / throughput figures for one step.
+
+    Args:
+        results: Dicts from LoadRunner.run()
+        offered_per_minute: Configured mean rate
+        duration: Step length in seconds
+
+    Returns:
+        dict
+    """
+    completed = [r for r in results if r['result'] not in FAILED_RESULTS]
+    latencies = sorted(r['latency_ms'] for r in results)
+    waits = sorted(r['wait_ms'] for r in results)
+    # Repeat scans may arrive after the step ends - the window covers them
+    window = max([duration] + [r['arrival'] for r in results])
+    finished = max([window] + [r['finished'] for r in results])
+    return {
+        'offered_per_minute': offered_per_minute,
+        'duration': duration,
+        'window': round(window, 3),
+        'scans': len(results),
+        'arrived_per_minute': round(len(results) / window * 60, 1),
+        'completed_per_minute': round(len(completed) / finished * 60, 1),
+        'errors': len(results) - len(completed),
+        'p50_ms': _round(percentile(latencies, 50)),
+        'p95_ms': _round(percentile(latencies, 95)),
+        'p99_ms': _round(percentile(latencies, 99)),
+        'max_ms': _round(latencies[-1] if latencies else None),
+        'kiosk_wait_p95_ms': _round(percentile(waits, 95)),
+        'results': dict(Counter(r['result'] for r in results)),
+        'error_statuses': dict(Counter(str(r['status']) for r in results if r['result'] in FAILED_RESULTS)),
+    }
+
+
+def _round(value):
+    return round(value, 1) if value is not None else None
+
+
+def saturation_point(steps, slo_ms=1000, min_ratio=0.95, max_error_rate=0.01):
+    """
+    First step where the server stops keeping up.
+
+    A step is saturated when completed throughput falls below
+    min_ratio of the scans that arrived, errors exceed max_error_rate,
+    or p95 latency exceeds slo_ms.
+
+    Returns:
+        dict: The saturated step, or None if every step kept up
+    """
+    for step in steps:
+        error_rate = step['errors'] / step['scans'] if step['scans'] else 0
+        if (step['completed_per_minute'] < step['arrived_per_minute'] * min_ratio
+                or error_rate > max_error_rate
+                or (step['p95_ms'] or 0) > slo_ms):
+            return step
+    return None
+
+
+class LoadRunner:
+    """
+    Kiosks (threads, one keep-alive HTTP session each) replaying a schedule.
+
+    Args:
+        base_url: Server, e.g. http://127.0.0.1:8000
+        endpoint: 'scan', 'api' or 'device'
+        kiosks: Concurrent kiosks
+        device_id / device_key: Device credentials (device endpoint)
+        capture_seconds: Kiosk time per student before the request
+                         (finger placement); 0 = server time only
+        timeout: Request timeout in seconds
+    """
+
+    def __init__(self, base_url, endpoint, kiosks=4, device_id='loadtest', device_key='',
+                 capture_seconds=0.0, timeout=30):
+        if endpoint not in ENDPOINTS:
+            raise ValueError(f'Unknown endpoint "{endpoint}" (choose from {", ".join(ENDPOINTS)})')
+        self.url = base_url.rstrip('/') + ENDPOINTS[endpoint]
+        self.endpoint = endpoint
+        self.kiosks = kiosks
+        self.device_id = device_id
+        self.device_key = device_key
+        self.capture_seconds = capture_seconds
+        self.timeout = timeout
+
+    def _session(self):
+        session = requests.Session()
+        if self.endpoint == 'scan':
+            # The scan page is a CSRF-protected form: any 32-character
+            # secret works when sent as both cookie and header
+            token = secrets.token_hex(16)
+            session.cookies.set('csrftoken', token)
+            session.headers['X-CSRFToken'] = token
+        return session
+
+    def _send(self, session, finger):
+        """One scan; returns (result, status)."""
+        if self.endpoint == 'device':
+            headers = {'X-Device-Key': self.device_key} if self.device_key else {}
+            response = session.post(self.url, timeout=self.timeout, headers=headers, json={
+                'device_id': self.device_id,
+                'fingerprint_id': finger if finger is not None else 0,
+                'confidence': 90,
+            })
+        else:
+            if finger is None:
+                finger = secrets.token_hex(UNKNOWN_TEMPLATE_BYTES)
+            response = session.post(self.url, timeout=self.timeout, headers={'X-Emulated-Finger': finger})
+
+        if self.endpoint != 'scan':
+            try:
+                result = response.json().get('result')
+            except ValueError:
+                result = None
+            if result:
+                return result, response.status_code
+        if response.status_code >= 400:
+            return 'error', response.status_code
+        return 'ok', response.status_code
+
+    def run(self, schedule):
+        """
+        Send every scheduled scan (blocks until done).
+
+        Returns:
+            list: One dict per scan: arrival/started/finished offsets (s),
+                  wait_ms (kiosk queue), latency_ms, result, status, repeat
+        """
+        pending = queue.Queue()
+        for item in schedule:
+            pending.put(item)
+        results = []
+        lock = threading.Lock()
+        started_at = time.perf_counter()
+
+        def kiosk():
+            session = self._session()
+            while True:
+                try:
+                    offset, finger, repeat = pending.get_nowait()
+                except queue.Empty:
+                    return
+                delay = offset - (time.perf_counter() - started_at)
+                if delay > 0:
+                    time.sleep(delay)
+                start = time.perf_counter()
+                if self.capture_seconds:
+                    time.sleep(self.capture_seconds)
+                request_start = time.perf_counter()
+                try:
+                    result, status = self._send(session, finger)
+                except requests.RequestException as e:
+                    result, status = 'error', type(e).__name__
+                end = time.perf_counter()
+                with lock:
+                    results.append({
+                        'arrival': offset,
+                        'started': start - started_at,
+                        'finished': end - started_at,
+                        'wait_ms': max(0.0, (start - started_at - offset) * 1000),
+                        'latency_ms': (end - request_start) * 1000,
+                        'result': result,
+                        'status': status,
+                        'repeat': repeat,
+                    })
+
+        threads = [threading.Thread(target=kiosk, daemon=True) for _ in range(max(1, self.kiosks))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        results.sort(key=lambda r: r['arrival'])
+        return results
+
+
+def curve_bar(completed, offered, width=30):
+    """Text bar of completed vs offered throughput."""
+    if offered <= 0:
+        return ''
+    filled = min(width, int(math.floor(completed / offered * width)))
+    return '█' * filled + '·' * (width - filled)
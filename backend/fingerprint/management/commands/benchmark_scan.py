@@ -0,0 +1,193 @@
+"""
+============================================================
+SCAN ENDPOINT BENCHMARK
+============================================================
+Compares the per-scan cost of the scan page (/fingerprint/scan/)
+and the kiosk JSON API (/fingerprint/api/scan/).
+
+Uses a simulated sensor (no R307 needed, no 2-second finger
+wait) and a temporary population created inside a transaction
+that is rolled back at the end - the database is left untouched.
+
+Usage:
+    python manage.py benchmark_scan
+    python manage.py benchmark_scan --students 500 --scans 1000
+============================================================
+"""
+import random
+import statistics
+import time
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.template import TemplateDoesNotExist
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+from attendance.models import AttendanceLog
+from fingerprint_attendance import cache as lookup_cache
+from users.models import Course, UserProfile
+
+
+BENCH_COURSE_CODE = 'BENCH-SCAN'
+
+ENDPOINTS = [
+    ('Scan page (HTML)', '/fingerprint/scan/'),
+    ('Kiosk API (JSON)', '/fingerprint/api/scan/'),
+]
+
+
+class _Rollback(Exception):
+    """Raised to roll back the benchmark transaction."""
+
+
+class SimulatedSensor:
+    """Stand-in for R307 that returns queued scans instantly."""
+
+    scans = []
+
+    def __init__(self, *args, **kwargs):
+        self.ser = True
+
+    def close(self):
+        pass
+
+    def scan_fingerprint(self):
+        return self.scans.pop(0) if self.scans else None
+
+    def match_fingerprint(self, template, scan):
+        return template == scan
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the scan page against the kiosk JSON scan API'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=200, help='Enrolled students to create')
+        parser.add_argument('--scans', type=int, default=200, help='Scans per endpoint')
+        parser.add_argument('--unknown-rate', type=float, default=0.05,
+                            help='Fraction of scans that match nobody')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+
+        self.stdout.write('=' * 60)
+        self.stdout.write('SCAN ENDPOINT BENCHMARK')
+        self.stdout.write('=' * 60)
+
+        results = {}
+        try:
+            with transaction.atomic():
+                templates = self._create_population(options['students'])
+
+                # Same scan sequence for every endpoint (repeat scans included)
+                sequence = [
+                    b'UNKNOWN-FINGER' if rng.random() < options['unknown_rate'] else rng.choice(templates)
+                    for _ in range(options['scans'])
+                ]
+
+                for name, url in ENDPOINTS:
+                    # Each endpoint starts from "nobody marked today"
+                    AttendanceLog.objects.filter(course__course_code=BENCH_COURSE_CODE).delete()
+                    results[name] = self._run(url, sequence)
+
+                raise _Rollback()
+        except _Rollback:
+            pass
+
+        self._report(results)
+
+    def _create_population(self, count):
+        """Create a course and enrolled students; return their templates."""
+        course = Course.objects.create(course_code=BENCH_COURSE_CODE, course_name='Scan Benchmark')
+
+        users = User.objects.bulk_create([User(username=f'bench-scan-{i}') for i in range(count)])
+        if users[0].pk is None:
+            users = list(User.objects.filter(username__startswith='bench-scan-').order_by('id'))
+
+        templates = [f'BENCH-TEMPLATE-{i}'.encode() for i in range(count)]
+        UserProfile.objects.bulk_create([
+            UserProfile(
+                user=user,
+                full_name=f'Bench Student {i}',
+                student_id=f'BENCH{i:05d}',
+                email=f'bench-scan-{i}@example.com',
+                course=course,
+                role='student',
+                fingerprint_template=templates[i],
+                fingerprint_enrolled=True,
+            )
+            for i, user in enumerate(users)
+        ])
+
+        # bulk_create sends no signals - refresh cached rosters/templates
+        lookup_cache.invalidate_rosters()
+
+        self.stdout.write(f'\n✅ Created {count} enrolled students in {BENCH_COURSE_CODE}')
+        return templates
+
+    def _run(self, url, sequence):
+        """Send every scan in the sequence to one endpoint."""
+        # 'localhost' is always allowed while DEBUG is on (ALLOWED_HOSTS may be empty)
+        client = Client(HTTP_HOST='localhost')
+        SimulatedSensor.scans = []
+        latencies, queries, writes, session_writes = [], [], [], []
+
+        with mock.patch('fingerprint.views.R307', SimulatedSensor):
+            for scan in sequence:
+                SimulatedSensor.scans = [scan]
+
+                with CaptureQueriesContext(connection) as captured:
+                    start = time.perf_counter()
+                    try:
+                        response = client.post(url)
+                    except TemplateDoesNotExist as e:
+                        return {'error': f'template {e} not found'}
+                    latencies.append((time.perf_counter() - start) * 1000)
+
+                if response.status_code >= 400:
+                    return {'error': f'HTTP {response.status_code}'}
+
+                statements = [query['sql'].lstrip().upper() for query in captured.captured_queries]
+                queries.append(len(statements))
+                writes.append(sum(sql.startswith(('INSERT', 'UPDATE', 'DELETE')) for sql in statements))
+                session_writes.append(sum(
+                    sql.startswith(('INSERT', 'UPDATE', 'DELETE')) and 'DJANGO_SESSION' in sql
+                    for sql in statements
+                ))
+
+        latencies.sort()
+        return {
+            'mean_ms': statistics.mean(latencies),
+            'p95_ms': latencies[int(len(latencies) * 0.95) - 1] if len(latencies) > 1 else latencies[0],
+            'queries': statistics.mean(queries),
+            'writes': statistics.mean(writes),
+            'session_writes': statistics.mean(session_writes),
+        }
+
+    def _report(self, results):
+        """Print a comparison table."""
+        self.stdout.write('\n' + '-' * 60)
+        self.stdout.write(f'{"Endpoint":<20}{"mean ms":>9}{"p95 ms":>9}{"queries":>9}{"writes":>8}{"session":>9}')
+        self.stdout.write('-' * 60)
+        for name, result in results.items():
+            if 'error' in result:
+                self.stdout.write(f'{name:<20}  ⚠️  {result["error"]}')
+                continue
+            self.stdout.write(
+                f'{name:<20}{result["mean_ms"]:>9.2f}{result["p95_ms"]:>9.2f}'
+                f'{result["queries"]:>9.2f}{result["writes"]:>8.2f}{result["session_writes"]:>9.2f}'
+            )
+        self.stdout.write('-' * 60)
+
+        page, api = (results.get(name) for name, _ in ENDPOINTS)
+        if page and api and 'error' not in page and 'error' not in api:
+            saving = page['mean_ms'] - api['mean_ms']
+            self.stdout.write(self.style.SUCCESS(
+                f'\n✅ Kiosk API saves {saving:.2f} ms and '
+                f'{page["queries"] - api["queries"]:.2f} queries per scan '
+                f'({saving / page["mean_ms"] * 100:.0f}% faster)'
+            ))
@@ -0,0 +1,185 @@
+"""
+============================================================
+MULTI-KIOSK SCAN LOAD TEST
+============================================================
+Finds how many scans per minute one backend host sustains.
+
+Steps through increasing offered rates (--rates), each for
+--duration seconds of bursty class-changeover traffic from
+--kiosks kiosks (see fingerprint/loadtest.py), and prints a
+latency/throughput table and the saturation curve.
+
+1. Seed a population (same database as the server):
+       python manage.py seed_population --students 2000
+2. Start the server with the emulated sensor:
+       R307_EMULATION=1 python manage.py runserver --noreload
+       (or gunicorn with several workers)
+3. Run the load:
+       python manage.py loadtest_scans --endpoint api --kiosks 8 --rates 60,120,240,480,960
+
+Attendance written during a step is deleted before the next one
+(so every step exercises the first-scan write path) - run it
+against a seeded copy, never the live database. Device scans go
+to the document store and are not cleaned up.
+============================================================
+"""
+import json
+import random
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max
+
+from attendance.models import AttendanceLog
+from fingerprint.loadtest import (
+    ENDPOINTS, LoadRunner, arrival_times, build_schedule, curve_bar, saturation_point, summarize,
+)
+from fingerprint.models import FingerprintScan
+from fingerprint_attendance import cache as lookup_cache
+
+
+class Command(BaseCommand):
+    help = 'Simulate kiosks scanning against a running server and report where it saturates'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000', help='Server base URL')
+        parser.add_argument('--endpoint', choices=list(ENDPOINTS), default='api', help='Scan endpoint')
+        parser.add_argument('--kiosks', type=int, default=4, help='Concurrent kiosks')
+        parser.add_argument('--rates', default='60,120,240,480',
+                            help='Offered scans per minute, one step each (e.g. 60,120,240)')
+        parser.add_argument('--duration', type=float, default=60, help='Seconds per step')
+        parser.add_argument('--burst', type=float, default=3.0, help='Mean students arriving together')
+        parser.add_argument('--repeat-rate', type=float, default=0.1, help='Chance a student scans twice')
+        parser.add_argument('--unknown-rate', type=float, default=0.02, help='Chance of an unenrolled finger')
+        parser.add_argument('--capture-ms', type=float, default=0,
+                            help='Kiosk time per student before the request (finger placement)')
+        parser.add_argument('--slo-ms', type=float, default=1000, help='p95 latency that counts as saturated')
+        parser.add_argument('--device-id', default='loadtest', help='Device id (device endpoint)')
+        parser.add_argument('--device-key', default='', help='X-Device-Key (device endpoint)')
+        parser.add_argument('--keep', action='store_true', help='Keep the attendance written by the test')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed')
+        parser.add_argument('--json', help='Also write the full report to this file')
+
+    def handle(self, *args, **options):
+        try:
+            rates = [float(rate) for rate in options['rates'].split(',') if rate.strip()]
+        except ValueError:
+            raise CommandError('--rates must be comma-separated numbers')
+        if not rates or min(rates) <= 0 or options['kiosks'] < 1 or options['duration'] <= 0:
+            raise CommandError('--rates, --kiosks and --duration must be positive')
+
+        rng = random.Random(options['seed'])
+        endpoint = options['endpoint']
+        fingers = self._fingers(endpoint)
+        runner = LoadRunner(
+            options['url'], endpoint, kiosks=options['kiosks'],
+            device_id=options['device_id'], device_key=options['device_key'],
+            capture_seconds=options['capture_ms'] / 1000,
+        )
+
+        self.stdout.write('=' * 72)
+        self.stdout.write('SCAN LOAD TEST')
+        self.stdout.write('=' * 72)
+        self.stdout.write(
+            f'{runner.url} - {options["kiosks"]} kiosks, {len(fingers)} enrolled fingers, '
+            f'{options["duration"]:g}s per step, bursts of ~{options["burst"]:g}, '
+            f'{options["repeat_rate"] * 100:g}% repeat scans\n'
+        )
+
+        steps = []
+        for rate in rates:
+            marker = self._last_ids()
+            schedule = build_schedule(
+                arrival_times(rate, options['duration'], options['burst'], rng),
+                fingers, options['repeat_rate'], options['unknown_rate'], rng,
+            )
+            self.stdout.write(f'▶️  {rate:g} scans/min offered ({len(schedule)} scans)...')
+            results = runner.run(schedule)
+            step = summarize(results, rate, options['duration'])
+            steps.append(step)
+            self._print_step(step)
+
+            if 'sensor_error' in step['results'] and len(step['results']) == 1:
+                raise CommandError('Every scan failed with sensor_error - start the server with R307_EMULATION=1')
+            if not options['keep'] and endpoint != 'device':
+                self._cleanup(marker)
+
+        self._report(steps, options['slo_ms'])
+
+        if options['json']:
+            with open(options['json'], 'w') as f:
+                json.dump({'config': {k: v for k, v in options.items() if k != 'json' and _jsonable(v)},
+                           'steps': steps}, f, indent=2)
+            self.stdout.write(self.style.SUCCESS(f'✅ Report written to {options["json"]}'))
+
+    def _fingers(self, endpoint):
+        """Enrolled fingers to scan: hex templates, or fingerprint ids for devices."""
+        if endpoint == 'device':
+            from devices.directory import get_directory
+            from docstore import shared_store
+            fingers = sorted(get_directory(shared_store()))
+            if not fingers:
+                raise CommandError('The device directory is empty - map fingerprints first')
+            return fingers
+
+        fingers = [bytes(template).hex() for _, template in lookup_cache.get_enrolled_templates()]
+        if not fingers:
+            raise CommandError('No enrolled students - seed data first (manage.py seed_population)')
+        return fingers
+
+    def _last_ids(self):
+        return (
+            AttendanceLog.objects.aggregate(last=Max('id'))['last'] or 0,
+            FingerprintScan.objects.aggregate(last=Max('id'))['last'] or 0,
+        )
+
+    def _cleanup(self, marker):
+        """Remove the rows the step created (everything after the ids seen before it)."""
+        last_log, last_scan = marker
+        AttendanceLog.objects.filter(id__gt=last_log).delete()
+        FingerprintScan.objects.filter(id__gt=last_scan).delete()
+
+    def _print_step(self, step):
+        results = ', '.join(f'{name} {count}' for name, count in sorted(step['results'].items()))
+        self.stdout.write(
+            f'   {step["completed_per_minute"]:g}/min completed, p50 {step["p50_ms"]} ms, '
+            f'p95 {step["p95_ms"]} ms, kiosk wait p95 {step["kiosk_wait_p95_ms"]} ms ({results})'
+        )
+        if step['error_statuses']:
+            statuses = ', '.join(f'{status} x{count}' for status, count in sorted(step['error_statuses'].items()))
+            self.stdout.write(self.style.ERROR(f'   ❌ failed scans by status: {statuses}'))
+
+    def _report(self, steps, slo_ms):
+        self.stdout.write('\n' + '-' * 72)
+        self.stdout.write(
+            f'{"arrived/min":>12}{"done/min":>10}{"p50 ms":>9}{"p95 ms":>9}{"p99 ms":>9}{"errors":>8}  saturation curve'
+        )
+        self.stdout.write('-' * 72)
+        for step in steps:
+            offered = step['arrived_per_minute']
+            self.stdout.write(
+                f'{offered:>12.0f}{step["completed_per_minute"]:>10.0f}{step["p50_ms"] or 0:>9.1f}'
+                f'{step["p95_ms"] or 0:>9.1f}{step["p99_ms"] or 0:>9.1f}{step["errors"]:>8}  '
+                f'{curve_bar(step["completed_per_minute"], offered)}'
+            )
+        self.stdout.write('-' * 72)
+
+        saturated = saturation_point(steps, slo_ms=slo_ms)
+        if saturated is None:
+            self.stdout.write(self.style.SUCCESS(
+                f'\n✅ No saturation up to {steps[-1]["offered_per_minute"]:g} scans/min - try higher --rates'
+            ))
+        else:
+            index = steps.index(saturated)
+            sustained = (
+                f'sustained: {steps[index - 1]["completed_per_minute"]:g}/min' if index
+                else 'already saturated at the first step - try lower --rates'
+            )
+            self.stdout.write(self.style.WARNING(
+                f'\n⚠️  Saturates at {saturated["offered_per_minute"]:g} scans/min offered '
+                f'(p95 {saturated["p95_ms"]} ms, {saturated["completed_per_minute"]:g}/min completed); '
+                f'{sustained}'
+            ))
+
+
+def _jsonable(value):
+    return isinstance(value, (str, int, float, bool)) or value is None
@@ -0,0 +1,148 @@
+"""
+============================================================
+R307 SESSION REPLAY BENCHMARK
+============================================================
+Replays a recorded sensor session (see fingerprint/transport.py)
+through the real scan path, repeatedly, and reports where the
+time goes:
+
+    capture   R307 protocol: finger wait, image, upload
+    match     identify() against the enrolled templates
+    write     mark_attendance()
+
+Every write is rolled back - the database is left untouched.
+--student makes the recorded scan match that student (their
+template is replaced inside the rolled-back transaction), so
+the match and write stages run their "found" path.
+
+Usage:
+    python manage.py replay_r307 /var/log/r307/r307-20260302-090112.rec
+    python manage.py replay_r307 session.rec --speed 0 --repeat 50 --student S000123
+============================================================
+"""
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from fingerprint.matching import identify, mark_attendance
+from fingerprint.r307 import R307
+from fingerprint.transport import ReplayMismatch, ReplayTransport, read_recording
+from fingerprint_attendance import cache as lookup_cache
+from users.models import UserProfile
+
+
+STAGES = ['capture', 'match', 'write', 'total']
+
+
+class _Rollback(Exception):
+    """Raised to roll back the replay transaction."""
+
+
+class Command(BaseCommand):
+    help = 'Replay a recorded R307 session through the scan path and time each stage'
+
+    def add_arguments(self, parser):
+        parser.add_argument('recording', help='Recording file (R307_RECORD_DIR/r307-*.rec)')
+        parser.add_argument('--speed', type=float, default=1.0,
+                            help='Replay speed: 1 = real time, 10 = ten times faster, 0 = no waits')
+        parser.add_argument('--repeat', type=int, default=10, help='Number of replays')
+        parser.add_argument('--student', help='Student ID the recorded scan should match')
+
+    def handle(self, *args, **options):
+        path = options['recording']
+        try:
+            metadata, events = read_recording(path)
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e))
+        if options['repeat'] < 1:
+            raise CommandError('--repeat must be at least 1')
+
+        self.stdout.write('=' * 60)
+        self.stdout.write('R307 SESSION REPLAY')
+        self.stdout.write('=' * 60)
+        self.stdout.write(
+            f'📼 {path}: {len(events)} events, {events[-1][0] if events else 0:.2f}s recorded '
+            f'on {metadata.get("port")} at {metadata.get("started_at")}'
+        )
+
+        timings = {stage: [] for stage in STAGES}
+        outcome = None
+        try:
+            with transaction.atomic():
+                if options['student']:
+                    self._match_student(path, options['student'])
+
+                for _ in range(options['repeat']):
+                    outcome = self._replay_once(path, options['speed'], timings)
+                raise _Rollback()
+        except _Rollback:
+            pass
+        finally:
+            # The template swap / attendance were rolled back
+            lookup_cache.invalidate_rosters()
+
+        self._report(timings, outcome, options['speed'])
+
+    def _scan(self, path, speed):
+        """Replay the capture; returns (R307, scan)."""
+        r307 = R307(transport=ReplayTransport(path, speed=speed))
+        try:
+            scan = r307.scan_fingerprint()
+        except ReplayMismatch as e:
+            raise CommandError(f'Driver diverged from the recording: {e}')
+        if not scan:
+            raise CommandError('The recording does not contain a successful scan')
+        return r307, scan
+
+    def _match_student(self, path, student_id):
+        """Give the student the recorded scan as their template."""
+        _, scan = self._scan(path, speed=0)
+        updated = UserProfile.objects.filter(student_id=student_id).update(
+            fingerprint_template=scan, fingerprint_enrolled=True
+        )
+        if not updated:
+            raise CommandError(f'Student "{student_id}" not found')
+        lookup_cache.invalidate_rosters()
+
+    def _replay_once(self, path, speed, timings):
+        """One scan through capture, match and write (each write undone)."""
+        started = time.perf_counter()
+        r307, scan = self._scan(path, speed)
+        captured = time.perf_counter()
+
+        profile = identify(r307, scan)
+        matched = time.perf_counter()
+
+        outcome = 'not_recognized'
+        if profile and profile.course:
+            savepoint = transaction.savepoint()
+            _, created = mark_attendance(profile)
+            transaction.savepoint_rollback(savepoint)
+            outcome = 'marked' if created else 'already_marked'
+        elif profile:
+            outcome = 'no_course'
+        finished = time.perf_counter()
+
+        for stage, seconds in zip(STAGES, (captured - started, matched - captured,
+                                           finished - matched, finished - started)):
+            timings[stage].append(seconds * 1000)
+        return outcome
+
+    def _report(self, timings, outcome, speed):
+        self.stdout.write('\n' + '-' * 60)
+        self.stdout.write(f'{"Stage":<12}{"mean ms":>12}{"p50 ms":>12}{"p95 ms":>12}{"max ms":>12}')
+        self.stdout.write('-' * 60)
+        for stage in STAGES:
+            values = sorted(timings[stage])
+            p95 = values[max(0, int(len(values) * 0.95) - 1)]
+            self.stdout.write(
+                f'{stage:<12}{statistics.mean(values):>12.2f}{statistics.median(values):>12.2f}'
+                f'{p95:>12.2f}{values[-1]:>12.2f}'
+            )
+        self.stdout.write('-' * 60)
+        note = ' (recorded waits skipped)' if speed <= 0 else f' at {speed:g}x'
+        self.stdout.write(self.style.SUCCESS(
+            f'\n✅ {len(timings["total"])} replays{note} - scan result: {outcome}'
+        ))
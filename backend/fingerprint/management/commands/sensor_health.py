@@ -0,0 +1,109 @@
+"""
+============================================================
+R307 SENSOR HEALTH REPORT
+============================================================
+Per-sensor command latency, timeouts, corrupt packets, retries
+and reconnects (see fingerprint/telemetry.py), to spot readers
+or USB-serial adapters that are slow or degrading.
+
+Read a running server's telemetry (its /metrics endpoint):
+    python manage.py sensor_health --url http://127.0.0.1:8000
+
+Or probe a sensor attached to this machine:
+    python manage.py sensor_health --probe 20 --port /dev/ttyUSB0
+
+Exits with an error when a sensor is over --max-p95-ms or
+--max-error-rate (usable from cron / monitoring).
+============================================================
+"""
+import json
+
+import requests
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from fingerprint import telemetry
+from fingerprint.r307 import BAUD_RATE, R307, SERIAL_PORT
+from fingerprint_attendance import metrics
+
+
+class Command(BaseCommand):
+    help = 'Report R307 sensor latency and error telemetry'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000', help='Server base URL to scrape')
+        parser.add_argument('--token', default=None, help='Metrics bearer token (default: METRICS_TOKEN)')
+        parser.add_argument('--probe', type=int, default=0,
+                            help='Instead of scraping, send this many handshakes to a local sensor')
+        parser.add_argument('--port', default=SERIAL_PORT, help='Serial port (--probe)')
+        parser.add_argument('--max-p95-ms', type=float, default=250, help='Slowest acceptable command p95')
+        parser.add_argument('--max-error-rate', type=float, default=0.01,
+                            help='Highest acceptable share of failed command attempts')
+        parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+
+    def handle(self, *args, **options):
+        text = self._probe(options) if options['probe'] else self._scrape(options)
+        sensors = telemetry.summarize(metrics.parse(text))
+
+        if options['json']:
+            self.stdout.write(json.dumps(sensors, indent=2, sort_keys=True))
+        else:
+            self._report(sensors)
+
+        if not sensors:
+            raise CommandError('No sensor telemetry yet - no scans since the server started?')
+        unhealthy = [
+            name for name, health in sensors.items()
+            if (health['p95_ms'] or 0) > options['max_p95_ms'] or health['error_rate'] > options['max_error_rate']
+        ]
+        if unhealthy:
+            raise CommandError(f'Unhealthy sensors: {", ".join(sorted(unhealthy))}')
+        if not options['json']:
+            self.stdout.write(self.style.SUCCESS(f'\n✅ {len(sensors)} sensor(s) healthy'))
+
+    def _scrape(self, options):
+        url = options['url'].rstrip('/') + '/metrics'
+        token = settings.METRICS_TOKEN if options['token'] is None else options['token']
+        headers = {'Authorization': f'Bearer {token}'} if token else {}
+        try:
+            response = requests.get(url, headers=headers, timeout=10)
+        except requests.RequestException as e:
+            raise CommandError(f'Could not reach {url}: {e}')
+        if response.status_code != 200:
+            raise CommandError(f'{url} answered {response.status_code}')
+        return response.text
+
+    def _probe(self, options):
+        """Handshake with a local sensor; returns this process's metrics."""
+        r307 = R307(options['port'], BAUD_RATE)
+        if not r307.ser:
+            raise CommandError(f'Could not open the sensor on {options["port"]}')
+        try:
+            answered = sum(r307.probe() for _ in range(options['probe']))
+        finally:
+            r307.close()
+        self.stdout.write(f'🔌 {answered}/{options["probe"]} handshakes answered on {options["port"]}')
+        return metrics.render()
+
+    def _report(self, sensors):
+        self.stdout.write('=' * 72)
+        self.stdout.write('R307 SENSOR HEALTH')
+        self.stdout.write('=' * 72)
+        for name, health in sorted(sensors.items()):
+            errors = health['errors']
+            connections = health['connections']
+            self.stdout.write(
+                f'\n📟 {name}: {health["count"]} commands, p95 {health["p95_ms"]} ms, '
+                f'error rate {health["error_rate"] * 100:.2f}%'
+            )
+            self.stdout.write(
+                f'   timeouts {errors["timeout"]}, checksum {errors["checksum"]}, '
+                f'bad packets {errors["bad_packet"]}, rejected {errors["rejected"]}, '
+                f'retries {health["retries"]}, reconnects {connections["reconnected"]}, '
+                f'failed connects {connections["failed"]}'
+            )
+            self.stdout.write(f'   {"command":<18}{"count":>8}{"p50 ms":>10}{"p95 ms":>10}')
+            for command, stats in sorted(health['commands'].items()):
+                self.stdout.write(
+                    f'   {command:<18}{stats["count"]:>8}{stats["p50_ms"] or 0:>10.1f}{stats["p95_ms"] or 0:>10.1f}'
+                )
@@ -0,0 +1,71 @@
+"""
+============================================================
+FINGERPRINT MATCHING + ATTENDANCE MARKING
+============================================================
+Shared by the scan page (scan_fingerprint) and the kiosk JSON
+API (scan_api):
+
+- identify: match a scan against the cached enrolled templates
+- mark_attendance: write today's AttendanceLog (one INSERT,
+  duplicates detected by the unique constraint instead of a
+  separate lookup), through the writer queue when the SQLite
+  production profile is on (fingerprint_attendance/writer.py)
+============================================================
+"""
+from datetime import date
+
+from django.db import IntegrityError, transaction
+
+from attendance.models import AttendanceLog
+from fingerprint_attendance import cache as lookup_cache
+from fingerprint_attendance import writer
+from users.models import UserProfile
+
+
+def identify(r307, scan):
+    """
+    Find the enrolled student whose template matches a scan.
+
+    Args:
+        r307: R307 sensor instance (provides match_fingerprint)
+        scan: Scanned fingerprint template
+
+    Returns:
+        UserProfile: Matched profile (with user and course loaded), or None
+    """
+    for profile_id, template in lookup_cache.get_enrolled_templates():
+        if r307.match_fingerprint(template, scan):
+            return UserProfile.objects.select_related('user', 'course').get(pk=profile_id)
+    return None
+
+
+def mark_attendance(profile):
+    """
+    Mark today's attendance for a student in their course.
+
+    Args:
+        profile: Student's UserProfile (must have a course)
+
+    Returns:
+        tuple: (AttendanceLog, created) - created is False if
+               attendance was already marked today
+    """
+    return writer.run(_mark_attendance, profile)
+
+
+def _mark_attendance(profile):
+    try:
+        with transaction.atomic():
+            log = AttendanceLog.objects.create(
+                user=profile.user,
+                student_name=profile.full_name,
+                student_id=profile.student_id,
+                course=profile.course,
+                status='present',
+                scan_method='fingerprint'
+            )
+        return log, True
+    except IntegrityError:
+        # Already marked today (unique user/course/date)
+        existing = AttendanceLog.objects.get(user=profile.user, course=profile.course, date=date.today())
+        return existing, False
@@ -16,17 +16,100 @@ IMPORTANT SETUP INSTRUCTIONS:
    - Windows: Check Device Manager for COM port (e.g., COM3)
 3. Update SERIAL_PORT below with your actual port
 4. Install required package: pip install pyserial
+
+Protocol: every exchange is a packet
+    EF01 | address (4) | PID (1) | length (2) | payload | checksum (2)
+commands go out as PID 0x01, the sensor acknowledges with 0x07
+and sends character files as 0x02 data packets ending with 0x08.
+
+Record / replay (see transport.py):
+    R307_RECORD_DIR=<dir>   save every sensor session to <dir>
+    R307_REPLAY=<file>      replay a recorded session instead of
+                            opening the serial port
+    R307_REPLAY_SPEED=10    replay speed (1 = real time, 0 = no waits)
+
+Every command is timed and every timeout, corrupt packet, retry
+and reconnect counted (see telemetry.py, exported at /metrics).
 ============================================================
 """
-import serial
+import os
+import struct
 import time
 
+from . import telemetry
+from .transport import RecordingTransport, ReplayTransport, SerialTransport, recording_path
+
 # ========== CONFIGURATION ==========
 # TODO: Update this with your actual serial port!
 SERIAL_PORT = '/dev/tty.usbserial-XXXXX'  # macOS/Linux example
 # SERIAL_PORT = 'COM3'  # Windows example
 BAUD_RATE = 57600  # R307 default baud rate
 
+# Record every session / replay a recording (empty = off)
+RECORD_DIR = os.environ.get('R307_RECORD_DIR', '')
+REPLAY_PATH = os.environ.get('R307_REPLAY', '')
+REPLAY_SPEED = float(os.environ.get('R307_REPLAY_SPEED', '1'))
+
+# How long to wait for a finger before giving up (seconds)
+FINGER_TIMEOUT = 10
+FINGER_POLL_INTERVAL = 0.1
+
+# Times a command is sent again after a timeout or corrupt reply
+COMMAND_RETRIES = 2
+
+# ========== PROTOCOL ==========
+HEADER = b'\xef\x01'
+ADDRESS = b'\xff\xff\xff\xff'
+PID_COMMAND = 0x01
+PID_DATA = 0x02
+PID_ACK = 0x07
+PID_END_DATA = 0x08
+
+CMD_GEN_IMAGE = 0x01      # capture finger image
+CMD_IMAGE_TO_TZ = 0x02    # image -> character file in buffer 1/2
+CMD_REG_MODEL = 0x05      # combine buffers 1 and 2 into a template
+CMD_UP_CHAR = 0x08        # upload a character buffer to the host
+CMD_VERIFY_PASSWORD = 0x13  # handshake (default password 0)
+
+OK = 0x00
+NO_FINGER = 0x02
+
+
+class R307Error(Exception):
+    """
+    Malformed, missing or failed sensor response.
+
+    kind: 'timeout', 'checksum', 'bad_packet' or 'rejected'
+    (the r307_errors_total label)
+    """
+
+    def __init__(self, message, kind='rejected'):
+        super().__init__(message)
+        self.kind = kind
+
+
+def build_packet(pid, payload):
+    """Frame a payload (length and checksum included)."""
+    length = len(payload) + 2
+    checksum = (pid + (length >> 8) + (length & 0xFF) + sum(payload)) & 0xFFFF
+    return HEADER + ADDRESS + struct.pack('>BH', pid, length) + bytes(payload) + struct.pack('>H', checksum)
+
+
+def _sensor_name(transport, port):
+    """Telemetry label: the transport's sensor / port name."""
+    return getattr(transport, 'sensor', None) or getattr(transport, 'port', None) or port
+
+
+def _open_transport(port, baudrate):
+    """Serial port, or a replay/recording of one (R307_REPLAY / R307_RECORD_DIR)."""
+    if REPLAY_PATH:
+        return ReplayTransport(REPLAY_PATH, speed=REPLAY_SPEED)
+    transport = SerialTransport(port, baudrate)
+    if RECORD_DIR:
+        transport = RecordingTransport(transport, recording_path(RECORD_DIR))
+    return transport
+
+
 class R307:
     """
     R307 Fingerprint Sensor Interface Class
@@ -39,20 +122,30 @@ class R307:
         match_fingerprint: Compare two fingerprint templates
     """
     
-    def __init__(self, port=SERIAL_PORT, baudrate=BAUD_RATE):
+    def __init__(self, port=SERIAL_PORT, baudrate=BAUD_RATE, transport=None):
         """
         Initialize connection to R307 sensor.
         
         Args:
             port: Serial port path (e.g., '/dev/ttyUSB0' or 'COM3')
             baudrate: Communication speed (default: 57600)
+            transport: Ready transport to use instead (e.g. a ReplayTransport)
         """
+        if transport is not None:
+            self.ser = transport
+            self.sensor = _sensor_name(transport, port)
+            telemetry.CONNECTIONS.inc(sensor=self.sensor, result='connected')
+            return
         try:
             # Attempt to open serial connection
-            self.ser = serial.Serial(port, baudrate, timeout=2)
+            self.ser = _open_transport(port, baudrate)
+            self.sensor = _sensor_name(self.ser, port)
+            telemetry.CONNECTIONS.inc(sensor=self.sensor, result='connected')
             print(f"✓ Connected to R307 sensor on {port}")
         except Exception as e:
             # Connection failed - sensor not connected or wrong port
+            self.sensor = port
+            telemetry.CONNECTIONS.inc(sensor=port, result='failed')
             print(f"✗ Error connecting to R307: {e}")
             print("  Check: 1) Sensor is connected, 2) Correct port in settings")
             self.ser = None
@@ -63,14 +156,140 @@ class R307:
             self.ser.close()
             print("✓ R307 connection closed")
 
+    # ---------- protocol ----------
+
+    def _read_exact(self, size):
+        data = self.ser.read(size)
+        if len(data) != size:
+            raise R307Error(f'timeout: expected {size} bytes, got {len(data)}', kind='timeout')
+        return data
+
+    def _read_packet(self):
+        """Read one packet; returns (pid, payload)."""
+        head = self._read_exact(9)
+        if head[:2] != HEADER:
+            raise R307Error(f'bad packet header {head[:2].hex()}', kind='bad_packet')
+        pid, length = struct.unpack('>BH', head[6:9])
+        if length < 2:
+            raise R307Error(f'bad packet length {length}', kind='bad_packet')
+        body = self._read_exact(length)
+        payload, checksum = body[:-2], struct.unpack('>H', body[-2:])[0]
+        if checksum != (pid + (length >> 8) + (length & 0xFF) + sum(payload)) & 0xFFFF:
+            raise R307Error('bad packet checksum', kind='checksum')
+        return pid, payload
+
+    def _read_ack(self):
+        pid, payload = self._read_packet()
+        if pid != PID_ACK or not payload:
+            raise R307Error(f'expected acknowledgement, got packet type {pid:#04x}', kind='bad_packet')
+        return payload[0], payload[1:]
+
+    def _read_data(self):
+        """Data packets following an upload acknowledgement."""
+        data = bytearray()
+        while True:
+            pid, payload = self._read_packet()
+            if pid not in (PID_DATA, PID_END_DATA):
+                raise R307Error(f'expected data packet, got packet type {pid:#04x}', kind='bad_packet')
+            data += payload
+            if pid == PID_END_DATA:
+                return bytes(data)
+
+    def _recover(self, error):
+        """Drop half-read bytes; reopen the port after a timeout."""
+        reset_input = getattr(self.ser, 'reset_input', None)
+        if reset_input:
+            reset_input()
+        reopen = getattr(self.ser, 'reopen', None)
+        if error.kind == 'timeout' and reopen:
+            try:
+                reopen()
+            except Exception as e:
+                telemetry.CONNECTIONS.inc(sensor=self.sensor, result='failed')
+                raise R307Error(f'reconnect failed: {e}', kind='timeout')
+            telemetry.CONNECTIONS.inc(sensor=self.sensor, result='reconnected')
+
+    def _command(self, code, *params, upload=False):
+        """
+        Send a command, retrying after a timeout or corrupt reply.
+
+        Args:
+            code, params: Command and its parameters
+            upload: Also read the data packets that follow an OK
+
+        Returns:
+            tuple: (confirmation code, data)
+        """
+        command = telemetry.command_name(code)
+        packet = build_packet(PID_COMMAND, bytes([code, *params]))
+        for attempt in range(COMMAND_RETRIES + 1):
+            if attempt:
+                telemetry.RETRIES.inc(sensor=self.sensor, command=command)
+            start = time.perf_counter()
+            try:
+                self.ser.write(packet)
+                confirmation, data = self._read_ack()
+                if upload and confirmation == OK:
+                    data = self._read_data()
+                break
+            except R307Error as e:
+                telemetry.ERRORS.inc(sensor=self.sensor, kind=e.kind)
+                if attempt == COMMAND_RETRIES:
+                    raise
+                self._recover(e)
+
+        telemetry.COMMAND_SECONDS.observe(time.perf_counter() - start, sensor=self.sensor, command=command)
+        # "No finger" is the normal answer while polling for one
+        if confirmation not in (OK, NO_FINGER):
+            telemetry.ERRORS.inc(sensor=self.sensor, kind='rejected')
+        return confirmation, data
+
+    def _capture(self, buffer_id, timeout=FINGER_TIMEOUT):
+        """Wait for a finger and store its character file in a buffer."""
+        deadline = time.monotonic() + timeout
+        while True:
+            code, _ = self._command(CMD_GEN_IMAGE)
+            if code == OK:
+                break
+            if code != NO_FINGER or time.monotonic() >= deadline:
+                raise R307Error(f'image capture failed (code {code:#04x})')
+            self.ser.sleep(FINGER_POLL_INTERVAL)
+        code, _ = self._command(CMD_IMAGE_TO_TZ, buffer_id)
+        if code != OK:
+            raise R307Error(f'feature extraction failed (code {code:#04x})')
+
+    def _upload(self, buffer_id):
+        """Read a character buffer from the sensor."""
+        code, data = self._command(CMD_UP_CHAR, buffer_id, upload=True)
+        if code != OK:
+            raise R307Error(f'upload failed (code {code:#04x})')
+        return data
+
+    # ---------- operations ----------
+
+    def probe(self):
+        """
+        Handshake with the sensor (VfyPwd, default password).
+
+        Returns:
+            bool: True if the sensor answered OK
+        """
+        if not self.ser:
+            return False
+        try:
+            code, _ = self._command(CMD_VERIFY_PASSWORD, 0, 0, 0, 0)
+        except R307Error:
+            return False
+        return code == OK
+
     def enroll_fingerprint(self):
         """
         Enroll a new fingerprint.
         
         Process:
-        1. User places finger on sensor
-        2. Sensor captures image
-        3. Converts to template
+        1. User places finger on sensor (twice)
+        2. Sensor captures both images
+        3. Combines them into a template
         4. Returns template data for storage
         
         Returns:
@@ -80,13 +299,25 @@ class R307:
             print("✗ Sensor not connected")
             return None
         
-        print("👆 Place finger on sensor for enrollment...")
-        time.sleep(2)  # Wait for finger placement
+        try:
+            print("👆 Place finger on sensor for enrollment...")
+            self._capture(1)
+            print("✋ Remove finger, then place the same finger again...")
+            # Wait for the finger to be lifted before the second capture
+            deadline = time.monotonic() + FINGER_TIMEOUT
+            while self._command(CMD_GEN_IMAGE)[0] != NO_FINGER and time.monotonic() < deadline:
+                self.ser.sleep(FINGER_POLL_INTERVAL)
+            self._capture(2)
+            code, _ = self._command(CMD_REG_MODEL)
+            if code != OK:
+                raise R307Error(f'the two scans do not match (code {code:#04x})')
+            template = self._upload(1)
+        except R307Error as e:
+            print(f"✗ Enrollment failed: {e}")
+            return None
         
-        # TODO: Implement actual R307 enrollment protocol
-        # This is a placeholder - replace with real sensor commands
-        print("✓ Fingerprint enrolled (simulated)")
-        return b"FAKE_TEMPLATE_DATA"  # Replace with actual template
+        print("✓ Fingerprint enrolled")
+        return template
 
     def scan_fingerprint(self):
         """
@@ -104,13 +335,16 @@ class R307:
             print("✗ Sensor not connected")
             return None
         
-        print("👆 Place finger on sensor for scanning...")
-        time.sleep(2)  # Wait for finger placement
+        try:
+            print("👆 Place finger on sensor for scanning...")
+            self._capture(1)
+            scan = self._upload(1)
+        except R307Error as e:
+            print(f"✗ Scan failed: {e}")
+            return None
         
-        # TODO: Implement actual R307 scan protocol
-        # This is a placeholder - replace with real sensor commands
-        print("✓ Fingerprint scanned (simulated)")
-        return b"FAKE_SCAN_DATA"  # Replace with actual scan
+        print("✓ Fingerprint scanned")
+        return scan
 
     def match_fingerprint(self, template, scan):
         """
@@ -129,4 +363,63 @@ class R307:
         # TODO: Implement actual R307 matching algorithm
         # Simple comparison for now - replace with sensor's match function
         return template == scan
- 
\ No newline at end of file
+
+
+class R307Emulator:
+    """
+    Transport that answers like a sensor (development and tests).
+
+    Record it to get a synthetic session for replay_r307:
+        transport = RecordingTransport(R307Emulator(template, finger_after=1.5), 'scan.rec')
+        R307(transport=transport).scan_fingerprint()
+
+    Args:
+        template: Character file uploaded for every finger
+        finger_after: Seconds until the finger is placed (GenImg
+                      answers "no finger" before that)
+        packet_size: Data packet size (R307 default: 128)
+    """
+
+    port = 'emulator'
+    baudrate = BAUD_RATE
+
+    def __init__(self, template, finger_after=0.0, packet_size=128):
+        self.template = bytes(template)
+        self.finger_at = time.monotonic() + finger_after
+        self.packet_size = packet_size
+        self.lifted = False
+        self._out = bytearray()
+
+    def _ack(self, code):
+        self._out += build_packet(PID_ACK, bytes([code]))
+
+    def write(self, data):
+        code, params = data[9], data[10:-2]
+        if code == CMD_GEN_IMAGE:
+            finger = time.monotonic() >= self.finger_at and not self.lifted
+            self.lifted = False
+            self._ack(OK if finger else NO_FINGER)
+        elif code == CMD_UP_CHAR:
+            self._ack(OK)
+            chunks = [self.template[i:i + self.packet_size] for i in range(0, len(self.template), self.packet_size)]
+            for index, chunk in enumerate(chunks):
+                self._out += build_packet(PID_END_DATA if index == len(chunks) - 1 else PID_DATA, chunk)
+        else:
+            # Enrollment lifts the finger between the two captures
+            self.lifted = code == CMD_IMAGE_TO_TZ and params[:1] == b'\x01'
+            self._ack(OK)
+        return len(data)
+
+    def read(self, size):
+        data = bytes(self._out[:size])
+        del self._out[:size]
+        return data
+
+    def reset_input(self):
+        self._out.clear()
+
+    def sleep(self, seconds):
+        time.sleep(seconds)
+
+    def close(self):
+        pass
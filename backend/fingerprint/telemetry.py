@@ -0,0 +1,126 @@
+"""
+============================================================
+R307 SENSOR TELEMETRY
+============================================================
+Health of every sensor the driver talks to, recorded by
+fingerprint/r307.py and exported with the request metrics at
+/metrics:
+
+    r307_command_duration_seconds{sensor,command}
+        round trip of each successful command (send -> reply,
+        data packets included)
+    r307_errors_total{sensor,kind}
+        timeout    no (complete) reply in time
+        checksum   reply with a bad checksum
+        bad_packet bad header, length or packet type
+        rejected   the sensor answered with a failure code
+    r307_retries_total{sensor,command}
+    r307_connections_total{sensor,result}
+        result: connected, failed, reconnected
+
+Unlike request metrics these are never sampled - a sensor does
+a few commands per scan. `sensor` is the serial port
+(replay:<port> for replayed sessions).
+
+A slow USB-serial adapter shows up as high command latency,
+a flaky cable as checksum errors and retries, a dying sensor
+as timeouts and reconnects. Read it with:
+
+    python manage.py sensor_health --url http://kiosk-server:8000
+============================================================
+"""
+from fingerprint_attendance import metrics
+from fingerprint_attendance.metrics import Counter, Histogram, histogram_quantile
+
+COMMAND_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+ERROR_KINDS = ('timeout', 'checksum', 'bad_packet', 'rejected')
+
+# Errors that make the driver retry (the sensor did not answer properly)
+TRANSPORT_ERRORS = ('timeout', 'checksum', 'bad_packet')
+
+COMMAND_NAMES = {
+    0x01: 'gen_image',
+    0x02: 'image_to_tz',
+    0x05: 'reg_model',
+    0x08: 'up_char',
+    0x13: 'verify_password',
+}
+
+COMMAND_SECONDS = metrics.register(Histogram(
+    'r307_command_duration_seconds', 'R307 command round trip, reply and data packets included',
+    COMMAND_BUCKETS, ['sensor', 'command']))
+ERRORS = metrics.register(Counter(
+    'r307_errors_total', 'R307 timeouts, corrupt packets and failure replies', ['sensor', 'kind']))
+RETRIES = metrics.register(Counter(
+    'r307_retries_total', 'R307 commands sent again after an error', ['sensor', 'command']))
+CONNECTIONS = metrics.register(Counter(
+    'r307_connections_total', 'R307 port opens (connected, failed, reconnected)', ['sensor', 'result']))
+
+
+def command_name(code):
+    return COMMAND_NAMES.get(code, f'{code:#04x}')
+
+
+def _sensor(sensors, name):
+    return sensors.setdefault(name, {
+        'commands': {},
+        'errors': dict.fromkeys(ERROR_KINDS, 0),
+        'retries': 0,
+        'connections': {'connected': 0, 'failed': 0, 'reconnected': 0},
+    })
+
+
+def summarize(samples):
+    """
+    Per-sensor health from parsed /metrics samples (metrics.parse()).
+
+    Returns:
+        dict: {sensor: {
+            'commands': {command: {'count', 'p50_ms', 'p95_ms'}},
+            'count', 'p95_ms',           all commands together
+            'errors': {kind: count}, 'retries', 'connections': {result: count},
+            'error_rate',                transport errors per attempt
+        }}
+    """
+    sensors = {}
+    buckets = {}  # (sensor, command) -> {le: cumulative count}
+    for name, labels, value in samples:
+        sensor = labels.get('sensor')
+        if sensor is None:
+            continue
+        if name == 'r307_command_duration_seconds_bucket':
+            le = float('inf') if labels['le'] == '+Inf' else float(labels['le'])
+            buckets.setdefault((sensor, labels['command']), {})[le] = value
+        elif name == 'r307_errors_total':
+            errors = _sensor(sensors, sensor)['errors']
+            errors[labels['kind']] = errors.get(labels['kind'], 0) + int(value)
+        elif name == 'r307_retries_total':
+            _sensor(sensors, sensor)['retries'] += int(value)
+        elif name == 'r307_connections_total':
+            connections = _sensor(sensors, sensor)['connections']
+            connections[labels['result']] = connections.get(labels['result'], 0) + int(value)
+
+    merged = {}  # sensor -> {le: cumulative count} over every command
+    for (sensor, command), counts in buckets.items():
+        counts = sorted(counts.items())
+        _sensor(sensors, sensor)['commands'][command] = {
+            'count': int(counts[-1][1]),
+            'p50_ms': _ms(histogram_quantile(0.5, counts)),
+            'p95_ms': _ms(histogram_quantile(0.95, counts)),
+        }
+        total = merged.setdefault(sensor, {})
+        for le, count in counts:
+            total[le] = total.get(le, 0) + count
+
+    for name, health in sensors.items():
+        health['count'] = sum(command['count'] for command in health['commands'].values())
+        health['p95_ms'] = _ms(histogram_quantile(0.95, sorted(merged.get(name, {}).items())))
+        failures = sum(health['errors'].get(kind, 0) for kind in TRANSPORT_ERRORS)
+        attempts = health['count'] + failures
+        health['error_rate'] = round(failures / attempts, 4) if attempts else 0.0
+    return sensors
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 1) if seconds is not None else None
@@ -1,3 +1,492 @@
-from django.test import TestCase
+import os
+import random
+import tempfile
+import time
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.core.servers.basehttp import WSGIServer
+from django.http import HttpResponse
+from django.test import LiveServerTestCase, SimpleTestCase, TestCase, override_settings
+from django.test.testcases import LiveServerThread
+from django.urls import path, reverse
+
+from attendance.models import AttendanceLog
+from fingerprint_attendance import metrics
+from users.models import Course, UserProfile
+
+from .loadtest import LoadRunner, arrival_times, build_schedule, saturation_point, summarize
+from .management.commands.benchmark_scan import SimulatedSensor
+from . import telemetry
+from .r307 import PID_ACK, R307, R307Emulator, build_packet
+from .transport import RECEIVED, SENT, RecordingTransport, ReplayMismatch, ReplayTransport, read_recording
+
+TEMPLATE = bytes(range(256)) * 2
+
+
+class UnnamedUrls:
+    urlpatterns = [path('unnamed/<int:pk>/', lambda request, pk: HttpResponse('ok'))]
+
+
+def record_scan(path, template=TEMPLATE, finger_after=0.0):
+    """Record an emulated scan session."""
+    r307 = R307(transport=RecordingTransport(R307Emulator(template, finger_after=finger_after), path))
+    scan = r307.scan_fingerprint()
+    r307.close()
+    return scan
+
+
+@mock.patch('fingerprint.views.R307', SimulatedSensor)
+class ScanMetricsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        course = Course.objects.create(course_code='MET101', course_name='Metrics')
+        UserProfile.objects.create(
+            user=User.objects.create(username='metrics-student'),
+            full_name='Metrics Student',
+            student_id='MET001',
+            email='metrics@example.com',
+            course=course,
+            role='student',
+            fingerprint_template=b'MET-TEMPLATE',
+            fingerprint_enrolled=True,
+        )
+
+    def setUp(self):
+        metrics.reset()
+        self.addCleanup(metrics.reset)
+
+    def scan(self, template=b'MET-TEMPLATE'):
+        SimulatedSensor.scans = [template]
+        return self.client.post('/fingerprint/api/scan/')
+
+    def test_scan_records_view_and_spans(self):
+        self.assertEqual(self.scan().json()['result'], 'marked')
+
+        requests = metrics.REQUESTS.snapshot()
+        self.assertEqual(requests[('scan_api', 'POST', 200)], 1)
+        counts, _ = metrics.REQUEST_QUERIES.snapshot()[('scan_api',)]
+        self.assertEqual(sum(counts), 1)
+        spans = metrics.SPAN_SECONDS.snapshot()
+        self.assertEqual({key[0] for key in spans}, {'capture', 'match', 'write'})
+
+    async def test_asgi_requests_are_recorded(self):
+        SimulatedSensor.scans = [b'MET-TEMPLATE']
+        response = await self.async_client.post('/fingerprint/api/scan/')
+        self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(metrics.REQUESTS.snapshot()[('scan_api', 'POST', 200)], 1)
+        # Queries ran in the view's thread, not the event loop - still counted
+        counts, queries = metrics.REQUEST_QUERIES.snapshot()[('scan_api',)]
+        self.assertEqual(sum(counts), 1)
+        self.assertGreater(queries, 0)
+
+    @override_settings(METRICS_TOKEN='scrape-secret')
+    def test_metrics_endpoint_renders_prometheus_text(self):
+        self.scan()
+        response = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer scrape-secret')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        body = response.content.decode()
+        self.assertIn('# TYPE http_request_duration_seconds histogram', body)
+        self.assertIn('http_request_duration_seconds_count{view="scan_api"} 1', body)
+        self.assertIn('http_request_duration_seconds_bucket{view="scan_api",le="+Inf"} 1', body)
+        self.assertIn('span_duration_seconds_count{span="write"} 1', body)
+        self.assertIn('http_requests_total{view="scan_api",method="POST",status="200"} 1', body)
+
+    @override_settings(METRICS_SAMPLE_RATE=0.0)
+    def test_unsampled_requests_record_nothing(self):
+        self.scan()
+        self.assertEqual(metrics.REQUESTS.snapshot(), {})
+        self.assertEqual(metrics.SPAN_SECONDS.snapshot(), {})
+
+    @override_settings(ROOT_URLCONF=UnnamedUrls)
+    def test_unnamed_routes_are_labelled_by_pattern(self):
+        self.client.get('/unnamed/1/')
+        self.client.get('/unnamed/2/')
+
+        self.assertEqual(metrics.REQUESTS.snapshot(), {('unnamed/<int:pk>/', 'GET', 200): 2})
+
+    @override_settings(METRICS_TOKEN='scrape-secret')
+    def test_metrics_token(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 401)
+        response = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer scrape-secret')
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(METRICS_TOKEN='')
+    def test_metrics_without_a_token_are_open_in_debug_only(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+        with self.settings(DEBUG=True):
+            self.assertEqual(self.client.get('/metrics').status_code, 200)
+
+
+@mock.patch('fingerprint.views.R307', SimulatedSensor)
+class ScanApiTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.course = Course.objects.create(course_code='KIO101', course_name='Kiosk')
+        for student_id, course in (('KIO001', cls.course), ('KIO002', None)):
+            UserProfile.objects.create(
+                user=User.objects.create(username=student_id), full_name=f'Student {student_id}',
+                student_id=student_id, email=f'{student_id.lower()}@example.com', course=course,
+                role='student', fingerprint_template=student_id.encode(), fingerprint_enrolled=True,
+            )
+
+    def setUp(self):
+        cache.clear()
+
+    def scan(self, *templates):
+        SimulatedSensor.scans = list(templates)
+        return self.client.post(reverse('scan_api'))
+
+    def test_match_marks_attendance(self):
+        response = self.scan(b'KIO001')
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['result'], 'marked')
+        self.assertEqual(
+            (data['student_id'], data['student_name'], data['course_code'], data['course_name']),
+            ('KIO001', 'Student KIO001', 'KIO101', 'Kiosk'),
+        )
+        self.assertRegex(data['time'], r'^\d\d:\d\d [AP]M$')
+        self.assertEqual(AttendanceLog.objects.filter(student_id='KIO001').count(), 1)
+
+    def test_duplicate_scan_is_already_marked(self):
+        first = self.scan(b'KIO001').json()
+        second = self.scan(b'KIO001').json()
+
+        self.assertEqual(second['result'], 'already_marked')
+        self.assertEqual(second['time'], first['time'])
+        self.assertEqual(AttendanceLog.objects.filter(student_id='KIO001').count(), 1)
+
+    def test_no_match(self):
+        response = self.scan(b'UNKNOWN')
+        self.assertEqual((response.status_code, response.json()), (200, {'result': 'not_recognized'}))
+        self.assertFalse(AttendanceLog.objects.exists())
+
+    def test_student_without_course(self):
+        self.assertEqual(self.scan(b'KIO002').json(), {'result': 'no_course', 'student_name': 'Student KIO002'})
+
+    def test_sensor_unavailable(self):
+        response = self.scan()
+        self.assertEqual((response.status_code, response.json()), (503, {'result': 'sensor_error'}))
+
+    def test_post_only(self):
+        self.assertEqual(self.client.get(reverse('scan_api')).status_code, 405)
+
+
+class R307RecordReplayTests(SimpleTestCase):
+
+    def setUp(self):
+        # The driver reports progress with print()
+        self.enterContext(mock.patch('builtins.print'))
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'scan.rec')
+
+    def test_recording_holds_both_directions(self):
+        self.assertEqual(record_scan(self.path, finger_after=0.15), TEMPLATE)
+
+        metadata, events = read_recording(self.path)
+        self.assertEqual(metadata['port'], 'emulator')
+        self.assertEqual({direction for _, direction, _ in events}, {SENT, RECEIVED})
+        received = b''.join(data for _, direction, data in events if direction == RECEIVED)
+        self.assertIn(TEMPLATE[:128], received)
+        # Polled "no finger" until the finger arrived
+        self.assertGreaterEqual(events[-1][0], 0.15)
+
+    def test_replay_returns_the_recorded_scan_at_any_speed(self):
+        record_scan(self.path, finger_after=0.3)
+
+        for speed, fastest, slowest in ((1.0, 0.3, 5), (10.0, 0.0, 0.2), (0, 0.0, 0.1)):
+            transport = ReplayTransport(self.path, speed=speed)
+            started = time.perf_counter()
+            self.assertEqual(R307(transport=transport).scan_fingerprint(), TEMPLATE)
+            elapsed = time.perf_counter() - started
+            self.assertTrue(fastest <= elapsed < slowest, (speed, elapsed))
+            self.assertTrue(transport.finished)
+
+    def test_diverging_driver_is_detected(self):
+        record_scan(self.path)
+        with self.assertRaises(ReplayMismatch):
+            R307(transport=ReplayTransport(self.path, speed=0)).enroll_fingerprint()
+
+    def test_corrupt_or_missing_response_fails_the_scan(self):
+        class Corrupt(R307Emulator):
+            def _ack(self, code):
+                self._out += build_packet(PID_ACK, bytes([code]))[:-1] + b'\x00'
+
+        self.assertIsNone(R307(transport=Corrupt(TEMPLATE)).scan_fingerprint())
+
+        # Recording ends early - reads time out
+        record_scan(self.path)
+        with open(self.path, 'r+b') as f:
+            f.truncate(os.path.getsize(self.path) - 200)
+        self.assertIsNone(R307(transport=ReplayTransport(self.path, speed=0)).scan_fingerprint())
+
+    def test_enrollment_protocol(self):
+        self.assertEqual(R307(transport=R307Emulator(TEMPLATE)).enroll_fingerprint(), TEMPLATE)
+
+
+class FlakyEmulator(R307Emulator):
+    """Corrupts (or drops) the first `failures` replies."""
+
+    def __init__(self, template=TEMPLATE, failures=1, drop=False):
+        super().__init__(template)
+        self.failures = failures
+        self.drop = drop
+        self.reopened = 0
+
+    def _ack(self, code):
+        if self.failures:
+            self.failures -= 1
+            if not self.drop:
+                self._out += build_packet(PID_ACK, bytes([code]))[:-1] + b'\x00'
+            return
+        super()._ack(code)
+
+    def reopen(self):
+        self.reopened += 1
+
+
+class SensorTelemetryTests(SimpleTestCase):
+
+    def setUp(self):
+        self.enterContext(mock.patch('builtins.print'))
+        metrics.reset()
+        self.addCleanup(metrics.reset)
+
+    def health(self):
+        return telemetry.summarize(metrics.parse(metrics.render()))['emulator']
+
+    def test_commands_are_timed_per_sensor(self):
+        self.assertEqual(R307(transport=R307Emulator(TEMPLATE)).scan_fingerprint(), TEMPLATE)
+
+        health = self.health()
+        self.assertEqual(set(health['commands']), {'gen_image', 'image_to_tz', 'up_char'})
+        self.assertEqual(health['count'], 3)
+        self.assertIsNotNone(health['p95_ms'])
+        self.assertEqual(health['error_rate'], 0.0)
+        self.assertEqual(health['connections']['connected'], 1)
+
+    def test_corrupt_reply_is_counted_and_retried(self):
+        self.assertEqual(R307(transport=FlakyEmulator()).scan_fingerprint(), TEMPLATE)
+
+        health = self.health()
+        self.assertEqual(health['errors']['checksum'], 1)
+        self.assertEqual(health['retries'], 1)
+        self.assertEqual(health['error_rate'], 0.25)
+        self.assertIn('r307_retries_total{sensor="emulator",command="gen_image"} 1', metrics.render())
+
+    def test_timeout_reopens_the_port(self):
+        sensor = FlakyEmulator(drop=True)
+        self.assertEqual(R307(transport=sensor).scan_fingerprint(), TEMPLATE)
+
+        health = self.health()
+        self.assertEqual(health['errors']['timeout'], 1)
+        self.assertEqual(health['connections']['reconnected'], 1)
+        self.assertEqual(sensor.reopened, 1)
+
+    def test_gives_up_after_retries(self):
+        self.assertIsNone(R307(transport=FlakyEmulator(failures=10)).scan_fingerprint())
+
+        health = self.health()
+        self.assertEqual(health['errors']['checksum'], 3)
+        self.assertEqual(health['retries'], 2)
+        self.assertEqual(health['count'], 0)
+
+    def test_replays_are_kept_apart_from_the_sensor(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, 'scan.rec')
+        record_scan(path)
+        R307(transport=ReplayTransport(path, speed=0)).scan_fingerprint()
+
+        sensors = telemetry.summarize(metrics.parse(metrics.render()))
+        self.assertEqual(set(sensors), {'emulator', 'replay:emulator'})
+
+    def test_quantile_interpolates_within_a_bucket(self):
+        buckets = [(0.01, 0), (0.02, 10), (float('inf'), 10)]
+        self.assertAlmostEqual(metrics.histogram_quantile(0.5, buckets), 0.015)
+        self.assertIsNone(metrics.histogram_quantile(0.5, [(float('inf'), 0)]))
+
+
+class SensorHealthCommandTests(SimpleTestCase):
+
+    def setUp(self):
+        self.enterContext(mock.patch('builtins.print'))
+        metrics.reset()
+        self.addCleanup(metrics.reset)
+
+    def probe(self, sensor, **options):
+        out = StringIO()
+        with mock.patch('fingerprint.management.commands.sensor_health.R307',
+                        lambda port, baudrate: R307(transport=sensor)):
+            call_command('sensor_health', probe=10, stdout=out, **options)
+        return out.getvalue()
+
+    def test_probe_reports_a_healthy_sensor(self):
+        out = self.probe(R307Emulator(TEMPLATE))
+        self.assertIn('10/10 handshakes answered', out)
+        self.assertIn('verify_password', out)
+        self.assertIn('1 sensor(s) healthy', out)
+
+    def test_degrading_sensor_fails_the_check(self):
+        with self.assertRaisesMessage(CommandError, 'Unhealthy sensors: emulator'):
+            self.probe(FlakyEmulator(failures=2), max_error_rate=0.05)
+
+
+class ReplayCommandTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        course = Course.objects.create(course_code='REP101', course_name='Replay')
+        UserProfile.objects.create(
+            user=User.objects.create(username='replay-student'),
+            full_name='Replay Student',
+            student_id='REP001',
+            email='replay@example.com',
+            course=course,
+            role='student',
+            fingerprint_template=b'OTHER',
+            fingerprint_enrolled=True,
+        )
+
+    def setUp(self):
+        self.enterContext(mock.patch('builtins.print'))
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'scan.rec')
+        record_scan(self.path)
+
+    def test_replays_through_the_scan_path_and_rolls_back(self):
+        out = StringIO()
+        call_command('replay_r307', self.path, speed=0, repeat=3, student='REP001', stdout=out)
+
+        self.assertIn('3 replays', out.getvalue())
+        self.assertIn('scan result: marked', out.getvalue())
+        self.assertFalse(AttendanceLog.objects.exists())
+        self.assertEqual(bytes(UserProfile.objects.get(student_id='REP001').fingerprint_template), b'OTHER')
+
+    def test_unknown_student(self):
+        with self.assertRaises(CommandError):
+            call_command('replay_r307', self.path, speed=0, student='NOBODY', stdout=StringIO())
+
+
+class LoadModelTests(SimpleTestCase):
+
+    def test_arrivals_match_the_offered_rate_in_bursts(self):
+        rng = random.Random(1)
+        arrivals = arrival_times(600, 600, burst=3, rng=rng)
+
+        # ~10 scans/s for 10 minutes
+        self.assertAlmostEqual(len(arrivals), 6000, delta=600)
+        self.assertEqual(arrivals, sorted(arrivals))
+        self.assertTrue(all(0 <= t < 600 for t in arrivals))
+        # Bursty: quiet gaps far longer than the mean gap of 0.1s
+        gaps = [b - a for a, b in zip(arrivals, arrivals[1:])]
+        self.assertGreater(max(gaps), 0.5)
+
+    def test_schedule_adds_repeats_and_unknown_fingers(self):
+        rng = random.Random(2)
+        schedule = build_schedule(list(range(1000)), ['aa', 'bb'], repeat_rate=0.2, unknown_rate=0.1, rng=rng)
+
+        repeats = [item for item in schedule if item[2]]
+        unknown = [item for item in schedule if item[1] is None]
+        self.assertAlmostEqual(len(repeats), 180, delta=50)
+        self.assertAlmostEqual(len(unknown), 100, delta=40)
+        self.assertFalse(any(finger is None for _, finger, _ in repeats))
+
+    def test_saturation_is_where_throughput_falls_behind(self):
+        def step(arrived, completed, p95=20, errors=0):
+            return {'scans': 100, 'errors': errors, 'arrived_per_minute': arrived,
+                    'completed_per_minute': completed, 'p95_ms': p95}
+
+        steps = [step(60, 60), step(120, 119), step(240, 180), step(480, 200)]
+        self.assertIs(saturation_point(steps), steps[2])
+        self.assertIsNotNone(saturation_point([step(60, 60, p95=2000)]))
+        self.assertIsNone(saturation_point(steps[:2]))
+        self.assertIsNotNone(saturation_point([step(60, 60, errors=5)]))
+
+    def test_summary(self):
+        results = [
+            {'arrival': i, 'finished': i + 0.01, 'wait_ms': 0.0, 'latency_ms': 10.0,
+             'result': 'marked' if i % 10 else 'error', 'status': 200 if i % 10 else 500}
+            for i in range(60)
+        ]
+        summary = summarize(results, 60, 60)
+
+        self.assertEqual(summary['arrived_per_minute'], 60)
+        self.assertEqual(summary['errors'], 6)
+        self.assertEqual(summary['error_statuses'], {'500': 6})
+        self.assertAlmostEqual(summary['completed_per_minute'], 54, delta=0.1)
+
+
+class SerialWSGIServer(WSGIServer):
+    """Live server answering one request at a time."""
+
+    # The live server shares the test's in-memory SQLite connection -
+    # concurrent requests would interleave statements on it
+
+    def __init__(self, *args, connections_override=None, **kwargs):
+        super().__init__(*args, **kwargs)
+
+
+class SerialLiveServerThread(LiveServerThread):
+    server_class = SerialWSGIServer
+
+
+@override_settings(R307_EMULATION=True)
+class LoadRunnerTests(LiveServerTestCase):
+    server_thread_class = SerialLiveServerThread
+
+    def setUp(self):
+        self.enterContext(mock.patch('builtins.print'))
+        course = Course.objects.create(course_code='LOAD101', course_name='Load')
+        self.templates = []
+        for i in range(5):
+            template = bytes([i]) * 512
+            UserProfile.objects.create(
+                user=User.objects.create(username=f'load-{i}'),
+                full_name=f'Load Student {i}',
+                student_id=f'LOAD{i:03d}',
+                email=f'load-{i}@example.com',
+                course=course,
+                role='student',
+                fingerprint_template=template,
+                fingerprint_enrolled=True,
+            )
+            self.templates.append(template.hex())
+
+    def test_kiosks_scan_through_the_emulated_sensor(self):
+        schedule = [(0.0, finger, False) for finger in self.templates]
+        schedule += [(0.05, self.templates[0], True), (0.05, None, False)]
+        results = LoadRunner(self.live_server_url, 'api', kiosks=3).run(schedule)
+
+        self.assertEqual(len(results), 7)
+        counts = summarize(results, 60, 1)['results']
+        self.assertEqual(counts, {'marked': 5, 'already_marked': 1, 'not_recognized': 1})
+        self.assertEqual(AttendanceLog.objects.count(), 5)
+
+    def test_command_reports_and_cleans_up(self):
+        out = StringIO()
+        call_command('loadtest_scans', url=self.live_server_url, endpoint='api', kiosks=2,
+                     rates='300', duration=1, repeat_rate=0, seed=3, stdout=out)
+
+        self.assertIn('arrived/min', out.getvalue())
+        self.assertEqual(AttendanceLog.objects.count(), 0)
+
+    @override_settings(R307_EMULATION=False)
+    def test_emulation_header_is_ignored_when_off(self):
+        with mock.patch('fingerprint.views.R307', SimulatedSensor):
+            SimulatedSensor.scans = []
+            results = LoadRunner(self.live_server_url, 'api', kiosks=1).run([(0.0, self.templates[0], False)])
+        self.assertEqual(results[0]['result'], 'sensor_error')
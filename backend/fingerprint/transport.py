@@ -0,0 +1,260 @@
+"""
+============================================================
+R307 SERIAL TRANSPORTS - RECORD AND REPLAY
+============================================================
+The R307 driver talks to the sensor through a transport
+(write / read / sleep / close, optionally reset_input / reopen
+for recovering from errors):
+
+- SerialTransport:    the real sensor (pyserial)
+- RecordingTransport: wraps another transport and saves every
+                      byte sent and received, with timestamps,
+                      for one sensor session (open -> close)
+- ReplayTransport:    feeds a recording back to the driver at
+                      real speed (1.0), accelerated (e.g. 10.0)
+                      or without any waiting (0)
+
+A field problem can then be reproduced - sensor wait included -
+on a machine with no sensor attached:
+
+    R307_RECORD_DIR=/var/log/r307 python manage.py runserver   # field
+    python manage.py replay_r307 /var/log/r307/r307-....rec    # desk
+
+Recording file format (little-endian):
+    b'R307REC1'
+    uint16 metadata length, metadata (JSON: port, baudrate, started_at)
+    events: uint8 direction (0 = sent, 1 = received),
+            uint32 microseconds since the previous event,
+            uint16 length, bytes
+============================================================
+"""
+import json
+import os
+import struct
+import time
+from datetime import datetime, timezone
+
+MAGIC = b'R307REC1'
+SENT = 0
+RECEIVED = 1
+
+_EVENT = struct.Struct('<BIH')
+_METADATA_LENGTH = struct.Struct('<H')
+
+# Longest chunk one event can hold (uint16 length)
+MAX_CHUNK = 0xFFFF
+
+
+class ReplayMismatch(Exception):
+    """The driver sent different bytes than the recorded session."""
+
+
+class SerialTransport:
+    """The sensor on a serial port."""
+
+    def __init__(self, port, baudrate, timeout=2):
+        import serial
+        self.port = port
+        self.baudrate = baudrate
+        self.ser = serial.Serial(port, baudrate, timeout=timeout)
+
+    def write(self, data):
+        return self.ser.write(data)
+
+    def read(self, size):
+        return self.ser.read(size)
+
+    def sleep(self, seconds):
+        time.sleep(seconds)
+
+    def reset_input(self):
+        self.ser.reset_input_buffer()
+
+    def reopen(self):
+        """Close and open the port again (e.g. after the adapter hung)."""
+        self.ser.close()
+        self.ser.open()
+
+    def close(self):
+        self.ser.close()
+
+
+def read_recording(path):
+    """
+    Load a recording.
+
+    Returns:
+        tuple: (metadata dict, [(seconds since start, direction, bytes), ...])
+
+    Raises:
+        ValueError: Not a recording file
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    if not data.startswith(MAGIC):
+        raise ValueError(f'{path} is not an R307 recording')
+    offset = len(MAGIC)
+    (length,) = _METADATA_LENGTH.unpack_from(data, offset)
+    offset += _METADATA_LENGTH.size
+    metadata = json.loads(data[offset:offset + length])
+    offset += length
+
+    events = []
+    elapsed_us = 0
+    while offset < len(data):
+        direction, delta_us, size = _EVENT.unpack_from(data, offset)
+        offset += _EVENT.size
+        elapsed_us += delta_us
+        events.append((elapsed_us / 1e6, direction, data[offset:offset + size]))
+        offset += size
+    return metadata, events
+
+
+class RecordingTransport:
+    """
+    Record a session on another transport.
+
+    Args:
+        inner: Transport actually talking to the sensor
+        path: Recording file to write
+        metadata: Extra JSON-able fields for the file header
+    """
+
+    def __init__(self, inner, path, metadata=None):
+        self.inner = inner
+        self.path = path
+        self.port = getattr(inner, 'port', None)
+        self._file = open(path, 'wb')
+        header = json.dumps({
+            'port': getattr(inner, 'port', None),
+            'baudrate': getattr(inner, 'baudrate', None),
+            'started_at': datetime.now(timezone.utc).isoformat(),
+            **(metadata or {}),
+        }).encode()
+        self._file.write(MAGIC + _METADATA_LENGTH.pack(len(header)) + header)
+        self._last = time.perf_counter()
+
+    def _record(self, direction, data):
+        now = time.perf_counter()
+        delta_us = min(int((now - self._last) * 1e6), 0xFFFFFFFF)
+        self._last = now
+        for start in range(0, len(data), MAX_CHUNK):
+            chunk = bytes(data[start:start + MAX_CHUNK])
+            self._file.write(_EVENT.pack(direction, delta_us, len(chunk)) + chunk)
+            delta_us = 0
+
+    def write(self, data):
+        written = self.inner.write(data)
+        self._record(SENT, data)
+        return written
+
+    def read(self, size):
+        data = self.inner.read(size)
+        if data:
+            self._record(RECEIVED, data)
+        return data
+
+    def sleep(self, seconds):
+        self.inner.sleep(seconds)
+
+    def reset_input(self):
+        if hasattr(self.inner, 'reset_input'):
+            self.inner.reset_input()
+
+    def reopen(self):
+        if hasattr(self.inner, 'reopen'):
+            self.inner.reopen()
+
+    def close(self):
+        try:
+            self.inner.close()
+        finally:
+            self._file.close()
+
+
+class ReplayTransport:
+    """
+    Play a recording back to the driver.
+
+    Received bytes are released no earlier than they arrived in the
+    recording (scaled by speed); sent bytes are checked against the
+    recording. Past the end it behaves like a sensor that stopped
+    answering: reads time out, writes (the driver's retries) go
+    nowhere.
+
+    Args:
+        path: Recording file
+        speed: 1.0 = real time, 10.0 = ten times faster, 0 = no waiting
+        strict: Raise ReplayMismatch when the driver sends other bytes
+    """
+
+    def __init__(self, path, speed=1.0, strict=True):
+        self.path = path
+        self.metadata, events = read_recording(path)
+        self.port = self.metadata.get('port')
+        # Keeps replays out of the real sensor's telemetry
+        self.sensor = f'replay:{self.port}'
+        self.baudrate = self.metadata.get('baudrate')
+        self.speed = speed
+        self.strict = strict
+        self._sent = bytearray()
+        self._received = []  # [(seconds, bytes)] in arrival order
+        for seconds, direction, data in events:
+            if direction == SENT:
+                self._sent += data
+            else:
+                self._received.append((seconds, data))
+        self._sent_offset = 0
+        self._chunk = 0
+        self._chunk_offset = 0
+        self._started = time.perf_counter()
+
+    def _wait_until(self, seconds):
+        if self.speed <= 0:
+            return
+        remaining = seconds / self.speed - (time.perf_counter() - self._started)
+        if remaining > 0:
+            time.sleep(remaining)
+
+    def write(self, data):
+        if self._sent_offset >= len(self._sent) and self._chunk >= len(self._received):
+            return len(data)
+        expected = bytes(self._sent[self._sent_offset:self._sent_offset + len(data)])
+        if self.strict and expected != bytes(data):
+            raise ReplayMismatch(
+                f'sent {bytes(data).hex()} at byte {self._sent_offset}, recording has {expected.hex() or "nothing"}'
+            )
+        self._sent_offset += len(data)
+        return len(data)
+
+    def read(self, size):
+        out = bytearray()
+        while len(out) < size and self._chunk < len(self._received):
+            seconds, chunk = self._received[self._chunk]
+            self._wait_until(seconds)
+            take = chunk[self._chunk_offset:self._chunk_offset + size - len(out)]
+            out += take
+            self._chunk_offset += len(take)
+            if self._chunk_offset >= len(chunk):
+                self._chunk += 1
+                self._chunk_offset = 0
+        return bytes(out)
+
+    def sleep(self, seconds):
+        # The driver's waits are already in the recorded timestamps
+        pass
+
+    @property
+    def finished(self):
+        """True once every recorded byte was sent and received."""
+        return self._sent_offset >= len(self._sent) and self._chunk >= len(self._received)
+
+    def close(self):
+        pass
+
+
+def recording_path(directory, prefix='r307'):
+    """New recording file name in directory (created if needed)."""
+    os.makedirs(directory, exist_ok=True)
+    stamp = datetime.now().strftime('%Y%m%d-%H%M%S-%f')
+    return os.path.join(directory, f'{prefix}-{stamp}.rec')
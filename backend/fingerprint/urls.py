@@ -17,6 +17,8 @@ urlpatterns = [
     
     # Fingerprint scanning for attendance (NO LOGIN REQUIRED)
     path('scan/', views.scan_fingerprint, name='scan_fingerprint'),
-]
 
- 
\ No newline at end of file
+    # Kiosk mode: static page + JSON scan API (NO LOGIN REQUIRED)
+    path('kiosk/', views.kiosk, name='kiosk'),
+    path('api/scan/', views.scan_api, name='scan_api'),
+]
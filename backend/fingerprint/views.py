@@ -8,17 +8,48 @@ Key Functions:
 - enroll_own_fingerprint: Students enroll their own fingerprint after registration
 - enroll_fingerprint: Admins/instructors enroll fingerprints for students
 - scan_fingerprint: Students scan to mark attendance (NO LOGIN REQUIRED)
+- kiosk / scan_api: Kiosk mode - static page + compact JSON scan API
 ============================================================
 """
 from django.shortcuts import render, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import User
-from django.http import HttpResponse
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
 from django.contrib import messages
 from users.models import UserProfile
+from fingerprint_attendance import cache as lookup_cache
+from fingerprint_attendance.metrics import span
+from fingerprint_attendance import writer
 from .models import FingerprintScan
-from attendance.models import AttendanceLog
-from .r307 import R307
+from .matching import identify, mark_attendance
+from .r307 import R307, R307Emulator
+from pathlib import Path
+
+
+# Kiosk page - plain HTML, read once and served as-is (no template rendering)
+KIOSK_PAGE_PATH = Path(__file__).resolve().parent / 'static' / 'fingerprint' / 'kiosk.html'
+_kiosk_page = None
+
+
+def _open_scanner(request):
+    """
+    The sensor for a scan request.
+    
+    With R307_EMULATION on (load tests only - see loadtest_scans) the
+    finger comes from the X-Emulated-Finger header (template as hex)
+    and is read through the emulated R307 protocol.
+    """
+    finger = request.headers.get('X-Emulated-Finger')
+    if finger is not None and settings.R307_EMULATION:
+        try:
+            template = bytes.fromhex(finger)
+        except ValueError:
+            template = b''
+        return R307(transport=R307Emulator(template))
+    return R307()
 
 
 @login_required
@@ -82,7 +113,7 @@ def enroll_fingerprint(request):
     """
     # Check if user is instructor or admin
     try:
-        profile = UserProfile.objects.get(user=request.user)
+        profile = lookup_cache.get_profile(request.user)
         if profile.role != 'instructor' and not request.user.is_staff:
             messages.error(request, '❌ Access denied! Only instructors can access this page.')
             return redirect('home')
@@ -143,26 +174,20 @@ def scan_fingerprint(request):
     """
     if request.method == 'POST':
         # Initialize fingerprint sensor
-        r307 = R307()
+        r307 = _open_scanner(request)
         
         # Scan fingerprint
-        scan = r307.scan_fingerprint()
-        r307.close()
+        with span('capture'):
+            scan = r307.scan_fingerprint()
+            r307.close()
         
         if not scan:
             messages.error(request, '❌ Error: Could not connect to fingerprint sensor.')
             return render(request, 'fingerprint/scan.html')
         
         # Try to match against ALL enrolled fingerprints
-        all_profiles = UserProfile.objects.filter(fingerprint_enrolled=True, role='student')
-        
-        matched_profile = None
-        for profile in all_profiles:
-            if profile.fingerprint_template:
-                # Simple comparison (in production, use R307's match function)
-                if r307.match_fingerprint(profile.fingerprint_template, scan):
-                    matched_profile = profile
-                    break
+        with span('match'):
+            matched_profile = identify(r307, scan)
         
         if matched_profile:
             # SUCCESS: Fingerprint matched!
@@ -172,34 +197,19 @@ def scan_fingerprint(request):
                 messages.error(request, f'⚠️ {matched_profile.full_name}: No course assigned. Please contact administrator.')
                 return render(request, 'fingerprint/scan.html')
             
-            # Check if already marked attendance today for this course
-            from datetime import date
-            today = date.today()
-            
-            existing_attendance = AttendanceLog.objects.filter(
-                user=matched_profile.user,
-                course=matched_profile.course,
-                date=today
-            ).first()
+            # Mark attendance (once per day per course)
+            with span('write'):
+                log, created = mark_attendance(matched_profile)
             
-            if existing_attendance:
-                messages.warning(request, f'⚠️ {matched_profile.full_name}: Attendance already marked today for {matched_profile.course.course_code} at {existing_attendance.time.strftime("%I:%M %p")}')
+            if not created:
+                messages.warning(request, f'⚠️ {matched_profile.full_name}: Attendance already marked today for {matched_profile.course.course_code} at {log.time.strftime("%I:%M %p")}')
             else:
-                # Create new attendance log
-                AttendanceLog.objects.create(
-                    user=matched_profile.user,
-                    student_name=matched_profile.full_name,
-                    student_id=matched_profile.student_id,
-                    course=matched_profile.course,
-                    status='present',
-                    scan_method='fingerprint'
-                )
-                
                 messages.success(request, f'✅ Welcome {matched_profile.full_name}!')
                 messages.success(request, f'📚 Attendance marked for {matched_profile.course.course_code} - {matched_profile.course.course_name}')
             
             # Save scan record for audit trail
-            FingerprintScan.objects.create(
+            writer.run(
+                FingerprintScan.objects.create,
                 user=matched_profile.user,
                 scan_data=scan
             )
@@ -214,3 +224,74 @@ def scan_fingerprint(request):
     return render(request, 'fingerprint/scan.html')
 
 
+@require_GET
+def kiosk(request):
+    """
+    Kiosk mode scan page (NO LOGIN REQUIRED).
+    
+    A static page that calls scan_api and shows the result.
+    Served from memory - no template rendering, no session.
+    
+    URL: /fingerprint/kiosk/
+    """
+    global _kiosk_page
+    if _kiosk_page is None:
+        _kiosk_page = KIOSK_PAGE_PATH.read_bytes()
+    return HttpResponse(_kiosk_page, content_type='text/html; charset=utf-8')
+
+
+@csrf_exempt
+@require_POST
+def scan_api(request):
+    """
+    Kiosk JSON scan API (NO LOGIN REQUIRED).
+    
+    Same process as scan_fingerprint, but answers with compact JSON
+    and never touches the session or the messages framework, so a
+    scan costs one identification and at most one attendance write.
+    
+    URL: /fingerprint/api/scan/
+    Method: POST
+    
+    Returns:
+        JSON: {"result": "marked" | "already_marked" | "not_recognized"
+                         | "no_course" | "sensor_error", ...student fields}
+    """
+    # Initialize fingerprint sensor
+    r307 = _open_scanner(request)
+    
+    # Scan fingerprint
+    with span('capture'):
+        scan = r307.scan_fingerprint()
+        r307.close()
+    
+    if not scan:
+        return JsonResponse({'result': 'sensor_error'}, status=503)
+    
+    with span('match'):
+        matched_profile = identify(r307, scan)
+    
+    if not matched_profile:
+        return JsonResponse({'result': 'not_recognized'})
+    
+    if not matched_profile.course:
+        return JsonResponse({
+            'result': 'no_course',
+            'student_name': matched_profile.full_name,
+        })
+    
+    with span('write'):
+        log, created = mark_attendance(matched_profile)
+    
+    # Optional audit trail (off by default - it is a second write per scan)
+    if getattr(settings, 'KIOSK_AUDIT_SCANS', False):
+        writer.run(FingerprintScan.objects.create, user=matched_profile.user, scan_data=scan)
+    
+    return JsonResponse({
+        'result': 'marked' if created else 'already_marked',
+        'student_name': matched_profile.full_name,
+        'student_id': matched_profile.student_id,
+        'course_code': matched_profile.course.course_code,
+        'course_name': matched_profile.course.course_name,
+        'time': log.time.strftime('%I:%M %p'),
+    })
@@ -3,6 +3,10 @@ ASGI config for fingerprint_attendance project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Use it for the live attendance feed (/attendance/events/<code>/), so each
+open Server-Sent Events stream costs a coroutine instead of a worker:
+    uvicorn fingerprint_attendance.asgi:application
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
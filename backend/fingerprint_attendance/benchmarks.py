@@ -0,0 +1,265 @@
+"""
+============================================================
+END-TO-END VIEW BENCHMARK SUITE
+============================================================
+Drives every hot view through the Django test client against
+the current database (seed one with `manage.py seed_population`)
+and records, per view:
+
+    p50/p95 latency (ms), SQL queries per request (max),
+    peak Python memory per request (KB, tracemalloc)
+
+Results are compared with a stored baseline
+(settings.BENCHMARK_BASELINE): more queries than the baseline,
+or latency / memory beyond the tolerance, is a regression.
+
+The R307 is replaced by an instant simulated sensor, and every
+write made by the scan views is rolled back at the end.
+Pages whose template is missing from this tree are rendered
+with a small stand-in that still walks every context row (so
+lazy querysets are evaluated as a real page would) - those
+results are flagged with "template": "stand-in".
+============================================================
+"""
+import random
+import tempfile
+import time
+import tracemalloc
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.db.models import Count
+from django.template import TemplateDoesNotExist
+from django.template.loader import get_template
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from attendance.models import AttendanceLog
+from docstore.benchmark import percentile
+from fingerprint.management.commands.benchmark_scan import SimulatedSensor
+from fingerprint_attendance import cache as lookup_cache
+from users.models import Course, UserProfile
+
+
+# ========== SCENARIOS ==========
+# (name, method, url, who: 'anonymous' | 'instructor', template or None)
+SCENARIOS = [
+    ('scan_fingerprint', 'post', '/fingerprint/scan/', 'anonymous', 'fingerprint/scan.html'),
+    ('scan_api', 'post', '/fingerprint/api/scan/', 'anonymous', None),
+    ('instructor_dashboard', 'get', '/attendance/dashboard/', 'instructor', 'attendance/instructor_dashboard.html'),
+    ('course_attendance', 'get', '/attendance/course/{course}/', 'instructor', 'attendance/course_attendance.html'),
+    ('attendance_report', 'get', '/attendance/report/{course}/', 'instructor', None),
+    ('course_analytics_data', 'get', '/attendance/analytics/{course}/data/', 'instructor', None),
+    ('api_attendance_logs', 'get', '/attendance/api/logs/?course={course}', 'instructor', None),
+]
+
+# Minimal pages for templates this tree does not ship
+STAND_IN_TEMPLATES = {
+    'fingerprint/scan.html': '{% for message in messages %}{{ message }}{% endfor %}',
+    'attendance/instructor_dashboard.html': (
+        '{% for row in course_stats %}{{ row.course.course_code }} {{ row.course.course_name }} '
+        '{{ row.total_students }} {{ row.present_today }} {{ row.absent_today }}{% endfor %}'
+    ),
+    'attendance/course_attendance.html': (
+        '{{ course.course_code }} {{ present_count }}/{{ total_students }}'
+        '{% for row in student_attendance %}{{ row.student.full_name }} {{ row.student.student_id }} '
+        '{{ row.attended }} {{ row.time }}{% endfor %}'
+        '{% for log in attendance_logs %}{{ log.student_name }} {{ log.time }}{% endfor %}'
+    ),
+}
+
+# What counts as a regression against the baseline
+DEFAULT_TOLERANCE = 0.5          # latency/memory may grow by 50% (machine noise)
+SCALE_TOLERANCE = 0.05           # data set must be within 5% of the baseline's
+
+
+class _Rollback(Exception):
+    """Raised to roll back everything the benchmark wrote."""
+
+
+def current_scale():
+    """Size of the data set the benchmark runs against."""
+    return {
+        'courses': Course.objects.count(),
+        'students': UserProfile.objects.filter(role='student').count(),
+        'attendance_logs': AttendanceLog.objects.count(),
+    }
+
+
+def _missing_templates():
+    missing = {}
+    for name, source in STAND_IN_TEMPLATES.items():
+        try:
+            get_template(name)
+        except TemplateDoesNotExist:
+            missing[name] = source
+    return missing
+
+
+def _template_settings(stand_ins):
+    """TEMPLATES with a last-resort loader serving the stand-in pages."""
+    templates = []
+    for engine in settings.TEMPLATES:
+        engine = dict(engine, OPTIONS=dict(engine.get('OPTIONS', {})))
+        if engine['BACKEND'].endswith('DjangoTemplates'):
+            loaders = ['django.template.loaders.filesystem.Loader']
+            if engine.pop('APP_DIRS', False):
+                loaders.append('django.template.loaders.app_directories.Loader')
+            engine['APP_DIRS'] = False
+            engine['OPTIONS']['loaders'] = loaders + [('django.template.loaders.locmem.Loader', stand_ins)]
+        templates.append(engine)
+    return templates
+
+
+def _pick_course():
+    """The course with the most students (and an instructor)."""
+    course = (
+        Course.objects.filter(instructor__isnull=False)
+        .annotate(enrolled=Count('students'))
+        .order_by('-enrolled', 'course_code')
+        .first()
+    )
+    if course is None:
+        raise ValueError('No course with an instructor - seed data first (manage.py seed_population)')
+    return course
+
+
+def _measure(client, method, url, sensor_scans, repeats):
+    """Latency, queries and peak memory for one scenario."""
+    request = getattr(client, method)
+    latencies, queries = [], []
+
+    def send():
+        if sensor_scans is not None:
+            SimulatedSensor.scans = [random.choice(sensor_scans)]
+        return request(url)
+
+    # Warm-up (fills caches, compiles templates)
+    response = send()
+    if response.status_code >= 400:
+        return {'error': f'HTTP {response.status_code}'}
+    # The report view redirects to its background job's page
+    if response.status_code in (301, 302) and not response['Location'].startswith('/jobs/'):
+        return {'error': f'redirected to {response.get("Location")} (no access?)'}
+
+    for _ in range(repeats):
+        with CaptureQueriesContext(connection) as captured:
+            start = time.perf_counter()
+            send()
+            latencies.append((time.perf_counter() - start) * 1000)
+        queries.append(len(captured.captured_queries))
+
+    # Peak memory on a separate request (tracemalloc slows everything down)
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        send()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    latencies.sort()
+    return {
+        'p50_ms': round(percentile(latencies, 50), 3),
+        'p95_ms': round(percentile(latencies, 95), 3),
+        'queries': max(queries),
+        'peak_kb': round(peak / 1024, 1),
+    }
+
+
+def run_suite(repeats=20, only=None, seed=42):
+    """
+    Benchmark every scenario against the current database.
+
+    Args:
+        repeats: Timed requests per view
+        only: Optional list of scenario names
+        seed: Random seed for the scanned fingerprints
+
+    Returns:
+        dict: {'scale': {...}, 'results': {view: {...}}}
+    """
+    random.seed(seed)
+    course = _pick_course()
+    instructor = User.objects.get(pk=course.instructor_id)
+    stand_ins = _missing_templates()
+    templates = [template for _, template in lookup_cache.get_enrolled_templates()]
+
+    report = {'scale': current_scale(), 'course': course.course_code, 'results': {}}
+
+    try:
+        with tempfile.TemporaryDirectory() as artifacts, transaction.atomic(), \
+                mock.patch('fingerprint.views.R307', SimulatedSensor), override_settings(
+            TEMPLATES=_template_settings(stand_ins),
+            ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'],
+            # Background jobs (the report) run inside the timed request;
+            # later repeats are served from the report cache
+            JOBS_RUN_INLINE=True,
+            JOBS_ARTIFACT_DIR=artifacts,
+            REPORT_CACHE_DIR=artifacts,
+        ):
+            for name, method, url, who, template in SCENARIOS:
+                if only and name not in only:
+                    continue
+                client = Client()
+                if who == 'instructor':
+                    client.force_login(instructor)
+
+                result = _measure(
+                    client, method, url.format(course=course.course_code),
+                    templates if name.startswith('scan') else None, repeats,
+                )
+                if template in stand_ins:
+                    result['template'] = 'stand-in'
+                report['results'][name] = result
+            raise _Rollback()
+    except _Rollback:
+        pass
+
+    # Scans marked attendance inside the rolled-back transaction
+    lookup_cache.invalidate_rosters()
+    return report
+
+
+def compare(report, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    Regressions of a report against a baseline.
+
+    Args:
+        report: run_suite() result
+        baseline: Earlier run_suite() result
+        tolerance: Allowed relative growth of latency and memory
+
+    Returns:
+        list: Human-readable regression messages (empty = OK)
+
+    Raises:
+        ValueError: Data sets differ too much to compare
+    """
+    for key, expected in baseline.get('scale', {}).items():
+        actual = report['scale'].get(key, 0)
+        if abs(actual - expected) > max(1, expected * SCALE_TOLERANCE):
+            raise ValueError(
+                f'data set differs from the baseline ({key}: {actual} vs {expected}) - '
+                f'seed the same scale or save a new baseline'
+            )
+
+    regressions = []
+    for name, before in baseline.get('results', {}).items():
+        after = report['results'].get(name)
+        if after is None or 'error' in before:
+            continue
+        if 'error' in after:
+            regressions.append(f'{name}: {after["error"]}')
+            continue
+        if after['queries'] > before['queries']:
+            regressions.append(f'{name}: {after["queries"]} queries (baseline {before["queries"]})')
+        for metric in ('p50_ms', 'peak_kb'):
+            if after[metric] > before[metric] * (1 + tolerance):
+                regressions.append(
+                    f'{name}: {metric} {after[metric]} (baseline {before[metric]}, '
+                    f'+{(after[metric] / before[metric] - 1) * 100:.0f}%)'
+                )
+    return regressions
@@ -0,0 +1,324 @@
+"""
+============================================================
+PROJECT-WIDE CACHE LAYER
+============================================================
+Read-through cache helpers for small, rarely changing data
+that almost every request needs:
+
+- get_course(course_code)  -> Course (course pages, reports)
+- get_profile(user)        -> UserProfile (role checks)
+- get_all_courses()        -> list of Courses (registration form)
+- get_course_day_stats()   -> roster size + attendance count
+- get_enrolled_templates() -> fingerprint templates to match scans against
+
+Built on Django's cache framework (see CACHES in settings.py):
+local-memory by default, file-based for multi-process servers.
+
+Invalidation is signal-based (post_save/post_delete on Course,
+UserProfile and AttendanceLog - see users/signals.py and
+attendance/signals.py), so cached values are never stale. Bulk
+writes that send no signals (bulk_create, update()) call the
+invalidate_* helpers themselves.
+Misses always load from the primary database, also inside
+replica_reads() blocks (see replica.py). With campus sites
+(sharding.py) every key includes the current site, so one site's
+courses and rosters never answer another site's lookups.
+
+Hit/miss counters per helper are available from get_stats().
+============================================================
+"""
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .sharding import current_site
+
+
+# ========== CONFIGURATION ==========
+# How long cached lookups live (seconds) - invalidation keeps them fresh
+CACHE_TIMEOUT = getattr(settings, 'LOOKUP_CACHE_TIMEOUT', 15 * 60)
+
+# Key prefix for everything stored by this module
+KEY_PREFIX = 'lookup'
+
+# Stored in place of a profile for users that have none
+# (admins without a profile), so their role checks are cached too
+_MISSING = '__missing__'
+
+
+# ========== HIT/MISS COUNTERS ==========
+_stats = defaultdict(lambda: {'hits': 0, 'misses': 0})
+_stats_lock = threading.Lock()
+
+
+def _record(name, hit):
+    """Count a cache hit or miss for a helper."""
+    with _stats_lock:
+        _stats[name]['hits' if hit else 'misses'] += 1
+
+
+def get_stats():
+    """
+    Hit/miss counters for this process.
+
+    Returns:
+        dict: {helper_name: {'hits': int, 'misses': int, 'hit_rate': float}}
+    """
+    with _stats_lock:
+        return {
+            name: {
+                **counts,
+                'hit_rate': round(counts['hits'] / (counts['hits'] + counts['misses']) * 100, 1)
+                if counts['hits'] + counts['misses'] else 0.0,
+            }
+            for name, counts in _stats.items()
+        }
+
+
+def reset_stats():
+    """Reset the hit/miss counters."""
+    with _stats_lock:
+        _stats.clear()
+
+
+# ========== GENERATION COUNTERS ==========
+# Some cached values depend on many rows (e.g. the course list).
+# Instead of tracking every key, such keys embed a generation
+# number that is bumped on change, orphaning the old entries.
+
+def get_generation(name):
+    """
+    Current generation number for a group of keys.
+
+    Also usable as a cheap version number (e.g. in ETags) for
+    'courses', 'rosters', 'attendance' (any log written, edited or
+    deleted) and 'attendance:<course_id>' (one course's logs).
+    """
+    return cache.get_or_set(f'{KEY_PREFIX}:gen:{name}', 1, None)
+
+
+def _bump_generation(name):
+    """Invalidate every key of a group by bumping its generation."""
+    key = f'{KEY_PREFIX}:gen:{name}'
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Key expired or was evicted - start a new generation
+        cache.set(key, 2, None)
+
+
+# ========== READ-THROUGH HELPERS ==========
+
+def _prefix():
+    """KEY_PREFIX, plus the current site when campus sites are configured."""
+    site = current_site()
+    return f'{KEY_PREFIX}:{site}' if site else KEY_PREFIX
+
+
+def _profile_key(user_id):
+    """
+    Cache key for a user's profile.
+
+    Includes the course generation because deleting a course
+    clears UserProfile.course with a bulk update (no signals).
+    """
+    return f'{_prefix()}:profile:{get_generation("courses")}:{user_id}'
+
+
+def get_course(course_code):
+    """
+    Get a course by code (case-insensitive input, codes stored uppercase).
+
+    Args:
+        course_code: Course code, e.g. "cs101" or "CS101"
+
+    Returns:
+        Course: The course
+
+    Raises:
+        Course.DoesNotExist: If no course has this code
+    """
+    from users.models import Course
+    from .replica import primary
+
+    course_code = course_code.upper()
+    key = f'{_prefix()}:course:{get_generation("courses")}:{course_code}'
+
+    course = cache.get(key)
+    _record('course', course is not None)
+    if course is None:
+        with primary():
+            course = Course.objects.get(course_code=course_code)
+        cache.set(key, course, CACHE_TIMEOUT)
+
+    return course
+
+
+def get_all_courses():
+    """
+    Get all courses (ordered by course code).
+
+    Returns:
+        list: Course instances
+    """
+    from users.models import Course
+    from .replica import primary
+
+    key = f'{_prefix()}:courses:{get_generation("courses")}'
+
+    courses = cache.get(key)
+    _record('all_courses', courses is not None)
+    if courses is None:
+        with primary():
+            courses = list(Course.objects.all())
+        cache.set(key, courses, CACHE_TIMEOUT)
+
+    return courses
+
+
+def get_profile(user):
+    """
+    Get the UserProfile for a user (used for role checks).
+
+    Args:
+        user: Django User
+
+    Returns:
+        UserProfile: The user's profile
+
+    Raises:
+        UserProfile.DoesNotExist: If the user has no profile
+    """
+    from users.models import UserProfile
+    from .replica import primary
+
+    key = _profile_key(user.pk)
+
+    profile = cache.get(key)
+    _record('profile', profile is not None)
+    if profile is None:
+        try:
+            with primary():
+                profile = UserProfile.objects.get(user=user)
+        except UserProfile.DoesNotExist:
+            profile = _MISSING
+        cache.set(key, profile, CACHE_TIMEOUT)
+
+    if profile == _MISSING:
+        raise UserProfile.DoesNotExist('UserProfile matching query does not exist.')
+
+    return profile
+
+
+def get_course_day_stats(course, day):
+    """
+    Roster size and attendance count for a course on a given day.
+
+    Args:
+        course: Course instance
+        day: date
+
+    Returns:
+        dict: {'total_students': int, 'present': int}
+    """
+    from users.models import UserProfile
+    from attendance.models import AttendanceLog
+    from .replica import primary
+
+    key = f'{_prefix()}:stats:{get_generation("rosters")}:{course.pk}:{day.isoformat()}'
+
+    stats = cache.get(key)
+    _record('course_day_stats', stats is not None)
+    if stats is None:
+        with primary():
+            stats = {
+                'total_students': UserProfile.objects.filter(course=course, role='student').count(),
+                'present': AttendanceLog.objects.filter(course=course, date=day).count(),
+            }
+        cache.set(key, stats, CACHE_TIMEOUT)
+
+    return stats
+
+
+def get_enrolled_templates():
+    """
+    Fingerprint templates of all enrolled students.
+
+    Used to identify a scan without loading every profile per scan.
+
+    Returns:
+        list: (profile_id, template bytes) tuples
+    """
+    from users.models import UserProfile
+    from .replica import primary
+
+    key = f'{_prefix()}:templates:{get_generation("rosters")}'
+
+    templates = cache.get(key)
+    _record('enrolled_templates', templates is not None)
+    if templates is None:
+        with primary():
+            templates = [
+                (profile_id, bytes(template))
+                for profile_id, template in UserProfile.objects.filter(
+                    fingerprint_enrolled=True, role='student', fingerprint_template__isnull=False
+                ).values_list('id', 'fingerprint_template')
+            ]
+        cache.set(key, templates, CACHE_TIMEOUT)
+
+    return templates
+
+
+# ========== INVALIDATION ==========
+# Called from post_save/post_delete signal handlers
+
+def invalidate_on_commit(func, *args, using=None):
+    """
+    Run an invalidate_* helper now and again once the transaction commits.
+
+    Now: later reads inside the same transaction see the change.
+    On commit: a concurrent request that cached the old rows while
+    the transaction was still open is dropped too.
+
+    Args:
+        func: Invalidation helper, e.g. invalidate_rosters
+        *args: Its arguments
+        using: Database alias the change was written to
+    """
+    func(*args)
+    transaction.on_commit(lambda: func(*args), using=using)
+
+
+def invalidate_courses():
+    """Drop every cached course lookup and the course list."""
+    _bump_generation('courses')
+
+
+def invalidate_profile(user_id):
+    """Drop the cached profile of a user."""
+    cache.delete(_profile_key(user_id))
+
+
+def invalidate_rosters():
+    """Drop every cached roster-dependent value (profile added/moved/enrolled/removed)."""
+    _bump_generation('rosters')
+
+
+def invalidate_attendance(course_id):
+    """
+    Log written, edited or deleted - bump the attendance generations.
+
+    Values derived from many logs (analytics, API ETags) embed these
+    instead of the latest log id alone, which an edit in place or the
+    deletion of an older log leaves unchanged.
+    """
+    _bump_generation('attendance')
+    _bump_generation(f'attendance:{course_id}')
+
+
+def invalidate_course_day_stats(course_id, day):
+    """Drop the cached stats for one course on one day."""
+    cache.delete(f'{_prefix()}:stats:{get_generation("rosters")}:{course_id}:{day.isoformat()}')
@@ -0,0 +1,132 @@
+"""
+============================================================
+FILE DOWNLOADS (ETAG, RANGE, GZIP)
+============================================================
+Serves stored files (cached reports, job artifacts) the way
+browsers and download managers expect:
+
+- ETag / If-None-Match: a client that has the file gets a
+  304 Not Modified instead of the body
+- Range / If-Range: one byte range per request (206 Partial
+  Content), so interrupted downloads resume
+- Content-Encoding: files stored gzipped go out as they are to
+  clients that accept gzip and are decompressed for the rest
+
+    return serve_file(request, path, 'report.csv', 'text/csv', etag=key, encoding='gzip')
+============================================================
+"""
+import gzip
+import re
+
+from django.http import FileResponse, HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import content_disposition_header, quote_etag
+
+
+# Same test as django.middleware.gzip.GZipMiddleware
+ACCEPTS_GZIP = re.compile(r'\bgzip\b')
+
+RANGE_HEADER = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def parse_range(header, size):
+    """
+    Byte range requested by a Range header.
+
+    Args:
+        header: Range header value
+        size: Length of the file
+
+    Returns:
+        tuple: (first, last) byte positions, inclusive
+        None: Header missing, malformed or several ranges (send the whole file)
+
+    Raises:
+        ValueError: If the range lies outside the file (416)
+    """
+    match = RANGE_HEADER.match(header.replace(' ', '')) if header else None
+    if not match or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if not first:
+        # bytes=-500: the last 500 bytes
+        suffix = int(last)
+        if suffix == 0 or size == 0:
+            raise ValueError('empty suffix range')
+        return max(0, size - suffix), size - 1
+    first = int(first)
+    last = size - 1 if not last else min(int(last), size - 1)
+    if first > last:
+        raise ValueError('range starts after the end')
+    return first, last
+
+
+def serve_file(request, path, filename, content_type, etag, encoding=None):
+    """
+    Download response for a stored file.
+
+    Args:
+        request: HttpRequest
+        path: File on disk
+        filename: Download name
+        content_type: MIME type of the (decoded) file
+        etag: Version of the file (unquoted)
+        encoding: 'gzip' if the file is stored gzip-compressed
+
+    Returns:
+        HttpResponse: 200, 206, 304 or 416
+    """
+    send_encoded = encoding is not None and ACCEPTS_GZIP.search(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+    # The encoded and decoded files are different representations
+    etag = quote_etag(f'{etag}-{encoding}' if send_encoded else etag)
+
+    not_modified = get_conditional_response(request, etag=etag)
+    if not_modified is not None:
+        return _finish(not_modified, etag, encoding, send_encoded)
+
+    if encoding is not None and not send_encoded:
+        with gzip.open(path, 'rb') as file:
+            body = file.read()
+        size = len(body)
+    else:
+        body = None
+        size = path.stat().st_size
+
+    byte_range = None
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if if_range is None or if_range == etag:
+        try:
+            byte_range = parse_range(request.META.get('HTTP_RANGE'), size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return _finish(response, etag, encoding, send_encoded)
+
+    if byte_range is not None:
+        first, last = byte_range
+        if body is None:
+            with open(path, 'rb') as file:
+                file.seek(first)
+                chunk = file.read(last - first + 1)
+        else:
+            chunk = body[first:last + 1]
+        response = HttpResponse(chunk, status=206, content_type=content_type)
+        response['Content-Range'] = f'bytes {first}-{last}/{size}'
+        response['Content-Disposition'] = content_disposition_header(True, filename)
+    elif body is None:
+        response = FileResponse(open(path, 'rb'), as_attachment=True, filename=filename, content_type=content_type)
+    else:
+        response = HttpResponse(body, content_type=content_type)
+        response['Content-Disposition'] = content_disposition_header(True, filename)
+
+    return _finish(response, etag, encoding, send_encoded)
+
+
+def _finish(response, etag, encoding, send_encoded):
+    response['ETag'] = etag
+    response['Accept-Ranges'] = 'bytes'
+    if send_encoded:
+        response['Content-Encoding'] = encoding
+    if encoding is not None:
+        patch_vary_headers(response, ('Accept-Encoding',))
+    return response
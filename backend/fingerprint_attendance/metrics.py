@@ -0,0 +1,386 @@
+"""
+============================================================
+PER-REQUEST PERFORMANCE METRICS
+============================================================
+In-process histograms, exposed in Prometheus text format at
+/metrics (see views.metrics):
+
+    http_request_duration_seconds{view}   wall time per request
+    http_request_db_queries{view}         SQL queries per request
+    http_request_db_seconds{view}         time spent in SQL
+    http_response_size_bytes{view}        response body size
+    http_requests_total{view,method,status}
+    span_duration_seconds{span}           named spans, e.g. the scan
+                                          path's capture/match/write
+    lookup_cache_requests_total{helper,result}
+
+Other modules add their own metrics with register() (e.g. the
+R307 driver's sensor telemetry, fingerprint/telemetry.py).
+
+MetricsMiddleware records a request only when it is sampled
+(settings.METRICS_SAMPLE_RATE, 0.0-1.0). Unsampled requests
+cost one random() call; spans outside a sampled request are a
+no-op. Counts are therefore of sampled requests - divide by
+metrics_sample_rate to estimate totals.
+
+Histograms live in each server process: with several workers,
+every scrape sees only the worker that answered it.
+
+Usage (views):
+    from fingerprint_attendance.metrics import span
+
+    with span('match'):
+        profile = identify(r307, scan)
+============================================================
+"""
+import random
+import re
+import threading
+import time
+from bisect import bisect_left
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+
+from . import cache as lookup_cache
+
+
+# ========== BUCKETS ==========
+SECONDS_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200, 500)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+# Label for requests that did not resolve to a view (404s)
+UNRESOLVED = '<unresolved>'
+
+# True while the current request is being recorded (spans check it)
+_recording = ContextVar('metrics_recording', default=False)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """
+    Thread-safe histogram with fixed buckets, one series per label set.
+
+    Args:
+        name: Metric name
+        help_text: # HELP line
+        buckets: Sorted upper bounds (+Inf is implicit)
+        labels: Label names, given as keyword arguments to observe()
+    """
+
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, buckets, labels=()):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(buckets)
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(name, '') for name in self.labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # [per-bucket counts (last = +Inf), sum]
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0]
+            series[0][index] += 1
+            series[1] += value
+
+    def snapshot(self):
+        """{label values: (per-bucket counts, sum)}"""
+        with self._lock:
+            return {key: (list(counts), total) for key, (counts, total) in self._series.items()}
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+    def render(self):
+        lines = []
+        for key, (counts, total) in sorted(self.snapshot().items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), counts):
+                cumulative += count
+                le = f'le="{bound if bound == "+Inf" else _number(bound)}"'
+                lines.append(f'{self.name}_bucket{_labels(self.labels, key, le)} {cumulative}')
+            lines.append(f'{self.name}_sum{_labels(self.labels, key)} {_number(total)}')
+            lines.append(f'{self.name}_count{_labels(self.labels, key)} {cumulative}')
+        return lines
+
+
+class Counter:
+    """Thread-safe counter, one series per label set."""
+
+    kind = 'counter'
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(name, '') for name in self.labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + amount
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._series)
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+    def render(self):
+        return [
+            f'{self.name}{_labels(self.labels, key)} {_number(value)}'
+            for key, value in sorted(self.snapshot().items())
+        ]
+
+
+# ========== METRICS ==========
+REQUEST_SECONDS = Histogram(
+    'http_request_duration_seconds', 'Wall time per request (sampled)', SECONDS_BUCKETS, ['view'])
+REQUEST_QUERIES = Histogram(
+    'http_request_db_queries', 'SQL queries per request (sampled)', QUERY_BUCKETS, ['view'])
+REQUEST_DB_SECONDS = Histogram(
+    'http_request_db_seconds', 'Time spent in SQL per request (sampled)', SECONDS_BUCKETS, ['view'])
+RESPONSE_BYTES = Histogram(
+    'http_response_size_bytes', 'Response body size (sampled, streaming responses excluded)',
+    SIZE_BUCKETS, ['view'])
+REQUESTS = Counter(
+    'http_requests_total', 'Requests by view, method and status (sampled)', ['view', 'method', 'status'])
+SPAN_SECONDS = Histogram(
+    'span_duration_seconds', 'Named timing spans inside sampled requests', SECONDS_BUCKETS, ['span'])
+
+REGISTRY = [REQUEST_SECONDS, REQUEST_QUERIES, REQUEST_DB_SECONDS, RESPONSE_BYTES, REQUESTS, SPAN_SECONDS]
+
+
+def register(metric):
+    """Export a Histogram/Counter at /metrics; returns it."""
+    if all(existing.name != metric.name for existing in REGISTRY):
+        REGISTRY.append(metric)
+    return metric
+
+
+def sample_rate():
+    return float(getattr(settings, 'METRICS_SAMPLE_RATE', 1.0))
+
+
+def reset():
+    """Clear every metric (tests)."""
+    for metric in REGISTRY:
+        metric.reset()
+
+
+@contextmanager
+def span(name):
+    """Time a block as span_duration_seconds{span=name} (only in sampled requests)."""
+    if not _recording.get():
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        SPAN_SECONDS.observe(time.perf_counter() - start, span=name)
+
+
+def render():
+    """
+    Every metric in Prometheus text exposition format (version 0.0.4).
+
+    Returns:
+        str
+    """
+    lines = []
+    for metric in REGISTRY:
+        lines.append(f'# HELP {metric.name} {metric.help_text}')
+        lines.append(f'# TYPE {metric.name} {metric.kind}')
+        lines.extend(metric.render())
+
+    lines.append('# HELP lookup_cache_requests_total Lookup cache hits and misses (see cache.get_stats)')
+    lines.append('# TYPE lookup_cache_requests_total counter')
+    for helper, stats in sorted(lookup_cache.get_stats().items()):
+        for result, key in (('hit', 'hits'), ('miss', 'misses')):
+            labels = _labels(('helper', 'result'), (helper, result))
+            lines.append(f'lookup_cache_requests_total{labels} {stats[key]}')
+
+    lines.append('# HELP metrics_sample_rate Fraction of requests recorded')
+    lines.append('# TYPE metrics_sample_rate gauge')
+    lines.append(f'metrics_sample_rate {_number(sample_rate())}')
+    return '\n'.join(lines) + '\n'
+
+
+_SAMPLE_LINE = re.compile(r'^([a-zA-Z_:][\w:]*)(?:\{(.*)\})?\s+(\S+)$')
+_LABEL = re.compile(r'(\w+)="((?:[^"\\]|\\.)*)"')
+
+
+def parse(text):
+    """
+    Read Prometheus text format back (e.g. a scrape of another process).
+
+    Returns:
+        list: [(name, {label: value}, float)]
+    """
+    samples = []
+    for line in text.splitlines():
+        match = _SAMPLE_LINE.match(line.strip())
+        if not match or line.startswith('#'):
+            continue
+        name, labels, value = match.groups()
+        labels = {
+            key: raw.replace('\\n', '\n').replace('\\"', '"').replace('\\\\', '\\')
+            for key, raw in _LABEL.findall(labels or '')
+        }
+        samples.append((name, labels, float(value)))
+    return samples
+
+
+def histogram_quantile(q, buckets):
+    """
+    Estimate a quantile from cumulative buckets (as Prometheus does).
+
+    Args:
+        q: Quantile, 0-1
+        buckets: [(upper bound, cumulative count)] - +Inf as float('inf')
+
+    Returns:
+        float: Estimated value, or None without observations
+    """
+    buckets = sorted(buckets)
+    if not buckets or buckets[-1][1] == 0:
+        return None
+    rank = q * buckets[-1][1]
+    lower, below = 0.0, 0.0
+    for bound, count in buckets:
+        if count >= rank:
+            if bound == float('inf'):
+                return lower
+            if count == below:
+                return bound
+            return lower + (bound - lower) * (rank - below) / (count - below)
+        lower, below = bound, count
+    return lower
+
+
+class _QueryTimer:
+    """execute_wrapper that counts and times SQL queries."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += time.perf_counter() - start
+
+
+class MetricsMiddleware:
+    """
+    Record wall time, SQL queries/time and response size per view.
+
+    Put it first in MIDDLEWARE so the time includes every other
+    middleware. Turned off by METRICS_ENABLED = False.
+
+    Works both under WSGI and ASGI; under ASGI the request is not
+    pushed onto a thread, so async views (e.g. the SSE stream) keep
+    running on the event loop. A streaming response is timed until
+    its headers are ready, not until the stream ends.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not _sampled():
+            return self.get_response(request)
+
+        timer = _QueryTimer()
+        token = _recording.set(True)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                _watch_queries(stack, timer)
+                response = self.get_response(request)
+        finally:
+            _recording.reset(token)
+        _observe(request, response, time.perf_counter() - start, timer)
+        return response
+
+    async def __acall__(self, request):
+        if not _sampled():
+            return await self.get_response(request)
+
+        timer = _QueryTimer()
+        token = _recording.set(True)
+        start = time.perf_counter()
+        # Connections are per thread: hook the ones of the thread the
+        # request's sync code (views, ORM calls) runs in
+        stack = ExitStack()
+        await sync_to_async(_watch_queries)(stack, timer)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+            _recording.reset(token)
+        _observe(request, response, time.perf_counter() - start, timer)
+        return response
+
+
+def _sampled():
+    return settings.METRICS_ENABLED and random.random() < sample_rate()
+
+
+def _watch_queries(stack, timer):
+    for connection in connections.all():
+        stack.enter_context(connection.execute_wrapper(timer))
+
+
+def _observe(request, response, elapsed, timer):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        view = UNRESOLVED
+    else:
+        # URL name, or the URL pattern for unnamed routes
+        view = match.view_name if match.url_name else match.route
+    REQUEST_SECONDS.observe(elapsed, view=view)
+    REQUEST_QUERIES.observe(timer.count, view=view)
+    REQUEST_DB_SECONDS.observe(timer.seconds, view=view)
+    if not response.streaming:
+        RESPONSE_BYTES.observe(len(response.content), view=view)
+    REQUESTS.inc(view=view, method=request.method, status=response.status_code)
@@ -0,0 +1,215 @@
+"""
+============================================================
+READ REPLICA ROUTING
+============================================================
+Reports and dashboards read from DATABASES['replica'] so their
+heavy queries never compete with check-in writes on the primary.
+
+The replica is either:
+- a SQLite snapshot of the primary, refreshed periodically:
+      DATABASE_REPLICA=/var/lib/attendance/replica.sqlite3
+      python manage.py snapshot_replica --every 60
+- a second database kept up to date by the database itself
+  (e.g. a PostgreSQL streaming replica):
+      DATABASE_REPLICA_ENGINE=django.db.backends.postgresql
+      DATABASE_REPLICA=attendance DATABASE_REPLICA_HOST=replica-host ...
+
+Only code inside replica_reads() reads from the replica:
+
+    @login_required
+    @replica_reads()
+    def attendance_report(request, course_code): ...
+
+Put it below @login_required: the session and user are then
+loaded from the primary (auth/session tables always are).
+
+Staleness: on entry, replica_reads() checks how far behind the
+replica is (cached for LAG_CHECK_INTERVAL seconds). If it is more
+than max_lag (settings.REPLICA_MAX_LAG) behind, or unreachable,
+the whole block reads from the primary instead - one block never
+mixes the two. Critical reads inside a replica block (access
+checks, anything written next) use primary(); the lookup cache
+(cache.py) always loads from the primary, so replica data never
+ends up in shared cached values.
+
+Writes always go to the primary.
+
+Exported at /metrics as replica_reads_total{result}:
+    replica      read from the replica
+    stale        fell back: replica too far behind
+    unavailable  fell back: replica missing or unreachable
+============================================================
+"""
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+from . import metrics
+
+
+PRIMARY = DEFAULT_DB_ALIAS
+REPLICA = 'replica'
+
+# Seconds a replica lag measurement is reused
+LAG_CHECK_INTERVAL = 5
+
+# Apps whose reads never go to the replica (logins, sessions, permissions)
+PRIMARY_APPS = {'auth', 'sessions', 'contenttypes', 'admin'}
+
+REPLICA_READS = metrics.register(metrics.Counter(
+    'replica_reads_total', 'Replica read blocks by outcome (replica, stale, unavailable)', ['result']))
+
+# Alias the current block reads from (None = Django's default routing)
+_read_alias = ContextVar('replica_read_alias', default=None)
+
+_lag_lock = threading.Lock()
+_lag_checked = {'at': None, 'lag': None}
+
+
+def replica_configured():
+    return REPLICA in settings.DATABASES
+
+
+def _measure_lag():
+    """Seconds the replica is behind the primary; None if unusable."""
+    connection = connections[REPLICA]
+    try:
+        if connection.vendor == 'sqlite':
+            # snapshot_replica stamps the file with the snapshot time
+            return max(0.0, time.time() - os.path.getmtime(connection.settings_dict['NAME']))
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'SELECT CASE WHEN NOT pg_is_in_recovery() '
+                    '            OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 '
+                    '       ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END'
+                )
+                lag = cursor.fetchone()[0]
+            return float(lag) if lag is not None else None
+        return 0.0
+    except (OSError, DatabaseError):
+        return None
+
+
+def replica_lag():
+    """
+    How far behind the replica is (cached for LAG_CHECK_INTERVAL).
+
+    Returns:
+        float: Seconds, or None if there is no usable replica
+    """
+    if not replica_configured():
+        return None
+    now = time.monotonic()
+    with _lag_lock:
+        if _lag_checked['at'] is not None and now - _lag_checked['at'] < LAG_CHECK_INTERVAL:
+            return _lag_checked['lag']
+    lag = _measure_lag()
+    with _lag_lock:
+        _lag_checked.update(at=now, lag=lag)
+    return lag
+
+
+def reset_lag():
+    """Forget the cached lag measurement (tests, after a snapshot)."""
+    with _lag_lock:
+        _lag_checked.update(at=None, lag=None)
+
+
+def snapshot_sqlite(path, using=PRIMARY):
+    """
+    Copy a SQLite primary to path as a consistent snapshot.
+
+    Written next to path and renamed over it, so readers see either
+    the old or the new snapshot. The file's mtime is set to when the
+    copy started - that is what replica_lag() measures.
+
+    Returns:
+        float: Seconds the copy took
+    """
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        raise ValueError('Snapshots copy a SQLite primary - replicate other databases with their own tools')
+    started = time.time()
+    connection.ensure_connection()
+    temporary = f'{path}.tmp'
+    target = sqlite3.connect(temporary)
+    try:
+        connection.connection.backup(target)
+        # Readers of the snapshot must not need -wal/-shm files
+        target.execute('PRAGMA journal_mode=DELETE')
+    finally:
+        target.close()
+    os.utime(temporary, (started, started))
+    os.replace(temporary, path)
+    reset_lag()
+    return time.time() - started
+
+
+@contextmanager
+def replica_reads(max_lag=None):
+    """
+    Read from the replica inside the block (also usable as a decorator).
+
+    Args:
+        max_lag: Most seconds behind the primary the block accepts
+                 (default: settings.REPLICA_MAX_LAG)
+    """
+    alias = PRIMARY
+    if replica_configured():
+        if max_lag is None:
+            max_lag = settings.REPLICA_MAX_LAG
+        lag = replica_lag()
+        if lag is None:
+            REPLICA_READS.inc(result='unavailable')
+        elif lag > max_lag:
+            REPLICA_READS.inc(result='stale')
+        else:
+            REPLICA_READS.inc(result='replica')
+            alias = REPLICA
+
+    token = _read_alias.set(alias)
+    try:
+        yield alias
+    finally:
+        _read_alias.reset(token)
+
+
+@contextmanager
+def primary():
+    """Read from the primary inside the block, even within replica_reads()."""
+    token = _read_alias.set(PRIMARY)
+    try:
+        yield PRIMARY
+    finally:
+        _read_alias.reset(token)
+
+
+class ReplicaRouter:
+    """
+    settings.DATABASE_ROUTERS entry: reads inside replica_reads() go to
+    the replica, everything else to the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        alias = _read_alias.get()
+        if alias == REPLICA and model._meta.app_label in PRIMARY_APPS:
+            return PRIMARY
+        return alias
+
+    def db_for_write(self, model, **hints):
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both databases hold the same rows
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica gets its schema from the primary
+        return db != REPLICA
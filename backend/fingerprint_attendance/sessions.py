@@ -0,0 +1,27 @@
+"""
+============================================================
+SESSION BACKEND - WRITES THROUGH THE WRITER QUEUE
+============================================================
+Database sessions whose saves and deletes (login, messages
+framework) go through writer.run() like the attendance writes,
+so they never compete with kiosks for the SQLite write lock.
+Sessions always live in the default database, also inside a
+campus site (sharding.py).
+
+    SESSION_ENGINE = 'fingerprint_attendance.sessions'
+    (set by DATABASE_PROFILE=production)
+============================================================
+"""
+from django.contrib.sessions.backends.db import SessionStore as DatabaseSessionStore
+from django.db import DEFAULT_DB_ALIAS
+
+from . import writer
+
+
+class SessionStore(DatabaseSessionStore):
+
+    def save(self, must_create=False):
+        writer.run(super().save, must_create, using=DEFAULT_DB_ALIAS)
+
+    def delete(self, session_key=None):
+        writer.run(super().delete, session_key, using=DEFAULT_DB_ALIAS)
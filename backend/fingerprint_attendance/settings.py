@@ -12,6 +12,8 @@ Date: November 2025
 ============================================================
 """
 
+import json
+import os
 from pathlib import Path
 
 # ========== PROJECT DIRECTORY SETUP ==========
@@ -46,17 +48,22 @@ INSTALLED_APPS = [
     'users',        # User profile management
     'fingerprint',  # Fingerprint enrollment and scanning
     'attendance',   # Attendance logging
+    'firestore_sync',  # Django <-> Firestore sync engine
+    'devices',      # ESP32 device API
+    'jobs',         # Background jobs (reports, syncs, maintenance)
 ]
 
 
 # ========== MIDDLEWARE CONFIGURATION ==========
 # Middleware processes requests/responses (security, sessions, auth, etc.)
 MIDDLEWARE = [
+    'fingerprint_attendance.metrics.MetricsMiddleware',   # Per-view timings for /metrics (keep first)
     'django.middleware.security.SecurityMiddleware',       # Security enhancements
     'django.contrib.sessions.middleware.SessionMiddleware', # Session handling
     'django.middleware.common.CommonMiddleware',           # Common utilities
     'django.middleware.csrf.CsrfViewMiddleware',          # CSRF protection
     'django.contrib.auth.middleware.AuthenticationMiddleware', # User authentication
+    'fingerprint_attendance.sharding.SiteMiddleware',          # Campus site of the request
     'django.contrib.messages.middleware.MessageMiddleware',    # Flash messages
     'django.middleware.clickjacking.XFrameOptionsMiddleware',  # Clickjacking protection
 ]
@@ -94,9 +101,99 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Migrations are generated locally (makemigrations), so tests
+        # build their tables straight from the models
+        'TEST': {'MIGRATE': False},
     }
 }
 
+# SQLite production profile (see fingerprint_attendance/sqlite.py):
+# DATABASE_PROFILE=production enables WAL and tuned PRAGMAs, BEGIN
+# IMMEDIATE transactions and one writer thread for attendance, scan
+# and session writes. Compare with: python manage.py benchmark_sqlite
+DATABASE_PROFILE = os.environ.get('DATABASE_PROFILE', 'default')
+SQLITE_PRAGMAS = {}
+SQLITE_WRITE_QUEUE = False
+if DATABASE_PROFILE == 'production':
+    from .sqlite import PRODUCTION_PRAGMAS
+    SQLITE_PRAGMAS = PRODUCTION_PRAGMAS
+    SQLITE_WRITE_QUEUE = True
+    DATABASES['default']['OPTIONS'] = {'transaction_mode': 'IMMEDIATE'}
+    SESSION_ENGINE = 'fingerprint_attendance.sessions'
+
+# Read replica for reports and dashboards (see fingerprint_attendance/replica.py).
+# DATABASE_REPLICA is the replica's NAME: a SQLite snapshot file kept fresh
+# by `manage.py snapshot_replica --every 60`, or e.g. a PostgreSQL
+# streaming replica with DATABASE_REPLICA_ENGINE/HOST/PORT/USER/PASSWORD.
+if os.environ.get('DATABASE_REPLICA'):
+    DATABASES['replica'] = {
+        'ENGINE': os.environ.get('DATABASE_REPLICA_ENGINE', 'django.db.backends.sqlite3'),
+        'NAME': os.environ['DATABASE_REPLICA'],
+        'HOST': os.environ.get('DATABASE_REPLICA_HOST', ''),
+        'PORT': os.environ.get('DATABASE_REPLICA_PORT', ''),
+        'USER': os.environ.get('DATABASE_REPLICA_USER', ''),
+        'PASSWORD': os.environ.get('DATABASE_REPLICA_PASSWORD', ''),
+        'TEST': {'MIRROR': 'default'},
+    }
+
+# Campus sites (see fingerprint_attendance/sharding.py): SITES_CONFIG
+# names a JSON file mapping each site to its database and the course
+# code / device id prefixes it owns. Each site's courses, rosters and
+# attendance live in DATABASES['site_<name>']. Split an existing
+# database with: python manage.py split_sites
+SITES = {}
+if os.environ.get('SITES_CONFIG'):
+    with open(os.environ['SITES_CONFIG']) as sites_file:
+        SITES = json.load(sites_file)
+    for site_name, site in SITES.items():
+        DATABASES[f'site_{site_name}'] = {
+            'ENGINE': site.get('engine', 'django.db.backends.sqlite3'),
+            'NAME': site['database'],
+            'HOST': site.get('host', ''),
+            'PORT': site.get('port', ''),
+            'USER': site.get('user', ''),
+            'PASSWORD': site.get('password', ''),
+            'OPTIONS': dict(DATABASES['default'].get('OPTIONS', {})),
+            'TEST': {'MIGRATE': False},
+        }
+# Site for requests nothing else assigns (default: the first site)
+SITE_DEFAULT = os.environ.get('SITE_DEFAULT') or None
+
+DATABASE_ROUTERS = [
+    'fingerprint_attendance.sharding.SiteRouter',
+    'fingerprint_attendance.replica.ReplicaRouter',
+]
+
+# Seconds behind the primary a replica may be before reports fall back
+# to the primary
+REPLICA_MAX_LAG = int(os.environ.get('REPLICA_MAX_LAG', '300'))
+
+
+# ========== CACHE CONFIGURATION ==========
+# Used by the lookup cache (fingerprint_attendance/cache.py) and analytics.
+# Local-memory cache is per process - fine for runserver or a single worker.
+# For multi-process servers (gunicorn/uvicorn workers) set
+# DJANGO_CACHE_BACKEND=file so all workers share one cache and see
+# each other's signal-based invalidations.
+if os.environ.get('DJANGO_CACHE_BACKEND') == 'file':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ.get('DJANGO_CACHE_LOCATION', str(BASE_DIR / '.django_cache')),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'fingerprint-attendance',
+        }
+    }
+
+# How long cached course/profile lookups live (seconds).
+# Signal-based invalidation keeps them fresh before they expire.
+LOOKUP_CACHE_TIMEOUT = 15 * 60
+
 
 # ========== PASSWORD VALIDATION ==========
 # Password security validators to ensure strong passwords
@@ -144,6 +241,67 @@ LOGOUT_REDIRECT_URL = '/'
 LOGIN_URL = '/admin/login/'  # Use Django admin login page
 
 
+# ========== ATTENDANCE ANALYTICS ==========
+# Students below this attendance percentage are listed as "at risk"
+ANALYTICS_AT_RISK_THRESHOLD = 75.0
+
+# How long computed course analytics stay cached (seconds).
+# Results are also keyed by the latest attendance log id, so new
+# attendance always produces fresh analytics.
+ANALYTICS_CACHE_TIMEOUT = 60 * 60
+
+
+# ========== METRICS ==========
+# Per-request timings, SQL queries and response sizes, served in
+# Prometheus text format at /metrics (fingerprint_attendance/metrics.py)
+METRICS_ENABLED = True
+
+# Fraction of requests recorded (0.0-1.0) - turn down on busy servers
+METRICS_SAMPLE_RATE = float(os.environ.get('METRICS_SAMPLE_RATE', '1.0'))
+
+# Bearer token required to scrape /metrics. Empty = refused unless DEBUG is on.
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
+
+# ========== VIEW BENCHMARKS ==========
+# Baseline compared by `python manage.py benchmark_views`
+# (written with --save-baseline after seeding with seed_population)
+BENCHMARK_BASELINE = os.path.join(BASE_DIR, 'benchmarks', 'baseline.json')
+
+
+# ========== KIOSK MODE ==========
+# Also save a FingerprintScan audit record for every kiosk API scan.
+# Off by default so a kiosk scan does at most one database write.
+KIOSK_AUDIT_SCANS = False
+
+# Load testing only (python manage.py loadtest_scans): scan requests
+# carrying an X-Emulated-Finger header are read from an emulated R307.
+# NEVER enable in production - anyone could mark attendance for anyone.
+R307_EMULATION = os.environ.get('R307_EMULATION') == '1'
+
+
+# ========== ESP32 DEVICE API ==========
+# Device keys: DEVICE_API_KEYS="lab1:secret1,lab2:secret2"
+# (sent as the X-Device-Key header). Empty = devices are refused unless DEBUG is on.
+DEVICE_API_KEYS = dict(
+    pair.split(':', 1) for pair in os.environ.get('DEVICE_API_KEYS', '').split(',') if ':' in pair
+)
+
+# Sensor matches below this confidence are rejected
+DEVICE_MIN_CONFIDENCE = 50
+
+# Device timestamps further in the future than this (seconds) are
+# treated as an unsynchronized clock and replaced by server time
+DEVICE_MAX_CLOCK_SKEW = 5 * 60
+
+# How long the fingerprint id -> student directory stays cached (seconds)
+DEVICE_DIRECTORY_TIMEOUT = 5 * 60
+
+# Courses served by each device, e.g. {'lab1': ['CS101', 'CS201']}.
+# Devices not listed get the directory for every course.
+DEVICE_COURSES = {}
+
+
 # ========== FIREBASE CONFIGURATION ==========
 # Firebase Firestore Database Configuration
 # Get these credentials from Firebase Console: https://console.firebase.google.com
@@ -178,3 +336,41 @@ FIREBASE_CONFIG = {
 # Firestore Database Name (default is '(default)')
 FIRESTORE_DATABASE = '(default)'
 
+
+# ========== FIRESTORE SYNC ==========
+# Checkpoint file for the incremental sync (python manage.py sync_firestore)
+FIRESTORE_SYNC_CHECKPOINT = os.path.join(BASE_DIR, '.firestore_sync_checkpoint.json')
+
+# Firestore writes per batch (Firestore maximum: 500)
+FIRESTORE_SYNC_BATCH_SIZE = 500
+
+# ========== BACKGROUND JOBS ==========
+# Database-backed job queue (jobs/queue.py) - run the worker with
+# `python manage.py run_jobs`. Files jobs produce (reports) go here:
+JOBS_ARTIFACT_DIR = os.environ.get('JOBS_ARTIFACT_DIR', os.path.join(BASE_DIR, 'job_artifacts'))
+
+# Run jobs inside the request that queues them (development without a worker).
+# On by default with DEBUG; set JOBS_RUN_INLINE=0 to test with a real worker.
+# With DEBUG off, jobs wait until `python manage.py run_jobs` picks them up.
+JOBS_RUN_INLINE = os.environ.get('JOBS_RUN_INLINE', '1' if DEBUG else '0') == '1'
+
+# Management commands the maintenance.command task may run
+JOBS_COMMANDS = ['clearsessions', 'compact_summary', 'rebuild_summary', 'snapshot_replica', 'site_report']
+
+# Finished jobs (and their files) kept this many days by the jobs.cleanup task
+JOBS_KEEP_DAYS = 7
+
+# ========== REPORT CACHE ==========
+# Built attendance reports, reused until the course's attendance
+# changes (attendance/report_cache.py). Least recently used files
+# are deleted once the directory grows past REPORT_CACHE_MAX_BYTES.
+REPORT_CACHE_DIR = os.environ.get('REPORT_CACHE_DIR', os.path.join(BASE_DIR, 'report_cache'))
+REPORT_CACHE_MAX_BYTES = int(os.environ.get('REPORT_CACHE_MAX_BYTES', 256 * 1024 * 1024))
+
+# ========== DOCUMENT STORE ==========
+# Backend for the Firestore collections used by the scripts and sync:
+#   'firestore' - Cloud Firestore (needs firebase-credentials.json)
+#   'sqlite'    - local file, works offline (DOCSTORE_SQLITE_PATH)
+#   'memory'    - in-process only (tests, benchmarks)
+DOCSTORE_BACKEND = os.environ.get('DOCSTORE_BACKEND', 'firestore')
+DOCSTORE_SQLITE_PATH = os.environ.get('DOCSTORE_SQLITE_PATH', os.path.join(BASE_DIR, 'docstore.sqlite3'))
@@ -0,0 +1,490 @@
+"""
+============================================================
+CAMPUS SITES (SHARDING)
+============================================================
+Each campus site keeps its own courses, rosters and attendance
+history in its own database, so one building's changeover burst
+only queues behind that building's writes and each database
+only holds that campus's rows.
+
+Sites come from a JSON file named by SITES_CONFIG (settings.py):
+
+    {
+      "north": {"number": 1, "database": "/var/lib/attendance/north.sqlite3",
+                "courses": ["N", "ENG"], "devices": ["north-"]},
+      "south": {"number": 2, "database": "/var/lib/attendance/south.sqlite3",
+                "courses": ["S", "MED"], "devices": ["south-"]}
+    }
+
+Each site becomes DATABASES['site_<name>']. Without SITES_CONFIG
+there are no sites and everything stays in 'default'.
+
+What lives where:
+- site database: Course, UserProfile, AttendanceLog, FingerprintScan
+  (SHARDED_MODELS), plus a copy of the users they reference
+  (foreign keys need the row; copies get an unusable password)
+- default database: users and logins, sessions, admin - shared by
+  every site
+
+Which site a request works on (SiteMiddleware), first match wins:
+1. the course in the URL (course_code) - by course code prefix
+2. ?site= / X-Site, e.g. a campus's registration page
+3. ?device= / X-Device-Id - the kiosk's device id prefix
+   (open the kiosk page as /fingerprint/kiosk/?device=north-kiosk-1)
+4. the logged-in user's home site (the site holding their profile)
+5. settings.SITE_DEFAULT (default: the first site)
+
+Code outside a request picks a site explicitly:
+
+    with site_scope('north'):
+        Course.objects.filter(...)
+
+Outside any site scope the sharded models use 'default' (single
+database setups, the database split_sites reads from).
+
+Cross-site queries (admin views, reports) run once per site in
+parallel and merge the results:
+
+    per_site = fan_out(lambda site: AttendanceLog.objects.filter(date=day).count())
+    total = sum(per_site.values())
+
+Ids stay unique across sites: each site numbers new rows from
+number * SITE_ID_BLOCK (split_sites --reserve-ids), so ids can
+keep being used as cache and event keys.
+
+Split an existing single database into the sites:
+    python manage.py split_sites --dry-run
+    python manage.py split_sites
+============================================================
+"""
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+# ========== CONFIGURATION ==========
+# Models stored in the site databases: (app_label, model_name)
+SHARDED_MODELS = {
+    ('users', 'course'),
+    ('users', 'userprofile'),
+    ('attendance', 'attendancelog'),
+    ('fingerprint', 'fingerprintscan'),
+}
+
+# Ids per site: site number N numbers new rows from N * SITE_ID_BLOCK
+SITE_ID_BLOCK = 10 ** 12
+
+# How long a user's home site is cached (seconds)
+HOME_SITE_TIMEOUT = 60 * 60
+
+ALIAS_PREFIX = 'site_'
+
+# Site the current block works on (None = no site: 'default')
+_site = ContextVar('site', default=None)
+
+
+class SiteError(ValueError):
+    """Unknown site or invalid site configuration."""
+
+
+# ========== SITE LOOKUPS ==========
+
+def sites():
+    """Configured sites: {name: {'number', 'database', 'courses', 'devices'}}."""
+    return getattr(settings, 'SITES', {})
+
+
+def sharding_enabled():
+    return bool(sites())
+
+
+def site_alias(site):
+    """Database alias of a site, e.g. 'north' -> 'site_north'."""
+    if site not in sites():
+        raise SiteError(f'Unknown site: {site!r}')
+    return f'{ALIAS_PREFIX}{site}'
+
+
+def site_of_alias(alias):
+    """Site a database alias belongs to (None for non-site aliases)."""
+    if alias and alias.startswith(ALIAS_PREFIX) and alias[len(ALIAS_PREFIX):] in sites():
+        return alias[len(ALIAS_PREFIX):]
+    return None
+
+
+def default_site():
+    """Site used when nothing else picks one (None without sites)."""
+    configured = sites()
+    if not configured:
+        return None
+    site = getattr(settings, 'SITE_DEFAULT', None) or next(iter(configured))
+    if site not in configured:
+        raise SiteError(f'SITE_DEFAULT {site!r} is not a configured site')
+    return site
+
+
+def _match(value, field):
+    """Site whose longest prefix in sites()[site][field] starts value."""
+    value = (value or '').upper()
+    best, best_length = None, -1
+    for site, config in sites().items():
+        for prefix in config.get(field, []):
+            if value.startswith(prefix.upper()) and len(prefix) > best_length:
+                best, best_length = site, len(prefix)
+    return best
+
+
+def site_for_course(course_code):
+    """Site a course belongs to, from its code (default site if no prefix matches)."""
+    return _match(course_code, 'courses') or default_site()
+
+
+def site_for_device(device_id):
+    """Site a kiosk/device belongs to, from its id (default site if no prefix matches)."""
+    return _match(device_id, 'devices') or default_site()
+
+
+def current_site():
+    """Site of the current block (None outside any site scope)."""
+    return _site.get()
+
+
+def current_alias():
+    """Database alias the sharded models use in the current block."""
+    site = _site.get()
+    return site_alias(site) if site else DEFAULT_DB_ALIAS
+
+
+@contextmanager
+def site_scope(site):
+    """
+    Work on one site's database inside the block (also usable as a decorator).
+
+    Args:
+        site: Site name (None = no site, sharded models use 'default')
+
+    Raises:
+        SiteError: If the site is not configured
+    """
+    if site is not None:
+        site_alias(site)
+    token = _site.set(site)
+    try:
+        yield site
+    finally:
+        _site.reset(token)
+
+
+def _home_site_key(user_id):
+    return f'site:home:{user_id}'
+
+
+def home_site(user):
+    """
+    Site holding a user's profile (or the courses they teach).
+
+    Looked up on every site once, then cached.
+
+    Returns:
+        str: Site name (default site if no site knows the user)
+    """
+    from users.models import Course, UserProfile
+
+    key = _home_site_key(user.pk)
+    site = cache.get(key)
+    if site in sites():
+        return site
+
+    known = fan_out(lambda site: (
+        UserProfile.objects.filter(user_id=user.pk).exists()
+        or Course.objects.filter(instructor_id=user.pk).exists()
+    ))
+    site = next((site for site, found in known.items() if found), default_site())
+    cache.set(key, site, HOME_SITE_TIMEOUT)
+    return site
+
+
+def forget_home_site(user_id):
+    """Drop a user's cached home site (profile created or moved)."""
+    cache.delete(_home_site_key(user_id))
+
+
+# ========== CROSS-SITE QUERIES ==========
+
+def fan_out(func, only=None, max_workers=None):
+    """
+    Run func(site) on every site in parallel, each inside site_scope(site).
+
+    Without configured sites, runs func(None) once, inline.
+
+    Args:
+        func: Callable taking the site name
+        only: Site names (default: all sites)
+        max_workers: Threads (default: one per site)
+
+    Returns:
+        dict: {site: func's result}, in site order
+
+    Raises:
+        The first site's exception, after every site has finished
+    """
+    names = list(only if only is not None else sites())
+    if not names:
+        return {None: func(None)}
+
+    def call(site):
+        try:
+            with site_scope(site):
+                return func(site)
+        finally:
+            # Worker threads open their own connections - don't leak them
+            for connection in connections.all(initialized_only=True):
+                connection.close()
+
+    with ThreadPoolExecutor(max_workers=max_workers or len(names), thread_name_prefix='site') as pool:
+        # Each site gets a copy of the caller's context (replica_reads() etc.)
+        futures = {site: pool.submit(contextvars.copy_context().run, call, site) for site in names}
+    return {site: future.result() for site, future in futures.items()}
+
+
+def merge_lists(results, key=None, reverse=False, limit=None):
+    """
+    Merge fan_out() results that are lists into one list.
+
+    Args:
+        results: {site: list}
+        key: Sort key (default: keep site order)
+        reverse: Sort descending
+        limit: Keep only the first rows
+
+    Returns:
+        list: Merged rows
+    """
+    rows = [row for site_rows in results.values() for row in site_rows]
+    if key is not None:
+        rows.sort(key=key, reverse=reverse)
+    return rows[:limit] if limit is not None else rows
+
+
+def merge_counts(results):
+    """
+    Merge fan_out() results that are {name: number} dicts by summing them.
+
+    Returns:
+        dict: {name: total over all sites}
+    """
+    totals = {}
+    for counts in results.values():
+        for name, value in counts.items():
+            totals[name] = totals.get(name, 0) + value
+    return totals
+
+
+# ========== SITE DATABASES ==========
+
+def mirror_users(user_ids, alias):
+    """
+    Copy users into a site database so its rows can reference them.
+
+    Copies keep the user's id and names but get an unusable
+    password - logins always use the default database.
+
+    Returns:
+        int: Users copied (already present ones are skipped)
+    """
+    from django.contrib.auth.models import User
+
+    user_ids = {user_id for user_id in user_ids if user_id is not None}
+    if not user_ids:
+        return 0
+    present = set(User.objects.using(alias).filter(pk__in=user_ids).values_list('pk', flat=True))
+    missing = list(User.objects.using(DEFAULT_DB_ALIAS).filter(pk__in=user_ids - present))
+    for user in missing:
+        user.password = '!'
+        user.last_login = None
+    User.objects.using(alias).bulk_create(missing, ignore_conflicts=True)
+    return len(missing)
+
+
+def create_schema(site):
+    """
+    Give a site database the full schema: migrate it, then create the
+    tables of apps whose migrations are not generated yet (tests, a
+    fresh checkout - makemigrations runs locally).
+
+    Returns:
+        list: Tables created outside migrations
+    """
+    from django.apps import apps
+    from django.core.management import call_command
+
+    alias = site_alias(site)
+    call_command('migrate', database=alias, interactive=False, verbosity=0)
+    connection = connections[alias]
+    existing = set(connection.introspection.table_names())
+    created = []
+    with connection.schema_editor() as editor:
+        for model in apps.get_models():
+            if model._meta.managed and not model._meta.proxy and model._meta.db_table not in existing:
+                editor.create_model(model)
+                created.append(model._meta.db_table)
+    return created
+
+
+def reserve_ids(site):
+    """
+    Make a site number new sharded rows from number * SITE_ID_BLOCK.
+
+    Returns:
+        int: First id of the site's block
+    """
+    from django.apps import apps
+
+    config = sites()[site]
+    start = int(config['number']) * SITE_ID_BLOCK
+    connection = connections[site_alias(site)]
+    tables = [apps.get_model(app_label, model_name)._meta.db_table for app_label, model_name in SHARDED_MODELS]
+    with connection.cursor() as cursor:
+        for table in tables:
+            if connection.vendor == 'sqlite':
+                cursor.execute('DELETE FROM sqlite_sequence WHERE name = %s', [table])
+                cursor.execute(
+                    f'INSERT INTO sqlite_sequence (name, seq) '
+                    f'SELECT %s, MAX(COALESCE(MAX(id), 0), %s) FROM {connection.ops.quote_name(table)}',
+                    [table, start - 1],
+                )
+            elif connection.vendor == 'postgresql':
+                cursor.execute(
+                    f'SELECT setval(pg_get_serial_sequence(%s, %s), '
+                    f'GREATEST((SELECT COALESCE(MAX(id), 0) FROM {connection.ops.quote_name(table)}), %s))',
+                    [table, 'id', start - 1],
+                )
+            else:
+                raise SiteError(f'Cannot reserve ids on {connection.vendor} - set the sequences by hand')
+    return start
+
+
+# ========== ROUTING ==========
+
+def _sharded(model):
+    return (model._meta.app_label, model._meta.model_name) in SHARDED_MODELS
+
+
+class SiteRouter:
+    """
+    settings.DATABASE_ROUTERS entry (before ReplicaRouter): sharded
+    models go to the current site's database; everything else (and
+    sharded models outside a site scope) is left to the next router.
+    """
+
+    def _alias(self, model, hints):
+        if not _sharded(model):
+            return None
+        site = _site.get()
+        if site:
+            return site_alias(site)
+        # Related lookups from a row loaded on a site stay on that site
+        instance = hints.get('instance')
+        if instance is not None and site_of_alias(instance._state.db):
+            return instance._state.db
+        return None
+
+    def db_for_read(self, model, **hints):
+        return self._alias(model, hints)
+
+    def db_for_write(self, model, **hints):
+        return self._alias(model, hints)
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Users exist in 'default' and, with the same id, in the site databases
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Site databases get the full schema (users are copied into them)
+        return None
+
+
+class SiteMiddleware:
+    """
+    Run each view inside site_scope() of the request's site (see the
+    module docstring for how it is chosen). Goes after
+    AuthenticationMiddleware. Sets request.site.
+
+    Works both under WSGI and ASGI, so async views are not pushed
+    onto a thread. Under ASGI the site is looked up in a thread (it
+    may read the user's home site from the database) and only when
+    sharding is enabled.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+            # Django awaits a coroutine process_view as it is; a sync one
+            # would run in a copied context and the site would not stick
+            self.process_view = self._process_view_async
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        request.site = None
+        try:
+            return self.get_response(request)
+        finally:
+            _leave_site(request)
+
+    async def __acall__(self, request):
+        request.site = None
+        try:
+            return await self.get_response(request)
+        finally:
+            _leave_site(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if not sharding_enabled():
+            return None
+        request.site = request_site(request, view_kwargs)
+        request._site_token = _site.set(request.site)
+        return None
+
+    async def _process_view_async(self, request, view_func, view_args, view_kwargs):
+        if not sharding_enabled():
+            return None
+        request.site = await sync_to_async(request_site)(request, view_kwargs)
+        request._site_token = _site.set(request.site)
+        return None
+
+
+def _leave_site(request):
+    token = getattr(request, '_site_token', None)
+    if token is not None:
+        _site.reset(token)
+
+
+def request_site(request, view_kwargs=None):
+    """Site a request works on (see the module docstring)."""
+    course_code = (view_kwargs or {}).get('course_code')
+    if course_code:
+        return site_for_course(course_code)
+
+    site = request.GET.get('site') or request.headers.get('X-Site')
+    if site in sites():
+        return site
+
+    device = request.GET.get('device') or request.headers.get('X-Device-Id')
+    if device:
+        return site_for_device(device)
+
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return home_site(user)
+    return default_site()
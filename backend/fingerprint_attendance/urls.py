@@ -12,11 +12,21 @@ URL Structure:
 - /profile/                  -> Student profile
 - /admin/                    -> Django admin panel
 - /fingerprint/scan/         -> Scan fingerprint for attendance (NO LOGIN)
+- /fingerprint/kiosk/        -> Kiosk scan page (NO LOGIN)
+- /fingerprint/api/scan/     -> Kiosk JSON scan API (NO LOGIN)
 - /fingerprint/enroll-own/   -> Student enrolls own fingerprint
 - /fingerprint/enroll/       -> Instructor enrolls student fingerprint
 - /attendance/dashboard/     -> Instructor dashboard
 - /attendance/course/<code>/ -> View course attendance
 - /attendance/report/<code>/ -> Download attendance report
+- /attendance/analytics/<code>/ -> Attendance analytics dashboard
+- /attendance/api/...        -> Read-only JSON API (logs, courses, rosters)
+- /attendance/events/<code>/ -> Live attendance feed (Server-Sent Events)
+- /devices/api/mark/         -> ESP32 single-request attendance marking
+- /devices/api/mark/batch/   -> ESP32 offline scan queue upload
+- /devices/api/directory/    -> Fingerprint directory snapshot/delta for devices
+- /jobs/<id>/                -> Background job progress (status/, download/)
+- /metrics                   -> Prometheus request metrics
 - /reports/generate/         -> Download all attendance data
 ============================================================
 """
@@ -39,6 +49,14 @@ urlpatterns = [
     
     # Attendance module - instructor dashboard and viewing
     path('attendance/', include('attendance.urls')),
+    
+    # ESP32 device API
+    path('devices/', include('devices.urls')),
+
+    # Background jobs - progress, status and downloads
+    path('jobs/', include('jobs.urls')),
+    
+    path('metrics', views.metrics, name='metrics'),
 ]
 
 
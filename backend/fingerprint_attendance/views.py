@@ -5,7 +5,14 @@ MAIN APPLICATION VIEWS
 Views for the main application pages.
 ============================================================
 """
+import hmac
+
+from django.conf import settings
+from django.http import HttpResponse
 from django.shortcuts import render
+from django.views.decorators.http import require_GET
+
+from . import metrics as request_metrics
 
 def home(request):
     """
@@ -18,4 +25,26 @@ def home(request):
         Rendered home.html template
     """
     return render(request, 'home.html')
- 
\ No newline at end of file
+
+
+@require_GET
+def metrics(request):
+    """
+    Prometheus scrape endpoint (per-process request metrics).
+    
+    URL: /metrics
+    Method: GET
+    Auth: "Authorization: Bearer <METRICS_TOKEN>" (no token configured
+          = open in DEBUG only)
+    
+    Returns:
+        Prometheus text exposition format
+    """
+    token = settings.METRICS_TOKEN
+    if not token and not settings.DEBUG:
+        return HttpResponse('Forbidden: METRICS_TOKEN is not set\n', status=403, content_type='text/plain')
+    if token:
+        provided = request.headers.get('Authorization', '').removeprefix('Bearer ')
+        if not hmac.compare_digest(token, provided):
+            return HttpResponse('Unauthorized\n', status=401, content_type='text/plain')
+    return HttpResponse(request_metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
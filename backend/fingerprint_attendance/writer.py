@@ -0,0 +1,172 @@
+"""
+============================================================
+SINGLE-WRITER QUEUE (GROUP COMMIT)
+============================================================
+SQLite allows one writer at a time. Instead of every request
+thread fighting for the write lock (and waiting on
+busy_timeout), hot writes are handed to one writer thread:
+
+    log, created = writer.run(_mark_attendance, profile)
+
+The writer takes whatever is queued (up to MAX_BATCH jobs),
+runs each job in its own savepoint inside ONE transaction and
+commits once - a burst of kiosk scans costs one commit instead
+of one per scan. The caller blocks until its write is committed
+and gets the job's return value (or its exception).
+
+run() executes the job inline, as before, when:
+- settings.SQLITE_WRITE_QUEUE is off (default; tests)
+- the caller is inside a transaction (its job must see - and be
+  rolled back with - the caller's uncommitted rows)
+- the caller is the writer thread itself
+
+Jobs run on the writer's own connection: pass ids / instances,
+never querysets bound to the caller's transaction.
+
+There is one writer per database: run() queues on the current
+campus site's database (sharding.py) unless told otherwise
+(using=), and the job runs in a copy of the caller's context, so
+it writes to the same site.
+============================================================
+"""
+import contextvars
+import queue
+import threading
+from concurrent.futures import Future
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+from .sharding import current_alias
+
+
+# ========== CONFIGURATION ==========
+# Most jobs committed together
+MAX_BATCH = 64
+
+# Seconds a caller waits for its write before giving up
+WRITE_TIMEOUT = 30
+
+
+class WriteQueue:
+    """
+    One writer thread for a database alias.
+
+    Args:
+        alias: Database alias the jobs write to
+        max_batch: Most jobs per commit
+    """
+
+    def __init__(self, alias=DEFAULT_DB_ALIAS, max_batch=MAX_BATCH):
+        self.alias = alias
+        self.max_batch = max_batch
+        self.commits = 0
+        self.jobs = 0
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def thread(self):
+        return self._thread
+
+    def submit(self, func, *args, **kwargs):
+        """Queue a job; returns a Future with its result."""
+        future = Future()
+        self._queue.put((future, func, args, kwargs))
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._loop, name=f'db-writer-{self.alias}', daemon=True)
+                    self._thread.start()
+        return future
+
+    def stop(self):
+        """Finish queued jobs, stop the thread and close its connection."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join()
+
+    def _loop(self):
+        connection = connections[self.alias]
+        try:
+            while True:
+                job = self._queue.get()
+                if job is None:
+                    return
+                batch = [job]
+                while len(batch) < self.max_batch:
+                    try:
+                        job = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if job is None:
+                        self._queue.put(None)
+                        break
+                    batch.append(job)
+                connection.close_if_unusable_or_obsolete()
+                self._commit(batch)
+        finally:
+            connection.close()
+
+    def _commit(self, batch):
+        """Run a batch in one transaction, a savepoint per job."""
+        jobs = [job for job in batch if job[0].set_running_or_notify_cancel()]
+        outcomes = []
+        try:
+            with transaction.atomic(using=self.alias):
+                for future, func, args, kwargs in jobs:
+                    try:
+                        with transaction.atomic(using=self.alias):
+                            outcomes.append((future, func(*args, **kwargs), None))
+                    except Exception as e:
+                        outcomes.append((future, None, e))
+        except Exception as e:
+            # The commit itself failed - none of the batch was written
+            for future, *_ in jobs:
+                future.set_exception(e)
+            return
+
+        self.commits += 1
+        self.jobs += len(jobs)
+        for future, result, error in outcomes:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+
+_writer = WriteQueue()
+_writers = {DEFAULT_DB_ALIAS: _writer}
+_writers_lock = threading.Lock()
+
+
+def _writer_for(alias):
+    """The writer of a database alias (created on first use)."""
+    writer = _writers.get(alias)
+    if writer is None:
+        with _writers_lock:
+            writer = _writers.setdefault(alias, WriteQueue(alias))
+    return writer
+
+
+def run(func, *args, using=None, **kwargs):
+    """
+    Run a write job through the writer thread (see module docstring).
+
+    Args:
+        using: Database alias the job writes to
+               (default: the current site's database)
+
+    Returns:
+        The job's return value (its exception is re-raised)
+    """
+    writer = _writer_for(using or current_alias())
+    if (not getattr(settings, 'SQLITE_WRITE_QUEUE', False)
+            or connections[writer.alias].in_atomic_block
+            or threading.current_thread() is writer.thread):
+        return func(*args, **kwargs)
+    context = contextvars.copy_context()
+    return writer.submit(context.run, func, *args, **kwargs).result(timeout=WRITE_TIMEOUT)
@@ -0,0 +1,525 @@
+"""
+============================================================
+DJANGO <-> FIRESTORE SYNC ENGINE
+============================================================
+Replicates changes in both directions between the Django
+database and Firestore:
+
+    Django                      Firestore
+    ------                      ---------
+    Course         <------->    courses/{course_code}
+    UserProfile    <------->    students/{student_id}
+    AttendanceLog  <------->    attendance/{studentID_date_courseCode}
+
+Each run only moves deltas, found by change cursors:
+- Django:    updated_at (Course, UserProfile, AttendanceLog)
+- Firestore: 'updated_at' (courses, students), 'received_at' (attendance)
+Attendance uses the server-assigned 'received_at', not the scan's
+'timestamp': a device uploading its offline queue late writes
+check-ins timestamped before the last run.
+The cursors are saved in a checkpoint after every successful run.
+The first run (no checkpoint) compares everything.
+
+Conflicts (same record changed on both sides since the last run)
+are resolved deterministically:
+- courses/students: the most recent change wins, Django on ties
+- attendance: the earliest check-in wins, Django on ties
+
+Firestore writes go out in batches of up to 500 operations;
+documents that already hold the same values are not rewritten.
+Values written to the other side keep their original change time,
+so a synced record is not echoed back as a new change.
+
+Pushed students and new check-ins also update the dashboard
+counters (summary/students, summary/{date}).
+
+Firestore is reached through the docstore layer, so the engine
+runs unchanged against the sqlite/memory backends.
+
+Usage:
+    engine = SyncEngine(get_store(), JsonFileCheckpoint(path))
+    report = engine.run()
+============================================================
+"""
+import json
+from collections import defaultdict
+from datetime import date, datetime, time, timezone as dt_timezone
+from pathlib import Path
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+
+from attendance import report_cache
+from attendance.models import AttendanceLog
+from devices.directory import invalidate_directory
+from docstore import MAX_BATCH_SIZE, SummaryRepository, attendance_doc_id, student_course_changes
+from fingerprint_attendance import cache as lookup_cache
+from users.models import Course, UserProfile
+
+
+# ========== CONFIGURATION ==========
+# Firestore field used as change cursor, per collection
+# (must be set by the server when the document is written)
+FIRESTORE_CURSOR_FIELDS = {
+    'courses': 'updated_at',
+    'students': 'updated_at',
+    'attendance': 'received_at',
+}
+
+# Firestore field holding the change time compared in conflicts
+FIRESTORE_CHANGED_FIELDS = {
+    'courses': 'updated_at',
+    'students': 'updated_at',
+    'attendance': 'timestamp',
+}
+
+# Fields compared to decide whether a record actually changed
+COURSE_FIELDS = ['course_code', 'course_name', 'description']
+STUDENT_FIELDS = ['student_id', 'full_name', 'email', 'course_code', 'fingerprint_enrolled']
+ATTENDANCE_FIELDS = ['student_id', 'student_name', 'course_code', 'date', 'time', 'status', 'scan_method']
+
+COLLECTIONS = ['courses', 'students', 'attendance']
+
+
+# ========== CHECKPOINTS ==========
+
+class MemoryCheckpoint:
+    """Checkpoint kept in memory (tests, one-off runs)."""
+
+    def __init__(self, state=None):
+        self.state = state or {}
+
+    def load(self):
+        return json.loads(json.dumps(self.state))
+
+    def save(self, state):
+        self.state = state
+
+
+class JsonFileCheckpoint:
+    """Checkpoint stored as a small JSON file."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+
+    def load(self):
+        if not self.path.exists():
+            return {}
+        return json.loads(self.path.read_text())
+
+    def save(self, state):
+        # Write then rename, so a crash never leaves a half-written checkpoint
+        temp_path = self.path.with_suffix('.tmp')
+        temp_path.write_text(json.dumps(state, indent=2, sort_keys=True))
+        temp_path.replace(self.path)
+
+
+class FreshCheckpoint(MemoryCheckpoint):
+    """Loads as empty, saves to the wrapped checkpoint (full sync)."""
+
+    def __init__(self, target):
+        super().__init__()
+        self._target = target
+
+    def save(self, state):
+        self._target.save(state)
+
+
+# ========== HELPERS ==========
+
+def _as_datetime(value):
+    """Convert a Firestore/ISO timestamp to an aware datetime (None if missing)."""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if timezone.is_naive(value):
+        value = value.replace(tzinfo=dt_timezone.utc)
+    return value
+
+
+def _cursor_to_json(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def _same(doc, other, fields):
+    """True if two documents agree on the compared fields."""
+    return all(doc.get(field) == other.get(field) for field in fields)
+
+
+def course_to_doc(course):
+    """Firestore document for a Course."""
+    doc = {
+        'course_code': course.course_code,
+        'course_name': course.course_name,
+        'description': course.description or '',
+        'updated_at': course.updated_at,
+    }
+    if course.instructor_id:
+        doc['instructor'] = course.instructor.get_full_name() or course.instructor.username
+    return doc
+
+
+def profile_to_doc(profile):
+    """Firestore document for a student UserProfile."""
+    return {
+        'student_id': profile.student_id,
+        'full_name': profile.full_name,
+        'email': profile.email,
+        'course_code': profile.course.course_code if profile.course_id else '',
+        'fingerprint_enrolled': profile.fingerprint_enrolled,
+        'updated_at': profile.updated_at,
+    }
+
+
+def log_to_doc(log):
+    """Firestore document for an AttendanceLog."""
+    return {
+        'student_id': log.student_id,
+        'student_name': log.student_name,
+        'course_code': log.course.course_code,
+        'date': log.date.isoformat(),
+        'time': log.time.strftime('%H:%M:%S'),
+        'timestamp': log.timestamp,
+        'status': log.status,
+        'scan_method': log.scan_method,
+    }
+
+
+class SyncReport:
+    """Counters and messages for one sync run."""
+
+    def __init__(self):
+        self.pushed = defaultdict(int)    # Django -> Firestore, per collection
+        self.pulled = defaultdict(int)    # Firestore -> Django, per collection
+        self.unchanged = 0                # Changed on both sides to the same value
+        self.conflicts = []               # (collection, key, winner)
+        self.errors = []                  # (collection, key, message)
+        self.batches = 0                  # Firestore batch commits
+
+    def as_dict(self):
+        return {
+            'pushed': dict(self.pushed),
+            'pulled': dict(self.pulled),
+            'unchanged': self.unchanged,
+            'conflicts': [list(conflict) for conflict in self.conflicts],
+            'errors': [list(error) for error in self.errors],
+            'batches': self.batches,
+        }
+
+
+# ========== SYNC ENGINE ==========
+
+class SyncEngine:
+    """
+    Bi-directional, incremental Django <-> Firestore sync.
+
+    Args:
+        store: DocumentStore holding the Firestore collections
+        checkpoint: Object with load() -> dict and save(dict)
+        batch_size: Firestore operations per batch (max 500)
+    """
+
+    FIELDS = {'courses': COURSE_FIELDS, 'students': STUDENT_FIELDS, 'attendance': ATTENDANCE_FIELDS}
+
+    def __init__(self, store, checkpoint, batch_size=MAX_BATCH_SIZE):
+        if not 1 <= batch_size <= MAX_BATCH_SIZE:
+            raise ValueError(f'batch_size must be between 1 and {MAX_BATCH_SIZE}')
+        self.store = store
+        self.checkpoint = checkpoint
+        self.batch_size = batch_size
+
+    def run(self, dry_run=False):
+        """
+        Run one sync pass.
+
+        Args:
+            dry_run: Compute and report changes without writing anything
+
+        Returns:
+            SyncReport: What was (or would be) moved
+        """
+        state = self.checkpoint.load()
+        django_cursor = state.get('django', {})
+        firestore_cursor = state.get('firestore', {})
+        report = SyncReport()
+
+        # 1. Collect deltas from both sides
+        django_changes, new_django_cursor = self._django_changes(django_cursor)
+        firestore_changes, new_firestore_cursor = self._firestore_changes(firestore_cursor)
+
+        # 2. Resolve conflicts, decide direction per record
+        to_push, to_pull = self._resolve(django_changes, firestore_changes, report)
+
+        if dry_run:
+            for collection, items in to_push.items():
+                report.pushed[collection] += len(items)
+            for collection, items in to_pull.items():
+                report.pulled[collection] += len(items)
+            return report
+
+        # 3. Apply (Firestore first - a failed Django write can be retried next run)
+        self._push(to_push, report)
+        self._pull(to_pull, report)
+
+        # 4. Checkpoint
+        self.checkpoint.save({
+            'django': new_django_cursor,
+            'firestore': new_firestore_cursor,
+            'last_run': timezone.now().isoformat(),
+        })
+
+        return report
+
+    # ---------- collect ----------
+
+    def _django_changes(self, cursor):
+        """Django records changed since the cursor: {collection: {key: (changed_at, doc)}}."""
+        changes = {collection: {} for collection in COLLECTIONS}
+        new_cursor = dict(cursor)
+
+        courses = Course.objects.select_related('instructor')
+        if cursor.get('courses'):
+            courses = courses.filter(updated_at__gt=_as_datetime(cursor['courses']))
+        for course in courses:
+            changes['courses'][course.course_code] = (course.updated_at, course_to_doc(course))
+
+        profiles = UserProfile.objects.filter(role='student', student_id__isnull=False).select_related('course')
+        if cursor.get('students'):
+            profiles = profiles.filter(updated_at__gt=_as_datetime(cursor['students']))
+        for profile in profiles:
+            changes['students'][profile.student_id] = (profile.updated_at, profile_to_doc(profile))
+
+        logs = AttendanceLog.objects.select_related('course')
+        # Older checkpoints hold the last log id instead - compare every log once
+        if isinstance(cursor.get('attendance'), str):
+            logs = logs.filter(updated_at__gt=_as_datetime(cursor['attendance']))
+        latest_edit = None
+        for log in logs:
+            key = attendance_doc_id(log.student_id, log.date, log.course.course_code)
+            # The check-in time decides conflicts, the edit time moves the cursor
+            changes['attendance'][key] = (log.timestamp, log_to_doc(log))
+            latest_edit = max(latest_edit or log.updated_at, log.updated_at)
+
+        for collection in ['courses', 'students']:
+            if changes[collection]:
+                latest = max(changed_at for changed_at, _ in changes[collection].values())
+                new_cursor[collection] = _cursor_to_json(latest)
+        if latest_edit:
+            new_cursor['attendance'] = _cursor_to_json(latest_edit)
+
+        return changes, new_cursor
+
+    def _firestore_changes(self, cursor):
+        """Firestore documents changed since the cursor: {collection: {doc_id: (changed_at, doc)}}."""
+        changes = {collection: {} for collection in COLLECTIONS}
+        new_cursor = dict(cursor)
+
+        for collection, field in FIRESTORE_CURSOR_FIELDS.items():
+            if cursor.get(collection):
+                documents = self.store.query(
+                    collection, [(field, '>', _as_datetime(cursor[collection]))], order_by=field
+                )
+            else:
+                documents = self.store.query(collection)
+
+            latest = _as_datetime(cursor.get(collection))
+            for document in documents:
+                doc = document.data
+                changed_at = _as_datetime(doc.get(FIRESTORE_CHANGED_FIELDS[collection])) or document.update_time
+                changes[collection][document.id] = (changed_at, doc)
+                if doc.get(field) is not None:
+                    value = _as_datetime(doc[field])
+                    latest = value if latest is None else max(latest, value)
+
+            if latest is not None:
+                new_cursor[collection] = _cursor_to_json(latest)
+
+        return changes, new_cursor
+
+    # ---------- resolve ----------
+
+    def _resolve(self, django_changes, firestore_changes, report):
+        """Split changes into pushes and pulls, resolving conflicts."""
+        to_push = {collection: {} for collection in COLLECTIONS}
+        to_pull = {collection: {} for collection in COLLECTIONS}
+
+        for collection in COLLECTIONS:
+            local = django_changes[collection]
+            remote = firestore_changes[collection]
+
+            for key in sorted(local.keys() | remote.keys()):
+                if key not in remote:
+                    to_push[collection][key] = local[key]
+                    continue
+                if key not in local:
+                    to_pull[collection][key] = remote[key]
+                    continue
+
+                (local_time, local_doc), (remote_time, remote_doc) = local[key], remote[key]
+                if _same(local_doc, remote_doc, self.FIELDS[collection]):
+                    report.unchanged += 1
+                    continue
+
+                if collection == 'attendance':
+                    # First check-in of the day is the real one
+                    django_wins = local_time <= remote_time
+                else:
+                    # Most recent edit wins
+                    django_wins = local_time >= remote_time
+
+                winner = 'django' if django_wins else 'firestore'
+                report.conflicts.append((collection, key, winner))
+                if django_wins:
+                    to_push[collection][key] = local[key]
+                else:
+                    to_pull[collection][key] = remote[key]
+
+        return to_push, to_pull
+
+    # ---------- apply: Django -> Firestore ----------
+
+    def _push(self, to_push, report):
+        summary = SummaryRepository(self.store)
+        with self.store.bulk_writer(self.batch_size) as writer:
+            for collection in COLLECTIONS:
+                # Skip records Firestore already has (e.g. rows that were just
+                # pulled from Firestore) - reads are cheaper than writes
+                current = self.store.get_many(collection, list(to_push[collection]))
+
+                written = []
+                for key, (_, doc) in to_push[collection].items():
+                    if key in current and _same(doc, current[key].data, self.FIELDS[collection]):
+                        report.unchanged += 1
+                        continue
+                    writer.set(collection, key, doc, merge=True)
+                    written.append((key, doc))
+                    report.pushed[collection] += 1
+
+                # Keep the dashboard counters (summary/...) in step
+                if collection == 'students':
+                    existing = {key: current[key].data for key, _ in written if key in current}
+                    summary.count_students(
+                        student_course_changes([doc for _, doc in written], existing), writer=writer
+                    )
+                elif collection == 'attendance':
+                    summary.count_check_ins([doc for key, doc in written if key not in current], writer=writer)
+        report.batches += writer.commits
+        if report.pushed.get('students'):
+            # Devices resolve fingerprints against the cached directory
+            invalidate_directory()
+
+    # ---------- apply: Firestore -> Django ----------
+
+    def _pull(self, to_pull, report):
+        handlers = [
+            ('courses', self._pull_course),
+            ('students', self._pull_student),
+            ('attendance', self._pull_attendance),
+        ]
+        for collection, handler in handlers:
+            for key, (changed_at, doc) in to_pull[collection].items():
+                try:
+                    with transaction.atomic():
+                        if handler(key, changed_at, doc):
+                            report.pulled[collection] += 1
+                        else:
+                            report.unchanged += 1
+                except Exception as e:
+                    report.errors.append((collection, key, str(e)))
+
+        # Bulk updates bypass signals - drop cached lookups once
+        if any(to_pull.values()):
+            lookup_cache.invalidate_courses()
+            lookup_cache.invalidate_rosters()
+
+    def _pull_course(self, course_code, changed_at, doc):
+        values = {
+            'course_name': doc.get('course_name') or course_code,
+            'description': doc.get('description') or '',
+        }
+        course = Course.objects.filter(course_code=course_code).first()
+        if course is None:
+            course = Course.objects.create(course_code=course_code, **values)
+        elif course.course_name == values['course_name'] and (course.description or '') == values['description']:
+            return False
+        # update() keeps the Firestore change time (auto_now would make it look like a new Django change)
+        Course.objects.filter(pk=course.pk).update(updated_at=changed_at, **values)
+        return True
+
+    def _pull_student(self, student_id, changed_at, doc):
+        if not doc.get('email'):
+            raise ValueError('student document has no email')
+
+        course = None
+        if doc.get('course_code'):
+            course = Course.objects.filter(course_code=doc['course_code']).first()
+            if course is None:
+                raise ValueError(f'unknown course {doc["course_code"]}')
+
+        values = {
+            'full_name': doc.get('full_name') or student_id,
+            'email': doc['email'],
+            'course_id': course.pk if course else None,
+            'fingerprint_enrolled': bool(doc.get('fingerprint_enrolled')),
+        }
+
+        profile = UserProfile.objects.filter(student_id=student_id).first()
+        if profile is None:
+            name_parts = values['full_name'].split()
+            user = User(
+                username=student_id,
+                email=values['email'],
+                first_name=name_parts[0] if name_parts else '',
+                last_name=' '.join(name_parts[1:]),
+            )
+            user.set_unusable_password()
+            user.save()
+            profile = UserProfile.objects.create(user=user, student_id=student_id, role='student', **values)
+        elif all(getattr(profile, field) == value for field, value in values.items()):
+            return False
+
+        UserProfile.objects.filter(pk=profile.pk).update(updated_at=changed_at, **values)
+        return True
+
+    def _pull_attendance(self, doc_id, changed_at, doc):
+        profile = UserProfile.objects.filter(student_id=doc.get('student_id')).first()
+        if profile is None:
+            raise ValueError(f'unknown student {doc.get("student_id")}')
+        course = Course.objects.filter(course_code=doc.get('course_code')).first()
+        if course is None:
+            raise ValueError(f'unknown course {doc.get("course_code")}')
+
+        log_date = date.fromisoformat(doc['date'])
+        values = {
+            'student_name': doc.get('student_name') or profile.full_name,
+            'student_id': profile.student_id,
+            'status': doc.get('status') or 'present',
+            'scan_method': doc.get('scan_method') or 'fingerprint',
+            'time': time.fromisoformat(doc['time']) if doc.get('time') else changed_at.time(),
+            'timestamp': changed_at,
+        }
+
+        log = AttendanceLog.objects.filter(user=profile.user, course=course, date=log_date).first()
+        if log is None:
+            # bulk_create: no post_save signals for historical records
+            log = AttendanceLog.objects.bulk_create([
+                AttendanceLog(user=profile.user, course=course, **values)
+            ])[0]
+        else:
+            # Compare like _resolve() does: the check-in time decides
+            # conflicts, so a matching status alone is not "unchanged"
+            log.course = course
+            if _same(log_to_doc(log), doc, ATTENDANCE_FIELDS):
+                return False
+            # An edit in place keeps the course's latest log id, which
+            # cached reports are keyed by - drop them once it commits
+            transaction.on_commit(lambda: report_cache.invalidate(course.pk))
+
+        # date/time/timestamp are auto_now_add - set the real values with update(),
+        # which also keeps updated_at from making the log look like a Django edit
+        AttendanceLog.objects.filter(pk=log.pk).update(date=log_date, updated_at=changed_at, **values)
+        lookup_cache.invalidate_on_commit(lookup_cache.invalidate_course_day_stats, course.pk, log_date)
+        lookup_cache.invalidate_on_commit(lookup_cache.invalidate_attendance, course.pk)
+        return True
@@ -0,0 +1,55 @@
+"""
+============================================================
+COMPACT DASHBOARD COUNTER SHARDS
+============================================================
+Check-ins are counted on sharded counters (see
+docstore/counters.py) so lecture-start bursts never queue up on
+one Firestore document. This folds the shards back into
+summary/{YYYY-MM-DD}, keeping dashboard reads small.
+
+Safe to run while devices are scanning - increments that
+arrive during compaction are kept. Schedule it every few
+minutes (cron, systemd timer).
+
+Usage:
+    python manage.py compact_summary              (today + yesterday)
+    python manage.py compact_summary --days 7
+============================================================
+"""
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from docstore import BACKENDS, StoreUnavailable, SummaryRepository, get_store
+
+
+class Command(BaseCommand):
+    help = 'Fold the dashboard counter shards into the daily summary documents'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=2,
+                            help='Days to compact, counting back from today (offline devices upload late)')
+        parser.add_argument('--store', choices=BACKENDS, default=None,
+                            help='Document store backend (default: settings.DOCSTORE_BACKEND)')
+
+    def handle(self, *args, **options):
+        if options['days'] < 1:
+            raise CommandError('--days must be at least 1')
+
+        try:
+            store = get_store(options['store'])
+        except StoreUnavailable as e:
+            raise CommandError(str(e))
+
+        summary = SummaryRepository(store)
+        today = timezone.localdate()
+        try:
+            for offset in range(options['days']):
+                day = today - timedelta(days=offset)
+                folded = summary.compact_day(day)
+                self.stdout.write(f'📅 {day.isoformat()}: {folded} shard(s) folded')
+        finally:
+            store.close()
+
+        self.stdout.write(self.style.SUCCESS('\n✅ Compaction complete'))
@@ -0,0 +1,62 @@
+"""
+============================================================
+REBUILD DASHBOARD SUMMARY COUNTERS
+============================================================
+Recounts the summary documents the dashboard reads
+(summary/students and summary/{YYYY-MM-DD}) from the students
+and attendance collections.
+
+The counters are normally kept up to date incrementally on
+every write; run this once after upgrading (to backfill) or
+after data was changed outside the app (e.g. in the Firebase
+console).
+
+Usage:
+    python manage.py rebuild_summary                    (today)
+    python manage.py rebuild_summary --date 2025-11-03
+    python manage.py rebuild_summary --days 7
+============================================================
+"""
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from docstore import BACKENDS, StoreUnavailable, SummaryRepository, get_store
+
+
+class Command(BaseCommand):
+    help = 'Recount the dashboard summary documents from the students and attendance collections'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help='Day to recount (YYYY-MM-DD, default: today)')
+        parser.add_argument('--days', type=int, default=1,
+                            help='Also recount the N-1 days before --date')
+        parser.add_argument('--store', choices=BACKENDS, default=None,
+                            help='Document store backend (default: settings.DOCSTORE_BACKEND)')
+
+    def handle(self, *args, **options):
+        try:
+            last_day = date.fromisoformat(options['date']) if options['date'] else timezone.localdate()
+        except ValueError:
+            raise CommandError(f'Invalid --date: {options["date"]} (expected YYYY-MM-DD)')
+        if options['days'] < 1:
+            raise CommandError('--days must be at least 1')
+
+        try:
+            store = get_store(options['store'])
+        except StoreUnavailable as e:
+            raise CommandError(str(e))
+
+        summary = SummaryRepository(store)
+        try:
+            students = summary.rebuild_students()
+            self.stdout.write(f'👥 Students: {students["total"]} in {len(students["courses"])} course(s)')
+
+            for offset in range(options['days']):
+                day = summary.rebuild_day(last_day - timedelta(days=offset))
+                self.stdout.write(f'📅 {day["date"]}: {day["present"]} check-in(s)')
+        finally:
+            store.close()
+
+        self.stdout.write(self.style.SUCCESS('\n✅ Summary rebuilt'))
@@ -0,0 +1,77 @@
+"""
+============================================================
+SYNC DJANGO <-> FIRESTORE
+============================================================
+Runs one incremental, bi-directional sync pass (see
+firestore_sync/engine.py). Schedule it (cron, systemd timer)
+to keep both sides in step.
+
+Usage:
+    python manage.py sync_firestore
+    python manage.py sync_firestore --dry-run
+    python manage.py sync_firestore --full
+    python manage.py sync_firestore --store sqlite
+============================================================
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from docstore import BACKENDS, StoreUnavailable, get_store
+from firestore_sync.engine import FreshCheckpoint, JsonFileCheckpoint, SyncEngine
+
+
+class Command(BaseCommand):
+    help = 'Incremental bi-directional sync between Django and Firestore'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Show what would change without writing')
+        parser.add_argument('--full', action='store_true',
+                            help='Ignore the checkpoint and compare everything')
+        parser.add_argument('--checkpoint', default=settings.FIRESTORE_SYNC_CHECKPOINT,
+                            help='Checkpoint file')
+        parser.add_argument('--store', choices=BACKENDS, default=None,
+                            help='Document store backend (default: settings.DOCSTORE_BACKEND)')
+
+    def handle(self, *args, **options):
+        checkpoint = JsonFileCheckpoint(options['checkpoint'])
+        if options['full']:
+            # Start from scratch, but still save the new cursors at the end
+            checkpoint = FreshCheckpoint(checkpoint)
+
+        try:
+            store = get_store(options['store'])
+        except StoreUnavailable as e:
+            raise CommandError(str(e))
+
+        engine = SyncEngine(
+            store,
+            checkpoint,
+            batch_size=settings.FIRESTORE_SYNC_BATCH_SIZE,
+        )
+
+        self.stdout.write(
+            f'🔄 Syncing Django <-> {store.name}' + (' (dry run)' if options['dry_run'] else '')
+        )
+        try:
+            report = engine.run(dry_run=options['dry_run'])
+        finally:
+            store.close()
+
+        for collection in ['courses', 'students', 'attendance']:
+            self.stdout.write(
+                f'  {collection:<12} ⬆️  {report.pushed.get(collection, 0):>6} to Firestore   '
+                f'⬇️  {report.pulled.get(collection, 0):>6} to Django'
+            )
+        self.stdout.write(f'  Unchanged: {report.unchanged}   Batches: {report.batches}')
+
+        for collection, key, winner in report.conflicts:
+            self.stdout.write(self.style.WARNING(f'  ⚠️  Conflict {collection}/{key}: {winner} wins'))
+        for collection, key, message in report.errors:
+            self.stdout.write(self.style.ERROR(f'  ❌ {collection}/{key}: {message}'))
+
+        if report.errors:
+            self.stdout.write(self.style.WARNING(f'\n⚠️  Sync finished with {len(report.errors)} error(s)'))
+        else:
+            self.stdout.write(self.style.SUCCESS('\n✅ Sync complete'))
+
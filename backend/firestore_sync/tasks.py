@@ -0,0 +1,32 @@
+"""
+============================================================
+FIRESTORE SYNC BACKGROUND TASK
+============================================================
+The sync_firestore pass as a background job, e.g. queued from
+cron with `manage.py enqueue_job firestore.sync`.
+============================================================
+"""
+from django.conf import settings
+
+from docstore import get_store
+from jobs.queue import task
+
+from .engine import FreshCheckpoint, JsonFileCheckpoint, SyncEngine
+
+
+@task('firestore.sync')
+def sync_firestore(job, full=False, dry_run=False, store=None):
+    """One incremental Django <-> Firestore sync pass (see engine.py)."""
+    checkpoint = JsonFileCheckpoint(settings.FIRESTORE_SYNC_CHECKPOINT)
+    if full:
+        checkpoint = FreshCheckpoint(checkpoint)
+
+    document_store = get_store(store)
+    job.progress(0.1, f'Syncing with {document_store.name}')
+    try:
+        report = SyncEngine(document_store, checkpoint, batch_size=settings.FIRESTORE_SYNC_BATCH_SIZE).run(
+            dry_run=dry_run
+        )
+    finally:
+        document_store.close()
+    return report.as_dict()
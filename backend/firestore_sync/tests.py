@@ -0,0 +1,215 @@
+from datetime import date, time, timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+
+from attendance.models import AttendanceLog
+from devices.directory import resolve
+from devices.ingest import ingest_batch, ingest_scan
+from docstore import SERVER_TIMESTAMP, FingerprintMappingRepository, MemoryStore, attendance_doc_id
+from users.models import Course, UserProfile
+
+from .engine import MemoryCheckpoint, SyncEngine
+
+
+class SyncEngineTests(TestCase):
+
+    def setUp(self):
+        # Firestore edits happen "later" than anything created in the test
+        self.t0 = timezone.now().replace(microsecond=0) + timedelta(days=1)
+        self.now = self.t0
+        self.store = MemoryStore(clock=lambda: self.now)
+        self.checkpoint = MemoryCheckpoint()
+        self.engine = SyncEngine(self.store, self.checkpoint)
+
+        self.course = Course.objects.create(course_code='CS101', course_name='Intro to Programming')
+        self.profile = self._student('ST001', 'Alice Smith')
+
+    def _student(self, student_id, name, course=None):
+        user = User.objects.create(username=student_id)
+        return UserProfile.objects.create(
+            user=user, full_name=name, student_id=student_id,
+            email=f'{student_id.lower()}@example.com', course=course or self.course, role='student',
+        )
+
+    def _touch(self, model, pk, when):
+        model.objects.filter(pk=pk).update(updated_at=when)
+
+    def test_first_run_pushes_everything_then_nothing(self):
+        log = AttendanceLog.objects.create(
+            user=self.profile.user, student_name='Alice Smith', student_id='ST001', course=self.course,
+        )
+
+        report = self.engine.run()
+        self.assertEqual(report.pushed, {'courses': 1, 'students': 1, 'attendance': 1})
+
+        student = self.store.get('students', 'ST001').data
+        self.assertEqual(student['course_code'], 'CS101')
+        doc_id = attendance_doc_id('ST001', log.date, 'CS101')
+        self.assertIsNotNone(self.store.get('attendance', doc_id))
+
+        writes = self.store.stats['writes']
+        report = self.engine.run()
+        self.assertEqual(report.as_dict()['pushed'], {})
+        self.assertEqual(report.as_dict()['pulled'], {})
+        self.assertEqual(self.store.stats['writes'], writes)
+
+    def test_log_edited_after_the_push_is_pushed_again(self):
+        log = AttendanceLog.objects.create(
+            user=self.profile.user, student_name='Alice Smith', student_id='ST001', course=self.course,
+        )
+        self.engine.run()
+
+        log.status = 'absent'
+        log.save()
+
+        report = self.engine.run()
+        self.assertEqual(report.pushed, {'attendance': 1})
+        doc = self.store.get('attendance', attendance_doc_id('ST001', log.date, 'CS101')).data
+        self.assertEqual(doc['status'], 'absent')
+
+    def test_pulls_new_firestore_student_without_echo(self):
+        self.engine.run()
+
+        self.now = self.t0 + timedelta(hours=1)
+        self.store.set('students', 'ST002', {
+            'student_id': 'ST002', 'full_name': 'Bob Jones', 'email': 'bob@example.com',
+            'course_code': 'CS101', 'fingerprint_enrolled': False, 'updated_at': self.now,
+        })
+
+        report = self.engine.run()
+        self.assertEqual(report.pulled['students'], 1)
+        profile = UserProfile.objects.get(student_id='ST002')
+        self.assertEqual(profile.course, self.course)
+        self.assertEqual(profile.updated_at, self.now)
+
+        writes = self.store.stats['writes']
+        report = self.engine.run()
+        self.assertEqual(report.as_dict()['pushed'], {})
+        self.assertEqual(self.store.stats['writes'], writes)
+
+    def test_conflict_latest_edit_wins(self):
+        self.engine.run()
+
+        # Django edited at 10:00, Firestore at 11:00 -> Firestore wins
+        self.profile.full_name = 'Alice Django'
+        self.profile.save()
+        self._touch(UserProfile, self.profile.pk, self.t0 + timedelta(hours=1))
+        self.store.update('students', 'ST001', {
+            'full_name': 'Alice Firestore', 'updated_at': self.t0 + timedelta(hours=2),
+        })
+
+        report = self.engine.run()
+        self.assertEqual(report.conflicts, [('students', 'ST001', 'firestore')])
+        self.profile.refresh_from_db()
+        self.assertEqual(self.profile.full_name, 'Alice Firestore')
+
+        # Now Django is later -> Django wins
+        self.profile.full_name = 'Alice Again'
+        self.profile.save()
+        self._touch(UserProfile, self.profile.pk, self.t0 + timedelta(hours=4))
+        self.store.update('students', 'ST001', {
+            'full_name': 'Alice Remote', 'updated_at': self.t0 + timedelta(hours=3),
+        })
+
+        report = self.engine.run()
+        self.assertEqual(report.conflicts, [('students', 'ST001', 'django')])
+        doc = self.store.get('students', 'ST001').data
+        self.assertEqual(doc['full_name'], 'Alice Again')
+
+    def test_attendance_conflict_earliest_check_in_wins(self):
+        self.engine.run()
+        log = AttendanceLog.objects.create(
+            user=self.profile.user, student_name='Alice Smith', student_id='ST001', course=self.course,
+        )
+        AttendanceLog.objects.filter(pk=log.pk).update(
+            timestamp=self.t0 + timedelta(minutes=30), time=time(11, 0), status='present',
+        )
+        doc_id = attendance_doc_id('ST001', log.date, 'CS101')
+        self.store.set('attendance', doc_id, {
+            'student_id': 'ST001', 'student_name': 'Alice Smith', 'course_code': 'CS101',
+            'date': log.date.isoformat(), 'time': '09:05:00', 'timestamp': self.t0 + timedelta(minutes=5),
+            'status': 'present', 'scan_method': 'fingerprint', 'received_at': SERVER_TIMESTAMP,
+        })
+
+        with mock.patch('attendance.report_cache.invalidate') as invalidate, \
+                self.captureOnCommitCallbacks(execute=True):
+            report = self.engine.run()
+        self.assertEqual(report.conflicts, [('attendance', doc_id, 'firestore')])
+        log.refresh_from_db()
+        # Same status on both sides - the earlier check-in time still wins
+        self.assertEqual(log.status, 'present')
+        self.assertEqual(log.time, time(9, 5))
+        self.assertEqual(log.timestamp, self.t0 + timedelta(minutes=5))
+        # Edited in place: cached reports of the course are dropped
+        invalidate.assert_called_once_with(self.course.pk)
+
+    def test_pulled_attendance_keeps_its_date(self):
+        self.engine.run()
+        self.store.set('attendance', 'ST001_2026-01-15_CS101', {
+            'student_id': 'ST001', 'student_name': 'Alice Smith', 'course_code': 'CS101',
+            'date': '2026-01-15', 'time': '08:55:00', 'timestamp': self.t0 + timedelta(minutes=1),
+            'status': 'present', 'scan_method': 'fingerprint', 'received_at': SERVER_TIMESTAMP,
+        })
+
+        report = self.engine.run()
+        self.assertEqual(report.pulled['attendance'], 1)
+        log = AttendanceLog.objects.get(student_id='ST001')
+        self.assertEqual(log.date, date(2026, 1, 15))
+
+    def test_late_offline_batch_is_pulled_on_the_next_run(self):
+        cache.clear()
+        late = self._student('ST002', 'Bob Late')
+        self.engine.run()
+        mappings = FingerprintMappingRepository(self.store)
+        mappings.map(1, 'ST001')
+        mappings.map(2, 'ST002')
+
+        ingest_scan(self.store, 'lab1', 1)
+        self.assertEqual(self.engine.run().pulled['attendance'], 1)
+
+        # The device comes back online an hour later with a scan taken
+        # before the last run - its timestamp is behind the cursor
+        self.now = self.t0 + timedelta(hours=1)
+        scanned_at = timezone.now() - timedelta(hours=2)
+        ingest_batch(self.store, 'lab1', [{'fingerprint_id': 2, 'client_ts': scanned_at.isoformat()}])
+
+        report = self.engine.run()
+        self.assertEqual(report.pulled['attendance'], 1)
+        log = AttendanceLog.objects.get(user=late.user)
+        self.assertEqual(log.timestamp, scanned_at)
+
+    def test_pushed_students_refresh_the_device_directory(self):
+        cache.clear()
+        FingerprintMappingRepository(self.store).map(1, 'ST001')
+        self.engine.run()
+        self.assertEqual(resolve(self.store, 1)['full_name'], 'Alice Smith')
+
+        UserProfile.objects.filter(pk=self.profile.pk).update(
+            full_name='Alice Jones', updated_at=timezone.now() + timedelta(minutes=1)
+        )
+        self.engine.run()
+        self.assertEqual(resolve(self.store, 1)['full_name'], 'Alice Jones')
+
+    def test_writes_are_batched(self):
+        students = [User(username=f'BULK{i:04d}') for i in range(1200)]
+        User.objects.bulk_create(students)
+        UserProfile.objects.bulk_create([
+            UserProfile(user=user, full_name=user.username, student_id=user.username,
+                        email=f'{user.username}@example.com', course=self.course, role='student')
+            for user in User.objects.filter(username__startswith='BULK')
+        ])
+
+        report = self.engine.run()
+        # 1 course + 1201 students = 1202 writes -> 3 batches
+        self.assertEqual(report.batches, 3)
+        self.assertEqual(self.store.stats['commits'], 3)
+
+    def test_dry_run_writes_nothing(self):
+        report = self.engine.run(dry_run=True)
+        self.assertEqual(report.pushed['students'], 1)
+        self.assertEqual(self.store.stats['writes'], 0)
+        self.assertEqual(self.checkpoint.load(), {})
@@ -9,11 +9,10 @@ Run this ONCE after setting up Firebase credentials.
 
 Usage:
     python initialize_firebase.py
+    DOCSTORE_BACKEND=sqlite python initialize_firebase.py   (offline)
 ============================================================
 """
 
-import firebase_admin
-from firebase_admin import credentials, firestore
 import os
 from datetime import datetime
 
@@ -23,17 +22,21 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'fingerprint_attendance.settings')
 
 from fingerprint_attendance import settings
+from docstore import SERVER_TIMESTAMP, CourseRepository, get_store
 
 def initialize_firebase():
-    """Initialize Firebase Firestore connection and create database structure."""
+    """Initialize Firebase Firestore connection and create database structure.
+    
+    Returns the opened document store, or None on failure.
+    """
     
     print("=" * 60)
     print("FIREBASE FIRESTORE INITIALIZATION")
     print("=" * 60)
     print()
     
-    # Check if credentials file exists
-    if not os.path.exists(settings.FIREBASE_CREDENTIALS_PATH):
+    # Check if credentials file exists (only needed for Firestore)
+    if settings.DOCSTORE_BACKEND == 'firestore' and not os.path.exists(settings.FIREBASE_CREDENTIALS_PATH):
         print("❌ ERROR: Firebase credentials file not found!")
         print(f"   Expected location: {settings.FIREBASE_CREDENTIALS_PATH}")
         print()
@@ -42,27 +45,17 @@ def initialize_firebase():
         print("   2. Project Settings > Service Accounts")
         print("   3. Generate New Private Key")
         print("   4. Save as 'firebase-credentials.json' in project root")
-        return False
+        return None
     
     try:
-        # Initialize Firebase Admin SDK
+        # Open the document store (Firestore by default)
         print("1. Connecting to Firebase Firestore...")
-        cred = credentials.Certificate(settings.FIREBASE_CREDENTIALS_PATH)
+        store = get_store()
         
-        # Check if already initialized
-        try:
-            firebase_admin.get_app()
-            print("   ⚠️  Already initialized, using existing connection")
-        except ValueError:
-            firebase_admin.initialize_app(cred)
-        
-        print("   ✅ Connected to Firebase Firestore!")
+        print(f"   ✅ Connected to document store: {store.name}")
         print(f"   Project ID: {settings.FIREBASE_PROJECT_ID}")
         print()
         
-        # Get Firestore client
-        db_client = firestore.client()
-        
         # Create initial collections and documents
         print("2. Creating Firestore collections...")
         
@@ -74,36 +67,38 @@ def initialize_firebase():
                 'course_name': 'Introduction to Programming',
                 'instructor': 'Prof. Smith',
                 'description': 'Basic programming concepts with Python',
-                'created_at': firestore.SERVER_TIMESTAMP
+                'created_at': SERVER_TIMESTAMP
             },
             {
                 'course_code': 'CS201',
                 'course_name': 'Data Structures',
                 'instructor': 'Prof. Johnson',
                 'description': 'Advanced data structures and algorithms',
-                'created_at': firestore.SERVER_TIMESTAMP
+                'created_at': SERVER_TIMESTAMP
             },
             {
                 'course_code': 'MATH101',
                 'course_name': 'Calculus I',
                 'instructor': 'Prof. Williams',
                 'description': 'Introduction to calculus',
-                'created_at': firestore.SERVER_TIMESTAMP
+                'created_at': SERVER_TIMESTAMP
             }
         ]
         
-        for course in courses_data:
-            db_client.collection('courses').document(course['course_code']).set(course)
+        courses = CourseRepository(store)
+        with store.bulk_writer() as writer:
+            for course in courses_data:
+                courses.save_course(course, writer=writer)
         
         print("   ✅ 'courses' collection created with sample data")
         
         # Create system_info document
         print("   Creating 'system_info' document...")
-        db_client.collection('system').document('info').set({
-            'initialized_at': firestore.SERVER_TIMESTAMP,
+        store.set('system', 'info', {
+            'initialized_at': SERVER_TIMESTAMP,
             'version': '1.0',
             'database_type': 'Firestore',
-            'last_updated': firestore.SERVER_TIMESTAMP
+            'last_updated': SERVER_TIMESTAMP
         })
         print("   ✅ 'system_info' created")
         
@@ -137,7 +132,7 @@ def initialize_firebase():
         }
         """)
         
-        return True
+        return store
         
     except Exception as e:
         print()
@@ -148,36 +143,33 @@ def initialize_firebase():
         print("2. Wrong database URL in settings.py")
         print("3. No internet connection")
         print("4. Firebase project doesn't exist")
-        return False
+        return None
 
-def test_connection():
+def test_connection(store):
     """Test Firestore read/write operations."""
     print()
     print("Testing Firestore operations...")
     print()
     
     try:
-        db_client = firestore.client()
-        
         # Test write
         print("1. Testing write operation...")
-        test_ref = db_client.collection('_test').document('connection_test')
-        test_ref.set({
-            'timestamp': firestore.SERVER_TIMESTAMP,
+        store.set('_test', 'connection_test', {
+            'timestamp': SERVER_TIMESTAMP,
             'message': 'Connection test successful'
         })
         print("   ✅ Write successful")
         
         # Test read
         print("2. Testing read operation...")
-        doc = test_ref.get()
-        if doc.exists:
+        doc = store.get('_test', 'connection_test')
+        if doc is not None:
             print("   ✅ Read successful")
-            print(f"   Data: {doc.to_dict()['message']}")
+            print(f"   Data: {doc.get('message')}")
         
         # Clean up test data
         print("3. Cleaning up test data...")
-        test_ref.delete()
+        store.delete('_test', 'connection_test')
         print("   ✅ Delete successful")
         
         print()
@@ -191,11 +183,12 @@ def test_connection():
 
 if __name__ == "__main__":
     # Initialize database
-    success = initialize_firebase()
+    store = initialize_firebase()
     
-    if success:
+    if store:
         # Test connection
-        test_connection()
+        test_connection(store)
+        store.close()
     else:
         print()
         print("Please fix the errors above and try again.")
@@ -0,0 +1,21 @@
+"""
+============================================================
+JOB WORKER PROCESS ENTRY POINTS
+============================================================
+Functions a worker's process pool runs. Kept free of model
+imports at module level: a spawned process imports this module
+before Django is set up.
+============================================================
+"""
+
+
+def setup():
+    """Process pool initializer: set Django up in the new process."""
+    import django
+    django.setup()
+
+
+def execute(job_id):
+    """Run one claimed job (see jobs.queue.execute)."""
+    from .queue import execute as execute_job
+    return execute_job(job_id)
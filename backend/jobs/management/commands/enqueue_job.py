@@ -0,0 +1,49 @@
+"""
+============================================================
+QUEUE A BACKGROUND JOB
+============================================================
+For cron / systemd timers: queue the work and let the worker
+(run_jobs) run it, instead of running it in the timer itself.
+
+Usage:
+    python manage.py enqueue_job firestore.sync
+    python manage.py enqueue_job firestore.sync --kwargs '{"full": true}'
+    python manage.py enqueue_job maintenance.command --kwargs '{"command": "clearsessions"}'
+    python manage.py enqueue_job attendance.report --site north --kwargs '{"course_code": "N101"}'
+============================================================
+"""
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from fingerprint_attendance.sharding import SiteError, site_scope
+from jobs.queue import UnknownTask, enqueue, registered_tasks
+
+
+class Command(BaseCommand):
+    help = 'Queue a background job'
+
+    def add_arguments(self, parser):
+        parser.add_argument('task', help='Task name')
+        parser.add_argument('--kwargs', default='{}', help='Task arguments as a JSON object')
+        parser.add_argument('--priority', type=int, help="Override the task's priority")
+        parser.add_argument('--delay', type=int, default=0, help='Seconds before the job may start')
+        parser.add_argument('--site', help='Campus site to run on (see sharding.py)')
+
+    def handle(self, *args, **options):
+        try:
+            kwargs = json.loads(options['kwargs'])
+        except json.JSONDecodeError as e:
+            raise CommandError(f'--kwargs is not valid JSON: {e}')
+        if not isinstance(kwargs, dict):
+            raise CommandError('--kwargs must be a JSON object')
+
+        try:
+            with site_scope(options['site']):
+                job = enqueue(options['task'], priority=options['priority'], delay=options['delay'], **kwargs)
+        except UnknownTask:
+            raise CommandError(f'Unknown task {options["task"]!r} - available: {", ".join(registered_tasks())}')
+        except SiteError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(self.style.SUCCESS(f'✅ Queued {job.name} as job #{job.pk} ({job.status})'))
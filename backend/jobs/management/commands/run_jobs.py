@@ -0,0 +1,77 @@
+"""
+============================================================
+BACKGROUND JOB WORKER
+============================================================
+Runs queued jobs (reports, Firestore syncs, maintenance) until
+stopped with Ctrl+C / SIGTERM - running jobs are finished first.
+Run it as a service next to the web server; several workers
+(also on several hosts sharing the database) can run at once.
+
+Usage:
+    python manage.py run_jobs
+    python manage.py run_jobs --concurrency 8
+    python manage.py run_jobs --processes --concurrency 2   # CPU-heavy tasks
+    python manage.py run_jobs --burst                       # empty the queue, then exit
+============================================================
+"""
+import signal
+
+from django.core.management.base import BaseCommand, CommandError
+
+from jobs.models import Job
+from jobs.queue import registered_tasks
+from jobs.worker import STALE_AFTER, Worker
+
+
+class Command(BaseCommand):
+    help = 'Run queued background jobs'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=4, help='Jobs run at the same time')
+        parser.add_argument('--processes', action='store_true', help='Run jobs in processes instead of threads')
+        parser.add_argument('--poll', type=float, default=1.0, help='Seconds between looks at an empty queue')
+        parser.add_argument('--stale-after', type=int, default=STALE_AFTER,
+                            help='Seconds without heartbeat before a running job is requeued')
+        parser.add_argument('--burst', action='store_true', help='Exit when no job is runnable')
+        parser.add_argument('--max-jobs', type=int, help='Exit after this many jobs')
+
+    def handle(self, *args, **options):
+        try:
+            worker = Worker(
+                concurrency=options['concurrency'], processes=options['processes'],
+                poll_interval=options['poll'], stale_after=options['stale_after'],
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(
+            f'🔧 Worker {worker.name}: {worker.concurrency} '
+            f'{"processes" if worker.processes else "threads"}, tasks: {", ".join(registered_tasks())}'
+        )
+
+        previous = {}
+
+        def stop(signum, frame):
+            self.stdout.write(self.style.WARNING('⚠️  Stopping - finishing running jobs...'))
+            worker.stop()
+
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            previous[signum] = signal.signal(signum, stop)
+        try:
+            count = worker.run(burst=options['burst'], max_jobs=options['max_jobs'], on_finish=self._report)
+        finally:
+            for signum, handler in previous.items():
+                signal.signal(signum, handler)
+
+        self.stdout.write(self.style.SUCCESS(f'✅ Worker stopped after {count} job(s)'))
+
+    def _report(self, job_id, status):
+        job = Job.objects.get(pk=job_id)
+        took = (job.finished_at - job.started_at).total_seconds() if job.finished_at and job.started_at else 0
+        line = f'#{job.pk} {job.name} (attempt {job.attempts}/{job.max_attempts})'
+        if status == Job.SUCCEEDED:
+            self.stdout.write(self.style.SUCCESS(f'✅ {line} in {took:.1f}s'))
+        elif status == Job.QUEUED:
+            self.stdout.write(self.style.WARNING(f'🔁 {line} failed, retry queued: {job.as_dict()["error"]}'))
+        else:
+            self.stdout.write(self.style.ERROR(f'❌ {line} failed: {job.as_dict()["error"]}'))
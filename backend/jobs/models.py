@@ -0,0 +1,101 @@
+"""
+============================================================
+BACKGROUND JOB MODEL
+============================================================
+One row per queued task run (see jobs/queue.py): what to run,
+its arguments, priority, retry state, progress and outcome.
+The job table is the queue - workers claim rows with an atomic
+UPDATE, so no broker (Redis, RabbitMQ) is needed.
+============================================================
+"""
+from django.contrib.auth.models import User
+from django.db import models
+
+
+class Job(models.Model):
+    """
+    A background task run.
+
+    Fields:
+        name: Registered task name, e.g. "attendance.report"
+        kwargs: Task arguments (JSON)
+        site: Campus site the job was queued from (runs on that site)
+        status: queued -> running -> succeeded / failed
+        priority: Higher runs first
+        attempts / max_attempts: Runs so far / allowed (retries)
+        run_after: Not claimed before this time (retry backoff)
+        worker / heartbeat_at: Who runs it and when it last checked in
+        progress / message: 0.0-1.0 and a short status line for the UI
+        result / error: Task return value (JSON) or the last traceback
+        artifact / artifact_name / content_type: File the task produced
+    """
+
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+
+    STATUS_CHOICES = (
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (SUCCEEDED, 'Succeeded'),
+        (FAILED, 'Failed'),
+    )
+
+    name = models.CharField(max_length=100)
+    kwargs = models.JSONField(default=dict, blank=True)
+    site = models.CharField(max_length=50, blank=True)
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='jobs')
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    priority = models.IntegerField(default=0)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    run_after = models.DateTimeField()
+
+    worker = models.CharField(max_length=100, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    progress = models.FloatField(default=0.0)
+    message = models.CharField(max_length=200, blank=True)
+
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    artifact = models.CharField(max_length=255, blank=True)
+    artifact_name = models.CharField(max_length=255, blank=True)
+    content_type = models.CharField(max_length=100, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            # Claim query: next queued job by priority
+            models.Index(fields=['status', 'priority', 'run_after'], name='job_claim_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.status})"
+
+    @property
+    def finished(self):
+        return self.status in (self.SUCCEEDED, self.FAILED)
+
+    def as_dict(self):
+        """Status fields for the JSON status endpoint and the worker command."""
+        return {
+            'id': self.pk,
+            'name': self.name,
+            'status': self.status,
+            'progress': round(self.progress, 3),
+            'message': self.message,
+            'attempts': self.attempts,
+            'max_attempts': self.max_attempts,
+            'result': self.result,
+            'error': self.error.strip().splitlines()[-1] if self.error else '',
+            'artifact': self.artifact_name or None,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+        }
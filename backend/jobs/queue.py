@@ -0,0 +1,309 @@
+"""
+============================================================
+BACKGROUND JOBS - TASKS, QUEUE AND EXECUTION
+============================================================
+Slow work (Excel reports, Firestore syncs, maintenance) runs
+off the request path without a broker: jobs are rows in the Job
+table (jobs/models.py) and `python manage.py run_jobs` runs them.
+
+Define a task in an app's tasks.py (imported at startup):
+
+    @task('attendance.report', priority=PRIORITY_HIGH)
+    def attendance_report(job, course_code):
+        job.progress(0.5, 'Writing workbook')
+        job.save_artifact('report.xlsx', content, XLSX_CONTENT_TYPE)
+        return {'rows': 120}
+
+Queue it - the browser then polls /jobs/<id>/status/:
+
+    job = enqueue('attendance.report', user=request.user, course_code='CS101')
+
+- priority: higher runs first (PRIORITY_HIGH for reports someone
+  is waiting for, PRIORITY_LOW for maintenance)
+- retries: a task that raises runs again after
+  RETRY_DELAY * 2^(attempt-1) seconds, up to max_attempts runs
+- progress: job.progress() stores a fraction and a message
+  (throttled to one write per PROGRESS_INTERVAL)
+- a job runs on the campus site it was queued from (sharding.py)
+- unique=True returns the user's queued/running job with the same
+  task and arguments instead of adding another one
+- settings.JOBS_RUN_INLINE runs the job inside enqueue()
+  (development without a worker)
+
+Task arguments and return values must be JSON-serializable.
+============================================================
+"""
+import json
+import os
+import time
+import traceback
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+
+from fingerprint_attendance.sharding import current_site, site_scope
+
+from .models import Job
+
+
+# ========== CONFIGURATION ==========
+PRIORITY_HIGH = 10
+PRIORITY_NORMAL = 0
+PRIORITY_LOW = -10
+
+# Seconds before the first retry (doubles with every attempt)
+RETRY_DELAY = 30
+
+# Most one progress write per this many seconds
+PROGRESS_INTERVAL = 1.0
+
+
+class UnknownTask(LookupError):
+    """No task is registered under this name."""
+
+
+# ========== TASK REGISTRY ==========
+
+class Task:
+    """A registered task: the function and its queueing defaults."""
+
+    def __init__(self, name, func, priority, max_attempts):
+        self.name = name
+        self.func = func
+        self.priority = priority
+        self.max_attempts = max_attempts
+
+
+_tasks = {}
+
+
+def task(name, priority=PRIORITY_NORMAL, max_attempts=3):
+    """
+    Register a function as a background task.
+
+    The function gets a JobContext first, then the job's kwargs.
+
+    Args:
+        name: Task name used by enqueue(), e.g. "attendance.report"
+        priority: Default priority (higher runs first)
+        max_attempts: Runs before the job is marked failed
+    """
+    def decorator(func):
+        _tasks[name] = Task(name, func, priority, max_attempts)
+        return func
+    return decorator
+
+
+def get_task(name):
+    try:
+        return _tasks[name]
+    except KeyError:
+        raise UnknownTask(f'No task named {name!r}')
+
+
+def registered_tasks():
+    """Names of all registered tasks."""
+    return sorted(_tasks)
+
+
+# ========== QUEUEING ==========
+
+def enqueue(name, *, user=None, priority=None, delay=0, unique=False, **kwargs):
+    """
+    Queue a task run.
+
+    Args:
+        name: Registered task name
+        user: User the job belongs to (may see its status and download)
+        priority: Override the task's priority
+        delay: Seconds before the job may start
+        unique: Reuse the user's queued/running job with the same arguments
+        **kwargs: Task arguments (JSON-serializable)
+
+    Returns:
+        Job: The queued (or reused) job
+
+    Raises:
+        UnknownTask: If no task has this name
+    """
+    registered = get_task(name)
+    site = current_site() or ''
+    user_id = user.pk if user is not None else None
+
+    if unique:
+        pending = Job.objects.filter(
+            name=name, site=site, created_by_id=user_id, status__in=[Job.QUEUED, Job.RUNNING]
+        )
+        for job in pending:
+            if job.kwargs == kwargs:
+                return job
+
+    job = Job.objects.create(
+        name=name,
+        kwargs=kwargs,
+        site=site,
+        created_by_id=user_id,
+        priority=registered.priority if priority is None else priority,
+        max_attempts=registered.max_attempts,
+        run_after=timezone.now() + timedelta(seconds=delay),
+    )
+
+    if getattr(settings, 'JOBS_RUN_INLINE', False) and not delay:
+        if claim(job.pk, 'inline'):
+            execute(job.pk, close_connections=False)
+        job.refresh_from_db()
+
+    return job
+
+
+def claim(job_id, worker):
+    """
+    Take a queued job (atomic: only one worker can win).
+
+    Returns:
+        bool: True if this worker now runs the job
+    """
+    now = timezone.now()
+    return bool(Job.objects.filter(pk=job_id, status=Job.QUEUED).update(
+        status=Job.RUNNING, worker=worker, attempts=F('attempts') + 1,
+        started_at=now, heartbeat_at=now, progress=0.0, message='Started',
+    ))
+
+
+def requeue_stale(stale_after):
+    """
+    Recover jobs whose worker stopped sending heartbeats (crashed, killed).
+
+    Jobs with attempts left are queued again, the rest marked failed.
+
+    Returns:
+        int: Jobs recovered
+    """
+    now = timezone.now()
+    stale = Job.objects.filter(status=Job.RUNNING, heartbeat_at__lt=now - timedelta(seconds=stale_after))
+    requeued = stale.filter(attempts__lt=F('max_attempts')).update(
+        status=Job.QUEUED, run_after=now, worker='', message='Requeued - worker stopped responding',
+    )
+    failed = stale.update(
+        status=Job.FAILED, finished_at=now, error='Worker stopped responding', message='Failed',
+    )
+    return requeued + failed
+
+
+# ========== EXECUTION ==========
+
+def artifact_path(job):
+    """Absolute path of a job's artifact file."""
+    return Path(settings.JOBS_ARTIFACT_DIR) / job.artifact
+
+
+class JobContext:
+    """
+    What a task gets as its first argument.
+
+    Attributes:
+        id: Job id
+        attempt: Which run this is (1 = first)
+    """
+
+    def __init__(self, job):
+        self.id = job.pk
+        self.attempt = job.attempts
+        self._attempt_filter = {'pk': job.pk, 'attempts': job.attempts, 'status': Job.RUNNING}
+        self._reported = None
+
+    def progress(self, fraction, message=''):
+        """
+        Report progress (0.0-1.0) and a short status line for the UI.
+
+        Writes at most once per PROGRESS_INTERVAL; the final call
+        (fraction >= 1) is always written.
+        """
+        now = time.monotonic()
+        if fraction < 1 and self._reported is not None and now - self._reported < PROGRESS_INTERVAL:
+            return
+        self._reported = now
+        Job.objects.filter(**self._attempt_filter).update(
+            progress=max(0.0, min(1.0, fraction)), message=message[:200], heartbeat_at=timezone.now(),
+        )
+
+    def save_artifact(self, filename, content, content_type='application/octet-stream'):
+        """
+        Store a file the job produced (downloadable at /jobs/<id>/download/).
+
+        Args:
+            filename: Download name
+            content: bytes
+            content_type: MIME type
+        """
+        filename = os.path.basename(filename)
+        relative = f'{self.id}/{filename}'
+        path = Path(settings.JOBS_ARTIFACT_DIR) / relative
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_name(f'.{filename}.tmp')
+        temp_path.write_bytes(content)
+        temp_path.replace(path)
+        Job.objects.filter(**self._attempt_filter).update(
+            artifact=relative, artifact_name=filename, content_type=content_type,
+        )
+
+
+def record_failure(job_id, attempts, error, retry=True):
+    """
+    Store a failed run: queue a retry while attempts are left, else mark failed.
+
+    Returns:
+        str: New status
+    """
+    job = Job.objects.get(pk=job_id)
+    now = timezone.now()
+    current = Job.objects.filter(pk=job_id, attempts=attempts, status=Job.RUNNING)
+    if retry and attempts < job.max_attempts:
+        delay = RETRY_DELAY * 2 ** (attempts - 1)
+        current.update(
+            status=Job.QUEUED, run_after=now + timedelta(seconds=delay), worker='', error=error,
+            message=f'Attempt {attempts} of {job.max_attempts} failed - retrying in {delay}s',
+        )
+        return Job.QUEUED
+    current.update(status=Job.FAILED, finished_at=now, error=error, message='Failed')
+    return Job.FAILED
+
+
+def execute(job_id, close_connections=True):
+    """
+    Run a claimed job and record its outcome (worker threads/processes).
+
+    Args:
+        job_id: Job claimed with claim()
+        close_connections: Close this thread's database connections afterwards
+
+    Returns:
+        str: Status the job ended with (queued again for a retry)
+    """
+    from django.db import connections
+
+    try:
+        job = Job.objects.get(pk=job_id)
+        try:
+            registered = get_task(job.name)
+            with site_scope(job.site or None):
+                result = registered.func(JobContext(job), **job.kwargs)
+            # Fail here, not when saving, if the result cannot be stored
+            json.dumps(result)
+        except UnknownTask:
+            return record_failure(job_id, job.attempts, traceback.format_exc(), retry=False)
+        except Exception:
+            return record_failure(job_id, job.attempts, traceback.format_exc())
+
+        Job.objects.filter(pk=job_id, attempts=job.attempts, status=Job.RUNNING).update(
+            status=Job.SUCCEEDED, progress=1.0, message='Done', result=result, error='',
+            finished_at=timezone.now(),
+        )
+        return Job.SUCCEEDED
+    finally:
+        if close_connections:
+            for connection in connections.all(initialized_only=True):
+                connection.close()
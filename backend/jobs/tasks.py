@@ -0,0 +1,46 @@
+"""
+============================================================
+MAINTENANCE BACKGROUND TASKS
+============================================================
+- maintenance.command: run a management command from
+  settings.JOBS_COMMANDS (e.g. queued nightly from cron)
+- jobs.cleanup: delete old finished jobs and their files
+============================================================
+"""
+import shutil
+from datetime import timedelta
+from io import StringIO
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management import call_command
+from django.utils import timezone
+
+from .models import Job
+from .queue import PRIORITY_LOW, task
+
+
+# Characters of command output kept as the job result
+OUTPUT_LIMIT = 4000
+
+
+@task('maintenance.command', priority=PRIORITY_LOW, max_attempts=1)
+def run_command(job, command, args=None):
+    """Run an allowed management command; its output is the result."""
+    if command not in settings.JOBS_COMMANDS:
+        raise ValueError(f'{command!r} is not in settings.JOBS_COMMANDS')
+    output = StringIO()
+    job.progress(0.0, f'Running {command}')
+    call_command(command, *(args or []), stdout=output, stderr=output)
+    return {'command': command, 'output': output.getvalue()[-OUTPUT_LIMIT:]}
+
+
+@task('jobs.cleanup', priority=PRIORITY_LOW)
+def cleanup(job, days=None):
+    """Delete finished jobs older than settings.JOBS_KEEP_DAYS, with their artifacts."""
+    cutoff = timezone.now() - timedelta(days=settings.JOBS_KEEP_DAYS if days is None else days)
+    old = Job.objects.filter(status__in=[Job.SUCCEEDED, Job.FAILED], finished_at__lt=cutoff)
+    for job_id in old.values_list('pk', flat=True):
+        shutil.rmtree(Path(settings.JOBS_ARTIFACT_DIR) / str(job_id), ignore_errors=True)
+    deleted, _ = old.delete()
+    return {'deleted': deleted}
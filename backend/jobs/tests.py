@@ -0,0 +1,268 @@
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from attendance.models import AttendanceLog
+from users.models import Course, UserProfile
+
+from . import queue
+from .models import Job
+from .queue import PRIORITY_HIGH, PRIORITY_LOW, claim, enqueue, execute, requeue_stale, task
+from .worker import Worker
+
+
+calls = []
+
+
+@task('tests.echo')
+def echo(job, value=None):
+    calls.append(value)
+    job.progress(0.5, 'Halfway')
+    return {'value': value}
+
+
+@task('tests.flaky', max_attempts=2)
+def flaky(job):
+    if job.attempt == 1:
+        raise RuntimeError('first run fails')
+    return {'attempt': job.attempt}
+
+
+@task('tests.broken', max_attempts=2)
+def broken(job):
+    raise RuntimeError('always fails')
+
+
+@task('tests.file')
+def write_file(job, text):
+    job.save_artifact('../../out.txt', text.encode(), 'text/plain')
+    return None
+
+
+class ArtifactDirMixin:
+
+    def setUp(self):
+        super().setUp()
+        calls.clear()
+        artifacts = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, artifacts, ignore_errors=True)
+        settings_override = override_settings(JOBS_ARTIFACT_DIR=artifacts, REPORT_CACHE_DIR=artifacts, JOBS_RUN_INLINE=False)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.user = User.objects.create(username='job-owner')
+
+
+class QueueTests(ArtifactDirMixin, TestCase):
+
+    def test_unique_reuses_the_pending_job(self):
+        first = enqueue('tests.echo', user=self.user, unique=True, value=1)
+        self.assertEqual(enqueue('tests.echo', user=self.user, unique=True, value=1).pk, first.pk)
+        self.assertNotEqual(enqueue('tests.echo', user=self.user, unique=True, value=2).pk, first.pk)
+        self.assertNotEqual(enqueue('tests.echo', user=self.user, value=1).pk, first.pk)
+
+    def test_unknown_task_is_rejected(self):
+        with self.assertRaises(queue.UnknownTask):
+            enqueue('tests.missing')
+
+    def test_claim_is_taken_once(self):
+        job = enqueue('tests.echo')
+        self.assertTrue(claim(job.pk, 'a'))
+        self.assertFalse(claim(job.pk, 'b'))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.worker, job.attempts), (Job.RUNNING, 'a', 1))
+
+    def test_higher_priority_and_older_jobs_are_claimed_first(self):
+        low = enqueue('tests.echo', priority=PRIORITY_LOW)
+        normal = enqueue('tests.echo')
+        high = enqueue('tests.echo', priority=PRIORITY_HIGH)
+        later = enqueue('tests.echo', priority=PRIORITY_HIGH, delay=60)
+
+        self.assertEqual(Worker().claim_next(3), [high.pk, normal.pk, low.pk])
+        self.assertEqual(Job.objects.get(pk=later.pk).status, Job.QUEUED)
+
+    def test_success_stores_result_and_progress(self):
+        job = enqueue('tests.echo', value='x')
+        claim(job.pk, 'test')
+        self.assertEqual(execute(job.pk, close_connections=False), Job.SUCCEEDED)
+
+        job.refresh_from_db()
+        self.assertEqual(job.result, {'value': 'x'})
+        self.assertEqual((job.progress, job.message), (1.0, 'Done'))
+        self.assertIsNotNone(job.finished_at)
+
+    @mock.patch.object(queue, 'RETRY_DELAY', 0)
+    def test_failed_runs_are_retried_then_marked_failed(self):
+        job = enqueue('tests.flaky')
+        claim(job.pk, 'test')
+        self.assertEqual(execute(job.pk, close_connections=False), Job.QUEUED)
+        job.refresh_from_db()
+        self.assertIn('first run fails', job.error)
+
+        claim(job.pk, 'test')
+        self.assertEqual(execute(job.pk, close_connections=False), Job.SUCCEEDED)
+
+        job = enqueue('tests.broken')
+        for _ in range(2):
+            claim(job.pk, 'test')
+            status = execute(job.pk, close_connections=False)
+        self.assertEqual(status, Job.FAILED)
+        job.refresh_from_db()
+        self.assertEqual(job.as_dict()['error'], 'RuntimeError: always fails')
+        self.assertFalse(claim(job.pk, 'test'))
+
+    def test_retry_waits_longer_each_attempt(self):
+        job = enqueue('tests.broken')
+        claim(job.pk, 'test')
+        execute(job.pk, close_connections=False)
+        job.refresh_from_db()
+        self.assertGreater(job.run_after, timezone.now() + timedelta(seconds=queue.RETRY_DELAY - 5))
+
+    def test_artifact_stays_in_the_job_directory(self):
+        job = enqueue('tests.file', text='hello')
+        claim(job.pk, 'test')
+        execute(job.pk, close_connections=False)
+
+        job.refresh_from_db()
+        self.assertEqual(job.artifact, f'{job.pk}/out.txt')
+        self.assertEqual(queue.artifact_path(job).read_text(), 'hello')
+
+    def test_stale_running_jobs_are_recovered(self):
+        retried = enqueue('tests.echo')
+        exhausted = enqueue('tests.broken')
+        for job in (retried, exhausted):
+            claim(job.pk, 'dead-worker')
+        Job.objects.filter(pk=exhausted.pk).update(attempts=2)
+        Job.objects.update(heartbeat_at=timezone.now() - timedelta(minutes=10))
+
+        self.assertEqual(requeue_stale(60), 2)
+        self.assertEqual(Job.objects.get(pk=retried.pk).status, Job.QUEUED)
+        self.assertEqual(Job.objects.get(pk=exhausted.pk).status, Job.FAILED)
+
+    @override_settings(JOBS_RUN_INLINE=True)
+    def test_inline_mode_runs_in_enqueue(self):
+        job = enqueue('tests.echo', value=3)
+        self.assertEqual(job.status, Job.SUCCEEDED)
+        self.assertEqual(calls, [3])
+
+    def test_cleanup_deletes_old_jobs_and_files(self):
+        old = enqueue('tests.file', text='old')
+        claim(old.pk, 'test')
+        execute(old.pk, close_connections=False)
+        Job.objects.filter(pk=old.pk).update(finished_at=timezone.now() - timedelta(days=30))
+        old.refresh_from_db()
+        path = queue.artifact_path(old)
+        pending = enqueue('tests.echo')
+
+        job = enqueue('jobs.cleanup')
+        claim(job.pk, 'test')
+        execute(job.pk, close_connections=False)
+
+        self.assertFalse(Job.objects.filter(pk=old.pk).exists())
+        self.assertTrue(Job.objects.filter(pk=pending.pk).exists())
+        self.assertFalse(path.exists())
+
+    @override_settings(JOBS_COMMANDS=['clearsessions'])
+    def test_only_allowed_commands_run(self):
+        allowed = enqueue('maintenance.command', command='clearsessions')
+        refused = enqueue('maintenance.command', command='flush')
+        for job in (allowed, refused):
+            claim(job.pk, 'test')
+            execute(job.pk, close_connections=False)
+
+        self.assertEqual(Job.objects.get(pk=allowed.pk).status, Job.SUCCEEDED)
+        self.assertEqual(Job.objects.get(pk=refused.pk).status, Job.FAILED)
+
+
+class WorkerTests(ArtifactDirMixin, TransactionTestCase):
+
+    def test_burst_runs_every_queued_job(self):
+        jobs = [enqueue('tests.echo', value=i) for i in range(5)]
+        finished = []
+
+        count = Worker(concurrency=2, poll_interval=0.05).run(
+            burst=True, on_finish=lambda job_id, status: finished.append(status)
+        )
+
+        self.assertEqual(count, 5)
+        self.assertEqual(finished, [Job.SUCCEEDED] * 5)
+        self.assertEqual(sorted(calls), list(range(5)))
+        self.assertFalse(Job.objects.exclude(status=Job.SUCCEEDED).filter(pk__in=[j.pk for j in jobs]).exists())
+
+    def test_max_jobs_stops_early(self):
+        for i in range(3):
+            enqueue('tests.echo', value=i)
+        self.assertEqual(Worker(concurrency=2, poll_interval=0.05).run(max_jobs=1), 1)
+        self.assertEqual(Job.objects.filter(status=Job.QUEUED).count(), 2)
+
+    def test_commands_queue_and_run_jobs(self):
+        out = StringIO()
+        call_command('enqueue_job', 'tests.echo', '--kwargs', '{"value": 7}', stdout=out)
+        self.assertIn('Queued tests.echo', out.getvalue())
+        with self.assertRaises(CommandError):
+            call_command('enqueue_job', 'tests.missing', stdout=StringIO())
+        with self.assertRaises(CommandError):
+            call_command('enqueue_job', 'tests.echo', '--kwargs', '[1]', stdout=StringIO())
+
+        out = StringIO()
+        call_command('run_jobs', '--burst', '--poll', '0.05', stdout=out)
+        self.assertIn('1 job', out.getvalue())
+        self.assertEqual(calls, [7])
+
+
+class JobViewTests(ArtifactDirMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user.is_staff = True
+        self.user.save()
+        self.course = Course.objects.create(course_code='JOB101', course_name='Jobs', instructor=self.user)
+        profile = UserProfile.objects.create(
+            user=User.objects.create(username='job-student'), full_name='Job Student', student_id='J-1',
+            email='job@example.com', course=self.course, role='student',
+        )
+        AttendanceLog.objects.create(
+            user=profile.user, course=self.course, student_id='J-1', student_name='Job Student',
+        )
+        self.client.force_login(self.user)
+
+    def test_report_is_queued_and_downloaded(self):
+        response = self.client.get(reverse('attendance_report', args=['JOB101']))
+        job = Job.objects.get()
+        self.assertRedirects(response, reverse('job_page', args=[job.pk]), fetch_redirect_response=False)
+        self.assertEqual(job.kwargs, {'course_code': 'JOB101', 'fmt': 'xlsx'})
+
+        # Reloading the report page while the job waits does not queue another
+        self.client.get(reverse('attendance_report', args=['JOB101']))
+        self.assertEqual(Job.objects.count(), 1)
+
+        status = self.client.get(reverse('job_status', args=[job.pk])).json()
+        self.assertEqual((status['status'], status['download_url']), (Job.QUEUED, None))
+        self.assertEqual(self.client.get(reverse('job_download', args=[job.pk])).status_code, 404)
+
+        for job_id in Worker().claim_next(1):
+            execute(job_id, close_connections=False)
+
+        status = self.client.get(reverse('job_status', args=[job.pk])).json()
+        self.assertEqual(status['status'], Job.SUCCEEDED)
+        self.assertEqual(status['result']['rows'], 1)
+        response = self.client.get(status['download_url'])
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(b''.join(response.streaming_content).startswith(b'PK'))
+        self.assertIn('JOB101', response['Content-Disposition'])
+
+    def test_other_users_cannot_see_the_job(self):
+        job = enqueue('tests.echo', user=self.user)
+        self.assertEqual(self.client.get(reverse('job_page', args=[job.pk])).status_code, 200)
+
+        self.client.force_login(User.objects.create(username='someone-else'))
+        for name in ('job_page', 'job_status', 'job_download'):
+            self.assertEqual(self.client.get(reverse(name, args=[job.pk])).status_code, 404, name)
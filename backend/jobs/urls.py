@@ -0,0 +1,20 @@
+"""
+============================================================
+JOBS URL CONFIGURATION
+============================================================
+Progress page, status polling and downloads for background jobs.
+============================================================
+"""
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    # Progress page (polls the status endpoint, then downloads)
+    path('<int:job_id>/', views.job_page, name='job_page'),
+
+    # Job status (JSON)
+    path('<int:job_id>/status/', views.job_status, name='job_status'),
+
+    # File the job produced (e.g. the Excel report)
+    path('<int:job_id>/download/', views.job_download, name='job_download'),
+]
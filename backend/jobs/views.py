@@ -0,0 +1,93 @@
+"""
+============================================================
+JOB VIEWS
+============================================================
+Lets the user who queued a job (or an admin) follow it:
+- job_page:     static progress page, polls job_status
+- job_status:   JSON status (progress, message, result, error)
+- job_download: the file the job produced (ETag and Range aware)
+============================================================
+"""
+from pathlib import Path
+
+from django.contrib.auth.decorators import login_required
+from django.http import Http404, HttpResponse, JsonResponse
+from django.urls import reverse
+from django.views.decorators.http import require_GET
+
+from fingerprint_attendance.downloads import serve_file
+
+from .models import Job
+from .queue import artifact_path
+
+
+JOB_PAGE_PATH = Path(__file__).resolve().parent / 'static' / 'jobs' / 'job.html'
+_job_page = None
+
+
+def _get_job(request, job_id):
+    """The job, if the user may see it (404 otherwise - ids are guessable)."""
+    try:
+        job = Job.objects.get(pk=job_id)
+    except Job.DoesNotExist:
+        raise Http404('Job not found')
+    if not request.user.is_staff and job.created_by_id != request.user.id:
+        raise Http404('Job not found')
+    return job
+
+
+@login_required
+@require_GET
+def job_page(request, job_id):
+    """
+    Progress page for a job (static - the data comes from job_status).
+
+    URL: /jobs/<job_id>/
+    """
+    global _job_page
+    _get_job(request, job_id)
+    if _job_page is None:
+        _job_page = JOB_PAGE_PATH.read_bytes()
+    return HttpResponse(_job_page, content_type='text/html; charset=utf-8')
+
+
+@login_required
+@require_GET
+def job_status(request, job_id):
+    """
+    Job status for polling.
+
+    URL: /jobs/<job_id>/status/
+
+    Returns:
+        JSON: {"status": "queued" | "running" | "succeeded" | "failed",
+               "progress", "message", "result", "error", "download_url", ...}
+    """
+    job = _get_job(request, job_id)
+    data = job.as_dict()
+    data['download_url'] = None
+    if job.status == Job.SUCCEEDED:
+        if job.artifact:
+            data['download_url'] = reverse('job_download', args=[job.pk])
+        elif isinstance(job.result, dict):
+            # Tasks that store their file elsewhere (e.g. the report cache) link to it
+            data['download_url'] = job.result.get('download_url')
+    return JsonResponse(data)
+
+
+@login_required
+@require_GET
+def job_download(request, job_id):
+    """
+    Download the file a finished job produced.
+
+    URL: /jobs/<job_id>/download/
+    """
+    job = _get_job(request, job_id)
+    if job.status != Job.SUCCEEDED or not job.artifact:
+        raise Http404('Nothing to download')
+    path = artifact_path(job)
+    if not path.exists():
+        raise Http404('File was cleaned up - run the job again')
+    # A job's artifact never changes once the job succeeded
+    return serve_file(request, path, job.artifact_name, job.content_type, etag=f'job-{job.pk}-{job.attempts}')
@@ -0,0 +1,157 @@
+"""
+============================================================
+BACKGROUND JOB WORKER
+============================================================
+Claims queued jobs (highest priority first, oldest first) and
+runs them on a pool of threads - or processes, for CPU-heavy
+tasks that would otherwise hold the GIL against each other.
+
+While jobs run, the worker sends heartbeats for them every
+HEARTBEAT_INTERVAL seconds and requeues jobs of workers that
+stopped sending theirs (stale_after), so a killed worker never
+leaves a job stuck in "running".
+
+    python manage.py run_jobs --concurrency 4
+    python manage.py run_jobs --processes --concurrency 2
+============================================================
+"""
+import multiprocessing
+import os
+import socket
+import threading
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+from django.db import connections
+from django.utils import timezone
+
+from . import bootstrap
+from .models import Job
+from .queue import claim, record_failure, requeue_stale
+
+
+# ========== CONFIGURATION ==========
+# Seconds between heartbeats for running jobs
+HEARTBEAT_INTERVAL = 15
+
+# Seconds without a heartbeat before a running job counts as abandoned
+STALE_AFTER = 120
+
+
+class Worker:
+    """
+    Runs queued jobs until stopped.
+
+    Args:
+        concurrency: Jobs run at the same time
+        processes: Use a process pool instead of threads
+        poll_interval: Seconds between looks at an empty queue
+        stale_after: Seconds without heartbeat before a job is requeued
+        name: Worker name stored on claimed jobs (default: host:pid)
+    """
+
+    def __init__(self, concurrency=4, processes=False, poll_interval=1.0, stale_after=STALE_AFTER, name=None):
+        if concurrency < 1:
+            raise ValueError('concurrency must be at least 1')
+        self.concurrency = concurrency
+        self.processes = processes
+        self.poll_interval = poll_interval
+        self.stale_after = stale_after
+        self.name = name or f'{socket.gethostname()}:{os.getpid()}'
+        self._stop = threading.Event()
+
+    def stop(self):
+        """Stop claiming jobs; run() returns once the running ones finish."""
+        self._stop.set()
+
+    def claim_next(self, limit):
+        """
+        Claim up to limit runnable jobs.
+
+        Returns:
+            list: Claimed job ids
+        """
+        candidates = (
+            Job.objects.filter(status=Job.QUEUED, run_after__lte=timezone.now())
+            .order_by('-priority', 'run_after', 'id')
+            .values_list('pk', flat=True)[:limit * 2]
+        )
+        claimed = []
+        for job_id in candidates:
+            # Another worker may win the race for a candidate - try the next
+            if claim(job_id, self.name):
+                claimed.append(job_id)
+                if len(claimed) == limit:
+                    break
+        return claimed
+
+    def _executor(self):
+        if self.processes:
+            # Children must not inherit open database connections
+            connections.close_all()
+            return ProcessPoolExecutor(
+                max_workers=self.concurrency,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=bootstrap.setup,
+            )
+        return ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='job')
+
+    def run(self, burst=False, max_jobs=None, on_finish=None):
+        """
+        Run jobs until stop() (or until the queue is empty with burst).
+
+        Args:
+            burst: Return when no job is runnable right now
+            max_jobs: Return after this many jobs
+            on_finish: Called with (job_id, status) after each job
+
+        Returns:
+            int: Jobs run
+        """
+        executor = self._executor()
+        in_flight = {}
+        finished = 0
+        last_heartbeat = 0.0
+        try:
+            while True:
+                for future in [future for future in in_flight if future.done()]:
+                    job_id = in_flight.pop(future)
+                    try:
+                        status = future.result()
+                    except Exception:
+                        # The run itself broke (e.g. a worker process died)
+                        job = Job.objects.get(pk=job_id)
+                        status = record_failure(job_id, job.attempts, traceback.format_exc())
+                    finished += 1
+                    if on_finish:
+                        on_finish(job_id, status)
+
+                if time.monotonic() - last_heartbeat >= HEARTBEAT_INTERVAL:
+                    self._heartbeat(list(in_flight.values()))
+                    requeue_stale(self.stale_after)
+                    last_heartbeat = time.monotonic()
+
+                limit = self.concurrency - len(in_flight)
+                if max_jobs is not None:
+                    limit = min(limit, max_jobs - finished - len(in_flight))
+                if self._stop.is_set():
+                    limit = 0
+
+                claimed = self.claim_next(limit) if limit > 0 else []
+                for job_id in claimed:
+                    in_flight[executor.submit(bootstrap.execute, job_id)] = job_id
+
+                if not in_flight and not claimed:
+                    if burst or self._stop.is_set() or (max_jobs is not None and finished >= max_jobs):
+                        break
+                    self._stop.wait(self.poll_interval)
+                elif in_flight:
+                    wait(in_flight, timeout=self.poll_interval, return_when=FIRST_COMPLETED)
+        finally:
+            executor.shutdown(wait=True)
+        return finished
+
+    def _heartbeat(self, job_ids):
+        if job_ids:
+            Job.objects.filter(pk__in=job_ids, status=Job.RUNNING).update(heartbeat_at=timezone.now())
@@ -1,8 +1,18 @@
 """
 Test Firebase Connection Script
 Checks if backend can connect to Firebase Firestore
+(or the configured DOCSTORE_BACKEND, e.g. DOCSTORE_BACKEND=sqlite)
+
+Benchmark mode measures latency (p50/p95/p99) and throughput of
+the operations the attendance paths use (see docstore/benchmark.py):
+
+    python test_firebase_connection.py --benchmark
+    python test_firebase_connection.py --benchmark --store fake --concurrency 1,8,32
+    python test_firebase_connection.py --benchmark --payload-bytes 256,4096 --json report.json
 """
 
+import argparse
+import json
 import os
 import sys
 
@@ -10,9 +20,9 @@ import sys
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'fingerprint_attendance.settings')
 
-import firebase_admin
-from firebase_admin import credentials, firestore
 from fingerprint_attendance import settings
+from docstore import BACKENDS, SERVER_TIMESTAMP, StoreUnavailable, get_store
+from docstore.benchmark import OPERATIONS, run_benchmark
 from datetime import datetime
 
 def test_firebase_connection():
@@ -25,36 +35,27 @@ def test_firebase_connection():
     
     # Check if credentials file exists
     print("1. Checking credentials file...")
-    if not os.path.exists(settings.FIREBASE_CREDENTIALS_PATH):
+    if settings.DOCSTORE_BACKEND != 'firestore':
+        print(f"   ⚠️  Skipped: using local '{settings.DOCSTORE_BACKEND}' document store")
+    elif not os.path.exists(settings.FIREBASE_CREDENTIALS_PATH):
         print("   ❌ FAILED: firebase-credentials.json not found!")
         print(f"   Expected location: {settings.FIREBASE_CREDENTIALS_PATH}")
         return False
-    print(f"   ✅ Found: {settings.FIREBASE_CREDENTIALS_PATH}")
+    else:
+        print(f"   ✅ Found: {settings.FIREBASE_CREDENTIALS_PATH}")
     print()
     
-    # Initialize Firebase
-    print("2. Initializing Firebase Admin SDK...")
-    try:
-        # Check if already initialized
-        try:
-            app = firebase_admin.get_app()
-            print("   ⚠️  Already initialized, using existing connection")
-        except ValueError:
-            cred = credentials.Certificate(settings.FIREBASE_CREDENTIALS_PATH)
-            firebase_admin.initialize_app(cred)
-            print("   ✅ Firebase Admin SDK initialized!")
-        
-        print(f"   Project ID: {settings.FIREBASE_PROJECT_ID}")
-        print()
-    except Exception as e:
-        print(f"   ❌ FAILED: {str(e)}")
-        return False
+    # Backend
+    print("2. Selecting document store backend...")
+    print(f"   Backend: {settings.DOCSTORE_BACKEND}")
+    print(f"   Project ID: {settings.FIREBASE_PROJECT_ID}")
+    print()
     
-    # Get Firestore client
+    # Open the document store (initializes the Firebase Admin SDK for Firestore)
     print("3. Connecting to Firestore database...")
     try:
-        db = firestore.client()
-        print("   ✅ Firestore client created!")
+        store = get_store()
+        print(f"   ✅ Document store opened: {store.name}")
         print()
     except Exception as e:
         print(f"   ❌ FAILED: {str(e)}")
@@ -63,13 +64,12 @@ def test_firebase_connection():
     # Test write operation
     print("4. Testing WRITE operation...")
     try:
-        test_ref = db.collection('_connection_test').document('test')
         test_data = {
             'message': 'Backend connected successfully',
-            'timestamp': firestore.SERVER_TIMESTAMP,
+            'timestamp': SERVER_TIMESTAMP,
             'test_date': datetime.now().isoformat()
         }
-        test_ref.set(test_data)
+        store.set('_connection_test', 'test', test_data)
         print("   ✅ Write successful!")
         print(f"   Wrote to: _connection_test/test")
         print()
@@ -80,8 +80,8 @@ def test_firebase_connection():
     # Test read operation
     print("5. Testing READ operation...")
     try:
-        doc = test_ref.get()
-        if doc.exists:
+        doc = store.get('_connection_test', 'test')
+        if doc is not None:
             data = doc.to_dict()
             print("   ✅ Read successful!")
             print(f"   Data: {data['message']}")
@@ -96,14 +96,13 @@ def test_firebase_connection():
     # Check existing collections
     print("6. Checking existing collections...")
     try:
-        collections = db.collections()
-        collection_names = [col.id for col in collections]
+        collection_names = store.collections()
         
         if collection_names:
             print(f"   ✅ Found {len(collection_names)} collection(s):")
             for name in collection_names:
                 # Count documents in each collection
-                docs = db.collection(name).limit(5).stream()
+                docs = store.query(name, limit=5)
                 doc_count = sum(1 for _ in docs)
                 print(f"      - {name}/ ({doc_count}+ documents)")
         else:
@@ -117,7 +116,7 @@ def test_firebase_connection():
     # Clean up test data
     print("7. Cleaning up test data...")
     try:
-        test_ref.delete()
+        store.delete('_connection_test', 'test')
         print("   ✅ Test document deleted")
         print()
     except Exception as e:
@@ -144,9 +143,100 @@ def test_firebase_connection():
     
     return True
 
+def open_benchmark_store(backend):
+    """Store to benchmark ('fake' = FirestoreStore over the in-process fake client)."""
+    if backend == 'fake':
+        from docstore.fake_firestore import FakeFirestoreClient
+        from docstore.firestore import FirestoreStore
+        return FirestoreStore(FakeFirestoreClient())
+    return get_store(backend)
+
+
+def _int_list(value):
+    return [int(item) for item in value.split(',') if item.strip()]
+
+
+def benchmark(args):
+    """Run the benchmark for every concurrency/payload combination."""
+    
+    print("=" * 60, file=sys.stderr)
+    print("FIRESTORE BENCHMARK", file=sys.stderr)
+    print("=" * 60, file=sys.stderr)
+    
+    operations = [name.strip() for name in args.operations.split(',') if name.strip()]
+    runs = []
+    
+    for concurrency in _int_list(args.concurrency):
+        for payload_bytes in _int_list(args.payload_bytes):
+            # Fresh store per run so stats are per run
+            try:
+                store = open_benchmark_store(args.store)
+            except StoreUnavailable as e:
+                print(f"❌ {e}", file=sys.stderr)
+                return False
+            
+            print(f"\n▶️  {store.name}: concurrency={concurrency} payload={payload_bytes}B", file=sys.stderr)
+            try:
+                report = run_benchmark(
+                    store,
+                    operations=operations,
+                    ops=args.ops,
+                    concurrency=concurrency,
+                    payload_bytes=payload_bytes,
+                    batch_size=args.batch_size,
+                    seed_docs=args.seed_docs,
+                    query_docs=args.query_docs,
+                    progress=lambda name: print(f"   running {name}...", file=sys.stderr),
+                )
+            finally:
+                store.close()
+            runs.append(report)
+            
+            print(f"   {'operation':<10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'ops/s':>10}{'docs/s':>10}{'errors':>8}",
+                  file=sys.stderr)
+            for name, result in report['operations'].items():
+                if not result['count']:
+                    print(f"   {name:<10}  ❌ {result.get('first_error', 'all operations failed')}", file=sys.stderr)
+                    continue
+                print(
+                    f"   {name:<10}{result['p50_ms']:>10.2f}{result['p95_ms']:>10.2f}{result['p99_ms']:>10.2f}"
+                    f"{result['ops_per_second']:>10.1f}{result['docs_per_second']:>10.1f}{result['errors']:>8}",
+                    file=sys.stderr,
+                )
+    
+    output = json.dumps({'runs': runs}, indent=2)
+    if args.json:
+        with open(args.json, 'w') as f:
+            f.write(output)
+        print(f"\n✅ Report written to {args.json}", file=sys.stderr)
+    else:
+        # Machine-readable report on stdout (human table went to stderr)
+        print(output)
+    
+    return all(result['errors'] == 0 for run in runs for result in run['operations'].values())
+
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Test (or benchmark) the Firebase connection')
+    parser.add_argument('--benchmark', action='store_true', help='Measure latency and throughput')
+    parser.add_argument('--store', choices=BACKENDS + ['fake'], default=None,
+                        help="Backend to benchmark (default: DOCSTORE_BACKEND; 'fake' = in-process Firestore)")
+    parser.add_argument('--operations', default=','.join(OPERATIONS),
+                        help=f'Comma-separated subset of: {", ".join(OPERATIONS)}')
+    parser.add_argument('--ops', type=int, default=200, help='Operations per type')
+    parser.add_argument('--concurrency', default='8', help='Parallel clients, e.g. 1,8,32')
+    parser.add_argument('--payload-bytes', default='256', help='Extra bytes per document, e.g. 256,4096')
+    parser.add_argument('--batch-size', type=int, default=50, help='Writes per batch commit (max 500)')
+    parser.add_argument('--seed-docs', type=int, default=200, help='Students/mappings to read from')
+    parser.add_argument('--query-docs', type=int, default=100, help='Attendance documents the query returns')
+    parser.add_argument('--json', help='Write the JSON report to this file instead of stdout')
+    args = parser.parse_args()
+    
     try:
-        success = test_firebase_connection()
+        if args.benchmark:
+            success = benchmark(args)
+        else:
+            success = test_firebase_connection()
         sys.exit(0 if success else 1)
     except Exception as e:
         print()
@@ -0,0 +1,235 @@
+"""
+============================================================
+SYNTHETIC POPULATION GENERATOR
+============================================================
+Seeds a realistic, large data set for benchmarking
+(python manage.py benchmark_views):
+
+- courses, each with an instructor
+- students spread over the courses, enrolled with synthetic
+  512-byte fingerprint templates (R307 template size)
+- a term of attendance: every weekday, each student checks in
+  with probability --attendance-rate at a plausible time
+
+Everything is inserted with bulk_create in large batches
+(no per-row signals or queries). Seeded rows are recognisable
+(usernames "seed-...", course codes "SEED..."), so --clear
+removes exactly what a previous run created.
+
+Default scale: 200 courses, 10k students, ~1M attendance logs.
+
+Usage:
+    python manage.py seed_population
+    python manage.py seed_population --students 1000 --courses 20 --days 20
+    python manage.py seed_population --clear
+============================================================
+"""
+import random
+import time
+from contextlib import contextmanager
+from datetime import datetime, time as dt_time, timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from attendance.models import AttendanceLog
+from fingerprint_attendance import cache as lookup_cache
+from users.models import Course, UserProfile
+
+
+SEED_USERNAME_PREFIX = 'seed-'
+SEED_COURSE_PREFIX = 'SEED'
+
+# R307 character file / template size
+TEMPLATE_BYTES = 512
+
+
+@contextmanager
+def _explicit_log_times():
+    """
+    Let bulk_create store our own date/time/timestamp on AttendanceLog
+    (they are auto_now_add, which would stamp every row with "now").
+    """
+    fields = [AttendanceLog._meta.get_field(name) for name in ('timestamp', 'date', 'time')]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+class Command(BaseCommand):
+    help = 'Seed courses, instructors, students and a term of attendance for benchmarking'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--courses', type=int, default=200, help='Courses to create')
+        parser.add_argument('--instructors', type=int, default=50, help='Instructors (courses are shared out)')
+        parser.add_argument('--students', type=int, default=10000, help='Students to create')
+        parser.add_argument('--days', type=int, default=120,
+                            help='Weekdays of attendance, ending today')
+        parser.add_argument('--attendance-rate', type=float, default=0.85,
+                            help='Chance a student checks in on a given day')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows per bulk_create')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed')
+        parser.add_argument('--clear', action='store_true',
+                            help='Only remove previously seeded data')
+
+    def handle(self, *args, **options):
+        if options['courses'] < 1 or options['students'] < 0 or options['instructors'] < 1:
+            raise CommandError('--courses and --instructors must be at least 1')
+        if not 0 <= options['attendance_rate'] <= 1:
+            raise CommandError('--attendance-rate must be between 0 and 1')
+
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        started = time.perf_counter()
+
+        self._clear()
+        if options['clear']:
+            self.stdout.write(self.style.SUCCESS('✅ Seeded data removed'))
+            return
+
+        courses = self._create_courses(options['courses'], options['instructors'])
+        students = self._create_students(options['students'], courses)
+        logs = self._create_attendance(students, options['days'], options['attendance_rate'])
+
+        # bulk_create sends no signals - drop every cached lookup
+        lookup_cache.invalidate_courses()
+        lookup_cache.invalidate_rosters()
+        for course in courses:
+            lookup_cache.invalidate_attendance(course.pk)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'\n✅ Seeded {len(courses)} courses, {len(students)} students and '
+            f'{logs} attendance logs in {time.perf_counter() - started:.1f}s'
+        ))
+
+    # ---------- steps ----------
+
+    def _clear(self):
+        """Remove rows created by earlier runs (raw deletes - no per-row signals)."""
+        logs = AttendanceLog.objects.filter(course__course_code__startswith=SEED_COURSE_PREFIX)
+        deleted = logs._raw_delete(logs.db)
+        profiles = UserProfile.objects.filter(user__username__startswith=SEED_USERNAME_PREFIX)
+        profiles._raw_delete(profiles.db)
+        courses = Course.objects.filter(course_code__startswith=SEED_COURSE_PREFIX)
+        courses._raw_delete(courses.db)
+        users = User.objects.filter(username__startswith=SEED_USERNAME_PREFIX)
+        users.delete()
+        if deleted:
+            self.stdout.write(f'🗑️  Removed previously seeded data ({deleted} attendance logs)')
+
+    def _create_users(self, usernames):
+        """bulk_create users (unusable passwords - hashing 10k passwords is not the point)."""
+        User.objects.bulk_create(
+            [User(username=username, password='!') for username in usernames],
+            batch_size=self.batch_size,
+        )
+        by_name = dict(User.objects.filter(username__in=usernames).values_list('username', 'id'))
+        return [by_name[username] for username in usernames]
+
+    def _create_courses(self, count, instructor_count):
+        instructor_count = min(instructor_count, count)
+        with transaction.atomic():
+            instructor_ids = self._create_users(
+                [f'{SEED_USERNAME_PREFIX}i{i:04d}' for i in range(instructor_count)]
+            )
+            UserProfile.objects.bulk_create([
+                UserProfile(
+                    user_id=user_id,
+                    full_name=f'Instructor {i}',
+                    student_id=f'SEEDI{i:05d}',
+                    email=f'seed-instructor-{i}@example.com',
+                    role='instructor',
+                )
+                for i, user_id in enumerate(instructor_ids)
+            ], batch_size=self.batch_size)
+
+            Course.objects.bulk_create([
+                Course(
+                    course_code=f'{SEED_COURSE_PREFIX}{i:03d}',
+                    course_name=f'Seeded Course {i}',
+                    instructor_id=instructor_ids[i % instructor_count],
+                    description='Synthetic benchmark course',
+                )
+                for i in range(count)
+            ], batch_size=self.batch_size)
+        courses = list(Course.objects.filter(course_code__startswith=SEED_COURSE_PREFIX).order_by('course_code'))
+        self.stdout.write(f'📚 {len(courses)} courses, {instructor_count} instructors')
+        return courses
+
+    def _create_students(self, count, courses):
+        """Students with templates; returns [(user_id, student_id, full_name, course_id)]."""
+        students = []
+        for start in range(0, count, self.batch_size):
+            indexes = range(start, min(start + self.batch_size, count))
+            with transaction.atomic():
+                user_ids = self._create_users([f'{SEED_USERNAME_PREFIX}s{i:06d}' for i in indexes])
+                profiles = []
+                for i, user_id in zip(indexes, user_ids):
+                    course = courses[i % len(courses)]
+                    profiles.append(UserProfile(
+                        user_id=user_id,
+                        full_name=f'Student {i:06d}',
+                        student_id=f'S{i:06d}',
+                        email=f'seed-student-{i}@example.com',
+                        course=course,
+                        role='student',
+                        fingerprint_template=self.rng.randbytes(TEMPLATE_BYTES),
+                        fingerprint_enrolled=True,
+                    ))
+                    students.append((user_id, f'S{i:06d}', f'Student {i:06d}', course.id))
+                UserProfile.objects.bulk_create(profiles)
+        self.stdout.write(f'👥 {len(students)} students with synthetic templates')
+        return students
+
+    def _create_attendance(self, students, days, rate):
+        """One log per (student, weekday) with probability rate."""
+        tz = timezone.get_current_timezone()
+        weekdays = []
+        day = timezone.localdate()
+        while len(weekdays) < days:
+            if day.weekday() < 5:
+                weekdays.append(day)
+            day -= timedelta(days=1)
+        weekdays.reverse()
+
+        total = 0
+        pending = []
+        with _explicit_log_times():
+            for log_date in weekdays:
+                for user_id, student_id, full_name, course_id in students:
+                    if self.rng.random() >= rate:
+                        continue
+                    # Most arrive in the 20 minutes around 9:00 (minutes after 8:50)
+                    minutes = max(0, min(int(self.rng.gauss(10, 6)), 59))
+                    check_in = dt_time(8 + (minutes + 50) // 60, (minutes + 50) % 60, self.rng.randrange(60))
+                    pending.append(AttendanceLog(
+                        user_id=user_id,
+                        student_name=full_name,
+                        student_id=student_id,
+                        course_id=course_id,
+                        date=log_date,
+                        time=check_in,
+                        timestamp=datetime.combine(log_date, check_in, tzinfo=tz),
+                        status='present',
+                        scan_method=self.rng.choice(['fingerprint'] * 9 + ['manual']),
+                    ))
+                    if len(pending) >= self.batch_size:
+                        total += self._flush(pending)
+                self.stdout.write(f'\r📅 {log_date}: {total} logs', ending='')
+                self.stdout.flush()
+            total += self._flush(pending)
+        self.stdout.write('')
+        return total
+
+    def _flush(self, pending):
+        with transaction.atomic():
+            AttendanceLog.objects.bulk_create(pending)
+        count = len(pending)
+        pending.clear()
+        return count
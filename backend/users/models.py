@@ -22,6 +22,7 @@ class Course(models.Model):
         instructor: Faculty member teaching the course
         description: Course description
         created_at: When course was created
+        updated_at: Last modification (used by the Firestore sync)
     """
     course_code = models.CharField(max_length=20, unique=True, help_text="e.g., CS101, MATH201")
     course_name = models.CharField(max_length=200, help_text="Full course name")
@@ -34,6 +35,7 @@ class Course(models.Model):
     )
     description = models.TextField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         ordering = ['course_code']
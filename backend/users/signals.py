@@ -0,0 +1,39 @@
+"""
+============================================================
+USER SIGNALS - CACHE INVALIDATION
+============================================================
+Keeps the project-wide lookup cache (fingerprint_attendance/cache.py)
+in sync with Course and UserProfile changes (now and again after
+commit, see invalidate_on_commit()), and copies the users
+a course or profile references into its campus site database
+(fingerprint_attendance/sharding.py).
+============================================================
+"""
+from django.db.models.signals import post_save, post_delete, pre_save
+from django.dispatch import receiver
+
+from fingerprint_attendance import cache as lookup_cache, sharding
+from .models import Course, UserProfile
+
+
+@receiver([post_save, post_delete], sender=Course)
+def course_changed(sender, instance, using, **kwargs):
+    """Course created, edited or deleted - drop cached course lookups."""
+    lookup_cache.invalidate_on_commit(lookup_cache.invalidate_courses, using=using)
+
+
+@receiver([post_save, post_delete], sender=UserProfile)
+def profile_changed(sender, instance, using, **kwargs):
+    """Profile created, edited or deleted - drop its cached copy and roster stats."""
+    lookup_cache.invalidate_on_commit(lookup_cache.invalidate_profile, instance.user_id, using=using)
+    lookup_cache.invalidate_on_commit(lookup_cache.invalidate_rosters, using=using)
+    lookup_cache.invalidate_on_commit(sharding.forget_home_site, instance.user_id, using=using)
+
+
+@receiver(pre_save, sender=Course)
+@receiver(pre_save, sender=UserProfile)
+def copy_users_to_site(sender, instance, using, **kwargs):
+    """Saving on a site database - make sure the referenced user exists there."""
+    if sharding.site_of_alias(using):
+        user_id = instance.instructor_id if sender is Course else instance.user_id
+        sharding.mirror_users([user_id], using)
@@ -1,3 +1,177 @@
+import os
+import tempfile
+from datetime import date
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
 from django.test import TestCase
 
-# Create your tests here.
+from attendance.models import AttendanceLog
+from fingerprint_attendance import cache as lookup_cache
+
+from .management.commands.seed_population import TEMPLATE_BYTES
+from .models import Course, UserProfile
+
+
+class SeedPopulationTests(TestCase):
+
+    def seed(self, **options):
+        call_command('seed_population', stdout=StringIO(), **options)
+
+    def test_seeds_courses_students_and_attendance(self):
+        self.seed(courses=3, instructors=2, students=30, days=5, attendance_rate=1.0, batch_size=7)
+
+        self.assertEqual(Course.objects.filter(instructor__isnull=False).count(), 3)
+        self.assertEqual(UserProfile.objects.filter(role='instructor').count(), 2)
+        students = UserProfile.objects.filter(role='student', fingerprint_enrolled=True)
+        self.assertEqual(students.count(), 30)
+        self.assertEqual(len(students.first().fingerprint_template), TEMPLATE_BYTES)
+        # Every student, every weekday
+        self.assertEqual(AttendanceLog.objects.count(), 30 * 5)
+        self.assertEqual(AttendanceLog.objects.values('date').distinct().count(), 5)
+        self.assertTrue(all(day.weekday() < 5 for day in AttendanceLog.objects.values_list('date', flat=True)))
+
+    def test_reseeding_replaces_and_clear_removes_only_seeded_data(self):
+        User.objects.create(username='real-user')
+        self.seed(courses=2, instructors=1, students=10, days=2)
+        self.seed(courses=2, instructors=1, students=10, days=2)
+        self.assertEqual(UserProfile.objects.filter(role='student').count(), 10)
+
+        self.seed(clear=True)
+        self.assertEqual(Course.objects.count(), 0)
+        self.assertEqual(AttendanceLog.objects.count(), 0)
+        self.assertEqual(list(User.objects.values_list('username', flat=True)), ['real-user'])
+
+
+class ImportStudentsTests(TestCase):
+
+    def setUp(self):
+        self.course = Course.objects.create(course_code='IMP101', course_name='Imports')
+
+    def run_import(self, *rows, **options):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False, encoding='utf-8') as f:
+            f.write('student_id,full_name,email,course_code,password\n')
+            f.writelines(','.join(row) + '\n' for row in rows)
+        self.addCleanup(os.remove, f.name)
+        out = StringIO()
+        call_command('import_students', f.name, workers=1, stdout=out, **options)
+        return out.getvalue()
+
+    def test_valid_rows_are_registered(self):
+        out = self.run_import(
+            ('I-1', 'Ada Lovelace', 'ada@example.com', 'imp101', 'secret-pass'),
+            ('I-2', 'Alan Turing', 'alan@example.com', 'IMP101', ''),
+        )
+
+        self.assertIn('2 valid, 0 rejected', out)
+        profile = UserProfile.objects.select_related('user').get(student_id='I-1')
+        self.assertEqual((profile.course, profile.role, profile.user.first_name), (self.course, 'student', 'Ada'))
+        self.assertTrue(profile.user.check_password('secret-pass'))
+        self.assertFalse(User.objects.get(username='I-2').has_usable_password())
+
+    def test_duplicates_within_the_file_are_rejected(self):
+        out = self.run_import(
+            ('I-1', 'Ada Lovelace', 'ada@example.com', 'IMP101', ''),
+            ('I-1', 'Ada Again', 'other@example.com', 'IMP101', ''),
+            ('I-3', 'Ada Copy', 'ADA@example.com', 'IMP101', ''),
+        )
+
+        self.assertIn('1 valid, 2 rejected', out)
+        self.assertIn('row 3 (I-1): student ID already registered', out)
+        self.assertIn('row 4 (I-3): email already registered', out)
+        self.assertEqual(list(UserProfile.objects.values_list('student_id', flat=True)), ['I-1'])
+
+    def test_students_already_in_the_database_are_rejected(self):
+        User.objects.create(username='I-1')
+        User.objects.create(username='user-email', email='taken@example.com')
+        # Only the profile holds this email - it is unique there too
+        UserProfile.objects.create(
+            user=User.objects.create(username='profile-email'), full_name='Existing',
+            student_id='E-1', email='profile@example.com', role='student',
+        )
+
+        out = self.run_import(
+            ('I-1', 'Ada Lovelace', 'ada@example.com', 'IMP101', ''),
+            ('I-2', 'Alan Turing', 'taken@example.com', 'IMP101', ''),
+            ('I-3', 'Grace Hopper', 'Profile@example.com', 'IMP101', ''),
+            ('I-4', 'Edsger Dijkstra', 'edsger@example.com', 'IMP101', ''),
+        )
+
+        self.assertIn('1 valid, 3 rejected', out)
+        self.assertIn('row 4 (I-3): email already registered', out)
+        self.assertTrue(UserProfile.objects.filter(student_id='I-4').exists())
+        self.assertFalse(UserProfile.objects.filter(student_id__in=['I-1', 'I-2', 'I-3']).exists())
+
+    def test_unknown_course_code_is_rejected(self):
+        out = self.run_import(('I-1', 'Ada Lovelace', 'ada@example.com', 'NOPE1', ''))
+
+        self.assertIn('course code "NOPE1" not found', out)
+        self.assertFalse(User.objects.filter(username='I-1').exists())
+
+    def test_dry_run_creates_nothing(self):
+        out = self.run_import(('I-1', 'Ada Lovelace', 'ada@example.com', 'IMP101', ''), dry_run=True)
+
+        self.assertIn('1 valid, 0 rejected', out)
+        self.assertFalse(User.objects.filter(username='I-1').exists())
+        self.assertFalse(UserProfile.objects.exists())
+
+
+class LookupCacheTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        lookup_cache.reset_stats()
+        self.instructor = User.objects.create(username='cache-instructor')
+        self.course = Course.objects.create(course_code='CACHE1', course_name='Caching', instructor=self.instructor)
+        self.user = User.objects.create(username='cache-student')
+        self.profile = UserProfile.objects.create(
+            user=self.user, full_name='Cache Student', student_id='C-1',
+            email='c1@example.com', course=self.course, role='student',
+        )
+
+    def test_second_lookup_is_a_hit(self):
+        self.assertEqual(lookup_cache.get_course('cache1').pk, self.course.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(lookup_cache.get_course('CACHE1').pk, self.course.pk)
+        self.assertEqual(lookup_cache.get_stats()['course'], {'hits': 1, 'misses': 1, 'hit_rate': 50.0})
+
+    def test_missing_profile_is_cached_too(self):
+        admin = User.objects.create(username='cache-admin', is_staff=True)
+        with self.assertRaises(UserProfile.DoesNotExist):
+            lookup_cache.get_profile(admin)
+        with self.assertNumQueries(0), self.assertRaises(UserProfile.DoesNotExist):
+            lookup_cache.get_profile(admin)
+
+        # Creating the profile replaces the cached "no profile"
+        UserProfile.objects.create(
+            user=admin, full_name='Admin', student_id='ADM', email='adm@example.com', role='instructor',
+        )
+        self.assertEqual(lookup_cache.get_profile(admin).role, 'instructor')
+
+    def test_saving_a_course_profile_or_log_invalidates(self):
+        lookup_cache.get_course('CACHE1')
+        self.course.course_name = 'Caching 2'
+        self.course.save()
+        self.assertEqual(lookup_cache.get_course('CACHE1').course_name, 'Caching 2')
+
+        lookup_cache.get_profile(self.user)
+        self.profile.role = 'instructor'
+        self.profile.save()
+        self.assertEqual(lookup_cache.get_profile(self.user).role, 'instructor')
+
+        self.assertEqual(lookup_cache.get_course_day_stats(self.course, date.today())['present'], 0)
+        AttendanceLog.objects.create(user=self.user, course=self.course, student_id='C-1', student_name='C')
+        self.assertEqual(lookup_cache.get_course_day_stats(self.course, date.today())['present'], 1)
+
+    def test_invalidates_again_after_commit(self):
+        stale = lookup_cache.get_profile(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.profile.role = 'instructor'
+            self.profile.save()
+            # A concurrent request caches the row as it was before the commit
+            cache.set(lookup_cache._profile_key(self.user.pk), stale)
+            self.assertEqual(lookup_cache.get_profile(self.user).role, 'student')
+
+        self.assertEqual(lookup_cache.get_profile(self.user).role, 'instructor')
@@ -10,6 +10,9 @@ from django.contrib.auth import login, authenticate, logout
 from django.contrib.auth.models import User
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
+from fingerprint_attendance import cache as lookup_cache
+from fingerprint_attendance.replica import primary, replica_reads
+from fingerprint_attendance.sharding import home_site, sharding_enabled, site_scope
 from .models import UserProfile, Course
 
 
@@ -38,24 +41,24 @@ def student_registration(request):
         # Validation
         if password != confirm_password:
             messages.error(request, '❌ Passwords do not match!')
-            return render(request, 'users/registration.html', {'courses': Course.objects.all()})
+            return render(request, 'users/registration.html', {'courses': lookup_cache.get_all_courses()})
         
         # Check if email already exists
         if User.objects.filter(email=email).exists():
             messages.error(request, '❌ Email already registered!')
-            return render(request, 'users/registration.html', {'courses': Course.objects.all()})
+            return render(request, 'users/registration.html', {'courses': lookup_cache.get_all_courses()})
         
         # Check if student ID already exists
         if UserProfile.objects.filter(student_id=student_id).exists():
             messages.error(request, '❌ Student ID already registered!')
-            return render(request, 'users/registration.html', {'courses': Course.objects.all()})
+            return render(request, 'users/registration.html', {'courses': lookup_cache.get_all_courses()})
         
         # Check if course exists (case-insensitive search)
         try:
             course = Course.objects.get(course_code__iexact=course_code)
         except Course.DoesNotExist:
             messages.error(request, f'❌ Course code "{course_code}" not found!')
-            return render(request, 'users/registration.html', {'courses': Course.objects.all()})
+            return render(request, 'users/registration.html', {'courses': lookup_cache.get_all_courses()})
         
         try:
             # Create User account (username = student_id for uniqueness)
@@ -89,10 +92,10 @@ def student_registration(request):
             
         except Exception as e:
             messages.error(request, f'❌ Registration failed: {str(e)}')
-            return render(request, 'users/registration.html', {'courses': Course.objects.all()})
+            return render(request, 'users/registration.html', {'courses': lookup_cache.get_all_courses()})
     
     # GET request - show registration form
-    courses = Course.objects.all()
+    courses = lookup_cache.get_all_courses()
     return render(request, 'users/registration.html', {'courses': courses})
 
 
@@ -117,8 +120,12 @@ def user_login(request):
         if user is not None:
             login(request, user)
             
+            # SiteMiddleware picked the site while the user was still
+            # anonymous - read the profile from the user's own site
+            site = home_site(user) if sharding_enabled() else None
             try:
-                profile = UserProfile.objects.get(user=user)
+                with site_scope(site):
+                    profile = lookup_cache.get_profile(user)
                 messages.success(request, f'✅ Welcome back, {profile.full_name}!')
                 
                 # Redirect based on role
@@ -149,16 +156,20 @@ def user_logout(request):
 
 
 @login_required
+@replica_reads()
 def student_profile(request):
     """
     Student Profile View.
     
-    Shows student information and attendance history.
+    Shows student information and attendance history
+    (history from the replica when one is configured).
     
     URL: /profile/
     """
     try:
-        profile = UserProfile.objects.get(user=request.user)
+        # A just-registered profile may not have reached the replica yet
+        with primary():
+            profile = UserProfile.objects.get(user=request.user)
         
         # Get student's attendance logs
         from attendance.models import AttendanceLog